@@ -1,4 +1,5 @@
 import argparse
+import csv
 import datetime
 import os
 import shutil
@@ -27,6 +28,7 @@ class BenchmarkConfig:
             yesterday.year, yesterday.month, yesterday.day
         )
         self.bm_config["hardware"] = "cpu"
+        self.bm_config["trials"] = 1
 
     def ts_version(self, version):
         for k, v in version.items():
@@ -44,6 +46,9 @@ class BenchmarkConfig:
     def hardware(self, hw):
         self.bm_config["hardware"] = hw
 
+    def trials(self, trials):
+        self.bm_config["trials"] = max(1, int(trials))
+
     def metrics_cmd(self, cmd):
         cmd_options = []
         for key_value in cmd:
@@ -90,6 +95,8 @@ class BenchmarkConfig:
                 self.models(v)
             elif k == "hardware":
                 self.hardware(v)
+            elif k == "trials":
+                self.trials(v)
             elif k == "metrics_cmd" and not self.skip_upload:
                 self.metrics_cmd(v)
             elif k == "report_cmd" and not self.skip_upload:
@@ -198,22 +205,33 @@ def run_benchmark(bm_config):
     files.sort()
     for model_json_config in files:
         if model_json_config.endswith(".json"):
-            # call benchmark-ab.py
-            shutil.rmtree(TS_LOGS_PATH, ignore_errors=True)
-            shutil.rmtree(BENCHMARK_TMP_PATH, ignore_errors=True)
-            cmd = (
-                "python ./benchmarks/benchmark-ab.py --tmp_dir /tmp --report_location /tmp --config_properties "
-                "./benchmarks/config.properties --config {}/{}".format(
-                    bm_config["model_config_path"], model_json_config
+            # call benchmark-ab.py, the report of every trial is a row of ab_report.csv
+            csv_file = "{}/ab_report.csv".format(BENCHMARK_TMP_PATH)
+            trial_rows = []
+            for trial in range(bm_config["trials"]):
+                shutil.rmtree(TS_LOGS_PATH, ignore_errors=True)
+                shutil.rmtree(BENCHMARK_TMP_PATH, ignore_errors=True)
+                cmd = (
+                    "python ./benchmarks/benchmark-ab.py --tmp_dir /tmp --report_location /tmp --config_properties "
+                    "./benchmarks/config.properties --config {}/{}".format(
+                        bm_config["model_config_path"], model_json_config
+                    )
                 )
-            )
-            execute(cmd, wait=True)
+                execute(cmd, wait=True)
+                print(
+                    "finish trial {}/{} of {}".format(
+                        trial + 1, bm_config["trials"], model_json_config
+                    )
+                )
+                if os.path.exists(csv_file):
+                    with open(csv_file, newline="") as f:
+                        trial_rows.extend(csv.reader(f))
 
-            # generate stats metrics from ab_report.csv
+            # generate stats metrics from ab_report.csv of the last trial
             bm_model = model_json_config[0 : -len(".json")]
 
             gen_metrics_json.gen_metric(
-                "{}/ab_report.csv".format(BENCHMARK_TMP_PATH),
+                csv_file,
                 "{}/logs/stats_metrics.json".format(BENCHMARK_TMP_PATH),
             )
 
@@ -224,9 +242,15 @@ def run_benchmark(bm_config):
             # cp benchmark logs to local
             bm_model_log_path = "{}/{}".format(BENCHMARK_REPORT_PATH, bm_model)
             os.makedirs(bm_model_log_path, exist_ok=True)
-            csv_file = "{}/ab_report.csv".format(BENCHMARK_TMP_PATH)
-            if os.path.exists(csv_file):
-                shutil.move(csv_file, bm_model_log_path)
+            if trial_rows:
+                # Keep the header of the first trial only
+                header = trial_rows[0]
+                with open(
+                    "{}/ab_report.csv".format(bm_model_log_path), "w", newline=""
+                ) as f:
+                    writer = csv.writer(f)
+                    writer.writerow(header)
+                    writer.writerows(row for row in trial_rows if row != header)
             cmd = "tar -cvzf {}/benchmark.tar.gz {}".format(
                 bm_model_log_path, BENCHMARK_TMP_PATH
             )
@@ -1,10 +1,10 @@
 import json
-import os
 import tempfile
 
 import click
 import click_config_file
 from utils.benchmarks import create_benchmark
+from utils.common import update_exec_params
 from utils.system_under_test import create_system_under_test
 from utils.testplans import update_plan_params
 
@@ -103,10 +103,32 @@ def json_provider(file_path, cmd_name):
 @click.option(
     "--benchmark_backend",
     "-bb",
-    type=click.Choice(["ab", "locust"], case_sensitive=False),
+    type=click.Choice(["ab", "locust", "open_loop"], case_sensitive=False),
     default="ab",
     help=f"Benchmark backend to use.",
 )
+@click.option(
+    "--arrival",
+    type=click.Choice(["poisson", "constant", "trace"], case_sensitive=False),
+    default="poisson",
+    help="Arrival schedule of the open_loop backend. Default poisson",
+)
+@click.option(
+    "--arrival_rate",
+    "-ar",
+    default=10.0,
+    help="Requests per second sent by the open_loop backend. Default 10",
+)
+@click.option(
+    "--trace_file",
+    default="",
+    help="Arrival trace replayed by the open_loop backend with --arrival trace",
+)
+@click.option(
+    "--request_mix",
+    default="",
+    help="JSONL file with the request types sent by the open_loop backend",
+)
 @click_config_file.configuration_option(
     provider=json_provider, implicit=False, help="Read configuration from a JSON file"
 )
@@ -142,38 +164,5 @@ def benchmark(test_plan, **input_params):
     click.secho("\nTest suite execution complete.", fg="green")
 
 
-def update_exec_params(execution_params, input_param):
-    execution_params.update(input_param)
-
-    execution_params["result_file"] = os.path.join(
-        execution_params["tmp_dir"], "benchmark", "result.txt"
-    )
-    execution_params["metric_log"] = os.path.join(
-        execution_params["tmp_dir"], "benchmark", "logs", "model_metrics.log"
-    )
-
-    getAPIS(execution_params)
-
-
-def getAPIS(execution_params):
-    MANAGEMENT_API = "http://127.0.0.1:8081"
-    INFERENCE_API = "http://127.0.0.1:8080"
-
-    with open(execution_params["config_properties"], "r") as fp:
-        lines = fp.readlines()
-    for line in lines:
-        line = line.strip()
-        if "management_address" in line:
-            MANAGEMENT_API = line.split("=")[1]
-        if "inference_address" in line:
-            INFERENCE_API = line.split("=")[1]
-
-    execution_params["inference_url"] = INFERENCE_API
-    execution_params["management_url"] = MANAGEMENT_API
-    execution_params["config_properties_name"] = (
-        execution_params["config_properties"].strip().split("/")[-1]
-    )
-
-
 if __name__ == "__main__":
     benchmark()
@@ -0,0 +1,309 @@
+import csv
+import json
+import os
+import tempfile
+
+import click
+import yaml
+from utils.benchmarks import create_benchmark
+from utils.capacity_search import (
+    DEFAULT_SATURATION,
+    DIMENSIONS,
+    CapacitySearch,
+    LoadPoint,
+    load_model_config,
+    model_config,
+    ramp_load,
+    stage_model_dir,
+    write_model_config,
+)
+from utils.common import update_exec_params
+from utils.gen_md_report import gen_capacity_report
+from utils.system_under_test import create_system_under_test
+
+CSV_COLUMNS = DIMENSIONS + [
+    "concurrency",
+    "throughput",
+    "p50",
+    "p90",
+    "p99",
+    "error_rate",
+    "knee",
+]
+
+
+def parse_values(value):
+    return [int(v) for v in value.split(",") if v.strip()] if value else []
+
+
+def stage_model(execution_params, model_dir, settings):
+    """
+    Copies an unarchived model to the model store, running the configuration,
+    and registers it by directory name.
+    """
+    parallelism = settings.get("parallelism")
+    name = "benchmark_model" if parallelism is None else f"benchmark_p{parallelism}"
+    stage_model_dir(
+        model_dir,
+        os.path.join(execution_params["tmp_dir"], "model_store", name),
+        settings,
+    )
+    execution_params["url"] = name
+
+
+def base_model_config(model_dir):
+    if not model_dir:
+        return {}
+    manifest_file = os.path.join(model_dir, "MAR-INF", "MANIFEST.json")
+    if not os.path.exists(manifest_file):
+        return {}
+    with open(manifest_file) as f:
+        config_file = json.load(f)["model"].get("configFile")
+    return load_model_config(config_file and os.path.join(model_dir, config_file))
+
+
+@click.command()
+@click.option(
+    "--url",
+    "-u",
+    default="https://torchserve.pytorch.org/mar_files/resnet-18.mar",
+    help="Input model url",
+)
+@click.option(
+    "--model_dir",
+    default="",
+    help="Unarchived model directory, e.g. created with torch-model-archiver "
+    "--archive-format no-archive, used instead of --url. Required to sweep the "
+    "micro-batch parallelism",
+)
+@click.option(
+    "--exec_env",
+    "-e",
+    type=click.Choice(["local", "docker"], case_sensitive=False),
+    default="local",
+    help="Execution environment",
+)
+@click.option(
+    "--gpus",
+    "-g",
+    default="",
+    help="Number of gpus to run docker container with.  Leave empty to run CPU based docker container",
+)
+@click.option(
+    "--image", "-di", default="", help="Use custom docker image for benchmark"
+)
+@click.option(
+    "--docker_runtime", "-dr", default="", help="Specify required docker runtime"
+)
+@click.option(
+    "--input",
+    "-i",
+    default="../examples/image_classifier/kitten.jpg",
+    type=click.Path(exists=True),
+    help="The input file path for model",
+)
+@click.option(
+    "--content_type", "-ic", default="application/jpg", help="Input file content type"
+)
+@click.option(
+    "--requests", "-r", default=1000, help="Number of requests of every load point"
+)
+@click.option(
+    "--config_properties",
+    "-cp",
+    default="config.properties",
+    help="config.properties path, Default config.properties",
+)
+@click.option(
+    "--inference_model_url",
+    "-imu",
+    default="predictions/benchmark",
+    help="Inference function url. Default predictions/benchmark",
+)
+@click.option(
+    "--report_location",
+    "-rl",
+    default=tempfile.gettempdir(),
+    help=f"Target location of the sweep report. Default {tempfile.gettempdir()}",
+)
+@click.option(
+    "--tmp_dir",
+    "-td",
+    default=tempfile.gettempdir(),
+    help=f"Location for temporal files. Default {tempfile.gettempdir()}",
+)
+@click.option(
+    "--benchmark_backend",
+    "-bb",
+    type=click.Choice(["ab", "locust"], case_sensitive=False),
+    default="ab",
+    help=f"Benchmark backend to use.",
+)
+@click.option("--slo_p99", required=True, type=float, help="p99 latency SLO in ms")
+@click.option(
+    "--batch_size",
+    "-bs",
+    default="1,2,4,8,16,32",
+    help="Comma separated batch sizes to search",
+)
+@click.option(
+    "--batch_delay",
+    "-bd",
+    default="5,10,25,50,100",
+    help="Comma separated max batch delays in ms to search",
+)
+@click.option(
+    "--workers", "-w", default="1,2,4", help="Comma separated worker counts to search"
+)
+@click.option(
+    "--parallelism",
+    default="",
+    help="Comma separated micro-batch preprocess and postprocess threads to search, "
+    "requires --model_dir",
+)
+@click.option(
+    "--max_concurrency", default=256, help="Highest concurrency of the load ramp"
+)
+@click.option("--max_configs", default=48, help="Budget of configurations to benchmark")
+@click.option(
+    "--saturation",
+    default=DEFAULT_SATURATION,
+    help="Relative throughput gain below which a configuration is saturated",
+)
+@click.option(
+    "--output",
+    "-o",
+    default="model-config.yaml",
+    help="Path of the recommended model config yaml",
+)
+def sweep(**input_params):
+    execution_params = input_params.copy()
+    execution_params.update(
+        backend_profiling=False,
+        handler_profiling=False,
+        generate_graphs=False,
+        concurrency=1,
+    )
+    update_exec_params(execution_params, input_params)
+
+    model_dir = execution_params["model_dir"]
+    space = {
+        "batch_size": parse_values(execution_params["batch_size"]),
+        "batch_delay": parse_values(execution_params["batch_delay"]),
+        "workers": parse_values(execution_params["workers"]),
+        "parallelism": parse_values(execution_params["parallelism"]),
+    }
+    if space["parallelism"] and not model_dir:
+        raise click.UsageError("--parallelism requires --model_dir")
+    if model_dir and execution_params["exec_env"] != "local":
+        raise click.UsageError("--model_dir is only supported by the local exec_env")
+
+    report_dir = os.path.join(execution_params["report_location"], "capacity")
+    os.makedirs(report_dir, exist_ok=True)
+    csv_file = os.path.join(report_dir, "capacity_report.csv")
+
+    torchserve = create_system_under_test(execution_params)
+    benchmark = create_benchmark(execution_params)
+    benchmark.prepare_environment()
+    torchserve.start()
+    torchserve.check_health()
+
+    def measure(config, concurrency):
+        execution_params["concurrency"] = concurrency
+        benchmark.run()
+        artifacts = benchmark.collect_artifacts()
+        return LoadPoint(
+            concurrency,
+            float(artifacts["TS throughput"] or 0),
+            float(artifacts["TS latency P50"] or 0),
+            float(artifacts["TS latency P90"] or 0),
+            float(artifacts["TS latency P99"] or 0),
+            float(artifacts["TS error rate"] or 0),
+        )
+
+    def evaluate(config):
+        click.secho(f"\n\nBenchmarking {config} ...", fg="green")
+        execution_params["batch_size"] = config.get("batch_size", 1)
+        execution_params["batch_delay"] = config.get("batch_delay", 100)
+        execution_params["workers"] = config.get("workers", 1)
+        if model_dir:
+            # The registered configuration, with its defaults
+            settings = dict(
+                config,
+                batch_size=execution_params["batch_size"],
+                batch_delay=execution_params["batch_delay"],
+                workers=execution_params["workers"],
+            )
+            stage_model(execution_params, model_dir, settings)
+        torchserve.register_model()
+        # A full batch for every worker
+        capacity_hint = execution_params["workers"] * execution_params["batch_size"]
+        execution_params["concurrency"] = capacity_hint
+        benchmark.warm_up()
+        capacity = ramp_load(
+            measure,
+            config,
+            execution_params["slo_p99"],
+            start_concurrency=max(1, capacity_hint // 2),
+            max_concurrency=execution_params["max_concurrency"],
+            saturation=execution_params["saturation"],
+        )
+        torchserve.unregister_model()
+
+        with open(csv_file, "a", newline="") as f:
+            writer = csv.writer(f)
+            for point in capacity.points:
+                writer.writerow(
+                    [config.get(d, "") for d in DIMENSIONS]
+                    + [
+                        point.concurrency,
+                        point.throughput,
+                        point.p50,
+                        point.p90,
+                        point.p99,
+                        point.error_rate,
+                        point is capacity.knee,
+                    ]
+                )
+        return capacity
+
+    with open(csv_file, "w", newline="") as f:
+        csv.writer(f).writerow(CSV_COLUMNS)
+
+    try:
+        search = CapacitySearch(
+            space,
+            evaluate,
+            max_configs=execution_params["max_configs"],
+            saturation=execution_params["saturation"],
+        )
+        best = search.run()
+    finally:
+        torchserve.stop()
+
+    if best is None:
+        click.secho(
+            f"No configuration meets the p99 SLO of {execution_params['slo_p99']} ms",
+            fg="red",
+        )
+        return
+
+    base_config = base_model_config(model_dir)
+    write_model_config(best, execution_params["output"], base_config)
+    recommendation = yaml.safe_dump(model_config(best, base_config), sort_keys=False)
+    gen_capacity_report(
+        csv_file,
+        recommendation,
+        execution_params["slo_p99"],
+        os.path.join(report_dir, "capacity_report.md"),
+    )
+    click.secho(
+        f"\n{best.knee.throughput:.1f} requests/s at concurrency {best.knee.concurrency} "
+        f"with p99 {best.knee.p99:.1f} ms for {best.config}",
+        fg="green",
+    )
+    click.secho(f"Recommended model config written to {execution_params['output']}")
+
+
+if __name__ == "__main__":
+    sweep()
@@ -0,0 +1,89 @@
+"""
+Micro-benchmark of the image preprocessing of the vision handlers.
+
+Compares the PIL decode and float32 transforms chain of ImageClassifier.preprocess
+with the torchvision.io decode, uint8 resize and on device normalization selected
+by handler.image_processing: torchvision in model-config.yaml, for batches of
+JPEG or PNG images.
+
+python benchmarks/micro/bench_image_processing.py --image-sizes 640x480 1920x1080 --batch-sizes 1 8 32
+"""
+import argparse
+import io
+import timeit
+
+import torch
+from PIL import Image
+
+from ts.handler_utils.image_processing import TensorImageProcessing
+from ts.torch_handler.image_classifier import ImageClassifier
+
+
+def synthetic_image(width, height, fmt, seed=0):
+    """Smooth gradients with noise, which compress like photos"""
+    generator = torch.Generator().manual_seed(seed)
+    y = torch.linspace(0, 1, height).view(-1, 1, 1)
+    x = torch.linspace(0, 1, width).view(1, -1, 1)
+    rgb = torch.cat([x.expand(height, width, 1), y.expand(height, width, 1)], dim=2)
+    rgb = torch.cat([rgb, (x * y).expand(height, width, 1)], dim=2) * 200
+    rgb += torch.rand(height, width, 3, generator=generator) * 55
+    image = Image.fromarray(rgb.to(torch.uint8).numpy())
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def bench(fn, repeat, number):
+    return min(timeit.repeat(fn, repeat=repeat, number=number)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--image-sizes", nargs="+", default=["640x480", "1920x1080"])
+    parser.add_argument("--formats", nargs="+", default=["JPEG", "PNG"])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument(
+        "--device", default="cuda" if torch.cuda.is_available() else "cpu"
+    )
+    parser.add_argument("--threads", type=int, default=torch.get_num_threads())
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    device = torch.device(args.device)
+    pil_handler = ImageClassifier()
+    pil_handler.device = device
+    tensor_handler = ImageClassifier()
+    tensor_handler.device = device
+    tensor_handler.tensor_image_processing = TensorImageProcessing.from_transforms(
+        tensor_handler.image_processing
+    )
+
+    print(f"device {device}, {args.threads} threads")
+    print(
+        f"{'image':>10} {'format':>6} {'batch size':>10} {'pil img/s':>10} "
+        f"{'tensor img/s':>13} {'speedup':>8}"
+    )
+    for size in args.image_sizes:
+        width, height = map(int, size.split("x"))
+        for fmt in args.formats:
+            image = synthetic_image(width, height, fmt)
+            for batch_size in args.batch_sizes:
+                data = [{"data": image}] * batch_size
+
+                def run(handler):
+                    handler.preprocess(data)
+                    if device.type == "cuda":
+                        torch.cuda.synchronize(device)
+
+                pil_time = bench(lambda: run(pil_handler), args.repeat, 1)
+                tensor_time = bench(lambda: run(tensor_handler), args.repeat, 1)
+                print(
+                    f"{size:>10} {fmt:>6} {batch_size:>10} "
+                    f"{batch_size / pil_time:>10.1f} {batch_size / tensor_time:>13.1f} "
+                    f"{pil_time / tensor_time:>7.1f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
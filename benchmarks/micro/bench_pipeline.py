@@ -0,0 +1,257 @@
+"""
+Micro-benchmark of a workflow pipeline against the multi-hop execution of its nodes.
+
+A two node chain, embed -> score, is run in two ways:
+
+multi_hop  every node in its own backend worker, the output of embed being
+           encoded by create_predict_response, sent back in a response frame
+           and forwarded in a new inference frame to the worker of score,
+           the way the frontend runs a workflow DAG
+pipeline   both nodes in a single worker running the pipeline_handler, the
+           output of embed being passed in memory to score
+
+embed turns a float32 payload into a tensor and score reduces it, so the cost of
+a hop grows with the payload size. The workers run on Unix sockets in this
+process, without the frontend, whose HTTP hop between the nodes of a workflow is
+not included: the difference is a lower bound of the saving.
+
+No network or GPU is needed.
+
+python benchmarks/micro/bench_pipeline.py --batch-sizes 1 8 --payload-sizes 4096 1048576
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+import torch
+from bench_worker_otf import Worker, encode_inference_msg, percentile
+
+PERCENTILES = [50, 90, 99]
+
+EMBED_HANDLER = """
+import torch
+
+
+def handle(data, context):
+    if data is None:
+        return None
+    features = []
+    for row in data:
+        value = row.get("data")
+        value = row.get("body") if value is None else value
+        features.append(torch.frombuffer(bytearray(value), dtype=torch.float32) * 2)
+    return features
+"""
+
+SCORE_HANDLER = """
+import io
+
+import torch
+
+
+def handle(data, context):
+    if data is None:
+        return None
+    scores = []
+    for row in data:
+        features = row.get("data")
+        features = row.get("body") if features is None else features
+        # torch.save bytes from the frontend, the tensor itself in a pipeline
+        if isinstance(features, (bytes, bytearray)):
+            features = torch.load(io.BytesIO(features))
+        scores.append({"score": float(features.sum())})
+    return scores
+"""
+
+NODES = [("embed", EMBED_HANDLER), ("score", SCORE_HANDLER)]
+
+
+def _write_manifest(model_dir, model):
+    os.makedirs(os.path.join(model_dir, "MAR-INF"), exist_ok=True)
+    with open(os.path.join(model_dir, "MAR-INF", "MANIFEST.json"), "w") as f:
+        json.dump({"model": model}, f)
+
+
+def create_node_dir(root, name, handler):
+    node_dir = os.path.join(root, name)
+    os.makedirs(node_dir, exist_ok=True)
+    with open(os.path.join(node_dir, f"{name}_handler.py"), "w") as f:
+        f.write(handler)
+    _write_manifest(node_dir, {"modelName": name, "handler": f"{name}_handler.py"})
+    return node_dir
+
+
+def create_pipeline_dir(root):
+    """The content of the .mar built by torch-workflow-archiver for embed -> score"""
+    pipeline_dir = os.path.join(root, "pipeline")
+    for name, handler in NODES:
+        create_node_dir(pipeline_dir, name, handler)
+    config = {
+        "handler": {
+            "pipeline": {
+                "inputs": ["input"],
+                "nodes": [
+                    {"name": "embed", "model_dir": "embed", "inputs": ["input"]},
+                    {"name": "score", "model_dir": "score", "inputs": ["embed"]},
+                ],
+            }
+        }
+    }
+    # JSON is valid YAML
+    with open(os.path.join(pipeline_dir, "model-config.yaml"), "w") as f:
+        json.dump(config, f)
+    _write_manifest(
+        pipeline_dir,
+        {
+            "modelName": "pipeline",
+            "handler": "pipeline_handler",
+            "configFile": "model-config.yaml",
+        },
+    )
+    return pipeline_dir
+
+
+def _frame(bodies, content_type):
+    return encode_inference_msg(
+        [
+            (
+                f"request-{i}",
+                {"Content-Type": content_type},
+                [("body", content_type, body)],
+            )
+            for i, body in enumerate(bodies)
+        ]
+    )
+
+
+class MultiHop(object):
+    """Runs every node in its own worker and forwards the outputs between them"""
+
+    def __init__(self, root, batch_size):
+        self.workers = []
+        self.paths = []
+        for name, handler in NODES:
+            node_root = os.path.join(root, "multi_hop", name)
+            node_dir = create_node_dir(node_root, name, handler)
+            sys.path.insert(0, node_dir)
+            self.paths.append(node_dir)
+            self.workers.append(
+                Worker(node_root, node_dir, f"{name}_handler", batch_size, None)
+            )
+
+    def infer(self, frame):
+        bodies = self.workers[0].infer(frame)
+        for worker in self.workers[1:]:
+            bodies = worker.infer(_frame(bodies, "application/octet-stream"))
+        return bodies
+
+    def close(self):
+        for worker in self.workers:
+            worker.close()
+        for path in self.paths:
+            sys.path.remove(path)
+
+
+class InWorker(object):
+    """Runs the nodes in a single worker with the pipeline_handler"""
+
+    def __init__(self, root, batch_size):
+        pipeline_root = os.path.join(root, "in_worker")
+        os.makedirs(pipeline_root, exist_ok=True)
+        pipeline_dir = create_pipeline_dir(pipeline_root)
+        self.worker = Worker(
+            pipeline_root, pipeline_dir, "pipeline_handler", batch_size, None
+        )
+
+    def infer(self, frame):
+        return self.worker.infer(frame)
+
+    def close(self):
+        self.worker.close()
+
+
+MODES = {"multi_hop": MultiHop, "pipeline": InWorker}
+
+
+def run_case(root, mode, size, batch_size, args):
+    runner = MODES[mode](os.path.join(root, f"{mode}-{size}-{batch_size}"), batch_size)
+    try:
+        payload = torch.rand(max(1, size // 4)).numpy().tobytes()
+        frame = _frame([payload] * batch_size, "application/octet-stream")
+        for _ in range(args.warmup):
+            runner.infer(frame)
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            request_start = time.perf_counter()
+            runner.infer(frame)
+            latencies.append(time.perf_counter() - request_start)
+        elapsed = time.perf_counter() - start
+    finally:
+        runner.close()
+
+    result = {
+        "mode": mode,
+        "payload_bytes": len(payload),
+        "batch_size": batch_size,
+        "requests_per_sec": round(args.requests * batch_size / elapsed, 1),
+    }
+    for q in PERCENTILES:
+        result[f"latency_p{q}_ms"] = round(percentile(latencies, q) * 1000, 3)
+    return result
+
+
+def print_table(results):
+    columns = ["mode", "payload_bytes", "batch_size"]
+    columns += [f"latency_p{q}_ms" for q in PERCENTILES]
+    columns.append("requests_per_sec")
+    widths = [max(len(c), max(len(str(r[c])) for r in results)) for c in columns]
+    print("  ".join(c.rjust(w) for c, w in zip(columns, widths)))
+    for result in results:
+        print("  ".join(str(result[c]).rjust(w) for c, w in zip(columns, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument(
+        "--payload-sizes", nargs="+", type=int, default=[4096, 262144, 4194304]
+    )
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 8])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        help="level of the worker logs, which are discarded like the frontend would read them",
+    )
+    parser.add_argument("--output", help="write the results as JSON lines to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        stream=open(os.devnull, "w"), format="%(message)s", level=args.log_level
+    )
+    torch.set_num_threads(1)
+    warnings.simplefilter("ignore", FutureWarning)
+
+    results = []
+    with tempfile.TemporaryDirectory() as root:
+        for size in args.payload_sizes:
+            for batch_size in args.batch_sizes:
+                for mode in args.modes:
+                    results.append(run_case(root, mode, size, batch_size, args))
+
+    print_table(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Micro-benchmark of the response serializers of TS_RESPONSE_SERIALIZER.
+
+Serializes the outputs of a batch, the way create_predict_response does, for
+three kinds of models:
+
+classifier  top 5 {label: probability} dicts, and the tensor of the 1000
+            probabilities of an image with --full-scores
+detector    100 boxes of {label: [x1, y1, x2, y2], "score": score}
+llm         a generated text, with the tensors of its token ids and logprobs
+
+The legacy row converts the tensors with .tolist() then runs json.dumps with
+indent=2, the response path of previous releases. Serializers which are not
+installed are skipped.
+
+python benchmarks/micro/bench_serializer.py --batch-sizes 1 8 32 --tokens 512
+"""
+import argparse
+import json
+import random
+import timeit
+
+import torch
+
+from ts.utils import serializer
+
+WORDS = "the a model of serve token request response batch worker text".split()
+
+
+def legacy_dumps(obj):
+    def to_list(value):
+        if isinstance(value, torch.Tensor):
+            return value.tolist()
+        if isinstance(value, dict):
+            return {k: to_list(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [to_list(v) for v in value]
+        return value
+
+    return json.dumps(to_list(obj), indent=2).encode("utf-8")
+
+
+def classifier_output(rng, full_scores):
+    probs = torch.softmax(torch.rand(1000), dim=0)
+    top = torch.topk(probs, 5)
+    output = {
+        f"class_{i}": p for i, p in zip(top.indices.tolist(), top.values.tolist())
+    }
+    if full_scores:
+        output = {"top5": output, "scores": probs}
+    return output
+
+
+def detector_output(rng, full_scores):
+    boxes = torch.rand(100, 4) * 640
+    scores = torch.rand(100).tolist()
+    return [
+        {f"class_{rng.randrange(80)}": box, "score": score}
+        for box, score in zip(boxes.tolist(), scores)
+    ]
+
+
+def llm_output(rng, full_scores, tokens=512):
+    return {
+        "generated_text": " ".join(rng.choice(WORDS) for _ in range(tokens)),
+        "token_ids": torch.randint(0, 32000, (tokens,)),
+        "logprobs": torch.log(torch.rand(tokens)),
+    }
+
+
+def available_serializers():
+    serializers = {"legacy": legacy_dumps}
+    for name in ("json", "orjson", "ujson"):
+        try:
+            serializers[name] = serializer.create_serializer(name).dumps
+        except ImportError:
+            print(f"{name} is not installed, skipped")
+    return serializers
+
+
+def bench(fn, repeat, number):
+    return min(timeit.repeat(fn, repeat=repeat, number=number)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--outputs",
+        nargs="+",
+        choices=["classifier", "detector", "llm"],
+        default=["classifier", "detector", "llm"],
+    )
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--tokens", type=int, default=512)
+    parser.add_argument("--full-scores", action="store_true")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    factories = {
+        "classifier": classifier_output,
+        "detector": detector_output,
+        "llm": lambda rng, full_scores: llm_output(rng, full_scores, args.tokens),
+    }
+    serializers = available_serializers()
+
+    print(
+        f"{'output':>10} {'batch size':>10} {'serializer':>10} "
+        f"{'us/batch':>10} {'bytes':>8} {'speedup':>8}"
+    )
+    for output in args.outputs:
+        for batch_size in args.batch_sizes:
+            batch = [
+                factories[output](rng, args.full_scores) for _ in range(batch_size)
+            ]
+            baseline = None
+            for name, dumps in serializers.items():
+                # create_predict_response serializes the rows one by one
+                elapsed = bench(
+                    lambda: [dumps(row) for row in batch], args.repeat, args.number
+                )
+                size = sum(len(dumps(row)) for row in batch)
+                baseline = baseline or elapsed
+                print(
+                    f"{output:>10} {batch_size:>10} {name:>10} "
+                    f"{elapsed * 1e6:>10.1f} {size:>8} {baseline / elapsed:>7.2f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
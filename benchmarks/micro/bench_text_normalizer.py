@@ -0,0 +1,103 @@
+"""
+Micro-benchmark of the text normalization used by the text based default handlers.
+
+Compares the TextHandler cleanup chain followed by the basic_english tokenizer
+with the TextNormalizer, for single texts and for batches.
+Inputs are synthetic movie review like texts (html line breaks, contractions,
+accents and punctuation) unless a file with one review per line is passed.
+
+python benchmarks/micro/bench_text_normalizer.py --texts 500 --batch-sizes 1 8 32
+"""
+import argparse
+import random
+import timeit
+
+from ts.torch_handler.text_classifier import TextClassifier
+
+WORDS = (
+    "the movie film plot acting actors story director scenes character ending "
+    "really great terrible boring wonderful cinematography soundtrack performance "
+    "was is were had have been watch watched recommend nobody everyone again"
+).split()
+CONTRACTIONS = ["don't", "didn't", "I'd", "it's", "wasn't", "can't", "I've", "won't"]
+DECORATIONS = [
+    "<br /><br />",
+    "&amp;",
+    "!",
+    "...",
+    ",",
+    "(",
+    ")",
+    "?",
+    '"',
+    "café",
+    "naïve",
+]
+
+
+def synthetic_reviews(count, min_words=40, max_words=250, seed=0):
+    rng = random.Random(seed)
+    reviews = []
+    for _ in range(count):
+        words = []
+        for _ in range(rng.randint(min_words, max_words)):
+            choice = rng.random()
+            if choice < 0.08:
+                words.append(rng.choice(CONTRACTIONS))
+            elif choice < 0.15:
+                words.append(rng.choice(DECORATIONS))
+            else:
+                word = rng.choice(WORDS)
+                words.append(word.capitalize() if rng.random() < 0.1 else word)
+        reviews.append(" ".join(words))
+    return reviews
+
+
+def bench(fn, repeat, number):
+    return min(timeit.repeat(fn, repeat=repeat, number=number)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--input", help="File with one review per line")
+    parser.add_argument("--texts", type=int, default=256)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input) as f:
+            reviews = [line.rstrip("\n") for line in f if line.strip()]
+    else:
+        reviews = synthetic_reviews(args.texts)
+
+    handler = TextClassifier()
+    avg_chars = sum(len(r) for r in reviews) / len(reviews)
+    print(f"{len(reviews)} texts, {avg_chars:.0f} characters on average")
+    print(
+        f"{'batch size':>10} {'chain us/text':>14} {'fast us/text':>13} {'speedup':>8}"
+    )
+
+    for batch_size in args.batch_sizes:
+        batches = [
+            reviews[i : i + batch_size] for i in range(0, len(reviews), batch_size)
+        ]
+
+        def chain():
+            for batch in batches:
+                [handler._tokenize(t) for t in handler._normalize_texts(batch)]
+
+        def fast():
+            for batch in batches:
+                handler.normalizer.tokenize_batch(batch)
+
+        chain_time = bench(chain, args.repeat, 1) / len(reviews) * 1e6
+        fast_time = bench(fast, args.repeat, 1) / len(reviews) * 1e6
+        print(
+            f"{batch_size:>10} {chain_time:>14.1f} {fast_time:>13.1f} "
+            f"{chain_time / fast_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
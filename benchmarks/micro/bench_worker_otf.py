@@ -0,0 +1,425 @@
+"""
+Micro-benchmark of the Python backend worker without the frontend.
+
+Starts TorchModelServiceWorker on a Unix socket in this process, loads a model
+and sends inference frames in the OTF format read by
+ts/protocol/otf_message_handler.py, the way the frontend does. The worker
+functions are wrapped to time each stage of a request:
+
+decode      _retrieve_inference_msg, reading and decoding the request frame
+retrieve    Service.retrieve_data_for_inference
+handler     the handler entry point, including the envelope if any
+encode      create_predict_response
+roundtrip   time from sending the frame to reading the full response
+
+The sweep covers payload size, batch size, content type and handler:
+
+noop             echoes its input, measures the pure worker overhead
+json_envelope    the noop handler behind the json request envelope
+image_classifier the default image_classifier handler with a tiny TorchScript model
+
+No network or GPU is needed.
+
+python benchmarks/micro/bench_worker_otf.py --batch-sizes 1 8 --payload-sizes 1024 65536
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import random
+import socket
+import struct
+import sys
+import tempfile
+import threading
+import time
+import warnings
+from collections import defaultdict
+from contextlib import contextmanager
+
+import torch
+from PIL import Image
+
+import ts.model_service_worker as model_service_worker
+import ts.protocol.otf_message_handler as codec
+import ts.service as service_module
+from ts.model_service_worker import TorchModelServiceWorker
+
+METRICS_CONFIG = os.path.join(
+    os.path.dirname(os.path.realpath(model_service_worker.__file__)),
+    "configs",
+    "metrics.yaml",
+)
+HANDLERS = ["noop", "json_envelope", "image_classifier"]
+CONTENT_TYPES = ["application/json", "text/plain", "application/octet-stream"]
+STAGES = ["decode", "retrieve", "handler", "encode", "roundtrip"]
+PERCENTILES = [50, 90, 99]
+
+NOOP_HANDLER = """
+def handle(data, context):
+    if data is None:
+        return None
+    return [
+        row.get("data") or row.get("body") if isinstance(row, dict) else row
+        for row in data
+    ]
+"""
+
+
+def _string(value):
+    if isinstance(value, str):
+        value = value.encode("utf-8")
+    return struct.pack("!i", len(value)) + value
+
+
+def encode_load_msg(model_name, model_path, handler, batch_size=1, envelope="", gpu=-1):
+    """Encodes a load model frame as sent by the frontend"""
+    msg = bytearray(codec.LOAD_MSG)
+    msg += _string(model_name)
+    msg += _string(model_path)
+    msg += struct.pack("!i", batch_size)
+    msg += _string(handler)
+    msg += struct.pack("!i", gpu)
+    msg += _string(envelope)
+    msg += struct.pack("!?", True)
+    return bytes(msg)
+
+
+def encode_inference_msg(requests):
+    """
+    Encodes an inference frame as sent by the frontend.
+
+    :param requests: list of (request_id, headers dict, list of (name, content_type, value))
+    """
+    msg = bytearray(codec.PREDICT_MSG)
+    for request_id, headers, inputs in requests:
+        msg += _string(request_id)
+        for name, value in headers.items():
+            msg += _string(name)
+            msg += _string(value)
+        msg += struct.pack("!i", codec.END_OF_LIST)
+        for name, content_type, value in inputs:
+            msg += _string(name)
+            msg += _string(content_type)
+            msg += _string(value)
+        msg += struct.pack("!i", codec.END_OF_LIST)
+    msg += struct.pack("!i", codec.END_OF_LIST)
+    return bytes(msg)
+
+
+class ResponseReader(object):
+    """Reads load and predict responses of the worker"""
+
+    def __init__(self, sock):
+        self.stream = sock.makefile("rb")
+
+    def _read(self, length):
+        data = self.stream.read(length)
+        if len(data) != length:
+            raise ConnectionError("Worker closed the connection")
+        return data
+
+    def _int(self):
+        return struct.unpack("!i", self._read(4))[0]
+
+    def _string(self):
+        return self._read(self._int())
+
+    def read(self):
+        """Returns the status code, the message and the list of response bodies"""
+        code = self._int()
+        message = self._string().decode("utf-8")
+        bodies = []
+        while True:
+            length = self._int()
+            if length == codec.END_OF_LIST:
+                break
+            self._read(length)  # request id
+            self._string()  # content type
+            self._int()  # status code
+            self._string()  # reason phrase
+            for _ in range(self._int()):
+                self._string()
+                self._string()
+            bodies.append(self._string())
+        return code, message, bodies
+
+
+class StageTimer(object):
+    """Wraps the worker functions of each stage and records their latency"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.enabled = False
+
+    def record(self, stage, start):
+        if self.enabled:
+            self.samples[stage].append(time.perf_counter() - start)
+
+    def wrap(self, stage, fn):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.record(stage, start)
+
+        return timed
+
+    def reset(self):
+        self.samples = defaultdict(list)
+
+    @contextmanager
+    def patch(self):
+        retrieve_inference_msg = codec._retrieve_inference_msg
+        retrieve_data = service_module.Service.__dict__["retrieve_data_for_inference"]
+        create_predict_response = service_module.create_predict_response
+        load_model = TorchModelServiceWorker.load_model
+
+        timer = self
+
+        def timed_load_model(worker, load_model_request):
+            service, result, code = load_model(worker, load_model_request)
+            if service is not None:
+                service._entry_point = timer.wrap("handler", service._entry_point)
+            return service, result, code
+
+        codec._retrieve_inference_msg = self.wrap("decode", retrieve_inference_msg)
+        service_module.Service.retrieve_data_for_inference = staticmethod(
+            self.wrap("retrieve", retrieve_data.__func__)
+        )
+        service_module.create_predict_response = self.wrap(
+            "encode", create_predict_response
+        )
+        TorchModelServiceWorker.load_model = timed_load_model
+        try:
+            yield self
+        finally:
+            codec._retrieve_inference_msg = retrieve_inference_msg
+            service_module.Service.retrieve_data_for_inference = retrieve_data
+            service_module.create_predict_response = create_predict_response
+            TorchModelServiceWorker.load_model = load_model
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def create_model_dir(root, handler):
+    model_dir = os.path.join(root, handler)
+    os.makedirs(os.path.join(model_dir, "MAR-INF"), exist_ok=True)
+    manifest = {"model": {"modelName": handler}}
+    if handler == "image_classifier":
+        model = torch.nn.Sequential(
+            torch.nn.Conv2d(3, 8, 3, stride=2),
+            torch.nn.AdaptiveAvgPool2d(1),
+            torch.nn.Flatten(),
+            torch.nn.Linear(8, 10),
+        ).eval()
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", FutureWarning)
+            torch.jit.script(model).save(os.path.join(model_dir, "model.pt"))
+        manifest["model"]["serializedFile"] = "model.pt"
+        manifest["model"]["handler"] = "image_classifier"
+    else:
+        with open(os.path.join(model_dir, "noop_handler.py"), "w") as f:
+            f.write(NOOP_HANDLER)
+        manifest["model"]["handler"] = "noop_handler.py"
+    with open(os.path.join(model_dir, "MAR-INF", "MANIFEST.json"), "w") as f:
+        json.dump(manifest, f)
+    return model_dir
+
+
+def create_payload(handler, content_type, size, rng):
+    """Returns the content type and the body of a request of about size bytes"""
+    if handler == "image_classifier":
+        # size is the side of the image
+        pixels = bytes(rng.getrandbits(8) for _ in range(size * size * 3))
+        image = Image.frombytes("RGB", (size, size), pixels)
+        buf = io.BytesIO()
+        image.save(buf, format="JPEG")
+        return "image/jpeg", buf.getvalue()
+    if handler == "json_envelope":
+        values = [round(rng.random(), 6) for _ in range(max(1, size // 10))]
+        return "application/json", json.dumps({"instances": [values]})
+    if content_type == "application/json":
+        values = [round(rng.random(), 6) for _ in range(max(1, size // 10))]
+        return content_type, json.dumps({"inputs": values})
+    if content_type.startswith("text"):
+        return content_type, "".join(rng.choices("abcdefghij ", k=size))
+    return content_type, os.urandom(size)
+
+
+class Worker(object):
+    """A worker serving one model on a Unix socket, running in a thread"""
+
+    def __init__(self, root, model_dir, handler, batch_size, envelope):
+        self.sock_name = os.path.join(root, "worker.sock.9000")
+        worker = TorchModelServiceWorker(
+            "unix", self.sock_name, None, None, METRICS_CONFIG
+        )
+        self.thread = threading.Thread(target=worker.run_server, daemon=True)
+        self.thread.start()
+
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        for _ in range(100):
+            try:
+                self.sock.connect(self.sock_name)
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                time.sleep(0.05)
+        self.reader = ResponseReader(self.sock)
+
+        self.sock.sendall(
+            encode_load_msg(
+                "bench", model_dir, handler, batch_size, envelope=envelope or ""
+            )
+        )
+        code, message, _ = self.reader.read()
+        if code != 200:
+            raise RuntimeError(f"Failed to load the model: {code} {message}")
+        self.worker = worker
+
+    def infer(self, frame):
+        self.sock.sendall(frame)
+        code, message, bodies = self.reader.read()
+        if code != 200:
+            raise RuntimeError(f"Inference failed: {code} {message}")
+        return bodies
+
+    def close(self):
+        self.sock.close()
+        self.thread.join(timeout=5)
+        self.worker.sock.close()
+
+
+def run_case(root, timer, handler, content_type, size, batch_size, args):
+    rng = random.Random(0)
+    model_dir = create_model_dir(root, handler)
+    sys.path.insert(0, model_dir)
+    envelope = "json" if handler == "json_envelope" else None
+    worker_handler = (
+        "image_classifier" if handler == "image_classifier" else "noop_handler"
+    )
+    worker = Worker(root, model_dir, worker_handler, batch_size, envelope)
+    try:
+        content_type, body = create_payload(handler, content_type, size, rng)
+        frame = encode_inference_msg(
+            [
+                (
+                    f"request-{i}",
+                    {"Content-Type": content_type},
+                    [("body", content_type, body)],
+                )
+                for i in range(batch_size)
+            ]
+        )
+
+        for _ in range(args.warmup):
+            worker.infer(frame)
+        timer.reset()
+        timer.enabled = True
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            request_start = time.perf_counter()
+            worker.infer(frame)
+            timer.record("roundtrip", request_start)
+        elapsed = time.perf_counter() - start
+        timer.enabled = False
+    finally:
+        worker.close()
+        sys.path.remove(model_dir)
+
+    result = {
+        "handler": handler,
+        "content_type": content_type,
+        "payload_bytes": len(body),
+        "batch_size": batch_size,
+        "requests_per_sec": round(args.requests * batch_size / elapsed, 1),
+    }
+    for stage in STAGES:
+        for q in PERCENTILES:
+            result[f"{stage}_p{q}_ms"] = round(
+                percentile(timer.samples[stage], q) * 1000, 3
+            )
+    return result
+
+
+def cases(args):
+    for handler in args.handlers:
+        if handler == "image_classifier":
+            for size in args.image_sizes:
+                yield handler, "image/jpeg", size
+        elif handler == "json_envelope":
+            for size in args.payload_sizes:
+                yield handler, "application/json", size
+        else:
+            for content_type in args.content_types:
+                for size in args.payload_sizes:
+                    yield handler, content_type, size
+
+
+def print_table(results):
+    columns = ["handler", "content_type", "payload_bytes", "batch_size"]
+    columns += [f"{stage}_p{q}_ms" for stage in STAGES for q in (50, 99)]
+    columns.append("requests_per_sec")
+    widths = [max(len(c), max(len(str(r[c])) for r in results)) for c in columns]
+    print("  ".join(c.rjust(w) for c, w in zip(columns, widths)))
+    for result in results:
+        print("  ".join(str(result[c]).rjust(w) for c, w in zip(columns, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--handlers", nargs="+", choices=HANDLERS, default=HANDLERS)
+    parser.add_argument(
+        "--content-types", nargs="+", default=CONTENT_TYPES, help="noop handler only"
+    )
+    parser.add_argument(
+        "--payload-sizes", nargs="+", type=int, default=[1024, 65536, 1048576]
+    )
+    parser.add_argument(
+        "--image-sizes",
+        nargs="+",
+        type=int,
+        default=[64, 224, 512],
+        help="side of the images sent to image_classifier",
+    )
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 8])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        help="level of the worker logs, which are discarded like the frontend would read them",
+    )
+    parser.add_argument("--output", help="write the results as JSON lines to this file")
+    args = parser.parse_args()
+
+    # The worker logs every request at INFO, keep that cost without printing it
+    logging.basicConfig(
+        stream=open(os.devnull, "w"), format="%(message)s", level=args.log_level
+    )
+    torch.set_num_threads(1)
+    warnings.simplefilter("ignore", FutureWarning)
+
+    results = []
+    with tempfile.TemporaryDirectory() as root, StageTimer().patch() as timer:
+        for handler, content_type, size in cases(args):
+            for batch_size in args.batch_sizes:
+                results.append(
+                    run_case(root, timer, handler, content_type, size, batch_size, args)
+                )
+
+    print_table(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import os
 import shutil
+import sys
 from abc import ABC, abstractmethod
 from pathlib import Path
 
@@ -9,6 +10,7 @@ from utils.reporting import (
     extract_ab_tool_benchmark_artifacts,
     extract_locust_tool_benchmark_artifacts,
     extract_metrics,
+    extract_open_loop_tool_benchmark_artifacts,
     generate_csv_output,
     generate_latency_graph,
     generate_profile_graph,
@@ -18,6 +20,8 @@ from utils.reporting import (
 def create_benchmark(execution_params):
     if execution_params["benchmark_backend"] == "ab":
         return ABBenchmark(execution_params)
+    elif execution_params["benchmark_backend"] == "open_loop":
+        return OpenLoopBenchmark(execution_params)
     else:
         return LocustBenchmark(execution_params)
 
@@ -52,6 +56,10 @@ class Benchmark(ABC):
             generate_latency_graph(self.execution_params)
             generate_profile_graph(self.execution_params, metrics)
 
+    def collect_artifacts(self):
+        """Throughput, latency percentiles and error rate of the last run"""
+        return self._extract_benchmark_artifacts()
+
     def prepare_environment(self):
         input = self.execution_params["input"]
         shutil.rmtree(
@@ -148,3 +156,45 @@ class LocustBenchmark(Benchmark):
 
     def _extract_benchmark_artifacts(self):
         return extract_locust_tool_benchmark_artifacts(self.execution_params)
+
+
+class OpenLoopBenchmark(Benchmark):
+    def __init__(self, execution_params):
+        self.open_loop_benchmark_file = Path(__file__).parent / "open_loop_benchmark.py"
+        super().__init__(execution_params)
+
+    def _command(self, requests):
+        cmd = (
+            f"{sys.executable} {self.open_loop_benchmark_file} -H {self.execution_params['inference_url']} "
+            f"--model-url {self.execution_params['inference_model_url']} "
+            f"--input {self.execution_params['tmp_dir']}/benchmark/input --content-type {self.execution_params['content_type']} "
+            f"--requests {requests} --arrival {self.execution_params['arrival']} --rate {self.execution_params['arrival_rate']} "
+        )
+        if self.execution_params.get("trace_file"):
+            cmd += f"--trace {self.execution_params['trace_file']} "
+        if self.execution_params.get("request_mix"):
+            cmd += f"--request-mix {self.execution_params['request_mix']} "
+        return cmd
+
+    def warm_up(self):
+        click.secho("\n\nExecuting warm-up ...", fg="green")
+
+        execute(
+            self._command(self.execution_params["requests"] // 10)
+            + f"--output {self.execution_params['result_file']}",
+            wait=True,
+        )
+
+        self.warm_up_lines = sum(1 for _ in open(self.execution_params["metric_log"]))
+
+    def run(self):
+        click.secho("\n\nExecuting inference performance tests ...", fg="green")
+
+        execute(
+            self._command(self.execution_params["requests"])
+            + f"--output {self.execution_params['result_file']}",
+            wait=True,
+        )
+
+    def _extract_benchmark_artifacts(self):
+        return extract_open_loop_tool_benchmark_artifacts(self.execution_params)
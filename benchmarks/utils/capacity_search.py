@@ -0,0 +1,238 @@
+"""
+Adaptive search of the capacity of a model under a p99 latency SLO.
+
+Every candidate configuration of batchSize, maxBatchDelay, minWorkers and
+micro-batch parallelism is loaded with a doubling concurrency until its p99
+exceeds the SLO or its throughput stops growing. The knee of its
+throughput/latency curve is the lowest concurrency reaching the saturated
+throughput within the SLO, and the throughput at the knee is the capacity of
+the configuration.
+
+The configurations are searched on a coarse grid, every other value of every
+dimension, and the best one is refined by moving one dimension at a time to
+its neighbouring values until the capacity stops improving.
+"""
+import itertools
+import json
+import os
+import shutil
+
+import yaml
+
+DIMENSIONS = ["batch_size", "batch_delay", "workers", "parallelism"]
+# Relative throughput gain below which the load has saturated the configuration
+DEFAULT_SATURATION = 0.05
+
+
+class LoadPoint(object):
+    def __init__(self, concurrency, throughput, p50, p90, p99, error_rate=0.0):
+        self.concurrency = concurrency
+        self.throughput = throughput
+        self.p50 = p50
+        self.p90 = p90
+        self.p99 = p99
+        self.error_rate = error_rate
+
+    def within(self, slo_p99):
+        return self.p99 <= slo_p99 and self.error_rate == 0
+
+
+class Capacity(object):
+    """Load points of a configuration and the knee of its curve"""
+
+    def __init__(self, config, points, knee):
+        self.config = config
+        self.points = points
+        self.knee = knee
+
+    @property
+    def throughput(self):
+        return self.knee.throughput if self.knee else 0.0
+
+
+def find_knee(points, slo_p99, saturation=DEFAULT_SATURATION):
+    """
+    Returns the lowest concurrency point within the SLO whose throughput is
+    within saturation of the best throughput within the SLO, None if no point
+    meets the SLO.
+    """
+    valid = sorted(
+        (p for p in points if p.within(slo_p99)), key=lambda p: p.concurrency
+    )
+    if not valid:
+        return None
+    best = max(p.throughput for p in valid)
+    for point in valid:
+        if point.throughput >= best * (1 - saturation):
+            return point
+
+
+def ramp_load(
+    measure,
+    config,
+    slo_p99,
+    start_concurrency=1,
+    max_concurrency=256,
+    saturation=DEFAULT_SATURATION,
+):
+    """
+    Doubles the concurrency until the SLO is violated or the throughput saturates.
+
+    :param measure: measure(config, concurrency) -> LoadPoint
+    """
+    points = []
+    concurrency = max(1, start_concurrency)
+    while concurrency <= max_concurrency:
+        point = measure(config, concurrency)
+        points.append(point)
+        if not point.within(slo_p99):
+            break
+        if len(points) > 1 and point.throughput < points[-2].throughput * (
+            1 + saturation
+        ):
+            break
+        concurrency *= 2
+    return Capacity(config, points, find_knee(points, slo_p99, saturation))
+
+
+class CapacitySearch(object):
+    """
+    Coarse grid then coordinate refinement over the values of every dimension.
+
+    :param space: dict of dimension name to the list of its values
+    :param evaluate: evaluate(config) -> Capacity, config being a dict of a
+        value per dimension
+    :param max_configs: budget of evaluated configurations
+    """
+
+    def __init__(self, space, evaluate, max_configs=64, saturation=DEFAULT_SATURATION):
+        self.space = {k: sorted(set(v)) for k, v in space.items() if v}
+        self.evaluate = evaluate
+        self.max_configs = max_configs
+        self.saturation = saturation
+        self.results = {}
+
+    @staticmethod
+    def _key(config):
+        return tuple(sorted(config.items()))
+
+    def _run(self, config):
+        key = self._key(config)
+        if key not in self.results and len(self.results) < self.max_configs:
+            self.results[key] = self.evaluate(dict(config))
+        return self.results.get(key)
+
+    def coarse_grid(self):
+        """Every other value of every dimension, always including the last one"""
+        values = []
+        for name, dimension in self.space.items():
+            coarse = dimension[::2]
+            if coarse[-1] != dimension[-1]:
+                coarse.append(dimension[-1])
+            values.append([(name, v) for v in coarse])
+        return [dict(c) for c in itertools.product(*values)]
+
+    def neighbours(self, config):
+        for name, dimension in self.space.items():
+            index = dimension.index(config[name])
+            for i in (index - 1, index + 1):
+                if 0 <= i < len(dimension):
+                    yield dict(config, **{name: dimension[i]})
+
+    def best(self):
+        """
+        The configuration with the highest capacity, preferring fewer workers
+        and then the lower p99 among those within saturation of it.
+        """
+        results = [r for r in self.results.values() if r.knee is not None]
+        if not results:
+            return None
+        top = max(r.throughput for r in results)
+        close = [r for r in results if r.throughput >= top * (1 - self.saturation)]
+        return min(
+            close,
+            key=lambda r: (r.config.get("workers", 0), r.knee.p99, -r.throughput),
+        )
+
+    def run(self):
+        for config in self.coarse_grid():
+            self._run(config)
+
+        best = self.best()
+        while best is not None and len(self.results) < self.max_configs:
+            for config in self.neighbours(best.config):
+                self._run(config)
+            refined = self.best()
+            if refined is best:
+                break
+            best = refined
+        return best
+
+
+def model_config(capacity, base_config=None):
+    """Model-config.yaml content running the configuration of a capacity"""
+    return settings_model_config(capacity.config, base_config)
+
+
+def settings_model_config(settings, base_config=None):
+    """Model-config.yaml content running a configuration"""
+    config = dict(base_config or {})
+    if "workers" in settings:
+        config["minWorkers"] = settings["workers"]
+        config["maxWorkers"] = settings["workers"]
+    if "batch_size" in settings:
+        config["batchSize"] = settings["batch_size"]
+    if "batch_delay" in settings:
+        config["maxBatchDelay"] = settings["batch_delay"]
+    if "parallelism" in settings:
+        config["micro_batching"] = micro_batching_config(
+            config.get("micro_batching"), settings["parallelism"]
+        )
+    return config
+
+
+def micro_batching_config(micro_batching, parallelism):
+    """Runs the preprocess and postprocess of the micro-batches in parallelism threads"""
+    micro_batching = dict(micro_batching or {})
+    stages = dict(micro_batching.get("parallelism") or {})
+    stages["preprocess"] = parallelism
+    stages["postprocess"] = parallelism
+    stages.setdefault("inference", 1)
+    micro_batching["parallelism"] = stages
+    return micro_batching
+
+
+def write_model_config(capacity, path, base_config=None):
+    with open(path, "w") as f:
+        yaml.safe_dump(model_config(capacity, base_config), f, sort_keys=False)
+
+
+def load_model_config(path):
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return yaml.safe_load(f) or {}
+
+
+def stage_model_dir(model_dir, dest, settings):
+    """
+    Copies an unarchived model to dest, running the configuration. The
+    batchSize, maxBatchDelay and workers of the model-config.yaml of a model
+    take precedence over the ones it is registered with, so they are written
+    for every configuration.
+    """
+    shutil.rmtree(dest, ignore_errors=True)
+    shutil.copytree(model_dir, dest)
+
+    manifest_file = os.path.join(dest, "MAR-INF", "MANIFEST.json")
+    with open(manifest_file) as f:
+        manifest = json.load(f)
+    config_file = manifest["model"].get("configFile") or "model-config.yaml"
+    config = settings_model_config(
+        settings, load_model_config(os.path.join(dest, config_file))
+    )
+    with open(os.path.join(dest, config_file), "w") as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+    manifest["model"]["configFile"] = config_file
+    with open(manifest_file, "w") as f:
+        json.dump(manifest, f, indent=2)
@@ -25,3 +25,36 @@ def is_file_empty(file_path):
     """Check if file is empty by confirming if its size is 0 bytes"""
     # Check if file exist and it is empty
     return os.path.exists(file_path) and os.stat(file_path).st_size == 0
+
+
+def update_exec_params(execution_params, input_param):
+    execution_params.update(input_param)
+
+    execution_params["result_file"] = os.path.join(
+        execution_params["tmp_dir"], "benchmark", "result.txt"
+    )
+    execution_params["metric_log"] = os.path.join(
+        execution_params["tmp_dir"], "benchmark", "logs", "model_metrics.log"
+    )
+
+    getAPIS(execution_params)
+
+
+def getAPIS(execution_params):
+    MANAGEMENT_API = "http://127.0.0.1:8081"
+    INFERENCE_API = "http://127.0.0.1:8080"
+
+    with open(execution_params["config_properties"], "r") as fp:
+        lines = fp.readlines()
+    for line in lines:
+        line = line.strip()
+        if "management_address" in line:
+            MANAGEMENT_API = line.split("=")[1]
+        if "inference_address" in line:
+            INFERENCE_API = line.split("=")[1]
+
+    execution_params["inference_url"] = INFERENCE_API
+    execution_params["management_url"] = MANAGEMENT_API
+    execution_params["config_properties_name"] = (
+        execution_params["config_properties"].strip().split("/")[-1]
+    )
@@ -41,6 +41,48 @@ def iterate_subdir(input_dir, output, hw, ts_version):
 
     mdFile.create_md_file()
 
+def format_interval(interval):
+    return '{:.2f} [{:.2f}, {:.2f}]'.format(interval['mean'], interval['low'], interval['high'])
+
+def gen_regression_report(verdict, output):
+    """Writes the diff of the benchmark reports against the baseline with a row per gated metric"""
+    mdFile = MdUtils(file_name=output, title='TorchServe Benchmark Regression Report')
+    mdFile.new_paragraph('Mean of the trials [{:g}% confidence interval]. Result: {}'.format(
+        verdict['confidence'] * 100, 'regression' if verdict['regression'] else 'pass'))
+
+    for model, model_verdict in verdict['models'].items():
+        mdFile.new_header(level=2, title='{} ({})'.format(model, model_verdict['verdict']))
+        if not model_verdict['metrics']:
+            continue
+        list_of_strings = ['Metric', 'Baseline', 'Current', 'Change %', 'Verdict']
+        for key, metric in model_verdict['metrics'].items():
+            list_of_strings.extend([
+                key,
+                format_interval(metric['baseline']),
+                format_interval(metric['current']),
+                '{:+.2f}'.format(metric['change_percentage']),
+                metric['verdict'],
+            ])
+        mdFile.new_table(columns=5, rows=len(model_verdict['metrics'])+1, text=list_of_strings, text_align='center')
+
+    mdFile.create_md_file()
+
+def gen_capacity_report(csv_file, recommendation, slo_p99, output):
+    """Writes the load points of a capacity sweep and the recommended model config"""
+    mdFile = MdUtils(file_name=output, title='TorchServe Capacity Sweep')
+    mdFile.new_paragraph('p99 SLO: {} ms'.format(slo_p99))
+    mdFile.new_header(level=2, title='Recommended model config')
+    mdFile.insert_code(recommendation, language='yaml')
+
+    mdFile.new_header(level=2, title='Load points')
+    df = pd.read_csv(csv_file)
+    list_of_strings = list(df.columns)
+    for row in df.values.tolist():
+        list_of_strings.extend(row)
+    mdFile.new_table(columns=len(df.columns), rows=len(df.index)+1, text=list_of_strings, text_align='center')
+
+    mdFile.create_md_file()
+
 def main():
     parser = argparse.ArgumentParser()
 
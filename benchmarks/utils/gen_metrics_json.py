@@ -1,7 +1,9 @@
 import argparse
 import csv
 import json
-import re
+import textwrap
+
+from utils.metrics_log_parser import parse_metric_line
 
 # Ref valid unit:
 # https://docs.aws.amazon.com/AmazonCloudWatch/latest/APIReference/API_MetricDatum.html
@@ -98,62 +100,31 @@ def gen_metrics_from_log(csv_dict, metrics_log_file_path, raw_metrics_file_path)
     if metrics_log_file_path is None or raw_metrics_file_path is None:
         return
 
-    with open(metrics_log_file_path, "r") as logfile:
-        lines = logfile.readlines()
-
-    metrics_dict_list = []
-    pattern = re.compile(" TS_METRICS | MODEL_METRICS ")
-    for line in lines:
-        if pattern.search(line):
-            segments = line.split("|")
-            name, unit, value = parse_segments_0(segments[0])
-            if name is None:
+    # The log is streamed to the raw metrics file, which is formatted like a
+    # json.dump(..., indent=4) of the list of metrics
+    with open(metrics_log_file_path, "r") as logfile, open(
+        raw_metrics_file_path, "w"
+    ) as raw_file:
+        raw_file.write("[")
+        first = True
+        for line in logfile:
+            if " TS_METRICS " not in line and " MODEL_METRICS " not in line:
                 continue
-            dimensions = parse_segments_1(csv_dict, segments[1])
-            timestamp = parse_segments_2(segments[2])
-            metrics_dict_list.append(
-                {
-                    "MetricName": "{}_{}".format(csv_dict["Model"], name),
-                    "Dimensions": dimensions,
-                    "Unit": unit,
-                    "Value": float(value),
-                    "Timestamp": timestamp,
-                }
-            )
-
-    with open(raw_metrics_file_path, "w") as raw_file:
-        json.dump(metrics_dict_list, raw_file, indent=4)
-
-
-def parse_segments_0(segment):
-    index = segment.rfind(" ") + 1
-    data = segment[index:].split(":")
-    value = data[1]
-    name_unit = data[0].split(".")
-    if name_unit[0] in METRICS_NAME_SET:
-        name = name_unit[0]
-        unit = UNIT_MAP[name_unit[1]]
-    else:
-        name = None
-        unit = None
-
-    return name, unit, value
-
-
-def parse_segments_1(csv_dict, segment):
-    data = segment[1:].split(",")
-    dimensions = [{"Name": "batch_size", "Value": csv_dict["Batch size"]}]
-    for d in data:
-        dimension = d.split(":")
-        dimensions.append({"Name": dimension[0], "Value": dimension[1]})
-
-    return dimensions
-
-
-def parse_segments_2(segment):
-    index = segment.rfind(",") + 1
-    data = segment[index:].split(":")
-    return int(data[1])
+            record = parse_metric_line(line)
+            if record is None or record.name not in METRICS_NAME_SET:
+                continue
+            metric = {
+                "MetricName": "{}_{}".format(csv_dict["Model"], record.name),
+                "Dimensions": [{"Name": "batch_size", "Value": csv_dict["Batch size"]}]
+                + [{"Name": name, "Value": value} for name, value in record.dimensions],
+                "Unit": UNIT_MAP[record.unit],
+                "Value": record.value,
+                "Timestamp": record.timestamp,
+            }
+            raw_file.write("\n" if first else ",\n")
+            raw_file.write(textwrap.indent(json.dumps(metric, indent=4), " " * 4))
+            first = False
+        raw_file.write("]" if first else "\n]")
 
 
 def gen_metric(csv_file, stats_metrics_file):
@@ -0,0 +1,91 @@
+"""
+HDR style latency histogram shared by the benchmark tools.
+"""
+from collections import defaultdict
+
+
+class LatencyHistogram(object):
+    """
+    Log-linear histogram of integer values in the style of HdrHistogram. Values
+    below 2**significant_bits are exact, larger values are recorded with a
+    relative error below 2**-(significant_bits - 1).
+    """
+
+    def __init__(self, significant_bits=8):
+        self.significant_bits = significant_bits
+        self.counts = defaultdict(int)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def _key(self, value):
+        shift = max(0, value.bit_length() - self.significant_bits)
+        return shift, value >> shift
+
+    @staticmethod
+    def _highest_equivalent(key):
+        shift, sub_bucket = key
+        return ((sub_bucket + 1) << shift) - 1
+
+    def record(self, value):
+        value = max(0, int(value))
+        self.counts[self._key(value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def record_many(self, values):
+        """Records a numpy array of integer values"""
+        import numpy as np
+
+        values = np.maximum(np.asarray(values, dtype=np.int64), 0)
+        if not len(values):
+            return
+        # frexp returns the bit length of positive integers as the exponent
+        bits = np.frexp(values.astype(np.float64))[1].astype(np.int64)
+        shift = np.maximum(bits - self.significant_bits, 0)
+        keys, counts = np.unique((shift << 32) | (values >> shift), return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            self.counts[(key >> 32, key & 0xFFFFFFFF)] += count
+        self.count += len(values)
+        self.total += int(values.sum())
+        low, high = int(values.min()), int(values.max())
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+
+    def merge(self, other):
+        for key, count in other.counts.items():
+            self.counts[key] += count
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, q):
+        if self.count == 0:
+            return 0
+        rank = max(1, int(round(q / 100 * self.count + 0.5 - 1e-9)))
+        seen = 0
+        for key in sorted(self.counts, key=self._highest_equivalent):
+            seen += self.counts[key]
+            if seen >= rank:
+                return min(self._highest_equivalent(key), self.max)
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+    def summary(self, scale=1e-3, percentiles=(50, 90, 99, 99.9)):
+        """Returns count, mean, max and percentiles, by default converted from us to ms"""
+        summary = {"count": self.count}
+        for q in percentiles:
+            summary[f"p{q:g}"] = round(self.percentile(q) * scale, 3)
+        summary["mean"] = round(self.mean() * scale, 3)
+        summary["max"] = round((self.max or 0) * scale, 3)
+        return summary
@@ -0,0 +1,234 @@
+"""
+Single pass parser of TorchServe metrics logs.
+
+Every metric line, e.g.
+
+2023-06-01T10:00:00,123 - PredictionTime.Milliseconds:12.3|#ModelName:resnet,Level:Model|#hostname:host,1685613600,req-id
+
+is tokenized once and routed to the consumers registered for its metric name.
+The log is read in chunks which are tokenized by a single regular expression,
+and the values are aggregated per chunk into HDR style histograms and per time
+bucket aggregates, so memory does not grow with the length of the log.
+"""
+import json
+import re
+from collections import defaultdict
+
+import numpy as np
+from utils.histogram import LatencyHistogram
+
+# Values are recorded with three decimals, e.g. microseconds for metrics in ms
+VALUE_SCALE = 1000
+CHUNK_SIZE = 4 * 1024 * 1024
+
+# name, unit, value, dimensions, context and timestamp of a metric, the context
+# is hostname:<host>,<timestamp>[,<request id>] for model metrics and
+# hostname:<host>,timestamp:<timestamp> for frontend metrics
+METRIC_PATTERN = (
+    r" ({names})\.(\w+):(-?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)"
+    r"\|#([^|\n]*)\|#((?:[^,\s]*,(?:timestamp:)?(\d+)\b)?\S*)"
+)
+
+
+class MetricRecord(object):
+    __slots__ = ["name", "unit", "value", "_dimensions", "_context"]
+
+    def __init__(self, name, unit, value, dimensions, context):
+        self.name = name
+        self.unit = unit
+        self.value = value
+        self._dimensions = dimensions
+        self._context = context
+
+    @classmethod
+    def from_match(cls, match):
+        """Creates a record from a tuple of the strings matched by METRIC_PATTERN"""
+        name, unit, value, dimensions, context = match[:5]
+        return cls(name, unit, float(value), dimensions, context)
+
+    @property
+    def dimensions(self):
+        """List of (name, value) tuples"""
+        dimensions = []
+        for dimension in self._dimensions.split(","):
+            name, _, value = dimension.partition(":")
+            if name:
+                dimensions.append((name, value))
+        return dimensions
+
+    @property
+    def hostname(self):
+        return self._context.split(",", 1)[0].partition(":")[2]
+
+    @property
+    def timestamp(self):
+        fields = self._context.split(",", 2)
+        if len(fields) < 2:
+            return None
+        try:
+            return int(fields[1].rpartition(":")[2])
+        except ValueError:
+            return None
+
+
+def parse_metric_line(line):
+    """
+    Tokenizes a metric log line, the dimensions and the context of the metric
+    are only parsed when they are accessed.
+
+    :return: MetricRecord or None if the line holds no metric
+    """
+    bar = line.find("|#")
+    if bar < 0:
+        return None
+    name_unit, _, value = line[line.rfind(" ", 0, bar) + 1 : bar].rpartition(":")
+    name, _, unit = name_unit.partition(".")
+    if not name or not unit:
+        return None
+    try:
+        value = float(value)
+    except ValueError:
+        return None
+    dimensions, _, context = line[bar + 2 :].partition("|#")
+    return MetricRecord(name, unit, value, dimensions, context.strip())
+
+
+class MetricSeries(object):
+    """Distribution and per time bucket aggregates of the values of one metric"""
+
+    def __init__(self, bucket_sec=60):
+        self.bucket_sec = bucket_sec
+        self.histogram = LatencyHistogram(significant_bits=11)
+        self.buckets = {}
+
+    def add(self, value, timestamp=None):
+        self.add_many([value], [-1 if timestamp is None else timestamp])
+
+    def add_many(self, values, timestamps):
+        """
+        :param values: sequence of float values
+        :param timestamps: sequence of timestamps in seconds, -1 when unknown
+        """
+        values = np.asarray(values, dtype=np.float64)
+        self.histogram.record_many(np.rint(values * VALUE_SCALE).astype(np.int64))
+
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        known = timestamps >= 0
+        values, timestamps = values[known], timestamps[known]
+        if not len(values):
+            return
+        starts, index = np.unique(
+            timestamps - timestamps % self.bucket_sec, return_inverse=True
+        )
+        counts = np.bincount(index, minlength=len(starts))
+        totals = np.bincount(index, weights=values, minlength=len(starts))
+        lows = np.full(len(starts), np.inf)
+        highs = np.full(len(starts), -np.inf)
+        np.minimum.at(lows, index, values)
+        np.maximum.at(highs, index, values)
+
+        for start, count, total, low, high in zip(
+            starts.tolist(),
+            counts.tolist(),
+            totals.tolist(),
+            lows.tolist(),
+            highs.tolist(),
+        ):
+            bucket = self.buckets.get(start)
+            if bucket is None:
+                self.buckets[start] = [count, total, low, high]
+            else:
+                bucket[0] += count
+                bucket[1] += total
+                bucket[2] = min(bucket[2], low)
+                bucket[3] = max(bucket[3], high)
+
+    @property
+    def count(self):
+        return self.histogram.count
+
+    def mean(self):
+        return self.histogram.mean() / VALUE_SCALE
+
+    def percentile(self, q):
+        return self.histogram.percentile(q) / VALUE_SCALE
+
+    def summary(self, percentiles=(50, 90, 99)):
+        summary = self.histogram.summary(
+            scale=1.0 / VALUE_SCALE, percentiles=percentiles
+        )
+        summary["series"] = [
+            {
+                "timestamp": start,
+                "count": count,
+                "mean": round(total / count, 3),
+                "min": low,
+                "max": high,
+            }
+            for start, (count, total, low, high) in sorted(self.buckets.items())
+        ]
+        return summary
+
+
+class MetricsLogParser(object):
+    """
+    Parses a metrics log in a single pass.
+
+    :param metrics: names of the metrics to aggregate, None for all of them
+    :param bucket_sec: width of the time buckets of the series
+    """
+
+    def __init__(self, metrics=None, bucket_sec=60):
+        names = r"\w+" if metrics is None else "|".join(map(re.escape, metrics))
+        self.pattern = re.compile(METRIC_PATTERN.format(names=names))
+        self.bucket_sec = bucket_sec
+        self.series = {}
+        self._listeners = defaultdict(list)
+
+    def add_listener(self, fn, metric):
+        """
+        Calls fn(matches) with the (name, unit, value, dimensions, context,
+        timestamp) string tuples of the metric in every parsed chunk, in the
+        order of the log. MetricRecord.from_match converts them to records.
+        """
+        self._listeners[metric].append(fn)
+
+    def feed(self, text):
+        """Parses a chunk of whole log lines"""
+        matches_by_name = defaultdict(list)
+        for match in self.pattern.findall(text):
+            matches_by_name[match[0]].append(match)
+
+        for name, matches in matches_by_name.items():
+            values = np.array([m[2] for m in matches], dtype=np.float64)
+            timestamps = np.array([m[5] or -1 for m in matches], dtype=np.int64)
+
+            series = self.series.get(name)
+            if series is None:
+                series = self.series[name] = MetricSeries(self.bucket_sec)
+            series.add_many(values, timestamps)
+            for fn in self._listeners.get(name, ()):
+                fn(matches)
+
+    def parse_file(self, path, skip_lines=0, chunk_size=CHUNK_SIZE):
+        with open(path) as f:
+            for _ in range(skip_lines):
+                if not f.readline():
+                    return self
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                # Complete the last line of the chunk
+                self.feed(chunk + f.readline())
+        return self
+
+    def get(self, metric):
+        return self.series.get(metric) or MetricSeries(self.bucket_sec)
+
+    def summary(self):
+        return {name: series.summary() for name, series in self.series.items()}
+
+    def write_summary(self, path):
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=4)
@@ -0,0 +1,571 @@
+"""
+Open loop load generator for TorchServe.
+
+Requests are sent on a precomputed arrival schedule (Poisson, constant rate or
+replayed from a trace) regardless of how many requests are outstanding, and
+latency is measured from the scheduled send time. Unlike closed loop tools at a
+fixed concurrency, a slow server therefore shows up in the tail latency instead
+of silently lowering the offered load (coordinated omission).
+
+Latencies are recorded in HDR style log-linear histograms. For streaming
+responses the time to the first byte of the body is reported separately.
+
+python open_loop_benchmark.py -H http://127.0.0.1:8080 --model-url predictions/benchmark \
+    --input kitten.jpg --content-type application/jpg --requests 1000 --rate 50
+
+Run against a local stub server to check the load generator itself:
+
+python open_loop_benchmark.py --self-test
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+try:
+    from utils.histogram import LatencyHistogram
+except ImportError:
+    # Run as a script from benchmarks/utils
+    from histogram import LatencyHistogram
+
+
+def poisson_arrivals(rate, count, seed=0):
+    rng = random.Random(seed)
+    t, arrivals = 0.0, []
+    for _ in range(count):
+        arrivals.append(t)
+        t += rng.expovariate(rate)
+    return arrivals
+
+
+def constant_arrivals(rate, count):
+    return [i / rate for i in range(count)]
+
+
+def trace_arrivals(path, time_scale=1.0, count=None):
+    """
+    Reads a trace with one arrival per line, either the offset in seconds or a
+    JSON object with a "timestamp" in seconds and optionally the "name" of the
+    request in the request mix to send.
+
+    :return: list of (offset in seconds, name or None)
+    """
+    arrivals = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                record = json.loads(line)
+                arrivals.append((float(record["timestamp"]), record.get("name")))
+            else:
+                arrivals.append((float(line), None))
+    arrivals.sort(key=lambda a: a[0])
+    if count is not None:
+        arrivals = arrivals[:count]
+    start = arrivals[0][0] if arrivals else 0.0
+    return [((t - start) * time_scale, name) for t, name in arrivals]
+
+
+class RequestType(object):
+    def __init__(
+        self,
+        name,
+        url,
+        body=b"",
+        content_type="application/octet-stream",
+        headers=None,
+        stream=False,
+        weight=1.0,
+        model_name=None,
+    ):
+        self.name = name
+        self.url = url.lstrip("/")
+        self.body = body
+        self.content_type = content_type
+        self.headers = headers or {}
+        self.stream = stream
+        self.weight = weight
+        self.model_name = model_name or self.url.rstrip("/").split("/")[-1]
+
+
+def load_request_mix(path, default_url):
+    """
+    Reads a request mix, one JSON object per line with the fields
+    name, url, input (a file path relative to the mix) or body (a string or
+    a JSON value), content_type, headers, stream and weight.
+    """
+    mix = []
+    base_dir = os.path.dirname(os.path.abspath(path))
+    with open(path) as f:
+        for i, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            content_type = record.get("content_type")
+            if "input" in record:
+                with open(os.path.join(base_dir, record["input"]), "rb") as inp:
+                    body = inp.read()
+            else:
+                body = record.get("body", "")
+                if not isinstance(body, (str, bytes)):
+                    body = json.dumps(body)
+                    content_type = content_type or "application/json"
+                body = body.encode("utf-8") if isinstance(body, str) else body
+            mix.append(
+                RequestType(
+                    record.get("name", f"request_{i}"),
+                    record.get("url", default_url),
+                    body,
+                    content_type or "application/octet-stream",
+                    record.get("headers"),
+                    bool(record.get("stream", False)),
+                    float(record.get("weight", 1.0)),
+                    record.get("model_name"),
+                )
+            )
+    if not mix:
+        raise ValueError(f"No requests found in {path}")
+    return mix
+
+
+class StaleConnectionError(ConnectionError):
+    """The server closed the connection before sending a status line"""
+
+
+class HttpClient(object):
+    """Minimal HTTP/1.1 client with a pool of keep-alive connections"""
+
+    def __init__(self, base_url, timeout=300):
+        url = urlsplit(base_url)
+        self.host = url.hostname
+        self.port = url.port or 80
+        self.timeout = timeout
+        self._idle = []
+
+    async def request(self, request_type):
+        """Sends a request and returns the status code and the time of the first body byte"""
+        if self._idle:
+            reader, writer = self._idle.pop()
+            try:
+                result = await self._request(reader, writer, request_type)
+            except StaleConnectionError:
+                # The server closed the idle connection, e.g. on its keep-alive
+                # timeout: retried once on a fresh connection
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+                result = await self._request(reader, writer, request_type)
+        else:
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+            result = await self._request(reader, writer, request_type)
+        status, first_byte, keep_alive = result
+        if keep_alive:
+            self._idle.append((reader, writer))
+        else:
+            writer.close()
+        return status, first_byte
+
+    async def _request(self, reader, writer, request_type):
+        try:
+            return await asyncio.wait_for(
+                self._send(reader, writer, request_type), self.timeout
+            )
+        except BaseException:
+            writer.close()
+            raise
+
+    async def _send(self, reader, writer, request_type):
+        headers = {
+            "Host": f"{self.host}:{self.port}",
+            "Content-Type": request_type.content_type,
+            "Content-Length": str(len(request_type.body)),
+            "Connection": "keep-alive",
+        }
+        headers.update(request_type.headers)
+        head = f"POST /{request_type.url} HTTP/1.1\r\n" + "".join(
+            f"{k}: {v}\r\n" for k, v in headers.items()
+        )
+        writer.write(head.encode("latin-1") + b"\r\n" + request_type.body)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise StaleConnectionError("Connection closed by server")
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        first_byte = None
+        keep_alive = response_headers.get("connection", "").lower() != "close"
+        if response_headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                await reader.readexactly(size + 2)
+                if first_byte is None:
+                    first_byte = time.perf_counter()
+        elif "content-length" in response_headers:
+            length = int(response_headers["content-length"])
+            if length:
+                await reader.readexactly(length)
+                first_byte = time.perf_counter()
+        else:
+            await reader.read()
+            first_byte = time.perf_counter()
+            keep_alive = False
+        return status, first_byte, keep_alive
+
+    async def close(self):
+        for _, writer in self._idle:
+            writer.close()
+        for _, writer in self._idle:
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+        self._idle = []
+
+
+class GrpcClient(object):
+    """Client for the TorchServe gRPC inference API, needs grpcio and the generated stubs"""
+
+    def __init__(self, target, timeout=300):
+        # pylint: disable=import-outside-toplevel
+        import grpc
+        import inference_pb2
+        import inference_pb2_grpc
+
+        self.grpc = grpc
+        self.inference_pb2 = inference_pb2
+        self.channel = grpc.aio.insecure_channel(target)
+        self.stub = inference_pb2_grpc.InferenceAPIsServiceStub(self.channel)
+        self.timeout = timeout
+
+    async def request(self, request_type):
+        request = self.inference_pb2.PredictionsRequest(
+            model_name=request_type.model_name, input={"data": request_type.body}
+        )
+        try:
+            if request_type.stream:
+                first_byte = None
+                async for _ in self.stub.StreamPredictions(
+                    request, timeout=self.timeout
+                ):
+                    if first_byte is None:
+                        first_byte = time.perf_counter()
+                return 200, first_byte
+            await self.stub.Predictions(request, timeout=self.timeout)
+            return 200, time.perf_counter()
+        except self.grpc.RpcError as e:
+            return e.code().value[0], None
+
+    async def close(self):
+        await self.channel.close()
+
+
+class LoadGenerator(object):
+    """Issues requests on an arrival schedule and records their latency"""
+
+    def __init__(self, client, mix, max_in_flight=None, seed=0):
+        self.client = client
+        self.mix = mix
+        self.by_name = {request_type.name: request_type for request_type in mix}
+        self.semaphore = asyncio.Semaphore(max_in_flight) if max_in_flight else None
+        self.rng = random.Random(seed)
+        self.latency = defaultdict(LatencyHistogram)
+        self.ttfb = defaultdict(LatencyHistogram)
+        self.failures = defaultdict(int)
+
+    def _choose(self, name):
+        if name is not None:
+            return self.by_name[name]
+        if len(self.mix) == 1:
+            return self.mix[0]
+        return self.rng.choices(self.mix, weights=[r.weight for r in self.mix])[0]
+
+    async def _issue(self, intended, request_type):
+        try:
+            if self.semaphore is None:
+                status, first_byte = await self.client.request(request_type)
+            else:
+                async with self.semaphore:
+                    status, first_byte = await self.client.request(request_type)
+        except (
+            OSError,
+            EOFError,
+            asyncio.TimeoutError,
+            ValueError,
+            IndexError,
+        ):
+            # EOFError includes asyncio.IncompleteReadError, raised when the
+            # server closes the connection in the middle of a body
+            status, first_byte = None, None
+        done = time.perf_counter()
+        if status != 200:
+            self.failures[request_type.name] += 1
+            return
+        # Latency is measured from the scheduled send time
+        self.latency[request_type.name].record((done - intended) * 1e6)
+        if request_type.stream and first_byte is not None:
+            self.ttfb[request_type.name].record((first_byte - intended) * 1e6)
+
+    async def run(self, arrivals):
+        """
+        :param arrivals: list of offsets in seconds or of (offset, request name)
+        """
+        pending = set()
+        start = time.perf_counter() + 0.01
+        for arrival in arrivals:
+            offset, name = arrival if isinstance(arrival, tuple) else (arrival, None)
+            intended = start + offset
+            delay = intended - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            task = asyncio.ensure_future(self._issue(intended, self._choose(name)))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        if pending:
+            await asyncio.gather(*pending)
+        return time.perf_counter() - start
+
+    def report(self, duration):
+        latency, ttfb = LatencyHistogram(), LatencyHistogram()
+        for histogram in self.latency.values():
+            latency.merge(histogram)
+        for histogram in self.ttfb.values():
+            ttfb.merge(histogram)
+        num_failures = sum(self.failures.values())
+        num_requests = latency.count + num_failures
+        result = {
+            "num_requests": num_requests,
+            "num_failures": num_failures,
+            "duration_sec": round(duration, 3),
+            "throughput": round(latency.count / max(duration, 1e-9), 2),
+            "latency_ms": latency.summary(),
+            "by_name": {},
+        }
+        if ttfb.count:
+            result["ttfb_ms"] = ttfb.summary()
+        for request_type in self.mix:
+            name = request_type.name
+            by_name = {
+                "num_failures": self.failures.get(name, 0),
+                "latency_ms": self.latency[name].summary(),
+            }
+            if name in self.ttfb:
+                by_name["ttfb_ms"] = self.ttfb[name].summary()
+            result["by_name"][name] = by_name
+        return result
+
+
+class StubServer(object):
+    """
+    HTTP server answering every request after a fixed delay. Requests to a url
+    containing "stream" are answered with chunks, like a streaming handler.
+    """
+
+    def __init__(self, delay_ms=5.0, chunks=4, chunk_delay_ms=2.0):
+        self.delay = delay_ms / 1000
+        self.chunks = chunks
+        self.chunk_delay = chunk_delay_ms / 1000
+        self.server = None
+        self.port = None
+        self._handlers = set()
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{self.port}"
+
+    async def stop(self):
+        self.server.close()
+        for task in list(self._handlers):
+            task.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                length = 0
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    if name.strip().lower() == "content-length":
+                        length = int(value)
+                await reader.readexactly(length)
+                await asyncio.sleep(self.delay)
+
+                if b"stream" in request_line:
+                    writer.write(
+                        b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+                    )
+                    for i in range(self.chunks):
+                        chunk = json.dumps({"token": i}).encode("utf-8")
+                        writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                        await writer.drain()
+                        await asyncio.sleep(self.chunk_delay)
+                    writer.write(b"0\r\n\r\n")
+                else:
+                    body = b'{"result": "ok"}'
+                    writer.write(
+                        b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n%s"
+                        % (len(body), body)
+                    )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            self._handlers.discard(task)
+            writer.close()
+
+
+def create_arrivals(args):
+    if args.arrival == "trace":
+        if not args.trace:
+            raise ValueError("--trace is required for trace arrivals")
+        return trace_arrivals(args.trace, args.time_scale, args.requests)
+    if args.arrival == "constant":
+        return constant_arrivals(args.rate, args.requests)
+    return poisson_arrivals(args.rate, args.requests, args.seed)
+
+
+def create_mix(args):
+    if args.request_mix:
+        return load_request_mix(args.request_mix, args.model_url)
+    body = b""
+    if args.input:
+        with open(args.input, "rb") as f:
+            body = f.read()
+    return [
+        RequestType(
+            "default",
+            args.model_url,
+            body,
+            args.content_type,
+            stream=args.stream,
+            model_name=args.model_name,
+        )
+    ]
+
+
+async def run(args, base_url=None):
+    if args.protocol == "grpc":
+        client = GrpcClient(args.grpc_target, args.timeout)
+    else:
+        client = HttpClient(base_url or args.host, args.timeout)
+    generator = LoadGenerator(client, create_mix(args), args.max_in_flight, args.seed)
+    try:
+        duration = await generator.run(create_arrivals(args))
+    finally:
+        await client.close()
+    return generator.report(duration)
+
+
+async def self_test(args):
+    """Runs a Poisson and a streaming request mix against the stub server"""
+    stub = StubServer(delay_ms=5)
+    base_url = await stub.start()
+    try:
+        args.request_mix = None
+        args.model_url, args.content_type, args.stream = (
+            "predictions/stub",
+            "text/plain",
+            False,
+        )
+        result = await run(args, base_url)
+
+        mix = [
+            RequestType("predict", "predictions/stub", b"x" * 1024, "text/plain"),
+            RequestType(
+                "stream", "predictions/stream", b"{}", "application/json", stream=True
+            ),
+        ]
+        generator = LoadGenerator(HttpClient(base_url), mix, seed=args.seed)
+        duration = await generator.run(
+            poisson_arrivals(args.rate, args.requests, args.seed)
+        )
+        await generator.client.close()
+        stream_result = generator.report(duration)
+    finally:
+        await stub.stop()
+
+    assert result["num_failures"] == 0, result
+    assert result["num_requests"] == args.requests, result
+    assert result["latency_ms"]["p50"] >= 5, result
+    assert stream_result["num_failures"] == 0, stream_result
+    assert "ttfb_ms" in stream_result["by_name"]["stream"], stream_result
+    return {"single": result, "mix": stream_result}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-H", "--host", default="http://127.0.0.1:8080")
+    parser.add_argument("--model-url", default="predictions/benchmark")
+    parser.add_argument("--model-name", help="model name for gRPC requests")
+    parser.add_argument("--input", help="request body file")
+    parser.add_argument("--content-type", default="application/octet-stream")
+    parser.add_argument("--stream", action="store_true", help="streaming responses")
+    parser.add_argument("--request-mix", help="JSONL file of weighted request types")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument(
+        "--arrival", choices=["poisson", "constant", "trace"], default="poisson"
+    )
+    parser.add_argument("--rate", type=float, default=10.0, help="requests per second")
+    parser.add_argument("--trace", help="arrival trace for --arrival trace")
+    parser.add_argument(
+        "--time-scale", type=float, default=1.0, help="stretch factor of the trace"
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=None,
+        help="cap of outstanding requests, waiting for a slot counts as latency",
+    )
+    parser.add_argument("--protocol", choices=["http", "grpc"], default="http")
+    parser.add_argument("--grpc-target", default="127.0.0.1:7070")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON result to this file")
+    parser.add_argument(
+        "--self-test", action="store_true", help="run against a local stub server"
+    )
+    args = parser.parse_args()
+
+    if args.self_test:
+        result = asyncio.run(self_test(args))
+    else:
+        result = asyncio.run(run(args))
+
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+    if not args.self_test and result["num_failures"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
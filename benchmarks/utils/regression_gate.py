@@ -0,0 +1,156 @@
+"""
+Statistical regression gate of the benchmark reports.
+
+Every benchmark config is run for several trials, one row per trial in its
+ab_report.csv. The trials of the current run and of the baseline reports are
+summarized by bootstrap confidence intervals of the mean of the throughput and
+of the p50/p90/p99 latencies, and a metric only regresses when the intervals
+separate, so the noise of the host does not fail the gate.
+"""
+import json
+
+import numpy as np
+from utils.report import higher_is_better
+
+GATED_METRICS = [
+    "TS throughput",
+    "TS latency P50",
+    "TS latency P90",
+    "TS latency P99",
+]
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_RESAMPLES = 2000
+# A percentile bootstrap of fewer trials has no useful coverage
+MIN_TRIALS = 3
+
+REGRESSION = "regression"
+IMPROVEMENT = "improvement"
+UNCHANGED = "unchanged"
+INCONCLUSIVE = "inconclusive"
+
+
+class ConfidenceInterval(object):
+    def __init__(self, mean, low, high, trials):
+        self.mean = mean
+        self.low = low
+        self.high = high
+        self.trials = trials
+
+    def to_dict(self):
+        return {
+            "mean": round(self.mean, 3),
+            "low": round(self.low, 3),
+            "high": round(self.high, 3),
+            "trials": self.trials,
+        }
+
+
+def bootstrap_ci(
+    samples, confidence=DEFAULT_CONFIDENCE, resamples=DEFAULT_RESAMPLES, seed=0
+):
+    """Percentile bootstrap confidence interval of the mean of the samples"""
+    samples = np.asarray(samples, dtype=np.float64)
+    if len(samples) == 0:
+        raise ValueError("bootstrap_ci needs at least one sample")
+    rng = np.random.default_rng(seed)
+    means = samples[rng.integers(0, len(samples), (resamples, len(samples)))].mean(
+        axis=1
+    )
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(means, [alpha, 1 - alpha])
+    return ConfidenceInterval(
+        float(samples.mean()), float(low), float(high), len(samples)
+    )
+
+
+def compare_metric(
+    key,
+    current,
+    baseline,
+    confidence=DEFAULT_CONFIDENCE,
+    resamples=DEFAULT_RESAMPLES,
+    min_trials=MIN_TRIALS,
+):
+    """
+    Compares the trials of a metric with the trials of the baseline.
+
+    :return: dict with the verdict and the confidence intervals of both sides
+    """
+    current_ci = bootstrap_ci(current, confidence, resamples)
+    baseline_ci = bootstrap_ci(baseline, confidence, resamples)
+    higher = higher_is_better(key)
+
+    if len(current) < min_trials or len(baseline) < min_trials:
+        verdict = INCONCLUSIVE
+    elif current_ci.high < baseline_ci.low:
+        verdict = IMPROVEMENT if not higher else REGRESSION
+    elif current_ci.low > baseline_ci.high:
+        verdict = REGRESSION if not higher else IMPROVEMENT
+    else:
+        verdict = UNCHANGED
+
+    change = (
+        (current_ci.mean - baseline_ci.mean) / baseline_ci.mean * 100
+        if baseline_ci.mean
+        else 0.0
+    )
+    return {
+        "verdict": verdict,
+        "higher_is_better": higher,
+        "change_percentage": round(change, 2),
+        "baseline": baseline_ci.to_dict(),
+        "current": current_ci.to_dict(),
+    }
+
+
+def gate_reports(
+    current_reports,
+    baseline_reports,
+    confidence=DEFAULT_CONFIDENCE,
+    resamples=DEFAULT_RESAMPLES,
+    min_trials=MIN_TRIALS,
+):
+    """
+    Compares the trials of the current reports with the baseline reports.
+
+    :param current_reports: dict of model config name to utils.report.Report
+    :param baseline_reports: dict of model config name to utils.report.Report
+        accumulating the trials of all baseline runs
+    :return: verdict dict, which is written as JSON by write_verdict
+    """
+    models = {}
+    for model, report in current_reports.items():
+        baseline = baseline_reports.get(model)
+        if baseline is None:
+            models[model] = {"verdict": "no_baseline", "metrics": {}}
+            continue
+        metrics = {}
+        for key in GATED_METRICS:
+            if not report.trials.get(key) or not baseline.trials.get(key):
+                continue
+            metrics[key] = compare_metric(
+                key,
+                report.trials[key],
+                baseline.trials[key],
+                confidence,
+                resamples,
+                min_trials,
+            )
+        regressed = any(m["verdict"] == REGRESSION for m in metrics.values())
+        models[model] = {
+            "verdict": REGRESSION if regressed else "pass",
+            "metrics": metrics,
+        }
+
+    return {
+        "regression": any(m["verdict"] == REGRESSION for m in models.values()),
+        "confidence": confidence,
+        "resamples": resamples,
+        "min_trials": min_trials,
+        "models": models,
+    }
+
+
+def write_verdict(verdict, path):
+    with open(path, "w") as f:
+        json.dump(verdict, f, indent=4)
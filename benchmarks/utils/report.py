@@ -32,6 +32,8 @@ class Report:
         self.workers = 0
         self.deviation = deviation
         self.num_reports = num_reports
+        # Values of the properties in every trial, one row of the csv per trial
+        self.trials = {}
 
     def _get_mode(self, csv_file):
         cfg = csv_file.split("/")[-2]
@@ -41,29 +43,35 @@ class Report:
 
     def read_csv(self, csv_file):
         with open(csv_file, newline="") as f:
-            reader = csv.DictReader(f)
-            for k, v in next(reader).items():
-                if k in METRICS_VALIDATED:
-                    self.properties[k] = float(v)
+            for row in csv.DictReader(f):
+                for k, v in row.items():
+                    if k in METRICS_VALIDATED:
+                        self.trials.setdefault(k, []).append(float(v))
+        # The properties are the mean of the trials
+        for k, values in self.trials.items():
+            self.properties[k] = sum(values) / len(values)
         self._get_mode(csv_file)
 
     def update(self, report):
         for property in self.properties:
             # sum the properties to find the mean later
             self.properties[property] += report.properties[property]
+            self.trials[property].extend(report.trials[property])
 
     def mean(self):
         for k, v in self.properties.items():
             self.properties[k] = v / self.num_reports
 
 
-def metric_valid(key, obs_val, exp_val, threshold):
+def higher_is_better(key):
     # In case of throughput, higher is better
-    # In case of memory, lower is better.
+    # In case of latencies and memory, lower is better.
+    return "throughput" in key
+
+
+def metric_valid(key, obs_val, exp_val, threshold):
     # We ignore lower values for memory related metrices
-    lower = False
-    if "throughput" not in key:
-        lower = True
+    lower = not higher_is_better(key)
     return check_if_within_threshold(exp_val, obs_val, threshold) or (
         (obs_val < exp_val and lower) or (obs_val > exp_val and not lower)
     )
@@ -8,14 +8,11 @@ import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 from utils.common import is_file_empty
+from utils.metrics_log_parser import MetricsLogParser
 
 
 def extract_metrics(execution_params, warm_up_lines):
-    with open(execution_params["metric_log"]) as f:
-        lines = f.readlines()
-
     click.secho(f"Dropping {warm_up_lines} warmup lines from log", fg="green")
-    lines = lines[warm_up_lines:]
 
     metrics = {
         "predict.txt": "PredictionTime",
@@ -31,20 +28,34 @@ def extract_metrics(execution_params, warm_up_lines):
 
     update_metrics(execution_params, metrics)
 
-    for k, v in metrics.items():
-        all_lines = []
-        pattern = re.compile(v)
-        for line in lines:
-            if pattern.search(line):
-                all_lines.append(line.split("|")[0].split(":")[3].strip())
+    parser = MetricsLogParser(metrics.values())
+    out_files = []
+    try:
+        for k, v in metrics.items():
+            out_fname = os.path.join(*(execution_params["tmp_dir"], "benchmark", k))
+            click.secho(f"\nWriting extracted {v} metrics to {out_fname} ", fg="green")
+            outf = open(out_fname, "w")
+            out_files.append(outf)
+            parser.add_listener(
+                lambda matches, outf=outf: outf.writelines(
+                    m[2] + "\n" for m in matches
+                ),
+                metric=v,
+            )
+
+        parser.parse_file(execution_params["metric_log"], skip_lines=warm_up_lines)
+    finally:
+        for outf in out_files:
+            outf.close()
+
+    parser.write_summary(metrics_summary_path(execution_params))
+    return metrics
 
-        out_fname = os.path.join(*(execution_params["tmp_dir"], "benchmark", k))
-        click.secho(f"\nWriting extracted {v} metrics to {out_fname} ", fg="green")
-        with open(out_fname, "w") as outf:
-            all_lines = map(lambda x: x + "\n", all_lines)
-            outf.writelines(all_lines)
 
-    return metrics
+def metrics_summary_path(execution_params):
+    return os.path.join(
+        execution_params["report_location"], "benchmark", "metrics_summary.json"
+    )
 
 
 def update_metrics(execution_params, metrics):
@@ -132,46 +143,46 @@ def extract_locust_tool_benchmark_artifacts(execution_params):
     return artifacts
 
 
+def extract_open_loop_tool_benchmark_artifacts(execution_params):
+    with open(execution_params["result_file"], "r") as f:
+        data = json.load(f)
+
+    artifacts = {"Benchmark": "OpenLoop"}
+    artifacts["TS failed requests"] = data["num_failures"]
+    artifacts["TS throughput"] = data["throughput"]
+    for p in [50, 90, 99]:
+        artifacts[f"TS latency P{p}"] = data["latency_ms"][f"p{p}"]
+    artifacts["TS latency mean"] = data["latency_ms"]["mean"]
+    artifacts["TS error rate"] = (
+        data["num_failures"] / max(data["num_requests"], 1) * 100
+    )
+    if "ttfb_ms" in data:
+        for p in [50, 90, 99]:
+            artifacts[f"TS TTFB P{p}"] = data["ttfb_ms"][f"p{p}"]
+
+    return artifacts
+
+
 def extract_torchserve_artifacts(execution_params, metrics):
-    batched_requests = execution_params["requests"] / execution_params["batch_size"]
-    line50 = int(batched_requests / 2)
-    line90 = int(batched_requests * 9 / 10)
-    line99 = int(batched_requests * 99 / 100)
+    with open(metrics_summary_path(execution_params)) as f:
+        summary = json.load(f)
+
+    def percentile(metric, p):
+        return summary[metric][f"p{p}"] if metric in summary else 0.0
 
     artifacts = {}
 
-    with open(
-        os.path.join(execution_params["tmp_dir"], "benchmark", "predict.txt")
-    ) as f:
-        lines = f.readlines()
-        lines.sort(key=float)
-        artifacts["Model_p50"] = lines[line50].strip()
-        artifacts["Model_p90"] = lines[line90].strip()
-        artifacts["Model_p99"] = lines[line99].strip()
+    for p in [50, 90, 99]:
+        artifacts[f"Model_p{p}"] = percentile("PredictionTime", p)
 
-    with open(
-        os.path.join(execution_params["tmp_dir"], "benchmark", "waiting_time.txt")
-    ) as f:
-        lines = f.readlines()
-        lines.sort(key=float)
-        num_requests = len(lines)
-        line50 = int(num_requests / 2)
-        line90 = int(num_requests * 9 / 10)
-        line99 = int(num_requests * 99 / 100)
-        artifacts["Queue time p50"] = lines[line50].strip()
-        artifacts["Queue time p90"] = lines[line90].strip()
-        artifacts["Queue time p99"] = lines[line99].strip()
+    for p in [50, 90, 99]:
+        artifacts[f"Queue time p{p}"] = percentile("QueueTime", p)
 
-    for m in metrics:
-        df = pd.read_csv(
-            os.path.join(*(execution_params["tmp_dir"], "benchmark", m)),
-            header=None,
-            names=["data"],
-        )
-        if df.empty:
-            artifacts[m.split(".txt")[0] + "_mean"] = 0.0
+    for m, name in metrics.items():
+        if name in summary:
+            artifacts[m.split(".txt")[0] + "_mean"] = round(summary[name]["mean"], 2)
         else:
-            artifacts[m.split(".txt")[0] + "_mean"] = df["data"].values.mean().round(2)
+            artifacts[m.split(".txt")[0] + "_mean"] = 0.0
 
     return artifacts
 
@@ -1,6 +1,15 @@
 import argparse
 import os
+import sys
 
+from utils.gen_md_report import gen_regression_report
+from utils.regression_gate import (
+    DEFAULT_CONFIDENCE,
+    GATED_METRICS,
+    MIN_TRIALS,
+    gate_reports,
+    write_verdict,
+)
 from utils.report import (
     ACCEPTABLE_METRIC_DEVIATION,
     METRICS_VALIDATED,
@@ -14,7 +23,13 @@ from utils.update_artifacts import (
 )
 
 
-def validate_reports(artifacts_dir, report_dir, deviation):
+def validate_reports(
+    artifacts_dir,
+    report_dir,
+    deviation,
+    confidence=DEFAULT_CONFIDENCE,
+    min_trials=MIN_TRIALS,
+):
     # Read baseline reports
     baseline_reports = {}
     num_reports = len(os.listdir(artifacts_dir))
@@ -44,10 +59,34 @@ def validate_reports(artifacts_dir, report_dir, deviation):
             report.read_csv(csv_file)
             generated_reports[subdir] = report
 
-    # Compare generated reports with baseline reports
-    error = False
+    # Throughput and latencies regress when the confidence intervals of their
+    # trials separate
+    verdict = gate_reports(
+        generated_reports, baseline_reports, confidence, min_trials=min_trials
+    )
+
+    # Compare the other metrics, and the gated metrics without enough trials,
+    # with baseline reports
     for model, report in generated_reports.items():
+        if model not in baseline_reports:
+            print(f"No baseline report for model: {model}")
+            continue
+        error = False
+        gated = verdict["models"][model]["metrics"]
         for key in METRICS_VALIDATED:
+            if key not in report.properties:
+                continue
+            if key in gated and gated[key]["verdict"] != "inconclusive":
+                if gated[key]["verdict"] == "regression":
+                    print(
+                        f"Regression of {key} for model: {model}, "
+                        f"Expected interval: [{gated[key]['baseline']['low']:.2f}, "
+                        f"{gated[key]['baseline']['high']:.2f}], "
+                        f"Observed interval: [{gated[key]['current']['low']:.2f}, "
+                        f"{gated[key]['current']['high']:.2f}]"
+                    )
+                    error = True
+                continue
             if not metric_valid(
                 key,
                 report.properties[key],
@@ -63,6 +102,8 @@ def validate_reports(artifacts_dir, report_dir, deviation):
         if not error:
             print(f"Model {model} successfully validated")
 
+    return verdict
+
 
 def main():
     parser = argparse.ArgumentParser()
@@ -87,8 +128,42 @@ def main():
         type=float,
         default=ACCEPTABLE_METRIC_DEVIATION,
     )
+    parser.add_argument(
+        "--confidence",
+        help="confidence level of the intervals of " + ", ".join(GATED_METRICS),
+        type=float,
+        default=DEFAULT_CONFIDENCE,
+    )
+
+    parser.add_argument(
+        "--min-trials",
+        help="trials needed to gate on the confidence intervals instead of the deviation",
+        type=int,
+        default=MIN_TRIALS,
+    )
+
+    parser.add_argument(
+        "--output-dir",
+        help="directory where the regression verdict and report are saved, "
+        "the current benchmark report directory by default",
+        type=str,
+        default=None,
+    )
     args = parser.parse_args()
-    validate_reports(args.input_artifacts_dir, args.input_report_dir, args.deviation)
+    verdict = validate_reports(
+        args.input_artifacts_dir,
+        args.input_report_dir,
+        args.deviation,
+        args.confidence,
+        args.min_trials,
+    )
+
+    output_dir = args.output_dir or args.input_report_dir
+    write_verdict(verdict, os.path.join(output_dir, "regression_verdict.json"))
+    gen_regression_report(verdict, os.path.join(output_dir, "regression_report.md"))
+
+    if verdict["regression"]:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
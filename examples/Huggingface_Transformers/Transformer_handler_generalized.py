@@ -15,6 +15,7 @@ from transformers import (
     GPT2TokenizerFast,
 )
 
+from ts.handler_utils.length_bucketing import LengthBucketing
 from ts.torch_handler.base_handler import BaseHandler
 
 logger = logging.getLogger(__name__)
@@ -29,6 +30,7 @@ class TransformersSeqClassifierHandler(BaseHandler):
     def __init__(self):
         super(TransformersSeqClassifierHandler, self).__init__()
         self.setup_config = None
+        self.length_bucketing = None
         self.initialized = False
 
     def initialize(self, ctx):
@@ -123,6 +125,19 @@ class TransformersSeqClassifierHandler(BaseHandler):
 
         self.model.eval()
 
+        # Length bucketing needs a model accepting variable sequence lengths,
+        # traced torchscript models are fixed to max_length
+        if (
+            "length_bucketing" in self.setup_config
+            and self.setup_config["save_mode"] == "pretrained"
+            and self.setup_config["mode"]
+            in {"sequence_classification", "token_classification"}
+        ):
+            self.length_bucketing = LengthBucketing.from_config(
+                self.setup_config["length_bucketing"],
+                pad_value=self.tokenizer.pad_token_id or 0,
+            )
+
         pt2_value = self.model_yaml_config.get("pt2", {})
         if "compile" in pt2_value:
             compile_options = pt2_value["compile"]
@@ -161,6 +176,9 @@ class TransformersSeqClassifierHandler(BaseHandler):
         Returns:
             list : The preprocess function returns a list of Tensor for the size of the word tokens.
         """
+        if self.length_bucketing is not None and not self._is_explain():
+            return self._preprocess_unpadded(requests)
+
         input_ids_batch = None
         attention_mask_batch = None
         for idx, data in enumerate(requests):
@@ -228,6 +246,68 @@ class TransformersSeqClassifierHandler(BaseHandler):
                     )
         return (input_ids_batch, attention_mask_batch)
 
+    def _preprocess_unpadded(self, requests):
+        """Tokenizes the requests without padding, padding is applied per length bucket
+        in inference.
+        Args:
+            requests (list): The Input data in the form of text.
+        Returns:
+            list : A list of token ids per request.
+        """
+        max_length = int(self.setup_config["max_length"])
+        sequences = []
+        for data in requests:
+            input_text = data.get("data")
+            if input_text is None:
+                input_text = data.get("body")
+            if isinstance(input_text, (bytes, bytearray)):
+                input_text = input_text.decode("utf-8")
+            if self.setup_config["captum_explanation"]:
+                input_text = ast.literal_eval(input_text)["text"]
+            sequences.append(
+                self.tokenizer.encode(
+                    input_text,
+                    max_length=max_length,
+                    truncation=True,
+                    add_special_tokens=True,
+                )
+            )
+        return sequences
+
+    def _bucketed_inference(self, sequences):
+        """Runs sequence or token classification on length buckets of the batch.
+        Args:
+            sequences (list): Unpadded token ids per request
+        Returns:
+            list : The predictions in the order of the requests
+        """
+
+        def forward(input_ids, attention_mask):
+            outputs = self.model(input_ids, attention_mask)[0]
+            if self.setup_config["mode"] == "sequence_classification":
+                return [
+                    self.mapping[str(y_hat)] for y_hat in outputs.argmax(1).tolist()
+                ]
+
+            label_list = self.mapping["label_list"].strip("][").split(", ")
+            inferences = []
+            for row, predictions in enumerate(outputs.argmax(2).tolist()):
+                length = int(attention_mask[row].sum())
+                tokens = self.tokenizer.tokenize(
+                    self.tokenizer.decode(input_ids[row][:length])
+                )
+                inferences.append(
+                    [
+                        (token, label_list[prediction])
+                        for token, prediction in zip(tokens, predictions)
+                    ]
+                )
+            return inferences
+
+        return self.length_bucketing.run(
+            sequences, forward, device=self.device, metrics=self.context.metrics
+        )
+
     @torch.inference_mode
     def inference(self, input_batch):
         """Predict the class (or classes) of the received text using the
@@ -237,6 +317,9 @@ class TransformersSeqClassifierHandler(BaseHandler):
         Returns:
             list : It returns a list of the predicted value for the input text
         """
+        if self.length_bucketing is not None and isinstance(input_batch, list):
+            return self._bucketed_inference(input_batch)
+
         input_ids_batch, attention_mask_batch = input_batch
         inferences = []
         # Handling inference for sequence_classification.
@@ -2,9 +2,8 @@ import logging
 from abc import ABC
 from typing import Dict
 
-from lru import LRU
-
 from ts.context import Context
+from ts.handler_utils.session_store import SessionStateStore
 from ts.torch_handler.base_handler import BaseHandler
 
 logger = logging.getLogger(__name__)
@@ -15,7 +14,7 @@ class StatefulHandler(BaseHandler, ABC):
 
     def __init__(self):
         super().__init__()
-        self.cache: LRU = None
+        self.cache: SessionStateStore = None
         self.sequence_ids: Dict = None
         self.context = None
 
@@ -28,12 +27,17 @@ class StatefulHandler(BaseHandler, ABC):
         self.context = ctx
         if self.context.model_yaml_config["handler"] is not None:
             try:
-                self.cache = LRU(
-                    int(self.context.model_yaml_config["handler"]["cache"]["capacity"])
+                self.cache = SessionStateStore(
+                    max_sessions=int(
+                        self.context.model_yaml_config["handler"]["cache"]["capacity"]
+                    ),
+                    metrics=ctx.metrics,
                 )
             except KeyError:
                 logger.error("No cache capacity was set! Using default value.")
-                self.cache = LRU(StatefulHandler.DEFAULT_CAPACITY)
+                self.cache = SessionStateStore(
+                    max_sessions=StatefulHandler.DEFAULT_CAPACITY, metrics=ctx.metrics
+                )
 
         self.initialized = True
 
@@ -55,7 +59,7 @@ class StatefulHandler(BaseHandler, ABC):
             sequence_id = self.context.get_sequence_id(idx)
 
             prev = int(0)
-            if self.cache.has_key(sequence_id):
+            if sequence_id in self.cache:
                 prev = int(self.cache[sequence_id])
 
             request = row.get("data") or row.get("body")
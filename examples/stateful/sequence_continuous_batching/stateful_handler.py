@@ -2,9 +2,8 @@ import logging
 import time
 from abc import ABC
 
-from lru import LRU
-
 from ts.context import Context
+from ts.handler_utils.session_store import SessionStateStore
 from ts.torch_handler.base_handler import BaseHandler
 
 logger = logging.getLogger(__name__)
@@ -15,7 +14,7 @@ class StatefulHandler(BaseHandler, ABC):
 
     def __init__(self):
         super().__init__()
-        self.cache: LRU = None
+        self.cache: SessionStateStore = None
 
     def initialize(self, ctx: Context):
         """
@@ -31,12 +30,14 @@ class StatefulHandler(BaseHandler, ABC):
         # None(ie. non response streaming request), True or False (ie. streaming complete or not)
         ctx.cache = {}
         if ctx.model_yaml_config["handler"] is not None:
-            self.cache = LRU(
-                int(
-                    ctx.model_yaml_config["handler"]
-                    .get("cache", {})
-                    .get("capacity", StatefulHandler.DEFAULT_CAPACITY)
-                )
+            # The cache section takes the SessionStateStore options, e.g. ttl_sec
+            # or spill, with capacity as the max number of sessions
+            cache_config = dict(ctx.model_yaml_config["handler"].get("cache", {}))
+            cache_config["max_sessions"] = int(
+                cache_config.pop("capacity", StatefulHandler.DEFAULT_CAPACITY)
+            )
+            self.cache = SessionStateStore.from_config(
+                cache_config, metrics=ctx.metrics
             )
 
         self.initialized = True
@@ -73,7 +74,7 @@ class StatefulHandler(BaseHandler, ABC):
                     "end": False,
                     "num_requests": 0,
                 }
-            elif self.cache.has_key(sequence_id):
+            elif sequence_id in self.cache:
                 prev = int(self.cache[sequence_id])
             else:
                 prev = None
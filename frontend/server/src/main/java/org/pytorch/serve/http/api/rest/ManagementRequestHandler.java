@@ -17,6 +17,7 @@ import org.pytorch.serve.archive.model.ModelException;
 import org.pytorch.serve.archive.model.ModelNotFoundException;
 import org.pytorch.serve.archive.model.ModelVersionNotFoundException;
 import org.pytorch.serve.archive.workflow.WorkflowException;
+import org.pytorch.serve.http.BadRequestException;
 import org.pytorch.serve.http.HttpRequestHandlerChain;
 import org.pytorch.serve.http.InternalServerException;
 import org.pytorch.serve.http.MethodNotAllowedException;
@@ -35,6 +36,7 @@ import org.pytorch.serve.util.ApiUtils;
 import org.pytorch.serve.util.ConfigManager;
 import org.pytorch.serve.util.JsonUtils;
 import org.pytorch.serve.util.NettyUtils;
+import org.pytorch.serve.util.messages.InputParameter;
 import org.pytorch.serve.util.messages.RequestInput;
 import org.pytorch.serve.util.messages.WorkerCommands;
 import org.pytorch.serve.wlm.Model;
@@ -95,6 +97,10 @@ public class ManagementRequestHandler extends HttpRequestHandlerChain {
                 } else if (HttpMethod.PUT.equals(method)) {
                     if (segments.length == 5 && "set-default".equals(segments[4])) {
                         setDefaultModelVersion(ctx, segments[2], segments[3]);
+                    } else if (segments.length == 5 && "profile".equals(segments[4])) {
+                        handleProfileModel(ctx, decoder, segments[2], segments[3]);
+                    } else if (segments.length == 4 && "profile".equals(segments[3])) {
+                        handleProfileModel(ctx, decoder, segments[2], null);
                     } else {
                         handleScaleModel(ctx, decoder, segments[2], modelVersion);
                     }
@@ -131,6 +137,7 @@ public class ManagementRequestHandler extends HttpRequestHandlerChain {
         return segments.length == 0
                 || ((segments.length >= 2 && segments.length <= 4) && segments[1].equals("models"))
                 || (segments.length == 5 && "set-default".equals(segments[4]))
+                || (segments.length == 5 && "profile".equals(segments[4]))
                 || endpointMap.containsKey(segments[1]);
     }
 
@@ -175,6 +182,56 @@ public class ManagementRequestHandler extends HttpRequestHandlerChain {
         }
     }
 
+    private void handleProfileModel(
+            ChannelHandlerContext ctx,
+            QueryStringDecoder decoder,
+            String modelName,
+            String modelVersion)
+            throws ModelNotFoundException, ModelVersionNotFoundException {
+        ModelManager modelManager = ModelManager.getInstance();
+        Model model = modelManager.getModel(modelName, modelVersion);
+        if (model == null) {
+            throw new ModelNotFoundException("Model not found: " + modelName);
+        }
+        if (model.isAsyncCommunication()
+                || model.isSequenceBatching()
+                || model.isContinuousBatching()) {
+            throw new BadRequestException(
+                    "Profiling is not supported with asyncCommunication, sequence batching or "
+                            + "continuous batching");
+        }
+        // The profile is started and collected by two commands, which must reach the same worker
+        if (modelManager.getWorkers(model.getModelVersionName()).size() != 1) {
+            throw new BadRequestException(
+                    "Profiling needs a model scaled to a single worker: " + modelName);
+        }
+        int durationMs = NettyUtils.getIntParameter(decoder, "duration_ms", 10000);
+        if (durationMs <= 0) {
+            throw new BadRequestException("duration_ms should be positive: " + durationMs);
+        }
+
+        String requestId = NettyUtils.getRequestId(ctx.channel());
+        RequestInput input = new RequestInput(requestId);
+        input.addParameter(new InputParameter("duration_ms", String.valueOf(durationMs)));
+        input.addParameter(
+                new InputParameter(
+                        "interval_us",
+                        String.valueOf(NettyUtils.getIntParameter(decoder, "interval_us", 10000))));
+        input.addParameter(
+                new InputParameter(
+                        "format", NettyUtils.getParameter(decoder, "format", "collapsed")));
+        input.addParameter(
+                new InputParameter(
+                        "torch_profiler",
+                        NettyUtils.getParameter(decoder, "torch_profiler", "false")));
+        RestJob job =
+                new RestJob(ctx, modelName, model.getVersion(), WorkerCommands.PROFILE, input);
+        if (!modelManager.addJob(job)) {
+            throw new ServiceUnavailableException(
+                    "Model \"" + modelName + "\" has no worker to serve the profile request");
+        }
+    }
+
     private void handleKF1ModelReady(
             ChannelHandlerContext ctx, String modelName, String modelVersion)
             throws ModelNotFoundException, ModelVersionNotFoundException {
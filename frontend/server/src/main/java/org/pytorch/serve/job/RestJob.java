@@ -15,6 +15,7 @@ import io.netty.handler.codec.http.HttpResponseStatus;
 import io.netty.handler.codec.http.HttpVersion;
 import io.netty.handler.codec.http.LastHttpContent;
 import io.netty.util.CharsetUtil;
+import java.net.HttpURLConnection;
 import java.util.ArrayList;
 import java.util.Arrays;
 import java.util.List;
@@ -31,14 +32,17 @@ import org.pytorch.serve.util.ApiUtils;
 import org.pytorch.serve.util.ConfigManager;
 import org.pytorch.serve.util.JsonUtils;
 import org.pytorch.serve.util.NettyUtils;
+import org.pytorch.serve.util.messages.InputParameter;
 import org.pytorch.serve.util.messages.RequestInput;
 import org.pytorch.serve.util.messages.WorkerCommands;
+import org.pytorch.serve.wlm.ModelManager;
 import org.slf4j.Logger;
 import org.slf4j.LoggerFactory;
 
 public class RestJob extends Job {
 
     private static final Logger logger = LoggerFactory.getLogger(RestJob.class);
+    private static final long PROFILE_POLL_INTERVAL_MS = 100;
 
     private final IMetric inferenceLatencyMetric;
     private final IMetric queueLatencyMetric;
@@ -87,6 +91,51 @@ public class RestJob extends Job {
             responseInference(body, contentType, statusCode, statusPhrase, responseHeaders);
         } else if (this.getCmd() == WorkerCommands.DESCRIBE) {
             responseDescribe(body, contentType, statusCode, statusPhrase, responseHeaders);
+        } else if (this.getCmd() == WorkerCommands.PROFILE) {
+            responseProfile(body, statusCode);
+        }
+    }
+
+    /**
+     * The worker replies 202 to the command starting the profile, and to the commands collecting
+     * it while the window is open. The profile is collected when the window is over, then polled
+     * until the worker returns it with 200.
+     */
+    private void responseProfile(byte[] body, int statusCode) {
+        if (statusCode == HttpURLConnection.HTTP_ACCEPTED) {
+            String duration = getPayload().getStringParameter("duration_ms");
+            long delayMs = Math.max(Long.parseLong(duration), PROFILE_POLL_INTERVAL_MS);
+            RequestInput input = new RequestInput(getPayload().getRequestId());
+            input.addParameter(new InputParameter("duration_ms", "0"));
+            input.addParameter(new InputParameter("interval_us", "0"));
+            input.addParameter(new InputParameter("format", ""));
+            input.addParameter(new InputParameter("torch_profiler", "false"));
+            RestJob collect =
+                    new RestJob(
+                            ctx, getModelName(), getModelVersion(), WorkerCommands.PROFILE, input);
+            ctx.executor().schedule(collect::submit, delayMs, TimeUnit.MILLISECONDS);
+        } else if (statusCode == HttpURLConnection.HTTP_OK) {
+            FullHttpResponse resp =
+                    new DefaultFullHttpResponse(
+                            HttpVersion.HTTP_1_1,
+                            HttpResponseStatus.OK,
+                            Unpooled.wrappedBuffer(body));
+            resp.headers().set(HttpHeaderNames.CONTENT_TYPE, HttpHeaderValues.APPLICATION_JSON);
+            NettyUtils.sendHttpResponse(ctx, resp, true);
+        } else {
+            sendError(statusCode, new String(body, CharsetUtil.UTF_8));
+        }
+    }
+
+    private void submit() {
+        try {
+            if (!ModelManager.getInstance().addJob(this)) {
+                sendError(
+                        HttpURLConnection.HTTP_UNAVAILABLE,
+                        "Model \"" + getModelName() + "\" has no worker to collect the profile");
+            }
+        } catch (ModelNotFoundException | ModelVersionNotFoundException e) {
+            sendError(HttpURLConnection.HTTP_NOT_FOUND, e.getMessage());
         }
     }
 
@@ -23,6 +23,8 @@ public class MetricCollector implements Runnable {
     private static final Logger logger = LoggerFactory.getLogger(MetricCollector.class);
     private final MetricCache metricCache;
     private ConfigManager configManager;
+    private Process daemon;
+    private BufferedReader daemonReader;
 
     public MetricCollector(ConfigManager configManager) {
         this.configManager = configManager;
@@ -32,98 +34,168 @@ public class MetricCollector implements Runnable {
     @Override
     public void run() {
         try {
-            // Collect System level Metrics
-            List<String> args = new ArrayList<>();
-            args.add(configManager.getPythonExecutable());
             String systemMetricsCmd = configManager.getSystemMetricsCmd();
             if (systemMetricsCmd.isEmpty()) {
-                systemMetricsCmd =
-                        String.format(
-                                "%s --gpu %s",
-                                "ts/metrics/metric_collector.py",
-                                String.valueOf(configManager.getNumberOfGpu()));
-            }
-            args.addAll(Arrays.asList(systemMetricsCmd.split("\\s+")));
-            File workingDir = new File(configManager.getModelServerHome());
-
-            String[] envp = EnvironmentUtils.getEnvString(workingDir.getAbsolutePath(), null, null);
-            final Process p =
-                    Runtime.getRuntime()
-                            .exec(args.toArray(new String[0]), envp, workingDir); // NOPMD
-            ModelManager modelManager = ModelManager.getInstance();
-            Map<Integer, WorkerThread> workerMap = modelManager.getWorkers();
-            try (OutputStream os = p.getOutputStream()) {
-                writeWorkerPids(workerMap, os);
+                collectFromDaemon();
+            } else {
+                collectOnce(systemMetricsCmd);
             }
+        } catch (IOException e) {
+            logger.error("", e);
+            stopDaemon();
+        }
+    }
+
+    private Process startCollector(String systemMetricsCmd) throws IOException {
+        List<String> args = new ArrayList<>();
+        args.add(configManager.getPythonExecutable());
+        args.addAll(Arrays.asList(systemMetricsCmd.split("\\s+")));
+        File workingDir = new File(configManager.getModelServerHome());
 
-            new Thread(
+        String[] envp = EnvironmentUtils.getEnvString(workingDir.getAbsolutePath(), null, null);
+        return Runtime.getRuntime()
+                .exec(args.toArray(new String[0]), envp, workingDir); // NOPMD
+    }
+
+    /**
+     * Collect metrics with a long running collector process. The collector keeps its psutil
+     * handles between collections and replies with one batch of metrics for every list of worker
+     * pids written to its stdin.
+     */
+    private void collectFromDaemon() throws IOException {
+        if (daemon == null || !daemon.isAlive()) {
+            stopDaemon();
+            String systemMetricsCmd =
+                    String.format(
+                            "%s --gpu %s --daemon",
+                            "ts/metrics/metric_collector.py",
+                            String.valueOf(configManager.getNumberOfGpu()));
+            daemon = startCollector(systemMetricsCmd);
+            daemonReader =
+                    new BufferedReader(
+                            new InputStreamReader(
+                                    daemon.getInputStream(), StandardCharsets.UTF_8));
+            final Process p = daemon;
+            Thread errorReader =
+                    new Thread(
                             () -> {
-                                try {
-                                    String error =
-                                            IOUtils.toString(
-                                                    p.getErrorStream(), StandardCharsets.UTF_8);
-                                    if (!error.isEmpty()) {
-                                        logger.error(error);
+                                try (BufferedReader reader =
+                                        new BufferedReader(
+                                                new InputStreamReader(
+                                                        p.getErrorStream(),
+                                                        StandardCharsets.UTF_8))) {
+                                    String line;
+                                    while ((line = reader.readLine()) != null) {
+                                        logger.error(line);
                                     }
                                 } catch (IOException e) {
                                     logger.error("", e);
                                 }
-                            })
-                    .start();
+                            });
+            errorReader.setDaemon(true);
+            errorReader.start();
+        }
 
-            MetricManager metricManager = MetricManager.getInstance();
-            try (BufferedReader reader =
-                    new BufferedReader(
-                            new InputStreamReader(p.getInputStream(), StandardCharsets.UTF_8))) {
-                List<Metric> metricsSystem = new ArrayList<>();
-                metricManager.setMetrics(metricsSystem);
-
-                String line;
-                while ((line = reader.readLine()) != null) {
-                    if (line.isEmpty()) {
-                        break;
-                    }
-                    Metric metric = Metric.parse(line);
-                    if (metric == null) {
-                        logger.warn("Parse metrics failed: " + line);
-                    } else {
-                        if (this.metricCache.getMetricFrontend(metric.getMetricName()) != null) {
+        Map<Integer, WorkerThread> workerMap = ModelManager.getInstance().getWorkers();
+        OutputStream os = daemon.getOutputStream();
+        writeWorkerPids(workerMap, os);
+        os.flush();
+        readMetrics(daemonReader, workerMap);
+    }
+
+    private void stopDaemon() {
+        if (daemon != null) {
+            daemon.destroy();
+            daemon = null;
+            daemonReader = null;
+        }
+    }
+
+    private void collectOnce(String systemMetricsCmd) throws IOException {
+        final Process p = startCollector(systemMetricsCmd);
+        Map<Integer, WorkerThread> workerMap = ModelManager.getInstance().getWorkers();
+        try (OutputStream os = p.getOutputStream()) {
+            writeWorkerPids(workerMap, os);
+        }
+
+        new Thread(
+                        () -> {
                             try {
-                                // Frontend metrics by default have the last dimension as Hostname
-                                List<String> dimensionValues = metric.getDimensionValues();
-                                dimensionValues.add(metric.getHostName());
-
-                                this.metricCache
-                                        .getMetricFrontend(metric.getMetricName())
-                                        .addOrUpdate(
-                                                dimensionValues,
-                                                Double.parseDouble(metric.getValue()));
-                            } catch (Exception e) {
-                                logger.error(
-                                        "Failed to update frontend metric ",
-                                        metric.getMetricName(),
-                                        ": ",
-                                        e);
+                                String error =
+                                        IOUtils.toString(
+                                                p.getErrorStream(), StandardCharsets.UTF_8);
+                                if (!error.isEmpty()) {
+                                    logger.error(error);
+                                }
+                            } catch (IOException e) {
+                                logger.error("", e);
                             }
-                        }
-                        metricsSystem.add(metric);
+                        })
+                .start();
+
+        try (BufferedReader reader =
+                new BufferedReader(
+                        new InputStreamReader(p.getInputStream(), StandardCharsets.UTF_8))) {
+            readMetrics(reader, workerMap);
+        }
+    }
+
+    /**
+     * Read one batch of metrics: system metric lines followed by an empty line and one "pid:memory"
+     * line per worker, terminated by an empty line or the end of the stream.
+     */
+    private void readMetrics(BufferedReader reader, Map<Integer, WorkerThread> workerMap)
+            throws IOException {
+        MetricManager metricManager = MetricManager.getInstance();
+        List<Metric> metricsSystem = new ArrayList<>();
+
+        String line;
+        while ((line = reader.readLine()) != null) {
+            if (line.isEmpty()) {
+                break;
+            }
+            Metric metric = Metric.parse(line);
+            if (metric == null) {
+                logger.warn("Parse metrics failed: " + line);
+            } else {
+                if (this.metricCache.getMetricFrontend(metric.getMetricName()) != null) {
+                    try {
+                        // Frontend metrics by default have the last dimension as Hostname
+                        List<String> dimensionValues = metric.getDimensionValues();
+                        dimensionValues.add(metric.getHostName());
+
+                        this.metricCache
+                                .getMetricFrontend(metric.getMetricName())
+                                .addOrUpdate(
+                                        dimensionValues, Double.parseDouble(metric.getValue()));
+                    } catch (Exception e) {
+                        logger.error(
+                                "Failed to update frontend metric ",
+                                metric.getMetricName(),
+                                ": ",
+                                e);
                     }
                 }
+                metricsSystem.add(metric);
+            }
+        }
+        metricManager.setMetrics(metricsSystem);
 
-                // Collect process level metrics
-                while ((line = reader.readLine()) != null) {
-                    String[] tokens = line.split(":");
-                    if (tokens.length != 2) {
-                        continue;
-                    }
+        // Collect process level metrics
+        while ((line = reader.readLine()) != null) {
+            if (line.isEmpty()) {
+                break;
+            }
+            String[] tokens = line.split(":");
+            if (tokens.length != 2) {
+                continue;
+            }
 
-                    Integer pid = Integer.valueOf(tokens[0]);
-                    WorkerThread worker = workerMap.get(pid);
-                    worker.setMemory(Long.parseLong(tokens[1]));
-                }
+            Integer pid = Integer.valueOf(tokens[0]);
+            WorkerThread worker = workerMap.get(pid);
+            if (worker != null) {
+                worker.setMemory(Long.parseLong(tokens[1]));
             }
-        } catch (IOException e) {
-            logger.error("", e);
         }
     }
 
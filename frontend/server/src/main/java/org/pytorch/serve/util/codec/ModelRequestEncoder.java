@@ -10,6 +10,7 @@ import org.pytorch.serve.util.messages.BaseModelRequest;
 import org.pytorch.serve.util.messages.InputParameter;
 import org.pytorch.serve.util.messages.ModelInferenceRequest;
 import org.pytorch.serve.util.messages.ModelLoadModelRequest;
+import org.pytorch.serve.util.messages.ModelProfileRequest;
 import org.pytorch.serve.util.messages.RequestInput;
 
 @ChannelHandler.Sharable
@@ -68,6 +69,14 @@ public class ModelRequestEncoder extends MessageToByteEncoder<BaseModelRequest>
                 encodeRequest(input, out);
             }
             out.writeInt(-1); // End of List
+        } else if (msg instanceof ModelProfileRequest) {
+            out.writeByte('P');
+
+            ModelProfileRequest request = (ModelProfileRequest) msg;
+            out.writeInt(request.getDurationMs());
+            out.writeInt(request.getIntervalUs());
+            encodeField(request.getFormat(), out);
+            out.writeBoolean(request.isTorchProfiler());
         }
     }
 
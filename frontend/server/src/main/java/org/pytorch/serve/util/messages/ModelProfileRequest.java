@@ -0,0 +1,38 @@
+package org.pytorch.serve.util.messages;
+
+public class ModelProfileRequest extends BaseModelRequest {
+
+    /**
+     * ModelProfileRequest is a interface between frontend and backend to start a profile of the
+     * backend worker, or to collect its result when the duration is 0.
+     */
+    private int durationMs;
+
+    private int intervalUs;
+    private String format;
+    private boolean torchProfiler;
+
+    public ModelProfileRequest(String modelName, RequestInput input) {
+        super(WorkerCommands.PROFILE, modelName);
+        durationMs = Integer.parseInt(input.getStringParameter("duration_ms"));
+        intervalUs = Integer.parseInt(input.getStringParameter("interval_us"));
+        format = input.getStringParameter("format");
+        torchProfiler = Boolean.parseBoolean(input.getStringParameter("torch_profiler"));
+    }
+
+    public int getDurationMs() {
+        return durationMs;
+    }
+
+    public int getIntervalUs() {
+        return intervalUs;
+    }
+
+    public String getFormat() {
+        return format;
+    }
+
+    public boolean isTorchProfiler() {
+        return torchProfiler;
+    }
+}
@@ -1,5 +1,6 @@
 package org.pytorch.serve.wlm;
 
+import java.nio.charset.StandardCharsets;
 import java.util.LinkedHashMap;
 import java.util.Map;
 import java.util.concurrent.ExecutionException;
@@ -7,9 +8,11 @@ import org.pytorch.serve.job.Job;
 import org.pytorch.serve.util.messages.BaseModelRequest;
 import org.pytorch.serve.util.messages.ModelInferenceRequest;
 import org.pytorch.serve.util.messages.ModelLoadModelRequest;
+import org.pytorch.serve.util.messages.ModelProfileRequest;
 import org.pytorch.serve.util.messages.ModelWorkerResponse;
 import org.pytorch.serve.util.messages.Predictions;
 import org.pytorch.serve.util.messages.RequestInput;
+import org.pytorch.serve.util.messages.WorkerCommands;
 import org.slf4j.Logger;
 import org.slf4j.LoggerFactory;
 
@@ -41,7 +44,9 @@ public class BatchAggregator {
         }
 
         for (Job j : jobs.values()) {
-            if (j.isControlCmd()) {
+            if (j.getCmd() == WorkerCommands.PROFILE) {
+                return new ModelProfileRequest(model.getModelName(), j.getPayload());
+            } else if (j.isControlCmd()) {
                 if (jobs.size() > 1) {
                     throw new IllegalStateException(
                             "Received more than 1 control command. "
@@ -70,6 +75,18 @@ public class BatchAggregator {
      */
     public boolean sendResponse(ModelWorkerResponse message) {
         boolean jobDone = true;
+        if (isProfileResponse()) {
+            // The profile is the message of the response, its code the status of the profile
+            Job job = jobs.values().iterator().next();
+            job.response(
+                    message.getMessage().getBytes(StandardCharsets.UTF_8),
+                    null,
+                    message.getCode(),
+                    null,
+                    null);
+            cleanJobs();
+            return true;
+        }
         // TODO: Handle prediction level code
         if (message.getCode() == 200) {
             if (jobs.isEmpty()) {
@@ -135,12 +152,25 @@ public class BatchAggregator {
         return jobDone;
     }
 
+    private boolean isProfileResponse() {
+        return jobs.size() == 1
+                && jobs.values().iterator().next().getCmd() == WorkerCommands.PROFILE;
+    }
+
     public void sendError(BaseModelRequest message, String error, int status) {
         if (message instanceof ModelLoadModelRequest) {
             logger.warn("Load model failed: {}, error: {}", message.getModelName(), error);
             return;
         }
 
+        if (message instanceof ModelProfileRequest) {
+            for (Job job : jobs.values()) {
+                job.sendError(status, error);
+            }
+            cleanJobs();
+            return;
+        }
+
         if (message != null) {
             ModelInferenceRequest msg = (ModelInferenceRequest) message;
             for (RequestInput req : msg.getRequestBatch()) {
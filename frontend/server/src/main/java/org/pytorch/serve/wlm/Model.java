@@ -351,6 +351,10 @@ public class Model {
         }
     }
 
+    private static boolean isExclusiveJob(Job job) {
+        return job.getCmd() == WorkerCommands.DESCRIBE || job.getCmd() == WorkerCommands.PROFILE;
+    }
+
     public void addFirst(Job job) {
         jobsDb.get(DEFAULT_DATA_QUEUE).addFirst(job);
     }
@@ -388,8 +392,8 @@ public class Model {
             logger.trace("get first job: {}", Objects.requireNonNull(j).getJobId());
 
             jobsRepo.put(j.getJobId(), j);
-            // batch size always is 1 for describe request job
-            if (j.getCmd() == WorkerCommands.DESCRIBE) {
+            // batch size always is 1 for describe and profile request jobs
+            if (isExclusiveJob(j)) {
                 if (jobsRepo.isEmpty()) {
                     jobsRepo.put(j.getJobId(), j);
                     return;
@@ -413,8 +417,8 @@ public class Model {
                 break;
             }
             long end = System.currentTimeMillis();
-            // job batch size always is 1 when request is describe prediction
-            if (j.getCmd() == WorkerCommands.DESCRIBE) {
+            // job batch size always is 1 when request is describe prediction or profile
+            if (isExclusiveJob(j)) {
                 // Add the job back into the jobsQueue
                 jobsQueue.addFirst(j);
                 break;
@@ -483,8 +487,8 @@ public class Model {
             logger.trace("get first job: {}", Objects.requireNonNull(j).getJobId());
 
             jobsRepo.put(j.getJobId(), j);
-            // batch size always is 1 for describe request job
-            if (j.getCmd() == WorkerCommands.DESCRIBE) {
+            // batch size always is 1 for describe and profile request jobs
+            if (isExclusiveJob(j)) {
                 return;
             }
             long begin = System.currentTimeMillis();
@@ -494,8 +498,8 @@ public class Model {
                     break;
                 }
                 long end = System.currentTimeMillis();
-                // job batch size always is 1 when request is describe
-                if (j.getCmd() == WorkerCommands.DESCRIBE) {
+                // job batch size always is 1 when request is describe or profile
+                if (isExclusiveJob(j)) {
                     // Add the job back into the jobsQueue
                     jobsQueue.addFirst(j);
                     break;
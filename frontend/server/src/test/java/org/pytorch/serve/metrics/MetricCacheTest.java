@@ -54,6 +54,9 @@ public class MetricCacheTest {
                 metricCache.getMetricFrontend("GPUMemoryUsed").getClass(), PrometheusGauge.class);
         Assert.assertEquals(
                 metricCache.getMetricFrontend("GPUUtilization").getClass(), PrometheusGauge.class);
+        Assert.assertEquals(
+                metricCache.getMetricFrontend("WorkerCPUUtilization").getClass(),
+                PrometheusGauge.class);
         Assert.assertEquals(metricCache.getMetricFrontend("InvalidMetric"), null);
         Assert.assertEquals(
                 metricCache.getMetricBackend("HandlerTime").getClass(), PrometheusGauge.class);
@@ -8,8 +8,10 @@ import io.netty.channel.ChannelHandler;
 import io.netty.channel.embedded.EmbeddedChannel;
 import java.io.IOException;
 import java.util.ArrayList;
+import org.pytorch.serve.util.messages.BaseModelRequest;
 import org.pytorch.serve.util.messages.InputParameter;
 import org.pytorch.serve.util.messages.ModelInferenceRequest;
+import org.pytorch.serve.util.messages.ModelProfileRequest;
 import org.pytorch.serve.util.messages.RequestInput;
 import org.testng.annotations.Test;
 
@@ -134,6 +136,47 @@ public class ModelRequestEncoderTest {
         assertOutboundEquals(channel, expected);
     }
 
+    @Test
+    public void testProfile() {
+        ChannelHandler encoder = new ModelRequestEncoder(false);
+        EmbeddedChannel channel = new EmbeddedChannel(encoder);
+        RequestInput input = new RequestInput("request_id");
+        input.addParameter(new InputParameter("duration_ms", "2000"));
+        input.addParameter(new InputParameter("interval_us", "1000"));
+        input.addParameter(new InputParameter("format", "speedscope"));
+        input.addParameter(new InputParameter("torch_profiler", "true"));
+        ModelProfileRequest msg = new ModelProfileRequest("testModel", input);
+        writeToChannelAndFlush(channel, msg);
+        byte[] expected =
+                new byte[] {
+                    'P',
+                    0x00,
+                    0x00,
+                    0x07,
+                    (byte) 0xD0, // duration in ms
+                    0x00,
+                    0x00,
+                    0x03,
+                    (byte) 0xE8, // sampling interval in us
+                    0x00,
+                    0x00,
+                    0x00,
+                    0x0A,
+                    's',
+                    'p',
+                    'e',
+                    'e',
+                    'd',
+                    's',
+                    'c',
+                    'o',
+                    'p',
+                    'e',
+                    0x01 // torch profiler
+                };
+        assertOutboundEquals(channel, expected);
+    }
+
     private void assertOutboundEquals(EmbeddedChannel channel, byte[] expected) {
         ByteBuf buf = channel.readOutbound();
         byte[] actual = new byte[expected.length];
@@ -145,7 +188,7 @@ public class ModelRequestEncoderTest {
         assertEquals(actual, expected);
     }
 
-    private void writeToChannelAndFlush(EmbeddedChannel channel, ModelInferenceRequest msg) {
+    private void writeToChannelAndFlush(EmbeddedChannel channel, BaseModelRequest msg) {
         ChannelFuture write = channel.writeAndFlush(msg);
         while (true) {
             try {
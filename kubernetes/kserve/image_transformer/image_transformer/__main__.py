@@ -28,6 +28,21 @@ parser.add_argument(
     "--predictor_host", help="The URL for the model predict function", required=True
 )
 
+parser.add_argument(
+    "--tensor_format",
+    choices=["json", "binary"],
+    default="json",
+    help="Send the images as lists of floats in KServe v1 instances, or as raw "
+    "tensors of the KServe v2 binary tensor data extension",
+)
+parser.add_argument(
+    "--transform_workers",
+    type=int,
+    default=0,
+    help="Processes transforming the images of a request, 0 to transform them "
+    "in the server process",
+)
+
 args, _ = parser.parse_known_args()
 
 CONFIG_PATH = "/mnt/models/config/config.properties"
@@ -38,10 +53,8 @@ def parse_config():
     keys = {}
 
     with open(CONFIG_PATH) as f:
-
         for line in f:
             if separator in line:
-
                 # Find the name and value by splitting the string
                 name, value = line.split(separator, 1)
 
@@ -67,7 +80,12 @@ if __name__ == "__main__":
     model_names = parse_config()
     models = []
     for model_name in model_names:
-        transformer = ImageTransformer(model_name, predictor_host=args.predictor_host)
+        transformer = ImageTransformer(
+            model_name,
+            predictor_host=args.predictor_host,
+            tensor_format=args.tensor_format,
+            transform_workers=args.transform_workers,
+        )
         models.append(transformer)
     ModelServer(
         registered_models=TransformerModelRepository(args.predictor_host),
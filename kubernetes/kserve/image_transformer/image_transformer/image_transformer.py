@@ -16,9 +16,11 @@ import base64
 import io
 import json
 import logging
-from typing import Dict, List
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple
 
 import kserve
+import numpy as np
 import torchvision.transforms as transforms
 import tornado
 from kserve.model import Model as Model
@@ -27,6 +29,8 @@ from PIL import Image
 logging.basicConfig(level=kserve.constants.KSERVE_LOGLEVEL)
 
 EXPLAINER_URL_FORMAT = "http://{0}/v1/models/{1}:explain"
+PREDICTOR_V2_URL_FORMAT = "http://{0}/v2/models/{1}/infer"
+TENSOR_FORMATS = ["json", "binary"]
 
 image_processing = transforms.Compose(
     [transforms.ToTensor(), transforms.Normalize((0.1307,), (0.3081,))]
@@ -44,13 +48,50 @@ def image_transform(instance):
         list: Returns the data key's value and converts that into a list
         after converting it into a tensor
     """
-    byte_array = base64.b64decode(instance["data"])
-    image = Image.open(io.BytesIO(byte_array))
-    instance["data"] = image_processing(image).tolist()
-    logging.info(instance)
+    instance["data"] = transform_image(instance["data"]).tolist()
+    logging.debug(instance)
     return instance
 
 
+def transform_image(data):
+    """Converts a base64 encoded image into a float32 array"""
+    byte_array = base64.b64decode(data)
+    image = Image.open(io.BytesIO(byte_array))
+    return image_processing(image).numpy()
+
+
+class BinaryInferRequest(NamedTuple):
+    """A KServe v2 request of the binary tensor data extension"""
+
+    body: bytes
+    header_length: int
+
+
+def to_binary_request(arrays, request_id=None):
+    """
+    Serializes an input per array as a KServe v2 request of the binary tensor
+    data extension: the JSON description of the inputs followed by their raw
+    little endian values.
+    """
+    arrays = [np.ascontiguousarray(array, dtype="<f4") for array in arrays]
+    inputs = []
+    for index, array in enumerate(arrays):
+        inputs.append(
+            {
+                "name": f"input-{index}",
+                "shape": list(array.shape),
+                "datatype": "FP32",
+                "parameters": {"binary_data_size": array.nbytes},
+            }
+        )
+    request = {"inputs": inputs}
+    if request_id:
+        request["id"] = request_id
+    header = json.dumps(request).encode("utf-8")
+    body = b"".join([header] + [array.tobytes() for array in arrays])
+    return BinaryInferRequest(body, len(header))
+
+
 class ImageTransformer(Model):
     """A class object for the data handling activities of Image Classification
     Task and returns a KServe compatible response.
@@ -60,21 +101,54 @@ class ImageTransformer(Model):
         modeule is passed here.
     """
 
-    def __init__(self, name: str, predictor_host: str):
+    def __init__(
+        self,
+        name: str,
+        predictor_host: str,
+        tensor_format: str = "json",
+        transform_workers: int = 0,
+    ):
         """Initialize the model name, predictor host and the explainer host
 
         Args:
             name (str): Name of the model.
             predictor_host (str): The host in which the predictor runs.
+            tensor_format (str): "json" sends the images as lists of floats in
+            KServe v1 instances, "binary" as raw tensors of the KServe v2 binary
+            tensor data extension.
+            transform_workers (int): Processes transforming the images of a
+            request, 0 to transform them in the server process.
         """
         super().__init__(name)
+        if tensor_format not in TENSOR_FORMATS:
+            raise ValueError(
+                f"tensor_format should be one of {TENSOR_FORMATS}, got {tensor_format}"
+            )
         self.predictor_host = predictor_host
         self.explainer_host = predictor_host
+        self.tensor_format = tensor_format
+        self.transform_workers = transform_workers
+        self.transform_pool = (
+            ProcessPoolExecutor(max_workers=transform_workers)
+            if transform_workers > 0
+            else None
+        )
         logging.info("MODEL NAME %s", name)
         logging.info("PREDICTOR URL %s", self.predictor_host)
         logging.info("EXPLAINER URL %s", self.explainer_host)
+        logging.info("TENSOR FORMAT %s", self.tensor_format)
         self.timeout = 100
 
+    def transform(self, instances: List[Dict]) -> List[np.ndarray]:
+        """Transforms the images of the instances, in the process pool if any"""
+        images = [instance["data"] for instance in instances]
+        if self.transform_pool is None or len(images) < 2:
+            return [transform_image(image) for image in images]
+        chunksize = max(1, len(images) // (4 * self.transform_workers))
+        return list(
+            self.transform_pool.map(transform_image, images, chunksize=chunksize)
+        )
+
     def preprocess(self, inputs: Dict) -> Dict:
         """Pre-process activity of the Image Input data.
 
@@ -82,11 +156,47 @@ class ImageTransformer(Model):
             inputs (Dict): Kserve http request
 
         Returns:
-            Dict: Returns the request input after converting it into a tensor
+            Dict: Returns the request input after converting it into a tensor,
+            or a BinaryInferRequest with the binary tensor format
         """
-        return {
-            "instances": [image_transform(instance) for instance in inputs["instances"]]
-        }
+        arrays = self.transform(inputs["instances"])
+        if self.tensor_format == "binary":
+            return to_binary_request(arrays, inputs.get("id"))
+        instances = []
+        for instance, array in zip(inputs["instances"], arrays):
+            instances.append(dict(instance, data=array.tolist()))
+        return {"instances": instances}
+
+    async def predict(self, request, headers: Dict[str, str] = None):
+        """Sends binary tensor requests to the v2 inference endpoint of the
+        predictor, and the other requests to the KServe predict method.
+
+        Args:
+            request (Dict|BinaryInferRequest): The output of preprocess
+
+        Raises:
+            tornado.web.HTTPError: if the response code is not 200.
+
+        Returns:
+            Dict: The KServe v2 response of the predictor
+        """
+        if not isinstance(request, BinaryInferRequest):
+            if headers is None:
+                return await super().predict(request)
+            return await super().predict(request, headers)
+        response = await self._http_client.fetch(
+            PREDICTOR_V2_URL_FORMAT.format(self.predictor_host, self.name),
+            method="POST",
+            request_timeout=self.timeout,
+            headers={
+                "Content-Type": "application/octet-stream",
+                "Inference-Header-Content-Length": str(request.header_length),
+            },
+            body=request.body,
+        )
+        if response.code != 200:
+            raise tornado.web.HTTPError(status_code=response.code, reason=response.body)
+        return json.loads(response.body)
 
     def postprocess(self, inputs: List) -> List:
         """Post process function of Torchserve on the Kserve side is
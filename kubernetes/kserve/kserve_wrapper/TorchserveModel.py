@@ -7,8 +7,6 @@ import time
 from enum import Enum
 from typing import Dict, Union
 
-import grpc
-import inference_pb2_grpc
 import kserve
 import requests
 from gprc_utils import from_ts_grpc, to_ts_grpc
@@ -21,6 +19,7 @@ from kserve.protocol.grpc.grpc_predict_v2_pb2 import (
 )
 from kserve.protocol.infer_type import InferRequest, InferResponse
 from kserve.storage import Storage
+from predictor_client import grpc_channel_pool_from_env, http_connection_pool_from_env
 
 logging.basicConfig(level=kserve.constants.KSERVE_LOGLEVEL)
 
@@ -82,17 +81,35 @@ class TorchserveModel(Model):
         if self.protocol == PredictorProtocol.GRPC_V2.value:
             self.predictor_host = grpc_inference_address
 
+        # Created on the first request, in the event loop of the model server
+        self.grpc_pool = None
+        self.http_pool = None
+
         logging.info("Predict URL set to %s", self.predictor_host)
         logging.info("Explain URL set to %s", self.explainer_host)
         logging.info("Protocol version is %s", self.protocol)
 
-    def grpc_client(self):
-        if self._grpc_client_stub is None:
-            self.channel = grpc.aio.insecure_channel(self.predictor_host)
-            self.grpc_client_stub = inference_pb2_grpc.InferenceAPIsServiceStub(
-                self.channel
-            )
-        return self.grpc_client_stub
+    def grpc_channel_pool(self):
+        if self.grpc_pool is None:
+            self.grpc_pool = grpc_channel_pool_from_env(self.predictor_host, self.name)
+        return self.grpc_pool
+
+    def http_connection_pool(self):
+        if self.http_pool is None:
+            self.http_pool = http_connection_pool_from_env(self.name)
+        return self.http_pool
+
+    @property
+    def _http_client(self):
+        """Overrides the HTTP client of the Model class with the keep-alive pool"""
+        return self.http_connection_pool().client
+
+    async def _http_predict(self, payload, headers: Dict[str, str] = None) -> Dict:
+        """Overrides the `_http_predict` method in Model class to count the
+        requests in flight on the HTTP connection pool.
+        """
+        async with self.http_connection_pool().request():
+            return await super()._http_predict(payload, headers)
 
     async def _grpc_predict(
         self,
@@ -109,8 +126,8 @@ class TorchserveModel(Model):
             Dict: Torchserve grpc response.
         """
         payload = to_ts_grpc(payload)
-        grpc_stub = self.grpc_client()
-        async_result = await grpc_stub.Predictions(payload)
+        async with self.grpc_channel_pool().stub() as grpc_stub:
+            async_result = await grpc_stub.Predictions(payload)
         return from_ts_grpc(async_result)
 
     def postprocess(
@@ -0,0 +1,167 @@
+""" Pooled clients of the TorchServe inference endpoints
+
+A single gRPC channel multiplexes every request of the wrapper over one HTTP/2
+connection, and one TorchServe netty thread. The gRPC requests are spread over
+a pool of channels, each with its own connection, sending every request on the
+channel with the fewest outstanding requests. The REST requests share a pool of
+keep-alive HTTP connections.
+
+The pools are configured with the following environment variables
+
+PREDICTOR_GRPC_CHANNELS: gRPC channels, 4 by default
+PREDICTOR_HTTP_CONNECTIONS: HTTP connections kept alive, 100 by default
+PREDICTOR_MAX_MESSAGE_SIZE: gRPC message size, max_request_size of TorchServe by default
+PREDICTOR_KEEPALIVE_TIME_MS: gRPC keepalive ping interval, 5 minutes by default,
+    the shortest interval accepted by TorchServe
+PREDICTOR_KEEPALIVE_TIMEOUT_MS: gRPC keepalive ping timeout, 20 seconds by default
+"""
+import logging
+import os
+from contextlib import asynccontextmanager
+
+import grpc
+import httpx
+import inference_pb2_grpc
+from prometheus_client import Gauge
+
+DEFAULT_GRPC_CHANNELS = 4
+DEFAULT_HTTP_CONNECTIONS = 100
+# Default max_request_size of TorchServe
+DEFAULT_MAX_MESSAGE_SIZE = 6553500
+DEFAULT_KEEPALIVE_TIME_MS = 300000
+DEFAULT_KEEPALIVE_TIMEOUT_MS = 20000
+HTTP_KEEPALIVE_EXPIRY = 60
+
+IN_FLIGHT = Gauge(
+    "ts_predictor_in_flight_requests",
+    "Outstanding requests of the wrapper to TorchServe per channel",
+    ["model_name", "channel"],
+)
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def grpc_channel_options(
+    max_message_size=DEFAULT_MAX_MESSAGE_SIZE,
+    keepalive_time_ms=DEFAULT_KEEPALIVE_TIME_MS,
+    keepalive_timeout_ms=DEFAULT_KEEPALIVE_TIMEOUT_MS,
+):
+    return [
+        ("grpc.max_send_message_length", max_message_size),
+        ("grpc.max_receive_message_length", max_message_size),
+        ("grpc.keepalive_time_ms", keepalive_time_ms),
+        ("grpc.keepalive_timeout_ms", keepalive_timeout_ms),
+        # TorchServe closes connections pinged without calls in flight
+        ("grpc.keepalive_permit_without_calls", 0),
+        # Channels to the same target share their connection otherwise
+        ("grpc.use_local_subchannel_pool", 1),
+    ]
+
+
+class GrpcChannelPool:
+    """gRPC channels to TorchServe, least outstanding requests first
+
+    Args:
+        target (str): The gRPC inference address of TorchServe
+        size (int): The number of channels
+        options (list): The gRPC channel options
+        model_name (str): The model name label of the in flight metric
+    """
+
+    def __init__(self, target, size, options, model_name=""):
+        if size < 1:
+            raise ValueError(f"The pool needs at least one channel, got {size}")
+        self.target = target
+        self.options = options
+        self.channels = [
+            grpc.aio.insecure_channel(target, options=options) for _ in range(size)
+        ]
+        self.stubs = [
+            inference_pb2_grpc.InferenceAPIsServiceStub(channel)
+            for channel in self.channels
+        ]
+        self.in_flight = [0] * size
+        self._next = 0
+        self._gauges = [
+            IN_FLIGHT.labels(model_name=model_name, channel=f"grpc-{index}")
+            for index in range(size)
+        ]
+
+    def _select(self):
+        # Round robin among the channels with the fewest outstanding requests
+        size = len(self.channels)
+        index = min(
+            ((self._next + offset) % size for offset in range(size)),
+            key=self.in_flight.__getitem__,
+        )
+        self._next = (index + 1) % size
+        return index
+
+    @asynccontextmanager
+    async def stub(self):
+        """The stub of the least loaded channel, for the duration of a request"""
+        index = self._select()
+        self.in_flight[index] += 1
+        self._gauges[index].inc()
+        try:
+            yield self.stubs[index]
+        finally:
+            self.in_flight[index] -= 1
+            self._gauges[index].dec()
+
+    async def close(self):
+        for channel in self.channels:
+            await channel.close()
+
+
+class HttpConnectionPool:
+    """Keep-alive HTTP connections to TorchServe
+
+    Args:
+        connections (int): The maximum number of connections, all kept alive
+        model_name (str): The model name label of the in flight metric
+    """
+
+    def __init__(self, connections, model_name=""):
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=connections,
+                max_keepalive_connections=connections,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            )
+        )
+        self.in_flight = 0
+        self._gauge = IN_FLIGHT.labels(model_name=model_name, channel="http")
+
+    @asynccontextmanager
+    async def request(self):
+        """Counts a request in flight"""
+        self.in_flight += 1
+        self._gauge.inc()
+        try:
+            yield self.client
+        finally:
+            self.in_flight -= 1
+            self._gauge.dec()
+
+    async def close(self):
+        await self.client.aclose()
+
+
+def grpc_channel_pool_from_env(target, model_name=""):
+    size = _env_int("PREDICTOR_GRPC_CHANNELS", DEFAULT_GRPC_CHANNELS)
+    options = grpc_channel_options(
+        _env_int("PREDICTOR_MAX_MESSAGE_SIZE", DEFAULT_MAX_MESSAGE_SIZE),
+        _env_int("PREDICTOR_KEEPALIVE_TIME_MS", DEFAULT_KEEPALIVE_TIME_MS),
+        _env_int("PREDICTOR_KEEPALIVE_TIMEOUT_MS", DEFAULT_KEEPALIVE_TIMEOUT_MS),
+    )
+    logging.info("gRPC channel pool of %s channels to %s", size, target)
+    return GrpcChannelPool(target, size, options, model_name)
+
+
+def http_connection_pool_from_env(model_name=""):
+    connections = _env_int("PREDICTOR_HTTP_CONNECTIONS", DEFAULT_HTTP_CONNECTIONS)
+    logging.info("HTTP connection pool of %s connections", connections)
+    return HttpConnectionPool(connections, model_name)
@@ -36,6 +36,7 @@ model_handlers = {
     "dali_image_classifier": "vision",
     "vllm_handler": "text",
     "trt_llm_handler": "text",
+    "pipeline_handler": "anything",
 }
 
 MODEL_SERVER_VERSION = "1.0"
@@ -0,0 +1,125 @@
+import json
+import sys
+from pathlib import Path
+
+import yaml
+
+CURR_FILE_PATH = Path(__file__).parent
+REPO_ROOT_DIR = CURR_FILE_PATH.parents[1]
+
+sys.path.append((REPO_ROOT_DIR / "benchmarks").as_posix())
+
+from utils.capacity_search import (  # noqa: E402
+    CapacitySearch,
+    LoadPoint,
+    find_knee,
+    ramp_load,
+    stage_model_dir,
+    write_model_config,
+)
+
+
+def synthetic_measure(config, concurrency):
+    """
+    A server whose batches take 2 ms + 1 ms per request, which saturates at
+    workers * batch_size concurrent requests and queues beyond that.
+    """
+    batch = min(concurrency, config["batch_size"])
+    service_ms = 2 + batch + config["batch_delay"] * (batch < config["batch_size"])
+    capacity = config["workers"] * batch / service_ms * 1000
+    offered = concurrency / service_ms * 1000
+    throughput = min(capacity, offered)
+    latency = concurrency / throughput * 1000
+    return LoadPoint(concurrency, throughput, latency, latency, latency * 1.5)
+
+
+def test_find_knee_prefers_lowest_saturated_concurrency():
+    points = [
+        LoadPoint(1, 100, 5, 5, 10),
+        LoadPoint(2, 190, 5, 5, 11),
+        LoadPoint(4, 195, 10, 10, 20),
+        LoadPoint(8, 200, 20, 20, 60),
+    ]
+
+    assert find_knee(points, slo_p99=50).concurrency == 2
+    assert find_knee(points, slo_p99=5) is None
+
+
+def test_ramp_load_stops_at_slo():
+    config = {"batch_size": 4, "batch_delay": 5, "workers": 1}
+    capacity = ramp_load(synthetic_measure, config, slo_p99=20, max_concurrency=64)
+
+    assert capacity.points[-1].concurrency < 64
+    assert capacity.knee.p99 <= 20
+    assert capacity.knee.throughput > 0
+
+
+def test_search_refines_coarse_grid(tmp_path):
+    evaluated = []
+
+    def evaluate(config):
+        evaluated.append(config)
+        return ramp_load(synthetic_measure, config, slo_p99=40, max_concurrency=256)
+
+    space = {
+        "batch_size": [1, 2, 4, 8, 16],
+        "batch_delay": [1, 5, 10],
+        "workers": [1, 2, 4],
+    }
+    search = CapacitySearch(space, evaluate, max_configs=30)
+    best = search.run()
+
+    assert len(evaluated) <= 30
+    # The grid holds 45 configurations, the best one meets the SLO with the
+    # most workers
+    assert best.knee.p99 <= 40
+    assert best.config["workers"] == 4
+    assert best.throughput >= 0.95 * max(r.throughput for r in search.results.values())
+
+    path = tmp_path / "model-config.yaml"
+    write_model_config(best, path, {"responseTimeout": 120})
+    config = yaml.safe_load(path.read_text())
+    assert config["minWorkers"] == config["maxWorkers"] == 4
+    assert config["batchSize"] == best.config["batch_size"]
+    assert config["maxBatchDelay"] == best.config["batch_delay"]
+    assert config["responseTimeout"] == 120
+
+
+def test_stage_model_dir_overrides_model_config(tmp_path):
+    model_dir = tmp_path / "model"
+    (model_dir / "MAR-INF").mkdir(parents=True)
+    (model_dir / "MAR-INF" / "MANIFEST.json").write_text(
+        json.dumps({"model": {"modelName": "mnist", "configFile": "config.yaml"}})
+    )
+    # The model config of the micro batching example
+    (model_dir / "config.yaml").write_text(
+        yaml.safe_dump(
+            {
+                "minWorkers": 1,
+                "maxWorkers": 1,
+                "batchSize": 32,
+                "maxBatchDelay": 100,
+                "micro_batching": {"micro_batch_size": 4},
+            }
+        )
+    )
+
+    for settings in [
+        {"batch_size": 4, "batch_delay": 10, "workers": 2},
+        {"batch_size": 8, "batch_delay": 5, "workers": 4, "parallelism": 2},
+    ]:
+        dest = tmp_path / "model_store" / "benchmark_model"
+        stage_model_dir(model_dir, dest, settings)
+
+        config = yaml.safe_load((dest / "config.yaml").read_text())
+        assert config["batchSize"] == settings["batch_size"]
+        assert config["maxBatchDelay"] == settings["batch_delay"]
+        assert config["minWorkers"] == config["maxWorkers"] == settings["workers"]
+        assert config["micro_batching"]["micro_batch_size"] == 4
+        if "parallelism" in settings:
+            assert config["micro_batching"]["parallelism"]["preprocess"] == 2
+        else:
+            assert "parallelism" not in config["micro_batching"]
+
+    # The model directory is left untouched
+    assert yaml.safe_load((model_dir / "config.yaml").read_text())["batchSize"] == 32
@@ -0,0 +1,143 @@
+import asyncio
+import sys
+import types
+from contextlib import AsyncExitStack
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("grpc")
+pytest.importorskip("httpx")
+prometheus_client = pytest.importorskip("prometheus_client")
+
+CURR_FILE_PATH = Path(__file__).parent
+REPO_ROOT_DIR = CURR_FILE_PATH.parents[1]
+
+sys.path.append((REPO_ROOT_DIR / "kubernetes" / "kserve" / "kserve_wrapper").as_posix())
+
+# The gRPC stubs are generated when the wrapper image is built
+sys.modules.setdefault("inference_pb2_grpc", types.ModuleType("inference_pb2_grpc"))
+
+import predictor_client  # noqa: E402
+
+
+class StubChannel:
+    def __init__(self, target, options=None):
+        self.target = target
+        self.options = options
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class StubInferenceStub:
+    def __init__(self, channel):
+        self.channel = channel
+
+
+@pytest.fixture()
+def grpc_pool(monkeypatch, request):
+    monkeypatch.setattr(predictor_client.grpc.aio, "insecure_channel", StubChannel)
+    monkeypatch.setattr(
+        predictor_client.inference_pb2_grpc,
+        "InferenceAPIsServiceStub",
+        StubInferenceStub,
+        raising=False,
+    )
+    return predictor_client.GrpcChannelPool(
+        "localhost:7070", 3, [], model_name=request.node.name
+    )
+
+
+def gauge_value(model_name, channel):
+    return prometheus_client.REGISTRY.get_sample_value(
+        "ts_predictor_in_flight_requests",
+        {"model_name": model_name, "channel": channel},
+    )
+
+
+def channel_index(pool, stub):
+    return pool.channels.index(stub.channel)
+
+
+def test_round_robin_among_idle_channels(grpc_pool):
+    async def send(count):
+        indices = []
+        for _ in range(count):
+            async with grpc_pool.stub() as stub:
+                indices.append(channel_index(grpc_pool, stub))
+        return indices
+
+    assert asyncio.run(send(7)) == [0, 1, 2, 0, 1, 2, 0]
+
+
+def test_least_outstanding_requests_first(grpc_pool):
+    async def send():
+        async with AsyncExitStack() as stack, AsyncExitStack() as finished:
+            first = [
+                await stack.enter_async_context(grpc_pool.stub()),
+                await finished.enter_async_context(grpc_pool.stub()),
+                await stack.enter_async_context(grpc_pool.stub()),
+            ]
+            assert [channel_index(grpc_pool, stub) for stub in first] == [0, 1, 2]
+
+            # Channel 1 finishes its request, the next one goes to it
+            await finished.aclose()
+            assert grpc_pool.in_flight == [1, 0, 1]
+            indices = []
+            for _ in range(4):
+                stub = await stack.enter_async_context(grpc_pool.stub())
+                indices.append(channel_index(grpc_pool, stub))
+            assert grpc_pool.in_flight == [2, 2, 2]
+        return indices
+
+    # Ties are broken round robin from the channel after the last selected
+    assert asyncio.run(send()) == [1, 2, 0, 1]
+    assert grpc_pool.in_flight == [0, 0, 0]
+
+
+def test_select_under_uneven_load(grpc_pool):
+    grpc_pool.in_flight = [3, 1, 2]
+    assert [grpc_pool._select() for _ in range(3)] == [1, 1, 1]
+    grpc_pool.in_flight = [2, 5, 2]
+    assert [grpc_pool._select() for _ in range(3)] == [2, 0, 2]
+
+
+def test_grpc_in_flight_after_failed_request(grpc_pool, request):
+    model_name = request.node.name
+
+    async def fail():
+        async with grpc_pool.stub() as stub:
+            index = channel_index(grpc_pool, stub)
+            assert gauge_value(model_name, f"grpc-{index}") == 1
+            raise RuntimeError("StatusCode.UNAVAILABLE")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(fail())
+
+    assert grpc_pool.in_flight == [0, 0, 0]
+    for index in range(3):
+        assert gauge_value(model_name, f"grpc-{index}") == 0
+
+    asyncio.run(grpc_pool.close())
+    assert all(channel.closed for channel in grpc_pool.channels)
+
+
+def test_http_in_flight_after_failed_request(request):
+    model_name = request.node.name
+    pool = predictor_client.HttpConnectionPool(2, model_name=model_name)
+
+    async def fail():
+        async with pool.request():
+            async with pool.request():
+                assert pool.in_flight == 2
+                assert gauge_value(model_name, "http") == 2
+            raise RuntimeError("connection reset")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(fail())
+
+    assert pool.in_flight == 0
+    assert gauge_value(model_name, "http") == 0
+    asyncio.run(pool.close())
@@ -0,0 +1,101 @@
+import json
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+CURR_FILE_PATH = Path(__file__).parent
+REPO_ROOT_DIR = CURR_FILE_PATH.parents[1]
+
+sys.path.append((REPO_ROOT_DIR / "benchmarks").as_posix())
+
+from utils.gen_metrics_json import gen_metrics_from_log  # noqa: E402
+from utils.metrics_log_parser import MetricsLogParser, parse_metric_line  # noqa: E402
+
+MODEL_LINE = (
+    "2023-06-01T10:00:{sec:02d},123 - PredictionTime.Milliseconds:{value}"
+    "|#ModelName:resnet,Level:Model|#hostname:host,{ts},req-{i}\n"
+)
+FRONTEND_LINE = (
+    "2023-06-01T10:00:{sec:02d},123 [INFO ] pool-3-thread-1 TS_METRICS - "
+    "CPUUtilization.Percent:{value}|#Level:Host|#hostname:host,timestamp:{ts}\n"
+)
+
+
+def write_log(path, count=1000):
+    rng = random.Random(0)
+    values = []
+    with open(path, "w") as f:
+        f.write("2023-06-01T10:00:00,000 - not a metric\n")
+        for i in range(count):
+            value = round(rng.uniform(1, 100), 2)
+            values.append(value)
+            ts = 1685613600 + i // 100
+            f.write(MODEL_LINE.format(sec=i % 60, value=value, ts=ts, i=i))
+            f.write(FRONTEND_LINE.format(sec=i % 60, value=50.0, ts=ts))
+    return values
+
+
+def test_parse_metric_line():
+    record = parse_metric_line(MODEL_LINE.format(sec=1, value=12.5, ts=1685613600, i=7))
+    assert (record.name, record.unit, record.value) == (
+        "PredictionTime",
+        "Milliseconds",
+        12.5,
+    )
+    assert record.dimensions == [("ModelName", "resnet"), ("Level", "Model")]
+    assert (record.hostname, record.timestamp) == ("host", 1685613600)
+
+    record = parse_metric_line(FRONTEND_LINE.format(sec=1, value=3, ts=1685613601))
+    assert record.name == "CPUUtilization" and record.timestamp == 1685613601
+    assert parse_metric_line("2023-06-01T10:00:00,000 - Model loaded\n") is None
+
+
+def test_parser_percentiles_and_series(tmp_path):
+    log = tmp_path / "model_metrics.log"
+    values = write_log(log)
+
+    parser = MetricsLogParser(["PredictionTime", "CPUUtilization"], bucket_sec=5)
+    written = []
+    parser.add_listener(
+        lambda matches: written.extend(float(m[2]) for m in matches),
+        metric="PredictionTime",
+    )
+    parser.parse_file(log, skip_lines=201, chunk_size=4096)
+
+    expected = sorted(values[100:])
+    series = parser.get("PredictionTime")
+    assert written == values[100:]
+    assert series.count == len(expected)
+    assert series.mean() == pytest.approx(sum(expected) / len(expected))
+    for q in [50, 90, 99]:
+        assert series.percentile(q) == pytest.approx(
+            expected[int(q / 100 * len(expected)) - 1], rel=1e-3
+        )
+
+    summary = parser.summary()
+    assert summary["CPUUtilization"]["p50"] == 50.0
+    buckets = summary["PredictionTime"]["series"]
+    assert len(buckets) == 2 and sum(b["count"] for b in buckets) == len(expected)
+
+
+def test_gen_metrics_from_log(tmp_path):
+    log = tmp_path / "ts_metrics.log"
+    write_log(log, count=10)
+    raw = tmp_path / "raw.json"
+    gen_metrics_from_log({"Model": "resnet", "Batch size": "4"}, log, raw)
+
+    metrics = json.loads(raw.read_text())
+    assert len(metrics) == 10
+    assert metrics[0] == {
+        "MetricName": "resnet_CPUUtilization",
+        "Dimensions": [
+            {"Name": "batch_size", "Value": "4"},
+            {"Name": "Level", "Value": "Host"},
+        ],
+        "Unit": "Percent",
+        "Value": 50.0,
+        "Timestamp": 1685613600,
+    }
+    assert raw.read_text() == json.dumps(metrics, indent=4)
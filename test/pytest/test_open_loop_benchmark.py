@@ -0,0 +1,131 @@
+import asyncio
+import json
+import random
+import sys
+from argparse import Namespace
+from pathlib import Path
+
+import pytest
+
+CURR_FILE_PATH = Path(__file__).parent
+REPO_ROOT_DIR = CURR_FILE_PATH.parents[1]
+
+sys.path.append((REPO_ROOT_DIR / "benchmarks" / "utils").as_posix())
+
+import open_loop_benchmark as olb  # noqa: E402
+
+
+def test_histogram_percentiles():
+    rng = random.Random(0)
+    values = sorted(rng.randint(1, 10**6) for _ in range(10000))
+    histogram = olb.LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+
+    for q in [50, 90, 99, 99.9]:
+        expected = values[int(q / 100 * len(values)) - 1]
+        assert histogram.percentile(q) == pytest.approx(expected, rel=1 / 128)
+    assert histogram.percentile(100) == values[-1]
+
+    merged = olb.LatencyHistogram()
+    merged.merge(histogram)
+    merged.record(1)
+    assert merged.count == len(values) + 1 and merged.min == 1
+
+
+def test_arrivals(tmp_path):
+    arrivals = olb.poisson_arrivals(100, 5000)
+    assert arrivals[0] == 0
+    assert arrivals[-1] / len(arrivals) == pytest.approx(0.01, rel=0.1)
+    assert olb.constant_arrivals(4, 3) == [0, 0.25, 0.5]
+
+    trace = tmp_path / "trace.jsonl"
+    trace.write_text(
+        '{"timestamp": 12.0, "name": "b"}\n\n{"timestamp": 10.0, "name": "a"}\n'
+    )
+    assert olb.trace_arrivals(trace, time_scale=0.5) == [(0.0, "a"), (1.0, "b")]
+
+
+def test_request_mix(tmp_path):
+    (tmp_path / "input.bin").write_bytes(b"\x00\x01")
+    mix = tmp_path / "mix.jsonl"
+    mix.write_text(
+        "\n".join(
+            json.dumps(r)
+            for r in [
+                {"name": "image", "input": "input.bin", "weight": 3},
+                {"name": "llm", "url": "predictions/llm", "body": {"prompt": "hi"}},
+            ]
+        )
+    )
+    image, llm = olb.load_request_mix(mix, "predictions/benchmark")
+    assert image.body == b"\x00\x01" and image.weight == 3
+    assert image.url == "predictions/benchmark"
+    assert llm.content_type == "application/json" and llm.model_name == "llm"
+
+
+def test_self_test_against_stub_server():
+    args = Namespace(
+        requests=50,
+        rate=200.0,
+        arrival="poisson",
+        seed=0,
+        input=None,
+        model_name=None,
+        max_in_flight=None,
+        protocol="http",
+        timeout=10,
+    )
+    result = asyncio.run(olb.self_test(args))
+    assert result["single"]["latency_ms"]["count"] == 50
+    assert (
+        result["mix"]["ttfb_ms"]["p50"]
+        < result["mix"]["by_name"]["stream"]["latency_ms"]["p50"]
+    )
+
+
+async def _run_against(handle, arrivals):
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    client = olb.HttpClient(f"http://127.0.0.1:{port}", timeout=5)
+    mix = [olb.RequestType("default", "predictions/m", b"x", "text/plain")]
+    generator = olb.LoadGenerator(client, mix)
+    try:
+        await generator.run(arrivals)
+    finally:
+        await client.close()
+        server.close()
+    return generator
+
+
+async def _read_request(reader):
+    while (await reader.readline()) not in (b"\r\n", b""):
+        pass
+    await reader.readexactly(1)
+
+
+def test_truncated_body_counts_as_failure():
+    async def handle(reader, writer):
+        await _read_request(reader)
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 100\r\n\r\npartial")
+        await writer.drain()
+        writer.close()
+
+    generator = asyncio.run(_run_against(handle, [0, 0.01]))
+
+    assert generator.failures["default"] == 2
+
+
+def test_idle_connection_closed_by_server_is_retried():
+    async def handle(reader, writer):
+        # Serves a single request per connection without Connection: close,
+        # like a server whose keep-alive timeout expired
+        await _read_request(reader)
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+        await writer.drain()
+        writer.close()
+
+    generator = asyncio.run(_run_against(handle, [0, 0.05, 0.1]))
+
+    assert not generator.failures
+    assert generator.latency["default"].count == 3
@@ -0,0 +1,98 @@
+import csv
+import random
+import sys
+from pathlib import Path
+
+CURR_FILE_PATH = Path(__file__).parent
+REPO_ROOT_DIR = CURR_FILE_PATH.parents[1]
+
+sys.path.append((REPO_ROOT_DIR / "benchmarks").as_posix())
+
+from utils.regression_gate import (  # noqa: E402
+    INCONCLUSIVE,
+    REGRESSION,
+    UNCHANGED,
+    bootstrap_ci,
+    gate_reports,
+)
+from utils.report import Report  # noqa: E402
+
+
+def write_report(path, throughputs, p99s):
+    path.mkdir(parents=True, exist_ok=True)
+    csv_file = path / "ab_report.csv"
+    with open(csv_file, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Benchmark", "TS throughput", "TS latency P99"])
+        for throughput, p99 in zip(throughputs, p99s):
+            writer.writerow(["AB", throughput, p99])
+    report = Report()
+    report.read_csv(csv_file.as_posix())
+    return report
+
+
+def noisy(rng, mean, count, noise=0.05):
+    return [mean * (1 + rng.uniform(-noise, noise)) for _ in range(count)]
+
+
+def test_bootstrap_ci_contains_mean():
+    rng = random.Random(0)
+    samples = noisy(rng, 100, 20)
+    ci = bootstrap_ci(samples)
+
+    assert ci.low < ci.mean < ci.high
+    assert ci.trials == 20
+    assert bootstrap_ci(samples).to_dict() == ci.to_dict()
+
+
+def test_report_reads_trials(tmp_path):
+    report = write_report(
+        tmp_path / "eager_mode_mnist_w4_b1", [100, 110, 120], [10, 12, 14]
+    )
+
+    assert report.trials["TS throughput"] == [100, 110, 120]
+    assert report.properties["TS throughput"] == 110
+    assert report.properties["TS latency P99"] == 12
+
+
+def test_gate_flags_separated_intervals(tmp_path):
+    rng = random.Random(0)
+    baseline = write_report(
+        tmp_path / "baseline" / "eager_mode_mnist_w4_b1",
+        noisy(rng, 1000, 21, noise=0.1),
+        noisy(rng, 20, 21, noise=0.2),
+    )
+    # 8% lower throughput, a noisy but unchanged P99
+    current = write_report(
+        tmp_path / "current" / "eager_mode_mnist_w4_b1",
+        noisy(rng, 920, 5, noise=0.02),
+        noisy(rng, 20, 5, noise=0.2),
+    )
+
+    verdict = gate_reports(
+        {"eager_mode_mnist_w4_b1": current}, {"eager_mode_mnist_w4_b1": baseline}
+    )
+    metrics = verdict["models"]["eager_mode_mnist_w4_b1"]["metrics"]
+
+    assert verdict["regression"]
+    assert metrics["TS throughput"]["verdict"] == REGRESSION
+    assert metrics["TS throughput"]["change_percentage"] < 0
+    assert metrics["TS latency P99"]["verdict"] == UNCHANGED
+
+
+def test_gate_needs_trials(tmp_path):
+    baseline = write_report(
+        tmp_path / "baseline" / "eager_mode_m", [1000] * 10, [20] * 10
+    )
+    current = write_report(tmp_path / "current" / "eager_mode_m", [500], [40])
+
+    verdict = gate_reports(
+        {"eager_mode_m": current, "new": current}, {"eager_mode_m": baseline}
+    )
+
+    assert not verdict["regression"]
+    assert (
+        verdict["models"]["eager_mode_m"]["metrics"]["TS throughput"]["verdict"]
+        == INCONCLUSIVE
+    )
+    assert verdict["models"]["new"]["verdict"] == "no_baseline"
@@ -12,8 +12,9 @@ from queue import Empty, Queue
 from threading import Thread
 
 from ts.handler_utils.utils import create_predict_response
-from ts.protocol.otf_message_handler import retrieve_msg
+from ts.protocol.otf_message_handler import create_load_model_response, retrieve_msg
 from ts.service import PREDICTION_METRIC, PredictionException, Service
+from ts.utils.tracing import disable_tracing
 
 logger = logging.getLogger(__name__)
 
@@ -93,6 +94,8 @@ class AsyncService(object):
     def __init__(self, service):
         self.service = service
         self.service.predict = types.MethodType(predict, self.service)
+        # The tracer follows one batch at a time, async batches are concurrent
+        disable_tracing("not supported with asyncCommunication")
         self.in_queue = Queue()
         self.out_queue = None
         self.exception_queue = Queue()
@@ -106,6 +109,14 @@ class AsyncService(object):
             if cmd == b"I":
                 logging.debug(f"Putting msg in queue: {msg}")
                 self.in_queue.put(msg)
+            elif cmd == b"P":
+                # Sent by the thread of the responses so that it is not interleaved with one
+                response = create_load_model_response(
+                    501, "Profiling is not supported with asyncCommunication"
+                )
+                asyncio.run_coroutine_threadsafe(
+                    self.out_queue.put(response), self.loop
+                ).result()
             else:
                 logging.debug(f"Unexpected request: {cmd}")
 
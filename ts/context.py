@@ -40,6 +40,7 @@ class Context(object):
         self.metrics = metrics
         self.model_yaml_config = model_yaml_config
         self.stopping_criteria = None
+        self.memory_accountant = None
         self.header_key_sequence_id = os.getenv(
             "TS_REQUEST_SEQUENCE_ID", "ts_request_sequence_id"
         )
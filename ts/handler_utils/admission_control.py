@@ -0,0 +1,285 @@
+"""
+Token budget admission control for asynchronous LLM handlers.
+
+The controller tracks the prompt and decode tokens of the requests in flight
+in a worker. A request is admitted when its estimated cost fits into the token
+budget, otherwise it waits in a priority queue. Requests are rejected with
+a 503 and a Retry-After hint when the queue is full or they waited longer than
+the queue timeout or their deadline.
+
+To enable it for the vLLM handler add the following section in your model-config.yaml file
+
+handler:
+  admission_control:
+    max_tokens: 16384           # budget of in flight prompt + decode tokens
+    max_queue_size: 64
+    max_queue_time_sec: 30
+    policy: cost                # fifo, cost or deadline
+    default_max_tokens: 256     # decode tokens reserved if the request sets none
+    chars_per_token: 4          # prompt token estimate
+    retry_after_sec: 1
+    deadline_header: x-request-deadline-ms
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from ts.metrics.metric_type_enum import MetricTypes
+from ts.utils.util import PredictionException
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ["fifo", "cost", "deadline"]
+
+
+class AdmissionRejected(PredictionException):
+    def __init__(self, message, retry_after_sec=1):
+        super().__init__(message, 503)
+        self.retry_after_sec = retry_after_sec
+
+
+class _Waiter(object):
+    __slots__ = ["key", "future", "prompt_tokens", "decode_tokens", "cancelled"]
+
+    def __init__(self, key, future, prompt_tokens, decode_tokens):
+        self.key = key
+        self.future = future
+        self.prompt_tokens = prompt_tokens
+        self.decode_tokens = decode_tokens
+        self.cancelled = False
+
+    def __lt__(self, other):
+        return self.key < other.key
+
+
+class TokenBudgetAdmission(object):
+    """
+    Admits requests into the engine within a budget of in flight tokens.
+    All methods have to be called from the same event loop.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int,
+        max_queue_size: int = 64,
+        max_queue_time_sec: Optional[float] = None,
+        policy: str = "fifo",
+        default_max_tokens: int = 256,
+        chars_per_token: float = 4.0,
+        retry_after_sec: float = 1.0,
+        deadline_header: str = "x-request-deadline-ms",
+        metrics=None,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"policy should be one of {POLICIES}, got {policy}")
+        self.max_tokens = max_tokens
+        self.max_queue_size = max_queue_size
+        self.max_queue_time_sec = max_queue_time_sec
+        self.policy = policy
+        self.default_max_tokens = default_max_tokens
+        self.chars_per_token = chars_per_token
+        self.retry_after_sec = retry_after_sec
+        self.deadline_header = deadline_header
+        self.metrics = metrics
+
+        self.prompt_tokens = 0
+        self.decode_tokens = 0
+        self.in_flight = 0
+        self.rejected = 0
+        self._queue = []
+        self._queued = 0
+        self._counter = itertools.count()
+
+    @classmethod
+    def from_config(cls, config: dict, metrics=None):
+        """Creates the controller from the admission_control section of model-config.yaml"""
+        return cls(
+            max_tokens=int(config["max_tokens"]),
+            max_queue_size=int(config.get("max_queue_size", 64)),
+            max_queue_time_sec=config.get("max_queue_time_sec"),
+            policy=config.get("policy", "fifo"),
+            default_max_tokens=int(config.get("default_max_tokens", 256)),
+            chars_per_token=float(config.get("chars_per_token", 4.0)),
+            retry_after_sec=config.get("retry_after_sec", 1.0),
+            deadline_header=config.get("deadline_header", "x-request-deadline-ms"),
+            metrics=metrics,
+        )
+
+    @property
+    def queue_size(self) -> int:
+        return self._queued
+
+    @property
+    def in_flight_tokens(self) -> int:
+        return self.prompt_tokens + self.decode_tokens
+
+    def estimate_prompt_tokens(self, prompt) -> int:
+        """Estimates the number of tokens of a prompt string or a list of chat messages"""
+        if isinstance(prompt, list):
+            chars = sum(
+                len(str(m.get("content", ""))) if isinstance(m, dict) else len(str(m))
+                for m in prompt
+            )
+        else:
+            chars = len(prompt or "")
+        return max(1, math.ceil(chars / self.chars_per_token))
+
+    def parse_deadline(self, value) -> Optional[float]:
+        """Converts a deadline header in milliseconds from now to a monotonic timestamp"""
+        if value is None:
+            return None
+        try:
+            return time.monotonic() + float(value) / 1000
+        except ValueError:
+            logger.warning("Ignoring invalid deadline header value %s", value)
+            return None
+
+    def _fits(self, tokens: int) -> bool:
+        # A request larger than the whole budget is admitted when the worker is idle
+        return self.in_flight == 0 or self.in_flight_tokens + tokens <= self.max_tokens
+
+    def _priority(self, cost: int, deadline: Optional[float], seq: int):
+        if self.policy == "cost":
+            return (cost, seq)
+        if self.policy == "deadline":
+            return (deadline if deadline is not None else math.inf, cost, seq)
+        return (seq,)
+
+    def _reject(self, message: str):
+        self.rejected += 1
+        if self.metrics is not None:
+            self.metrics.add_counter("AdmissionRejected", 1)
+        raise AdmissionRejected(message, self.retry_after_sec)
+
+    def _reserve(self, prompt_tokens: int, decode_tokens: int) -> None:
+        self.prompt_tokens += prompt_tokens
+        self.decode_tokens += decode_tokens
+        self.in_flight += 1
+
+    def _dispatch(self) -> None:
+        while self._queue:
+            waiter = self._queue[0]
+            if waiter.cancelled:
+                heapq.heappop(self._queue)
+                continue
+            if not self._fits(waiter.prompt_tokens + waiter.decode_tokens):
+                break
+            heapq.heappop(self._queue)
+            self._queued -= 1
+            self._reserve(waiter.prompt_tokens, waiter.decode_tokens)
+            waiter.future.set_result(True)
+
+    async def acquire(
+        self,
+        prompt_tokens: int,
+        decode_tokens: int,
+        deadline: Optional[float] = None,
+    ) -> None:
+        """Waits until the request fits into the token budget.
+
+        Args:
+            prompt_tokens (int): estimated prompt tokens of the request
+            decode_tokens (int): maximum number of tokens to generate
+            deadline (float): optional time.monotonic() timestamp to be admitted by
+
+        Raises:
+            AdmissionRejected: if the queue is full or the request timed out waiting
+        """
+        cost = prompt_tokens + decode_tokens
+        if not self._queue and self._fits(cost):
+            self._reserve(prompt_tokens, decode_tokens)
+            self._emit_admission(0.0)
+            return
+
+        if self._queued >= self.max_queue_size:
+            self._reject(
+                f"Too many queued requests: {self._queued}, "
+                f"{self.in_flight_tokens}/{self.max_tokens} tokens in flight"
+            )
+
+        start = time.monotonic()
+        timeout = self.max_queue_time_sec
+        if deadline is not None:
+            remaining = max(0.0, deadline - start)
+            timeout = remaining if timeout is None else min(timeout, remaining)
+
+        waiter = _Waiter(
+            self._priority(cost, deadline, next(self._counter)),
+            asyncio.get_running_loop().create_future(),
+            prompt_tokens,
+            decode_tokens,
+        )
+        heapq.heappush(self._queue, waiter)
+        self._queued += 1
+        self._dispatch()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+        except asyncio.TimeoutError:
+            if not waiter.future.done():
+                waiter.cancelled = True
+                self._queued -= 1
+                self._reject(
+                    f"Request not admitted within {timeout:.3f}s, "
+                    f"{self.in_flight_tokens}/{self.max_tokens} tokens in flight"
+                )
+        except asyncio.CancelledError:
+            if waiter.future.done():
+                self.release(prompt_tokens, decode_tokens)
+            else:
+                waiter.cancelled = True
+                self._queued -= 1
+            raise
+        self._emit_admission((time.monotonic() - start) * 1000)
+
+    def release(self, prompt_tokens: int, decode_tokens: int) -> None:
+        """Returns the tokens of a finished request to the budget"""
+        self.prompt_tokens -= prompt_tokens
+        self.decode_tokens -= decode_tokens
+        self.in_flight -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def admit(
+        self,
+        prompt_tokens: int,
+        decode_tokens: int,
+        deadline: Optional[float] = None,
+    ):
+        await self.acquire(prompt_tokens, decode_tokens, deadline)
+        try:
+            yield
+        finally:
+            self.release(prompt_tokens, decode_tokens)
+
+    def _emit_admission(self, queue_time_ms: float) -> None:
+        if self.metrics is None:
+            return
+        self.metrics.add_time("AdmissionQueueTime", round(queue_time_ms, 2))
+        self.metrics.add_metric(
+            "AdmissionQueueSize",
+            self._queued,
+            "count",
+            metric_type=MetricTypes.GAUGE,
+        )
+        self.metrics.add_metric(
+            "AdmissionPromptTokens",
+            self.prompt_tokens,
+            "count",
+            metric_type=MetricTypes.GAUGE,
+        )
+        self.metrics.add_metric(
+            "AdmissionDecodeTokens",
+            self.decode_tokens,
+            "count",
+            metric_type=MetricTypes.GAUGE,
+        )
+        self.metrics.add_percent(
+            "AdmissionBudgetUtilization",
+            round(100.0 * self.in_flight_tokens / self.max_tokens, 2),
+        )
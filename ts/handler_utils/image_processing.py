@@ -0,0 +1,145 @@
+"""
+Tensor image processing for vision handlers
+
+The default preprocess of the vision handlers decodes every image with PIL and
+runs the transforms.Compose chain of the handler in float32 on the CPU. The
+tensor path decodes JPEG and PNG bytes with torchvision.io.decode_image into
+uint8 tensors and resizes and crops them in uint8. The batch is then copied to
+the device of the model, a quarter of the bytes of float32, and converted to
+float and normalized there in a single addcmul.
+
+The steps are derived from the image_processing chain of the handler, which can
+hold Resize, CenterCrop, ToTensor and Normalize transforms. Handlers with other
+transforms keep the PIL path.
+
+To enable it add the following section in your model-config.yaml file
+
+handler:
+  image_processing: torchvision
+"""
+import io
+import logging
+
+import torch
+from PIL import Image
+from torchvision import transforms
+from torchvision.io import ImageReadMode, decode_image
+
+try:
+    # The v2 kernels resize uint8 tensors without converting them to float
+    from torchvision.transforms.v2 import functional as F
+except ImportError:
+    from torchvision.transforms import functional as F
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ["pil", "torchvision"]
+
+
+class TensorImageProcessing(object):
+    """
+    uint8 decode, resize and crop of images, followed by the normalization of
+    the batch on its device.
+    """
+
+    def __init__(self, steps, mean=None, std=None, to_float=True):
+        self.steps = steps
+        self.to_float = to_float
+        self.mode = ImageReadMode.UNCHANGED
+        self._scale = self._bias = None
+        if mean is not None:
+            if len(mean) == 1:
+                self.mode = ImageReadMode.GRAY
+            elif len(mean) == 3:
+                self.mode = ImageReadMode.RGB
+            mean = torch.tensor(mean, dtype=torch.float32).view(1, -1, 1, 1)
+            std = torch.tensor(std, dtype=torch.float32).view(1, -1, 1, 1)
+            # (x / 255 - mean) / std == x * scale + bias
+            self._scale = 1 / (255 * std)
+            self._bias = -mean / std
+        self._device_constants = {}
+
+    @classmethod
+    def from_transforms(cls, image_processing):
+        """
+        Creates the processing equivalent to a transforms.Compose chain.
+
+        Raises ValueError if the chain holds transforms which are not supported.
+        """
+        chain = getattr(image_processing, "transforms", [image_processing])
+        steps, mean, std, to_float = [], None, None, False
+        for transform in chain:
+            if isinstance(transform, transforms.Resize):
+                steps.append(
+                    lambda img, t=transform: F.resize(
+                        img, t.size, t.interpolation, t.max_size, antialias=True
+                    )
+                )
+            elif isinstance(transform, transforms.CenterCrop):
+                steps.append(lambda img, t=transform: F.center_crop(img, t.size))
+            elif isinstance(transform, transforms.ToTensor):
+                to_float = True
+            elif isinstance(transform, transforms.Normalize) and to_float:
+                mean, std = list(transform.mean), list(transform.std)
+            else:
+                raise ValueError(f"{transform} is not supported on uint8 tensors")
+        return cls(steps, mean, std, to_float)
+
+    @classmethod
+    def from_config(cls, model_yaml_config, image_processing):
+        """
+        Creates the processing if the handler section of model-config.yaml selects
+        the torchvision backend, None otherwise.
+        """
+        handler_config = (model_yaml_config or {}).get("handler") or {}
+        backend = handler_config.get("image_processing", "pil")
+        if backend not in BACKENDS:
+            raise ValueError(
+                f"handler.image_processing should be one of {BACKENDS}, got {backend}"
+            )
+        if backend == "pil" or image_processing is None:
+            return None
+        try:
+            return cls.from_transforms(image_processing)
+        except ValueError as e:
+            logger.warning("Using the PIL image processing: %s", e)
+            return None
+
+    def decode(self, data):
+        """Decodes the bytes of an image into a CHW uint8 tensor"""
+        try:
+            return decode_image(
+                torch.frombuffer(bytearray(data), dtype=torch.uint8), mode=self.mode
+            )
+        except RuntimeError:
+            # Formats torchvision can't decode, e.g. BMP or TIFF
+            image = Image.open(io.BytesIO(data))
+            if self.mode == ImageReadMode.RGB:
+                image = image.convert("RGB")
+            elif self.mode == ImageReadMode.GRAY:
+                image = image.convert("L")
+            return F.pil_to_tensor(image)
+
+    def transform(self, image):
+        """Resizes and crops a uint8 image"""
+        for step in self.steps:
+            image = step(image)
+        return image
+
+    def __call__(self, data):
+        return self.transform(self.decode(data))
+
+    def normalize(self, batch):
+        """Converts a NCHW uint8 batch to float and normalizes it on its device"""
+        if not self.to_float:
+            return batch
+        if self._scale is None:
+            return batch.float().div_(255)
+        constants = self._device_constants.get(batch.device)
+        if constants is None:
+            constants = self._device_constants[batch.device] = (
+                self._scale.to(batch.device),
+                self._bias.to(batch.device),
+            )
+        scale, bias = constants
+        return torch.addcmul(bias, batch, scale)
@@ -0,0 +1,230 @@
+"""
+Length bucketing for batches of variable length token sequences.
+
+Padding a whole batch to its longest sequence wastes compute when the lengths
+are skewed: one 512 token input padded together with thirty-one 20 token inputs
+runs ~16x more tokens through the model than needed. The utilities here sort
+the rows of a batch by length, split them into buckets which are padded only to
+the longest sequence of the bucket and restore the original row order of the
+outputs so they line up with the request ids of the batch.
+
+To enable it for a handler add the following section in your model-config.yaml file
+
+handler:
+  length_bucketing:
+    max_padding_ratio: 0.2
+    max_bucket_size: 16
+
+or use explicit bucket boundaries
+
+handler:
+  length_bucketing:
+    boundaries: [32, 64, 128, 256]
+"""
+import logging
+from typing import Callable, List, Optional, Sequence
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+PADDING_WASTE_METRIC = "PaddingWaste"
+
+
+def padding_waste(lengths: Sequence[int], buckets: List[List[int]] = None) -> float:
+    """Ratio of padded tokens to the total tokens processed.
+
+    Args:
+        lengths (Sequence[int]): Number of real tokens per row
+        buckets (List[List[int]]): Row indices per bucket. Defaults to a single
+            bucket holding all rows.
+
+    Returns:
+        float: padding waste in the range [0, 1)
+    """
+    if buckets is None:
+        buckets = [list(range(len(lengths)))]
+
+    real, total = 0, 0
+    for bucket in buckets:
+        if not bucket:
+            continue
+        bucket_lengths = [lengths[i] for i in bucket]
+        real += sum(bucket_lengths)
+        total += max(bucket_lengths) * len(bucket_lengths)
+
+    if total == 0:
+        return 0.0
+    return 1.0 - real / total
+
+
+def bucket_by_length(
+    lengths: Sequence[int],
+    boundaries: Optional[Sequence[int]] = None,
+    max_bucket_size: Optional[int] = None,
+    max_padding_ratio: float = 0.0,
+) -> List[List[int]]:
+    """Groups row indices into buckets of similar length.
+
+    Rows are sorted by length. With boundaries, a row goes into the first bucket
+    whose boundary is >= its length, longer rows share a final bucket.
+    Without boundaries, rows are greedily appended to the current bucket as long
+    as the padding waste of the bucket stays within max_padding_ratio.
+    In both cases a bucket never holds more than max_bucket_size rows.
+
+    Args:
+        lengths (Sequence[int]): Number of real tokens per row
+        boundaries (Sequence[int]): Optional upper length limits of the buckets
+        max_bucket_size (int): Optional maximum number of rows per bucket
+        max_padding_ratio (float): Maximum padding waste tolerated within a bucket
+
+    Returns:
+        List[List[int]]: Row indices per bucket, ordered by increasing length
+    """
+    if max_bucket_size is not None and max_bucket_size < 1:
+        raise ValueError("max_bucket_size must be a positive integer")
+
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    boundaries = sorted(boundaries) if boundaries else None
+
+    buckets = []
+    current = []
+    current_key = None
+    current_real = 0
+
+    for idx in order:
+        length = lengths[idx]
+        if boundaries is not None:
+            key = next((b for b in boundaries if length <= b), None)
+            start_new = bool(current) and key != current_key
+        else:
+            key = None
+            # Rows are sorted, so the new row defines the padded length
+            padded = length * (len(current) + 1)
+            waste = 1.0 - (current_real + length) / padded if padded else 0.0
+            start_new = bool(current) and waste > max_padding_ratio
+
+        if max_bucket_size is not None and len(current) >= max_bucket_size:
+            start_new = True
+
+        if start_new:
+            buckets.append(current)
+            current = []
+            current_real = 0
+
+        current.append(idx)
+        current_key = key
+        current_real += length
+
+    if current:
+        buckets.append(current)
+    return buckets
+
+
+def pad_sequences(
+    sequences: Sequence[Sequence[int]], pad_value: int = 0, device=None
+) -> (torch.Tensor, torch.Tensor):
+    """Right pads token id sequences to the longest one.
+
+    Args:
+        sequences (Sequence[Sequence[int]]): Token ids per row, lists or 1D tensors
+        pad_value (int): Token id used for padding
+        device (torch.device): Device of the returned tensors
+
+    Returns:
+        (Tensor, Tensor): input ids and attention mask of shape [rows, max_length]
+    """
+    max_length = max(len(seq) for seq in sequences)
+    input_ids = torch.full(
+        (len(sequences), max_length), pad_value, dtype=torch.long, device=device
+    )
+    attention_mask = torch.zeros(
+        (len(sequences), max_length), dtype=torch.long, device=device
+    )
+    for row, seq in enumerate(sequences):
+        input_ids[row, : len(seq)] = torch.as_tensor(seq, dtype=torch.long)
+        attention_mask[row, : len(seq)] = 1
+    return input_ids, attention_mask
+
+
+class LengthBucketing(object):
+    """
+    Runs a model function on length buckets of a batch and restores the
+    original row order of its outputs.
+    """
+
+    def __init__(
+        self,
+        boundaries: Optional[Sequence[int]] = None,
+        max_bucket_size: Optional[int] = None,
+        max_padding_ratio: float = 0.0,
+        pad_value: int = 0,
+    ):
+        self.boundaries = boundaries
+        self.max_bucket_size = max_bucket_size
+        self.max_padding_ratio = max_padding_ratio
+        self.pad_value = pad_value
+
+    @classmethod
+    def from_config(cls, config: dict, pad_value: int = 0):
+        """Creates the bucketing from the length_bucketing section of model-config.yaml"""
+        return cls(
+            boundaries=config.get("boundaries"),
+            max_bucket_size=config.get("max_bucket_size"),
+            max_padding_ratio=float(config.get("max_padding_ratio", 0.0)),
+            pad_value=config.get("pad_value", pad_value),
+        )
+
+    def buckets(self, lengths: Sequence[int]) -> List[List[int]]:
+        return bucket_by_length(
+            lengths,
+            boundaries=self.boundaries,
+            max_bucket_size=self.max_bucket_size,
+            max_padding_ratio=self.max_padding_ratio,
+        )
+
+    def run(
+        self,
+        sequences: Sequence[Sequence[int]],
+        fn: Callable,
+        device=None,
+        metrics=None,
+    ) -> list:
+        """Pads each bucket separately and calls fn(input_ids, attention_mask) on it.
+
+        Args:
+            sequences (Sequence[Sequence[int]]): Unpadded token ids per row
+            fn (Callable): Returns one output per row of the bucket, either as a
+                list or as a tensor whose first dimension is the bucket size
+            device (torch.device): Device of the padded bucket tensors
+            metrics: Optional metrics cache to report the padding waste to
+
+        Returns:
+            list: One output per row, in the order of the input sequences
+        """
+        lengths = [len(seq) for seq in sequences]
+        buckets = self.buckets(lengths)
+
+        if metrics is not None:
+            metrics.add_percent(
+                PADDING_WASTE_METRIC, round(padding_waste(lengths, buckets) * 100, 2)
+            )
+        logger.debug(
+            "Split batch of %d rows into %d length buckets",
+            len(sequences),
+            len(buckets),
+        )
+
+        results = [None] * len(sequences)
+        for bucket in buckets:
+            input_ids, attention_mask = pad_sequences(
+                [sequences[i] for i in bucket], self.pad_value, device
+            )
+            outputs = fn(input_ids, attention_mask)
+            if len(outputs) != len(bucket):
+                raise ValueError(
+                    f"Expected {len(bucket)} outputs for bucket, got {len(outputs)}"
+                )
+            for row, idx in enumerate(bucket):
+                results[idx] = outputs[row]
+        return results
@@ -0,0 +1,170 @@
+"""
+Compact encodings of segmentation masks
+
+The default response of the image segmenter is a [class, probability] pair of
+floats per pixel, several MB of JSON per image. The following encodings of the
+label map, the class of every pixel, are negotiated with the Accept header of
+the request:
+
+- application/json: the default [class, probability] pairs
+- application/vnd.torchserve.rle+json: a COCO RLE binary mask per class, in the
+  compressed string format of pycocotools
+- image/png: the label map as a grayscale PNG
+
+With the confidence=uint8 parameter, e.g. Accept: image/png; confidence=uint8,
+the probability of the class of every pixel is quantized to uint8 and returned
+as the alpha channel of the PNG or as a base64 PNG in the RLE response.
+
+The default encoding, for requests without an Accept header, is configured with
+the following section in your model-config.yaml file
+
+handler:
+  segmentation:
+    encoding: rle              # json, rle or png
+    confidence: false
+    encode_threads: 4
+"""
+import base64
+import io
+
+import numpy as np
+from PIL import Image
+
+JSON = "json"
+RLE = "rle"
+PNG = "png"
+ENCODINGS = [JSON, RLE, PNG]
+MEDIA_TYPES = {
+    "application/json": JSON,
+    "application/vnd.torchserve.rle+json": RLE,
+    "image/png": PNG,
+}
+CONTENT_TYPES = {encoding: media for media, encoding in MEDIA_TYPES.items()}
+
+
+def negotiate(accept, default=JSON, confidence=False):
+    """
+    Picks the encoding of the media range of the Accept header with the highest
+    quality which is supported.
+
+    :return: (encoding, confidence)
+    """
+    if not accept:
+        return default, confidence
+    best, best_q = None, 0.0
+    for media_range in accept.split(","):
+        media, *params = [p.strip() for p in media_range.split(";")]
+        params = dict(p.partition("=")[::2] for p in params if "=" in p)
+        try:
+            q = float(params.get("q", 1))
+        except ValueError:
+            q = 0.0
+        if media == "*/*":
+            encoding = default
+        elif media == "image/*":
+            encoding = PNG
+        elif media == "application/*":
+            encoding = JSON if default == PNG else default
+        elif media in MEDIA_TYPES:
+            encoding = MEDIA_TYPES[media]
+        else:
+            continue
+        if q > best_q:
+            best_q = q
+            best = (encoding, params.get("confidence", "") == "uint8" or confidence)
+    return best if best is not None else (default, confidence)
+
+
+def rle_counts(mask):
+    """Run lengths of a binary HxW mask in column major order, starting with a run of zeros"""
+    flat = np.asarray(mask, dtype=bool).ravel(order="F")
+    changes = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+    counts = np.diff(np.concatenate([[0], changes, [flat.size]]))
+    if flat.size and flat[0]:
+        counts = np.concatenate([[0], counts])
+    return counts.tolist()
+
+
+def rle_string(counts):
+    """Compressed string of run lengths, as rleToString of pycocotools"""
+    chars = []
+    for i, x in enumerate(counts):
+        if i > 2:
+            x -= counts[i - 2]
+        more = True
+        while more:
+            c = x & 0x1F
+            x >>= 5
+            more = x != -1 if c & 0x10 else x != 0
+            if more:
+                c |= 0x20
+            chars.append(chr(c + 48))
+    return "".join(chars)
+
+
+def rle_string_counts(string):
+    """Run lengths of a compressed string, as rleFrString of pycocotools"""
+    counts = []
+    p = 0
+    while p < len(string):
+        x, k, more = 0, 0, True
+        while more:
+            c = ord(string[p]) - 48
+            x |= (c & 0x1F) << (5 * k)
+            more = bool(c & 0x20)
+            p += 1
+            k += 1
+            if not more and c & 0x10:
+                x |= -1 << (5 * k)
+        if len(counts) > 2:
+            x += counts[-2]
+        counts.append(x)
+    return counts
+
+
+def rle_decode(rle):
+    """Binary HxW mask of a COCO RLE"""
+    height, width = rle["size"]
+    counts = rle_string_counts(rle["counts"])
+    values = np.zeros(len(counts), dtype=bool)
+    values[1::2] = True
+    flat = np.repeat(values, counts)
+    return flat.reshape((width, height)).T
+
+
+def png_bytes(array, compress_level=1):
+    """PNG of a HxW uint8 array, or of a HxWx2 array as grayscale and alpha"""
+    mode = "LA" if array.ndim == 3 else "L"
+    buffer = io.BytesIO()
+    Image.fromarray(np.ascontiguousarray(array), mode=mode).save(
+        buffer, format="PNG", compress_level=compress_level
+    )
+    return buffer.getvalue()
+
+
+def encode_rle(labels, names, confidence=None):
+    """
+    :param labels: HxW uint8 label map
+    :param names: names of the class ids
+    :param confidence: HxW uint8 quantized probabilities or None
+    """
+    height, width = labels.shape
+    result = {"size": [height, width], "masks": {}}
+    for class_id in np.unique(labels).tolist():
+        result["masks"][names[class_id]] = {
+            "size": [height, width],
+            "counts": rle_string(rle_counts(labels == class_id)),
+        }
+    if confidence is not None:
+        result["confidence"] = {
+            "format": "png",
+            "scale": 1 / 255,
+            "data": base64.b64encode(png_bytes(confidence)).decode("ascii"),
+        }
+    return result
+
+
+def encode_png(labels, confidence=None):
+    if confidence is None:
+        return png_bytes(labels)
+    return png_bytes(np.stack([labels, confidence], axis=2))
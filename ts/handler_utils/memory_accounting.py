@@ -0,0 +1,311 @@
+"""
+Memory accounting of handler stages
+
+A sample of the requests is measured while the handler runs, for the whole
+request and for every stage decorated with ts.handler_utils.timer.timed:
+
+- the Python heap high-water mark with tracemalloc, which only traces the sampled requests
+- the delta of the resident set size of the process
+- the peak of the torch CUDA caching allocator
+
+The peaks are emitted as MemoryPeakHeap, MemoryRSSDelta and MemoryPeakCUDA metrics
+tagged with the stage, the batch size and the input size. The peaks of the whole
+requests fit a linear model of the peak bytes per input byte, which can be used to
+reject a batch with a 507 before it runs out of memory.
+
+To enable it add the following section in your model-config.yaml file
+
+handler:
+  memory_accounting:
+    sample_rate: 0.05           # fraction of the requests measured
+    tracemalloc: true
+    reject: true                # reject batches whose predicted peak exceeds the budget
+    max_bytes: 4000000000       # budget, by default the free device memory and the cached blocks
+    safety_factor: 1.2
+    min_samples: 20             # measured requests before rejecting
+
+The stages are measured in the thread running the request. With MicroBatching
+the stages run in parallel threads and the process wide peaks can't be
+attributed to one of them, so only the whole request, the handler stage, is
+measured.
+"""
+import json
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+import psutil
+import torch
+
+from ts.metrics.dimension import Dimension
+from ts.utils.util import PredictionException
+
+
+class MemoryBudgetExceeded(PredictionException):
+    def __init__(self, message):
+        super().__init__(message, 507)
+
+
+def input_size(value):
+    """Approximate size in bytes of a request input"""
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    if isinstance(value, torch.Tensor):
+        return value.element_size() * value.nelement()
+    try:
+        return len(json.dumps(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+def size_bucket(size):
+    """Upper bound of the power of two bucket of a size, to bound the metric cardinality"""
+    return str(1 << max(0, int(size) - 1).bit_length())
+
+
+class _Frame(object):
+    __slots__ = [
+        "stage",
+        "heap_start",
+        "heap_peak",
+        "cuda_start",
+        "cuda_peak",
+        "rss_start",
+    ]
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.heap_start = self.heap_peak = 0
+        self.cuda_start = self.cuda_peak = 0
+        self.rss_start = 0
+
+
+class LinearMemoryModel(object):
+    """Least squares fit of peak bytes = intercept + slope * input bytes"""
+
+    def __init__(self):
+        self.n = 0
+        self.sum_x = self.sum_y = self.sum_xx = self.sum_xy = 0.0
+
+    def add(self, x, y):
+        self.n += 1
+        self.sum_x += x
+        self.sum_y += y
+        self.sum_xx += x * x
+        self.sum_xy += x * y
+
+    def predict(self, x):
+        if self.n == 0:
+            return 0.0
+        mean_x, mean_y = self.sum_x / self.n, self.sum_y / self.n
+        variance = self.sum_xx / self.n - mean_x * mean_x
+        if variance <= 0:
+            # All the samples had the same input size
+            return mean_y * x / mean_x if mean_x else mean_y
+        slope = (self.sum_xy / self.n - mean_x * mean_y) / variance
+        slope = max(slope, 0.0)
+        return max(mean_y + slope * (x - mean_x), 0.0)
+
+
+class MemoryAccountant(object):
+    """Measures the memory of the sampled requests of a worker"""
+
+    def __init__(
+        self,
+        sample_rate=0.05,
+        use_tracemalloc=True,
+        reject=False,
+        max_bytes=None,
+        safety_factor=1.2,
+        min_samples=20,
+        device=None,
+    ):
+        self.sample_every = round(1 / sample_rate) if sample_rate > 0 else 0
+        self.use_tracemalloc = use_tracemalloc
+        self.reject = reject
+        self.max_bytes = max_bytes
+        self.safety_factor = safety_factor
+        self.min_samples = min_samples
+        self.device = device
+        self.cuda = device is not None and device.type == "cuda"
+        self.model = LinearMemoryModel()
+        self._process = psutil.Process()
+        self._requests = 0
+        # The frames of the stages and their peaks are kept by the thread
+        # measuring the request, the stages run by other threads are not measured
+        self._local = threading.local()
+        self._started_tracemalloc = False
+
+    @classmethod
+    def from_config(cls, model_yaml_config, device=None):
+        """Creates the accountant from the handler section of model-config.yaml, None if not enabled"""
+        handler_config = (model_yaml_config or {}).get("handler") or {}
+        config = handler_config.get("memory_accounting")
+        if not config:
+            return None
+        if config is True:
+            config = {}
+        return cls(
+            sample_rate=float(config.get("sample_rate", 0.05)),
+            use_tracemalloc=config.get("tracemalloc", True),
+            reject=config.get("reject", False),
+            max_bytes=config.get("max_bytes"),
+            safety_factor=float(config.get("safety_factor", 1.2)),
+            min_samples=int(config.get("min_samples", 20)),
+            device=device,
+        )
+
+    @property
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @property
+    def active(self):
+        """Whether a sampled request is being measured by the current thread"""
+        return bool(self._stack)
+
+    def budget(self):
+        if self.max_bytes is not None:
+            return self.max_bytes
+        if self.cuda:
+            # Memory reserved by the caching allocator but not allocated is
+            # reused by the next batch
+            free = torch.cuda.mem_get_info(self.device)[0]
+            return (
+                free
+                + torch.cuda.memory_reserved(self.device)
+                - torch.cuda.memory_allocated(self.device)
+            )
+        return psutil.virtual_memory().available
+
+    def check(self, batch_size, input_bytes, metrics=None):
+        """
+        Raises MemoryBudgetExceeded when the predicted peak of the batch exceeds the budget
+        """
+        if not self.reject or self.model.n < self.min_samples:
+            return
+        predicted = self.model.predict(input_bytes) * self.safety_factor
+        budget = self.budget()
+        if predicted > budget:
+            if metrics is not None:
+                metrics.add_counter(
+                    "MemoryRejected",
+                    1,
+                    dimensions=self._dimensions(None, batch_size, input_bytes),
+                )
+            raise MemoryBudgetExceeded(
+                f"Predicted memory peak {int(predicted)} bytes of the batch of "
+                f"{batch_size} requests of {input_bytes} bytes exceeds {int(budget)} bytes"
+            )
+
+    def record_oom(self, batch_size, input_bytes, metrics):
+        """Counts a batch which ran out of memory"""
+        metrics.add_counter(
+            "MemoryOOM", 1, dimensions=self._dimensions(None, batch_size, input_bytes)
+        )
+
+    def sample(self):
+        if not self.sample_every:
+            return False
+        self._requests += 1
+        return self._requests % self.sample_every == 0
+
+    @contextmanager
+    def measure_request(self, batch_size, input_bytes, metrics):
+        """Measures the whole request if it is sampled and emits the peaks of its stages"""
+        if not self.sample():
+            yield
+            return
+        self._local.peaks = []
+        with self._measure("handler"):
+            yield
+        peaks, self._local.peaks = self._local.peaks, []
+        for stage, heap, rss, cuda in peaks:
+            dimensions = self._dimensions(stage, batch_size, input_bytes)
+            if self.use_tracemalloc:
+                metrics.add_size(
+                    "MemoryPeakHeap", heap, unit="B", dimensions=dimensions
+                )
+            metrics.add_size("MemoryRSSDelta", rss, unit="B", dimensions=dimensions)
+            if self.cuda:
+                metrics.add_size(
+                    "MemoryPeakCUDA", cuda, unit="B", dimensions=dimensions
+                )
+        stage, heap, rss, cuda = peaks[-1]
+        self.model.add(input_bytes, cuda if self.cuda else max(heap, rss))
+
+    @staticmethod
+    def _dimensions(stage, batch_size, input_bytes):
+        dimensions = [] if stage is None else [Dimension("Stage", stage)]
+        dimensions.append(Dimension("BatchSize", str(batch_size)))
+        dimensions.append(Dimension("InputBytes", size_bucket(input_bytes)))
+        return dimensions
+
+    def _propagate_peaks(self):
+        # Peaks are reset when a nested stage starts, the frames below keep the maximum
+        if self._tracing:
+            peak = tracemalloc.get_traced_memory()[1]
+            for frame in self._stack:
+                frame.heap_peak = max(frame.heap_peak, peak)
+        if self.cuda:
+            peak = torch.cuda.max_memory_allocated(self.device)
+            for frame in self._stack:
+                frame.cuda_peak = max(frame.cuda_peak, peak)
+
+    @property
+    def _tracing(self):
+        return self.use_tracemalloc and tracemalloc.is_tracing()
+
+    def _enter(self, stage):
+        if not self._stack and self.use_tracemalloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._propagate_peaks()
+        frame = _Frame(stage)
+        if self._tracing:
+            # Python < 3.9 can't reset the peak, nested stages then report the
+            # peak of the request so far
+            getattr(tracemalloc, "reset_peak", lambda: None)()
+            frame.heap_start = frame.heap_peak = tracemalloc.get_traced_memory()[0]
+        if self.cuda:
+            torch.cuda.reset_peak_memory_stats(self.device)
+            frame.cuda_start = frame.cuda_peak = torch.cuda.memory_allocated(
+                self.device
+            )
+        frame.rss_start = self._process.memory_info().rss
+        self._stack.append(frame)
+
+    def _exit(self):
+        self._propagate_peaks()
+        frame = self._stack.pop()
+        self._local.peaks.append(
+            (
+                frame.stage,
+                frame.heap_peak - frame.heap_start,
+                self._process.memory_info().rss - frame.rss_start,
+                frame.cuda_peak - frame.cuda_start,
+            )
+        )
+        if not self._stack and self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    @contextmanager
+    def measure(self, stage):
+        """Measures a stage of the sampled request which is being measured by this thread"""
+        if not self.active:
+            yield
+            return
+        with self._measure(stage):
+            yield
+
+    @contextmanager
+    def _measure(self, stage):
+        self._enter(stage)
+        try:
+            yield
+        finally:
+            self._exit()
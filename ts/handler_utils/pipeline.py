@@ -0,0 +1,239 @@
+"""
+In-worker execution of a linear chain of workflow nodes
+
+Every node of a workflow DAG is a separate model, and its outputs go through
+the frontend to the worker of the next node, encoded in the OTF protocol and
+serialized as JSON or torch.save bytes. A pipeline runs a chain of nodes in a
+single worker, passing the outputs of every node in memory to the next one.
+Tensors stay on their device, and every node keeps its own handler, model
+directory and model-config.yaml.
+
+The pipeline model archives are built by torch-workflow-archiver from the
+pipelines section of a workflow spec. Their model-config.yaml holds
+
+handler:
+  pipeline:
+    inputs: [pre_processing]      # predecessors of the pipeline in the DAG
+    nodes:
+      - name: cat_dog_classification
+        model_dir: cat_dog_classification   # content of the .mar of the node
+        inputs: [pre_processing]
+      - name: dog_breed_classification
+        model_dir: dog_breed_classification
+        inputs: [pre_processing, cat_dog_classification]
+
+Nodes without a model_dir are functions of the workflow handler, e.g.
+handler: workflow_handler.py:prep_intermediate_input.
+
+A node receives the rows the frontend would send it: the output of its
+predecessor as "body" if it has one, the output of every predecessor under its
+name otherwise. The outputs are the objects returned by the handler of the
+predecessor instead of their serialization, so handlers written for workflows
+should accept both, e.g. str and bytes.
+"""
+import importlib
+import importlib.util
+import json
+import logging
+import os
+import re
+import sys
+
+import ts
+from ts.context import Context
+from ts.model_loader import TsModelLoader
+from ts.utils.util import PredictionException, get_yaml_config
+
+logger = logging.getLogger(__name__)
+
+
+def _row_value(row):
+    value = row.get("data")
+    return row.get("body") if value is None else value
+
+
+def _import_handler(handler, node_dir, node_name):
+    """Imports the module of a handler file of the node, or of a default handler"""
+    module_name, _, function_name = handler.partition(":")
+    path = os.path.join(node_dir, module_name)
+    if not path.endswith(".py"):
+        path += ".py"
+    if os.path.isfile(path):
+        # A name of its own, nodes often have handler files of the same name
+        stem = os.path.splitext(os.path.basename(path))[0]
+        unique_name = re.sub(r"\W", "_", f"ts_pipeline_{node_name}_{stem}")
+        spec = importlib.util.spec_from_file_location(unique_name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = module
+        spec.loader.exec_module(module)
+    else:
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            module = importlib.import_module(f".{module_name}", "ts.torch_handler")
+    return module, function_name or "handle"
+
+
+class PipelineNode(object):
+    """
+    A node of the pipeline with its handler and context.
+
+    :param name: name of the node in the workflow DAG
+    :param inputs: names of the predecessors of the node in the DAG
+    :param model_dir: directory of the model of the node, None for a function
+        of the workflow handler
+    :param handler: handler of a function node
+    """
+
+    def __init__(self, name, inputs, model_dir=None, handler=None):
+        self.name = name
+        self.inputs = list(inputs)
+        self.model_dir = model_dir
+        self.handler = handler
+        self.context = None
+        self.entry_point = None
+
+    def load(self, pipeline_context):
+        """Loads the handler of the node and initializes it with a context of its own"""
+        properties = pipeline_context.system_properties
+        node_dir = properties["model_dir"]
+        manifest = None
+        model_yaml_config = {}
+        if self.model_dir is not None:
+            node_dir = os.path.join(node_dir, self.model_dir)
+            manifest_file = os.path.join(node_dir, "MAR-INF", "MANIFEST.json")
+            with open(manifest_file) as f:
+                manifest = json.load(f)
+            model = manifest.get("model", {})
+            self.handler = model.get("handler")
+            if "configFile" in model:
+                model_yaml_config = get_yaml_config(
+                    os.path.join(node_dir, model["configFile"])
+                )
+
+        self.context = Context(
+            self.name,
+            node_dir,
+            manifest,
+            properties.get("batch_size"),
+            properties.get("gpu_id"),
+            ts.__version__,
+            properties.get("limit_max_image_pixels", True),
+            pipeline_context.metrics,
+            model_yaml_config,
+        )
+
+        # The modules of the node, e.g. model.py, are imported from its directory
+        # and removed afterwards so that the next node imports its own
+        loaded_modules = set(sys.modules)
+        sys.path.insert(0, node_dir)
+        try:
+            module, function_name = _import_handler(self.handler, node_dir, self.name)
+            loader = TsModelLoader()
+            if hasattr(module, function_name):
+                self.entry_point, initialize_fn = loader._get_function_entry_point(
+                    module, function_name
+                )
+            else:
+                self.entry_point, initialize_fn = loader._get_class_entry_point(module)
+            initialize_fn(self.context)
+        finally:
+            sys.path.remove(node_dir)
+            prefix = os.path.join(node_dir, "")
+            for name in set(sys.modules) - loaded_modules:
+                path = getattr(sys.modules[name], "__file__", None) or ""
+                if path.startswith(prefix) and not name.startswith("ts_pipeline_"):
+                    del sys.modules[name]
+        logger.info("Loaded pipeline node %s with handler %s", self.name, self.handler)
+
+    def rows(self, data, outputs, pipeline_inputs):
+        """The input rows of the node, as the frontend would send them"""
+        if self.inputs == pipeline_inputs:
+            return data
+
+        def value(name, idx):
+            if name in outputs:
+                return outputs[name][idx]
+            if len(pipeline_inputs) == 1:
+                return _row_value(data[idx])
+            return data[idx].get(name)
+
+        rows = []
+        for idx in range(len(data)):
+            if len(self.inputs) == 1:
+                rows.append({"body": value(self.inputs[0], idx)})
+            else:
+                rows.append({name: value(name, idx) for name in self.inputs})
+        return rows
+
+    def __call__(self, rows, pipeline_context):
+        self.context.request_ids = pipeline_context.request_ids
+        self.context.request_processor = pipeline_context.request_processor
+        return self.entry_point(rows, self.context)
+
+
+class Pipeline(object):
+    """
+    Runs the nodes of a linear chain in order, passing their outputs in memory.
+
+    :param nodes: PipelineNode list, in the order of the chain
+    :param inputs: names of the predecessors of the pipeline in the workflow DAG
+    """
+
+    def __init__(self, nodes, inputs=()):
+        if not nodes:
+            raise ValueError("A pipeline needs at least one node")
+        self.nodes = nodes
+        self.inputs = list(inputs)
+        known = set(self.inputs)
+        for node in nodes:
+            unknown = [name for name in node.inputs if name not in known]
+            if unknown:
+                raise ValueError(
+                    f"Inputs {unknown} of node {node.name} are neither inputs of "
+                    f"the pipeline nor earlier nodes"
+                )
+            known.add(node.name)
+
+    @classmethod
+    def from_config(cls, model_yaml_config):
+        handler_config = (model_yaml_config or {}).get("handler") or {}
+        config = handler_config.get("pipeline")
+        if not config:
+            raise ValueError("model-config.yaml has no handler.pipeline section")
+        inputs = config.get("inputs") or []
+        nodes = []
+        previous = inputs
+        for node in config["nodes"]:
+            node_inputs = node.get("inputs")
+            if node_inputs is None:
+                # By default the output of the previous node
+                node_inputs = previous
+            nodes.append(
+                PipelineNode(
+                    node["name"],
+                    node_inputs,
+                    node.get("model_dir"),
+                    node.get("handler"),
+                )
+            )
+            previous = [node["name"]]
+        return cls(nodes, inputs)
+
+    def load(self, context):
+        for node in self.nodes:
+            node.load(context)
+
+    def __call__(self, data, context):
+        outputs = {}
+        for node in self.nodes:
+            result = node(node.rows(data, outputs, self.inputs), context)
+            if result is None or len(result) != len(data):
+                raise PredictionException(
+                    f"Pipeline node {node.name} returned "
+                    f"{0 if result is None else len(result)} outputs for a batch "
+                    f"of {len(data)}",
+                    500,
+                )
+            outputs[node.name] = result
+        return outputs[self.nodes[-1].name]
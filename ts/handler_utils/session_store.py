@@ -0,0 +1,409 @@
+"""
+Session state store for stateful inference with sequence batching.
+
+Handlers get and put the state of a sequence by its sequence id
+(see Context.get_sequence_id). The store accounts for the memory held by each
+session and keeps the resident state within a byte budget. When the budget is
+exceeded, or a session has been idle for a while, the least recently used
+sessions are spilled to local disk or to pinned host memory if spilling is
+enabled, otherwise they are evicted. Sessions idle for longer than the TTL are
+evicted.
+
+Spilling to pinned memory needs CUDA and only moves the tensors on a device:
+sessions without device tensors stay resident, and are evicted to enforce the
+budget.
+
+To configure the store add the following section in your model-config.yaml file
+
+handler:
+  session_store:
+    max_sessions: 1000
+    max_bytes: 1073741824
+    ttl_sec: 600
+    spill: disk                # or pinned
+    spill_dir: /tmp/ts_sessions
+    spill_idle_sec: 60
+    max_spill_bytes: 8589934592
+
+and create it in the initialize method of your handler
+
+self.sessions = SessionStateStore.from_config(
+    ctx.model_yaml_config["handler"]["session_store"], metrics=ctx.metrics
+)
+"""
+import hashlib
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+import torch
+
+from ts.metrics.metric_type_enum import MetricTypes
+
+logger = logging.getLogger(__name__)
+
+SPILL_DISK = "disk"
+SPILL_PINNED = "pinned"
+
+
+def state_nbytes(state: Any) -> int:
+    """Estimates the memory held by a session state, counting tensor storage"""
+    if isinstance(state, torch.Tensor):
+        return state.element_size() * state.nelement()
+    if isinstance(state, (bytes, bytearray, memoryview)):
+        return len(state)
+    if isinstance(state, dict):
+        return sys.getsizeof(state) + sum(
+            state_nbytes(k) + state_nbytes(v) for k, v in state.items()
+        )
+    if isinstance(state, (list, tuple, set)):
+        return sys.getsizeof(state) + sum(state_nbytes(v) for v in state)
+    nbytes = getattr(state, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    return sys.getsizeof(state)
+
+
+def _map_tensors(state: Any, fn) -> Any:
+    if isinstance(state, torch.Tensor):
+        return fn(state)
+    if isinstance(state, dict):
+        return type(state)((k, _map_tensors(v, fn)) for k, v in state.items())
+    if isinstance(state, (list, tuple)):
+        mapped = [_map_tensors(v, fn) for v in state]
+        return (
+            type(state)(*mapped) if hasattr(state, "_fields") else type(state)(mapped)
+        )
+    return state
+
+
+def _on_device(tensor: torch.Tensor) -> bool:
+    return tensor.device.type != "cpu"
+
+
+class _Session(object):
+    __slots__ = [
+        "state",
+        "nbytes",
+        "spilled_nbytes",
+        "last_access",
+        "spilled",
+        "devices",
+    ]
+
+    def __init__(self, state, nbytes):
+        self.state = state
+        self.nbytes = nbytes
+        # Bytes moved out of the resident memory by the spill
+        self.spilled_nbytes = 0
+        self.last_access = time.monotonic()
+        self.spilled = None
+        self.devices = None
+
+
+class SessionStateStore(object):
+    """
+    LRU store of session states keyed by sequence id with memory accounting,
+    TTL eviction and optional spilling of idle sessions.
+    """
+
+    def __init__(
+        self,
+        max_sessions: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        ttl_sec: Optional[float] = None,
+        spill: Optional[str] = None,
+        spill_dir: Optional[str] = None,
+        spill_idle_sec: Optional[float] = None,
+        max_spill_bytes: Optional[int] = None,
+        metrics=None,
+        metrics_interval_sec: float = 10.0,
+    ):
+        if spill not in (None, SPILL_DISK, SPILL_PINNED):
+            raise ValueError(
+                f"spill should be one of {SPILL_DISK}, {SPILL_PINNED}, got {spill}"
+            )
+        if spill == SPILL_PINNED and not torch.cuda.is_available():
+            raise ValueError(
+                f"spill: {SPILL_PINNED} needs CUDA, use spill: {SPILL_DISK} on this host"
+            )
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.ttl_sec = ttl_sec
+        self.spill = spill
+        self.spill_idle_sec = spill_idle_sec
+        self.max_spill_bytes = max_spill_bytes
+        self.metrics = metrics
+        self.metrics_interval_sec = metrics_interval_sec
+
+        self.spill_dir = None
+        self._owns_spill_dir = False
+        if spill == SPILL_DISK:
+            if spill_dir is None:
+                spill_dir = tempfile.mkdtemp(prefix="ts_sessions_")
+                self._owns_spill_dir = True
+            os.makedirs(spill_dir, exist_ok=True)
+            self.spill_dir = spill_dir
+
+        self._sessions = OrderedDict()
+        self._lock = threading.RLock()
+        self.resident_bytes = 0
+        self.spilled_bytes = 0
+        self.spills = 0
+        self.evictions = 0
+        self._published = {"spills": 0, "evictions": 0}
+        self._last_publish = time.monotonic()
+
+    @classmethod
+    def from_config(cls, config: dict, metrics=None):
+        """Creates the store from the session_store section of model-config.yaml"""
+        config = config or {}
+        return cls(
+            max_sessions=config.get("max_sessions"),
+            max_bytes=config.get("max_bytes"),
+            ttl_sec=config.get("ttl_sec"),
+            spill=config.get("spill"),
+            spill_dir=config.get("spill_dir"),
+            spill_idle_sec=config.get("spill_idle_sec"),
+            max_spill_bytes=config.get("max_spill_bytes"),
+            metrics=metrics,
+            metrics_interval_sec=config.get("metrics_interval_sec", 10.0),
+        )
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, sequence_id):
+        with self._lock:
+            self._expire()
+            return sequence_id in self._sessions
+
+    def __getitem__(self, sequence_id):
+        with self._lock:
+            self._expire()
+            if sequence_id not in self._sessions:
+                raise KeyError(sequence_id)
+            return self._touch(sequence_id)
+
+    def __setitem__(self, sequence_id, state):
+        self.put(sequence_id, state)
+
+    def __delitem__(self, sequence_id):
+        if not self.delete(sequence_id):
+            raise KeyError(sequence_id)
+
+    def get(self, sequence_id, default=None):
+        """Returns the state of a session, loading it back if it was spilled"""
+        try:
+            return self[sequence_id]
+        except KeyError:
+            return default
+
+    def put(self, sequence_id, state) -> None:
+        """Stores the state of a session and enforces the memory budget"""
+        with self._lock:
+            self._remove(sequence_id)
+            session = _Session(state, state_nbytes(state))
+            self._sessions[sequence_id] = session
+            self.resident_bytes += session.nbytes
+            self._expire()
+            self._enforce_budget(keep=sequence_id)
+            self._maybe_publish_metrics()
+
+    def delete(self, sequence_id) -> bool:
+        """Removes a session, e.g. at the end of a sequence"""
+        with self._lock:
+            return self._remove(sequence_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            for sequence_id in list(self._sessions):
+                self._remove(sequence_id)
+
+    def close(self) -> None:
+        """Removes all sessions and the spill directory created by the store"""
+        self.clear()
+        if self._owns_spill_dir and self.spill_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+    def _touch(self, sequence_id):
+        session = self._sessions[sequence_id]
+        self._sessions.move_to_end(sequence_id)
+        session.last_access = time.monotonic()
+        if session.spilled is not None:
+            self._restore(session)
+            self._enforce_budget(keep=sequence_id)
+        return session.state
+
+    def _remove(self, sequence_id) -> bool:
+        session = self._sessions.pop(sequence_id, None)
+        if session is None:
+            return False
+        if session.spilled is not None and self.spill == SPILL_DISK:
+            try:
+                os.remove(session.spilled)
+            except OSError:
+                pass
+        self.spilled_bytes -= session.spilled_nbytes
+        self.resident_bytes -= session.nbytes - session.spilled_nbytes
+        return True
+
+    def _evict(self, sequence_id) -> None:
+        self._remove(sequence_id)
+        self.evictions += 1
+        logger.debug("Evicted session %s", sequence_id)
+
+    def _expire(self) -> None:
+        """Evicts sessions idle for longer than the TTL and spills idle sessions"""
+        now = time.monotonic()
+        for sequence_id in list(self._sessions):
+            session = self._sessions[sequence_id]
+            idle = now - session.last_access
+            if self.ttl_sec is not None and idle > self.ttl_sec:
+                self._evict(sequence_id)
+            elif (
+                self.spill is not None
+                and self.spill_idle_sec is not None
+                and idle > self.spill_idle_sec
+            ):
+                if session.spilled is None:
+                    self._spill(session, sequence_id)
+            else:
+                # Sessions are ordered by last access
+                break
+        self._enforce_spill_budget()
+
+    def _over_budget(self) -> bool:
+        return (
+            self.max_sessions is not None and len(self._sessions) > self.max_sessions
+        ) or (self.max_bytes is not None and self.resident_bytes > self.max_bytes)
+
+    def _enforce_budget(self, keep=None) -> None:
+        if not self._over_budget():
+            return
+        for sequence_id in list(self._sessions):
+            over_sessions = (
+                self.max_sessions is not None
+                and len(self._sessions) > self.max_sessions
+            )
+            over_bytes = (
+                self.max_bytes is not None and self.resident_bytes > self.max_bytes
+            )
+            if not (over_sessions or over_bytes):
+                break
+            if sequence_id == keep:
+                continue
+            session = self._sessions[sequence_id]
+            if over_sessions or self.spill is None:
+                self._evict(sequence_id)
+            elif session.spilled is None and not self._spill(session, sequence_id):
+                # Nothing to move out of the resident memory
+                self._evict(sequence_id)
+        self._enforce_spill_budget()
+
+    def _enforce_spill_budget(self) -> None:
+        if self.max_spill_bytes is None:
+            return
+        for sequence_id in list(self._sessions):
+            if self.spilled_bytes <= self.max_spill_bytes:
+                break
+            if self._sessions[sequence_id].spilled is not None:
+                self._evict(sequence_id)
+
+    def _spill(self, session: _Session, sequence_id) -> bool:
+        """Spills a session, returns False if none of its memory can be moved"""
+        if self.spill == SPILL_DISK:
+            digest = hashlib.sha1(str(sequence_id).encode("utf-8")).hexdigest()
+            path = os.path.join(self.spill_dir, f"{digest}.pt")
+            torch.save(session.state, path)
+            session.spilled = path
+            session.state = None
+            session.spilled_nbytes = session.nbytes
+        else:
+            moved = []
+
+            def find_device_tensors(tensor):
+                if _on_device(tensor):
+                    moved.append(tensor)
+                return tensor
+
+            _map_tensors(session.state, find_device_tensors)
+            if not moved:
+                return False
+            devices = []
+
+            def to_pinned(tensor):
+                if not _on_device(tensor):
+                    devices.append(None)
+                    return tensor
+                devices.append(tensor.device)
+                return tensor.to("cpu").pin_memory()
+
+            session.state = _map_tensors(session.state, to_pinned)
+            session.devices = devices
+            session.spilled = SPILL_PINNED
+            session.spilled_nbytes = sum(state_nbytes(t) for t in moved)
+
+        self.resident_bytes -= session.spilled_nbytes
+        self.spilled_bytes += session.spilled_nbytes
+        self.spills += 1
+        logger.debug("Spilled session %s to %s", sequence_id, self.spill)
+        return True
+
+    def _restore(self, session: _Session) -> None:
+        if self.spill == SPILL_DISK:
+            path = session.spilled
+            session.state = torch.load(path, weights_only=False)
+            os.remove(path)
+        else:
+            devices = iter(session.devices)
+
+            def to_device(tensor):
+                device = next(devices)
+                if device is None:
+                    return tensor
+                return tensor.to(device, non_blocking=True)
+
+            session.state = _map_tensors(session.state, to_device)
+            session.devices = None
+
+        session.spilled = None
+        self.spilled_bytes -= session.spilled_nbytes
+        self.resident_bytes += session.spilled_nbytes
+        session.spilled_nbytes = 0
+
+    def _maybe_publish_metrics(self) -> None:
+        if self.metrics is None:
+            return
+        now = time.monotonic()
+        if now - self._last_publish >= self.metrics_interval_sec:
+            self._last_publish = now
+            self.publish_metrics()
+
+    def publish_metrics(self, metrics=None) -> None:
+        """Publishes the size of the store and the spills and evictions since the last call"""
+        metrics = metrics or self.metrics
+        if metrics is None:
+            return
+        with self._lock:
+            metrics.add_metric(
+                "SessionStoreSessions",
+                len(self._sessions),
+                "count",
+                metric_type=MetricTypes.GAUGE,
+            )
+            metrics.add_size("SessionStoreResidentBytes", self.resident_bytes, unit="B")
+            metrics.add_size("SessionStoreSpilledBytes", self.spilled_bytes, unit="B")
+            metrics.add_counter(
+                "SessionStoreSpills", self.spills - self._published["spills"]
+            )
+            metrics.add_counter(
+                "SessionStoreEvictions", self.evictions - self._published["evictions"]
+            )
+            self._published = {"spills": self.spills, "evictions": self.evictions}
@@ -0,0 +1,149 @@
+"""
+Fast text normalization for the text based default handlers.
+
+TextNormalizer produces the same tokens as the TextHandler cleanup chain
+(_remove_html_tags, lower, _expand_contractions, _remove_accented_characters,
+_remove_punctuation) followed by the basic_english tokenizer, in a few
+C level passes instead of ~17 full passes over the text:
+
+- one regex pass removing html tags and entities
+- lowercasing
+- one regex pass expanding contractions, compiled from a trie of the
+  contraction map instead of a large alternation
+- one str.translate pass with a precompiled table which removes apostrophes,
+  accents and punctuation and lowercases the result
+- splitting on whitespace
+"""
+import re
+import string
+import unicodedata
+from typing import Dict, List
+
+from ts.utils.util import CLEANUP_REGEX
+
+# Joins the texts of a batch so the cleanup runs once per batch.
+# None of the cleanup steps match across or modify a newline or the record separator.
+BATCH_SEPARATOR = "\n\x1e\n"
+
+_PUNCTUATION_TABLE = str.maketrans("", "", string.punctuation)
+
+
+def _fold_character(char: str) -> str:
+    """
+    Applies accent removal, punctuation removal and lowercasing to a single character.
+
+    NFKD followed by dropping non ascii characters is a per character mapping:
+    canonical reordering only moves combining marks, which are not ascii.
+    """
+    folded = unicodedata.normalize("NFKD", char).encode("ascii", "ignore")
+    folded = folded.decode("utf-8", "ignore")
+    return folded.translate(_PUNCTUATION_TABLE).lower()
+
+
+class _FoldTable(dict):
+    """
+    str.translate table which computes the mapping of a code point on first use
+    """
+
+    def __missing__(self, codepoint):
+        folded = _fold_character(chr(codepoint))
+        self[codepoint] = folded
+        return folded
+
+
+def _build_trie_pattern(keys: List[str]) -> str:
+    trie = {}
+    for key in keys:
+        node = trie
+        for char in key:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def to_pattern(node):
+        terminal = "" in node
+        branches = [
+            re.escape(char) + to_pattern(child) for char, child in node.items() if char
+        ]
+        if not branches:
+            return ""
+        pattern = (
+            branches[0] if len(branches) == 1 else "(?:{})".format("|".join(branches))
+        )
+        if terminal:
+            # Greedy optional, longer keys are preferred over their prefixes
+            return "(?:{})?".format(pattern)
+        return pattern
+
+    return to_pattern(trie)
+
+
+def compile_contractions(contraction_map: Dict[str, str]):
+    """Compiles the contraction keys into a trie shaped regex.
+
+    re.compile("|".join(keys)) picks the first key in map order matching at a position.
+    Keys which have an earlier key as (case insensitive) prefix can therefore never
+    match and are dropped. For the remaining keys the first match is the longest,
+    which is what a trie regex with greedy optional suffixes matches.
+
+    Args:
+        contraction_map (Dict[str, str]): contraction -> expansion
+
+    Returns:
+        re.Pattern: pattern matching the same spans as the alternation of the keys
+    """
+    reachable = []
+    for key in contraction_map:
+        lowered = key.lower()
+        if not any(lowered.startswith(prev) for prev in reachable):
+            reachable.append(lowered)
+    return re.compile(_build_trie_pattern(reachable), flags=re.IGNORECASE | re.DOTALL)
+
+
+class TextNormalizer(object):
+    """
+    Tokenizes text like TextHandler._tokenize(TextHandler._normalize_text(text))
+    with the default basic_english tokenizer
+    """
+
+    def __init__(self, contraction_map: Dict[str, str], cleanup_regex=CLEANUP_REGEX):
+        self.contraction_map = contraction_map
+        self.cleanup_regex = cleanup_regex
+        self.contractions_regex = compile_contractions(contraction_map)
+        self.expansions = {}
+        for key in contraction_map:
+            lowered = key.lower()
+            if lowered not in self.expansions and contraction_map.get(lowered):
+                expansion = contraction_map[lowered]
+                self.expansions[lowered] = lowered[0] + expansion[1:]
+        self.table = _FoldTable()
+        for codepoint in range(128):
+            self.table[codepoint] = _fold_character(chr(codepoint))
+
+    def _expand_match(self, contraction):
+        match = contraction.group(0)
+        expanded = self.expansions.get(match)
+        if expanded is not None:
+            return expanded
+        # Case insensitive matches of non ascii characters like the long s
+        expanded = self.contraction_map.get(match) or self.contraction_map.get(
+            match.lower()
+        )
+        return match[0] + expanded[1:]
+
+    def normalize(self, text: str) -> str:
+        """Normalized text whose whitespace separated words are the tokens"""
+        text = self.cleanup_regex.sub("", text).lower()
+        text = self.contractions_regex.sub(self._expand_match, text)
+        return text.translate(self.table)
+
+    def tokenize(self, text: str) -> List[str]:
+        return self.normalize(text).split()
+
+    def tokenize_batch(self, texts: List[str]) -> List[List[str]]:
+        """Tokenizes all texts of a batch with a single normalize call"""
+        if len(texts) > 1 and not any(BATCH_SEPARATOR in text for text in texts):
+            texts = self.normalize(BATCH_SEPARATOR.join(texts)).split(BATCH_SEPARATOR)
+            return [text.split() for text in texts]
+        return [self.tokenize(text) for text in texts]
+
+    __call__ = tokenize
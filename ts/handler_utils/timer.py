@@ -1,11 +1,39 @@
 """
-Decorator for timing handler methods
+Stage timing for handler methods
 
-Use this decorator to compute the execution time for your preprocesss, inference and
-postprocess methods.
-By default this feature is not enabled.
+Use the timed decorator to measure the latency of your preprocess, inference and
+postprocess methods, or of any custom stage of your handler:
 
-To enable this, add the following section in your model-config.yaml file
+    @timed
+    def preprocess(self, data):
+        ...
+
+    @timed("tokenize")
+    def tokenize(self, text):
+        ...
+
+    def inference(self, data):
+        with stage_timer(self).measure("forward"):
+            ...
+
+A sample of the calls is measured and recorded into per stage histograms which are
+reported periodically as StageLatency percentiles and StageCount metrics. On GPU
+the stages are timed with CUDA events which are resolved asynchronously, so the
+measurement does not synchronize the device.
+
+The sampling is configured with the following section in your model-config.yaml file
+
+handler:
+  stage_timing:
+    sample_rate: 0.01           # fraction of the calls measured, 0 disables timing
+    report_interval_sec: 60
+    percentiles: [50, 90, 99]
+    cuda_events: true
+
+To emit one ts_handler_<stage> metric for every call, e.g. to break down the
+PredictionTime in benchmarks, add the following section instead. The end of
+every stage is then synchronized on GPU, so that the metric is emitted with the
+request it belongs to
 
 handler:
   profile: true
@@ -15,53 +43,277 @@ https://github.com/pytorch/serve/tree/master/examples/benchmarking/resnet50
 
 """
 
+import functools
+import threading
 import time
+from collections import deque
+from contextlib import contextmanager
 
 import torch
 
+from ts.metrics.dimension import Dimension
+from ts.utils.tracing import get_tracer
 
-def timed(func):
-    def wrap_func(self, *args, **kwargs):
-        # Measure time if config specified in model_yaml_config
-        if (
-            self.context
-            and "handler" in self.context.model_yaml_config
-            and "profile" in self.context.model_yaml_config["handler"]
-        ):
-            if self.context.model_yaml_config["handler"]["profile"]:
-                # Measure start time
-                if torch.cuda.is_available():
-                    start = torch.cuda.Event(enable_timing=True)
-                    end = torch.cuda.Event(enable_timing=True)
-                    start.record()
-                else:
-                    start = time.time()
-
-                result = func(self, *args, **kwargs)
-
-                # Measure end time
-                if torch.cuda.is_available():
-                    end.record()
-                    torch.cuda.synchronize()
-                else:
-                    end = time.time()
-
-                # Measure time taken to execute the function in miliseconds
-                if torch.cuda.is_available():
-                    duration = start.elapsed_time(end)
-                else:
-                    duration = (end - start) * 1000
-
-                # Add metrics for profiling
-                metrics = self.context.metrics
-                metrics.add_time("ts_handler_" + func.__name__, duration)
+DEFAULT_SAMPLE_RATE = 0.01
+DEFAULT_REPORT_INTERVAL_SEC = 60
+DEFAULT_PERCENTILES = [50, 90, 99]
+# Sampled CUDA measurements waiting for their events to complete
+MAX_PENDING_EVENTS = 256
+
+_create_lock = threading.Lock()
+
+
+class StageHistogram(object):
+    """
+    Log-linear histogram of latencies in microseconds, values are recorded with a
+    relative error below 2**-(significant_bits - 1).
+    """
+
+    def __init__(self, significant_bits=6):
+        self.significant_bits = significant_bits
+        self.counts = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, duration_ms):
+        value = max(0, int(duration_ms * 1000))
+        shift = max(0, value.bit_length() - self.significant_bits)
+        key = (shift, value >> shift)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.count += 1
+        self.total += duration_ms
+        if duration_ms > self.max:
+            self.max = duration_ms
+
+    def percentile(self, q):
+        """Returns the q-th percentile in milliseconds"""
+        if self.count == 0:
+            return 0.0
+        rank = max(1, int(round(q / 100 * self.count + 0.5 - 1e-9)))
+        seen = 0
+        for shift, sub_bucket in sorted(self.counts, key=lambda k: (k[1] + 1) << k[0]):
+            seen += self.counts[(shift, sub_bucket)]
+            if seen >= rank:
+                # Middle of the bucket
+                value = ((2 * sub_bucket + 1) << shift) / 2 if shift else sub_bucket
+                return min(value / 1000, self.max)
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+
+class StageTimer(object):
+    """
+    Records sampled stage latencies of a handler into histograms.
+
+    The stages of a handler can run in parallel threads, e.g. with MicroBatching,
+    so the call counters, histograms and pending CUDA measurements are guarded by
+    a lock. The histograms are swapped out when reported and emitted outside of it.
+    """
+
+    def __init__(
+        self,
+        sample_rate=DEFAULT_SAMPLE_RATE,
+        report_interval_sec=DEFAULT_REPORT_INTERVAL_SEC,
+        percentiles=DEFAULT_PERCENTILES,
+        cuda_events=True,
+        per_call=False,
+    ):
+        self.sample_every = round(1 / sample_rate) if sample_rate > 0 else 0
+        self.report_interval_sec = report_interval_sec
+        self.percentiles = list(percentiles)
+        self.cuda_events = cuda_events and torch.cuda.is_available()
+        self.per_call = per_call
+        self.histograms = {}
+        self.pending = deque()
+        self._calls = {}
+        self._last_report = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, model_yaml_config):
+        """Creates the timer from the handler section of model-config.yaml"""
+        handler_config = (model_yaml_config or {}).get("handler") or {}
+        if handler_config.get("profile"):
+            return cls(sample_rate=1, per_call=True)
+
+        config = handler_config.get("stage_timing", {})
+        if config is False:
+            config = {"sample_rate": 0}
+        elif config is True:
+            config = {}
+        return cls(
+            sample_rate=float(config.get("sample_rate", DEFAULT_SAMPLE_RATE)),
+            report_interval_sec=float(
+                config.get("report_interval_sec", DEFAULT_REPORT_INTERVAL_SEC)
+            ),
+            percentiles=config.get("percentiles", DEFAULT_PERCENTILES),
+            cuda_events=config.get("cuda_events", True),
+        )
+
+    @property
+    def enabled(self):
+        return self.sample_every > 0
+
+    def sample(self, stage):
+        """Returns whether the current call of the stage should be measured"""
+        if not self.sample_every:
+            return False
+        with self._lock:
+            calls = self._calls.get(stage, 0) + 1
+            self._calls[stage] = calls
+        return calls % self.sample_every == 0
+
+    @contextmanager
+    def measure(self, stage, metrics=None):
+        """
+        Measures the enclosed block as a call of the stage if it is sampled.
+
+        Args:
+            stage (str): name of the stage
+            metrics: metrics cache the summaries are reported to
+        """
+        if self.sample(stage):
+            with self._measure(stage, metrics):
+                yield
+        else:
+            yield
+            self.maybe_report(metrics)
+
+    @contextmanager
+    def _measure(self, stage, metrics):
+        if self.cuda_events and len(self.pending) < MAX_PENDING_EVENTS:
+            start = torch.cuda.Event(enable_timing=True)
+            end = torch.cuda.Event(enable_timing=True)
+            start.record()
+            yield
+            end.record()
+            if self.per_call:
+                # The metric belongs to the request of this call
+                end.synchronize()
+                self.record(stage, start.elapsed_time(end), metrics)
             else:
-                # If profile config specified in model_yaml_config is False
-                result = func(self, *args, **kwargs)
+                with self._lock:
+                    self.pending.append((stage, start, end))
         else:
-            # If no profile config specified in model_yaml_config
-            result = func(self, *args, **kwargs)
+            start = time.perf_counter()
+            yield
+            self.record(stage, (time.perf_counter() - start) * 1000, metrics)
+        self.maybe_report(metrics)
+
+    def record(self, stage, duration_ms, metrics=None):
+        if self.per_call:
+            if metrics is not None:
+                metrics.add_time("ts_handler_" + stage, duration_ms)
+            return
+        with self._lock:
+            self._record(stage, duration_ms)
+
+    def _record(self, stage, duration_ms):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = StageHistogram()
+        histogram.record(duration_ms)
+
+    def resolve_pending(self, metrics=None):
+        """Records the CUDA measurements whose events completed, without blocking"""
+        with self._lock:
+            while self.pending:
+                stage, start, end = self.pending[0]
+                if not end.query():
+                    break
+                self.pending.popleft()
+                self._record(stage, start.elapsed_time(end))
+
+    def maybe_report(self, metrics):
+        if self.pending:
+            self.resolve_pending(metrics)
+        if metrics is None or self.per_call:
+            return
+        if time.monotonic() - self._last_report >= self.report_interval_sec:
+            self.report(metrics)
+
+    def report(self, metrics):
+        """Emits the percentiles of every stage and starts new histograms"""
+        with self._lock:
+            self._last_report = time.monotonic()
+            histograms, self.histograms = self.histograms, {}
+        for stage, histogram in histograms.items():
+            stage_dim = Dimension("Stage", stage)
+            metrics.add_metric(
+                "StageCount", histogram.count, "count", dimensions=[stage_dim]
+            )
+            for q in self.percentiles:
+                metrics.add_time(
+                    "StageLatency",
+                    round(histogram.percentile(q), 3),
+                    dimensions=[stage_dim, Dimension("Percentile", f"p{q:g}")],
+                )
 
-        return result
+
+def stage_timer(handler):
+    """Returns the StageTimer of a handler, created from its context on first use"""
+    timer = getattr(handler, "_stage_timer", None)
+    if timer is None:
+        with _create_lock:
+            timer = getattr(handler, "_stage_timer", None)
+            if timer is None:
+                context = getattr(handler, "context", None)
+                timer = StageTimer.from_config(
+                    getattr(context, "model_yaml_config", None)
+                )
+                handler._stage_timer = timer
+    return timer
+
+
+def timed(func=None, stage=None):
+    """
+    Decorator measuring a handler method as a stage, named after the method by default.
+    Can be applied as @timed, @timed("stage") or @timed(stage="stage").
+    """
+    if isinstance(func, str):
+        func, stage = None, func
+    if func is None:
+        return functools.partial(timed, stage=stage)
+
+    name = stage or func.__name__
+
+    @functools.wraps(func)
+    def wrap_func(self, *args, **kwargs):
+        tracer = get_tracer()
+        if tracer is not None and tracer.current is not None:
+            start_ns = time.monotonic_ns()
+            try:
+                return _timed_call(self, func, name, *args, **kwargs)
+            finally:
+                tracer.current.add_child(
+                    "handler." + name, start_ns, time.monotonic_ns()
+                )
+        return _timed_call(self, func, name, *args, **kwargs)
 
     return wrap_func
+
+
+def _timed_call(self, func, name, *args, **kwargs):
+    if not getattr(self, "context", None):
+        return func(self, *args, **kwargs)
+    accountant = getattr(self.context, "memory_accountant", None)
+    if accountant is not None and accountant.active:
+        with accountant.measure(name):
+            return _sampled_call(self, func, name, *args, **kwargs)
+    return _sampled_call(self, func, name, *args, **kwargs)
+
+
+def _sampled_call(self, func, name, *args, **kwargs):
+    timer = stage_timer(self)
+    if not timer.enabled:
+        return func(self, *args, **kwargs)
+    metrics = self.context.metrics
+    if not timer.sample(name):
+        result = func(self, *args, **kwargs)
+        timer.maybe_report(metrics)
+        return result
+    with timer._measure(name, metrics):
+        return func(self, *args, **kwargs)
@@ -1,5 +1,3 @@
-
-
 """
 Single start point for system metrics and process metrics script
 
@@ -11,6 +9,25 @@ import sys
 from ts.metrics import system_metrics
 from ts.metrics.process_memory_metric import check_process_mem_usage
 
+
+def parse_pids(line):
+    """
+    Parse a comma separated list of worker pids
+    """
+    return [int(pid) for pid in line.strip().split(",") if pid.strip().isdigit()]
+
+
+def run_daemon(num_of_gpu, stdin=sys.stdin, stdout=sys.stdout):
+    """
+    Collect metrics until stdin is closed. The frontend writes the list of worker
+    pids once per collection interval and reads back one batch of metrics.
+    """
+    collector = system_metrics.SystemMetricsCollector(num_of_gpu)
+    for line in iter(stdin.readline, ""):
+        stdout.write(collector.report(parse_pids(line)))
+        stdout.flush()
+
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
 
@@ -20,8 +37,19 @@ if __name__ == '__main__':
         help="number of GPU",
         type=int
     )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="keep running and collect metrics for every list of pids read from stdin",
+    )
     arguments = parser.parse_args()
 
+    if arguments.daemon:
+        # stdout carries the metric batches
+        logging.basicConfig(stream=sys.stderr, format="%(message)s", level=logging.WARNING)
+        run_daemon(arguments.gpu)
+        sys.exit(0)
+
     logging.basicConfig(stream=sys.stdout, format="%(message)s", level=logging.INFO)
 
     system_metrics.collect_all(sys.modules['ts.metrics.system_metrics'], arguments.gpu)
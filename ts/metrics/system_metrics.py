@@ -111,9 +111,10 @@ def collect_all(mod, num_of_gpu):
     members = dir(mod)
     for i in members:
         value = getattr(mod, i)
-        if isinstance(value, types.FunctionType) and value.__name__ not in (
-            "collect_all",
-            "log_msg",
+        if (
+            isinstance(value, types.FunctionType)
+            and value.__name__ not in ("collect_all", "log_msg")
+            and not value.__name__.startswith("_")
         ):
             if value.__name__ == "gpu_utilization":
                 value(num_of_gpu)
@@ -124,3 +125,164 @@ def collect_all(mod, num_of_gpu):
         logging.info(str(met))
 
     logging.info("")
+
+
+class SystemMetricsCollector(object):
+    """
+    Long lived collector of system and worker process metrics.
+
+    Unlike collect_all, which is run in a fresh process for every collection,
+    the collector keeps the psutil process handles of the workers and the NVML
+    device handles between samples. CPU utilization is therefore measured over
+    the interval since the previous sample.
+    """
+
+    def __init__(self, num_of_gpu=0):
+        self.num_of_gpu = num_of_gpu or 0
+        self._processes = {}
+        self._gpu_handles = None
+        # The first call only records the CPU times to compare the next sample against
+        psutil.cpu_percent()
+
+    def _gpu_devices(self):
+        if self._gpu_handles is None:
+            self._gpu_handles = []
+            if self.num_of_gpu > 0:
+                # pylint: disable=import-outside-toplevel
+                import pynvml
+
+                try:
+                    pynvml.nvmlInit()
+                    count = min(self.num_of_gpu, pynvml.nvmlDeviceGetCount())
+                    self._gpu_handles = [
+                        pynvml.nvmlDeviceGetHandleByIndex(i) for i in range(count)
+                    ]
+                except pynvml.NVMLError:
+                    logging.error("Failed to initialize NVML", exc_info=True)
+        return self._gpu_handles
+
+    def _gpu_metrics(self, metrics):
+        # pylint: disable=import-outside-toplevel
+        import pynvml
+
+        for idx, handle in enumerate(self._gpu_devices()):
+            dimension_gpu = [Dimension("Level", "Host"), Dimension("device_id", idx)]
+            try:
+                memory = pynvml.nvmlDeviceGetMemoryInfo(handle)
+                metrics.append(
+                    Metric(
+                        "GPUMemoryUtilization",
+                        round(100.0 * memory.used / memory.total, 2),
+                        "percent",
+                        dimension_gpu,
+                    )
+                )
+                metrics.append(
+                    Metric(
+                        "GPUMemoryUsed",
+                        memory.used / (1024 * 1024),
+                        "MB",
+                        dimension_gpu,
+                    )
+                )
+                utilization = pynvml.nvmlDeviceGetUtilizationRates(handle)
+                metrics.append(
+                    Metric("GPUUtilization", utilization.gpu, "percent", dimension_gpu)
+                )
+            except pynvml.NVMLError:
+                logging.error("gpu device monitoring not supported")
+
+    def _process(self, pid):
+        process = self._processes.get(pid)
+        if process is None:
+            process = psutil.Process(pid)
+            # Prime the CPU counters, the first sample of a new worker reads 0
+            process.cpu_percent()
+            self._processes[pid] = process
+        return process
+
+    def collect(self):
+        """
+        Samples the host metrics.
+
+        :return: list of Metric
+        """
+        metrics = [Metric("CPUUtilization", psutil.cpu_percent(), "percent", dimension)]
+
+        memory = psutil.virtual_memory()
+        metrics.append(
+            Metric("MemoryUsed", memory.used / (1024 * 1024), "MB", dimension)
+        )
+        metrics.append(
+            Metric("MemoryAvailable", memory.available / (1024 * 1024), "MB", dimension)
+        )
+        metrics.append(
+            Metric("MemoryUtilization", memory.percent, "percent", dimension)
+        )
+
+        disk = psutil.disk_usage("/")
+        metrics.append(
+            Metric("DiskUsage", disk.used / (1024 * 1024 * 1024), "GB", dimension)
+        )
+        metrics.append(Metric("DiskUtilization", disk.percent, "percent", dimension))
+        metrics.append(
+            Metric("DiskAvailable", disk.free / (1024 * 1024 * 1024), "GB", dimension)
+        )
+
+        if self.num_of_gpu > 0:
+            self._gpu_metrics(metrics)
+        return metrics
+
+    def collect_processes(self, pids):
+        """
+        Samples the resident memory and CPU utilization of the worker processes.
+        Handles of processes which are no longer in pids are dropped.
+
+        :param pids: list of int
+        :return: list of (pid, rss in bytes, cpu percent or None if the process is gone)
+        """
+        for pid in set(self._processes) - set(pids):
+            del self._processes[pid]
+
+        samples = []
+        for pid in pids:
+            try:
+                process = self._process(pid)
+                with process.oneshot():
+                    samples.append(
+                        (pid, process.memory_info().rss, process.cpu_percent())
+                    )
+            except psutil.Error:
+                logging.error("Failed get process for pid: %s", pid, exc_info=True)
+                self._processes.pop(pid, None)
+                samples.append((pid, 0, None))
+        return samples
+
+    def report(self, pids):
+        """
+        Samples all metrics and formats them as one batch for the frontend: the host
+        metrics, the per worker CPU utilization, an empty line, one "pid:rss" line
+        per worker and an empty line.
+
+        :param pids: list of int
+        :return: str
+        """
+        metrics = self.collect()
+        processes = self.collect_processes(pids)
+        for pid, _, cpu in processes:
+            if cpu is None:
+                continue
+            metrics.append(
+                Metric(
+                    "WorkerCPUUtilization",
+                    cpu,
+                    "percent",
+                    [Dimension("Level", "Worker"), Dimension("WorkerPid", pid)],
+                )
+            )
+
+        lines = [str(met) for met in metrics]
+        lines.append("")
+        lines.extend("%d:%d" % (pid, rss) for pid, rss, _ in processes)
+        lines.append("")
+        return "\n".join(lines) + "\n"
@@ -9,6 +9,7 @@ import os
 import platform
 import socket
 import sys
+import time
 from typing import Optional
 
 from ts.arg_parser import ArgParser
@@ -16,11 +17,15 @@ from ts.async_service import AsyncService
 from ts.metrics.metric_cache_yaml_impl import MetricsCacheYamlImpl
 from ts.model_loader import ModelLoaderFactory
 from ts.protocol.otf_message_handler import create_load_model_response, retrieve_msg
+from ts.utils.stack_sampler import ProfileSession
+from ts.utils.tracing import get_tracer
 
 MAX_FAILURE_THRESHOLD = 5
 SOCKET_ACCEPT_TIMEOUT = 30.0
 DEBUG = False
 BENCHMARK = os.getenv("TS_BENCHMARK") in ["True", "true", "TRUE"]
+BENCHMARK_DUMP_INTERVAL_SEC = 10
+BENCHMARK_PROFILE_PATH = "/tmp/tsPythonProfile.prof"
 LOCAL_RANK = int(os.getenv("LOCAL_RANK", 0))
 WORLD_SIZE = int(os.getenv("WORLD_SIZE", 0))
 WORLD_RANK = int(os.getenv("RANK", 0))
@@ -82,6 +87,7 @@ class TorchModelServiceWorker(object):
                 f"Failed to initialize metrics from file {metrics_config}"
             )
         self.async_comm = async_comm
+        self.profile_session = None
 
     def load_model(self, load_model_request):
         """
@@ -129,6 +135,9 @@ class TorchModelServiceWorker(object):
                 limit_max_image_pixels = bool(load_model_request["limitMaxImagePixels"])
 
             self.metrics_cache.model_name = model_name
+            tracer = get_tracer()
+            if tracer is not None:
+                tracer.model_name = model_name
             model_loader = ModelLoaderFactory.get_model_loader()
             service = model_loader.load(
                 model_name,
@@ -164,6 +173,46 @@ class TorchModelServiceWorker(object):
                 )
                 return None, "Unknown exception", 500
 
+    def handle_profile(self, profile_request):
+        """
+        Starts a profile of the worker or collects its result.
+
+        Expected command
+        {
+            "durationMs" : profiling window, 0 to collect the result, int
+            "intervalUs" : stack sampling interval, int
+            "format" : "collapsed" or "speedscope", string
+            "torchProfiler" : also record a torch.profiler trace, bool
+        }
+
+        :param profile_request:
+        :return: response code and message, the profile as JSON when collected
+        """
+        session = self.profile_session
+        duration_ms = profile_request["durationMs"]
+        if duration_ms > 0:
+            if session is not None and not session.done:
+                return 409, "Profiling already in progress"
+            try:
+                self.profile_session = ProfileSession(
+                    duration_ms / 1000,
+                    max(profile_request["intervalUs"], 1000) / 1e6,
+                    profile_request["format"].decode("utf-8") or "collapsed",
+                    profile_request["torchProfiler"],
+                ).start()
+            except (ValueError, ImportError) as ex:
+                logging.exception("Failed to start profiling")
+                return 400, str(ex)
+            return 202, "Profiling started for {} ms".format(duration_ms)
+
+        if session is None:
+            return 404, "No profile was started"
+        session.poll()
+        if not session.done:
+            return 202, "Profiling in progress"
+        self.profile_session = None
+        return 200, session.result()
+
     def handle_connection(self, cl_socket):
         """
         Handle socket connection.
@@ -172,10 +221,16 @@ class TorchModelServiceWorker(object):
         :return:
         """
         service = None
+        last_dump = time.monotonic()
         while True:
             if BENCHMARK:
                 pr.disable()
-                pr.dump_stats("/tmp/tsPythonProfile.prof")
+                # Dumping the stats is expensive, only refresh the file periodically
+                if time.monotonic() - last_dump >= BENCHMARK_DUMP_INTERVAL_SEC:
+                    pr.dump_stats(BENCHMARK_PROFILE_PATH)
+                    last_dump = time.monotonic()
+            if self.profile_session is not None:
+                self.profile_session.poll()
             cmd, msg = retrieve_msg(cl_socket)
             if BENCHMARK:
                 pr.enable()
@@ -187,6 +242,10 @@ class TorchModelServiceWorker(object):
                         cl_socket.sendall(resp)
                     else:
                         logging.info("skip sending response at rank %d", LOCAL_RANK)
+                    tracer = get_tracer()
+                    if tracer is not None:
+                        tracer.mark("sendall")
+                        tracer.finish()
                 else:
                     raise RuntimeError(
                         "Received command: {}, but service is not loaded".format(cmd)
@@ -200,6 +259,10 @@ class TorchModelServiceWorker(object):
                 if code != 200:
                     raise RuntimeError("{} - {}".format(code, result))
                 service.set_cl_socket(cl_socket)
+            # b"P" encodes a profiling request
+            elif cmd == b"P":
+                code, result = self.handle_profile(msg)
+                cl_socket.sendall(create_load_model_response(code, result))
             else:
                 raise ValueError("Received unknown command: {}".format(cmd))
 
@@ -289,19 +352,19 @@ if __name__ == "__main__":
         metrics_config = args.metrics_config
 
         if BENCHMARK:
+            import atexit
             import cProfile
 
             pr = cProfile.Profile()
             pr.disable()
-            pr.dump_stats("/tmp/tsPythonProfile.prof")
+            pr.dump_stats(BENCHMARK_PROFILE_PATH)
+            # The worker exits when the frontend disconnects
+            atexit.register(lambda: pr.dump_stats(BENCHMARK_PROFILE_PATH))
 
         worker = TorchModelServiceWorker(
             sock_type, socket_name, host, port, metrics_config, async_comm
         )
         worker.run_server()
-        if BENCHMARK:
-            pr.disable()
-            pr.dump_stats("/tmp/tsPythonProfile.prof")
 
     except socket.timeout:
         logging.error(
@@ -0,0 +1,164 @@
+"""
+Lazy decoding of the inputs of inference requests.
+
+The JSON and text parameters of a request are kept as the bytes read from the
+socket and decoded on first access, so handlers forwarding the raw payload, or
+reading only some of the parameters of a multipart request, do not pay for the
+decoding of the others. The rows of a batch are dicts which decode their values
+when they are read, so handlers indexing row["data"] or row["body"] still get
+the decoded value.
+
+row.raw("body") returns the bytes of a parameter without decoding it.
+"""
+import json
+import logging
+
+
+class LazyValue(object):
+    """
+    Raw bytes of a parameter decoded on first access, the decoded value being cached.
+
+    :param raw: bytes read from the socket
+    :param content_type: application/json values are decoded as JSON, text/* as UTF-8
+    """
+
+    __slots__ = ("raw", "content_type", "_value", "_decoded")
+
+    def __init__(self, raw, content_type):
+        self.raw = raw
+        self.content_type = content_type
+        self._value = None
+        self._decoded = False
+
+    @staticmethod
+    def decodes(content_type):
+        """Whether values of a content type are decoded"""
+        return content_type == "application/json" or content_type.startswith("text")
+
+    @property
+    def decoded(self):
+        return self._decoded
+
+    def value(self):
+        if not self._decoded:
+            self._value = self._decode()
+            self._decoded = True
+        return self._value
+
+    def _decode(self):
+        if self.content_type == "application/json":
+            try:
+                return json.loads(self.raw.decode("utf-8"))
+            except Exception:
+                logging.warning(
+                    "Failed json decoding of input data. Forwarding encoded payload",
+                    exc_info=True,
+                )
+                return self.raw
+        try:
+            return self.raw.decode("utf-8")
+        except Exception:
+            logging.warning(
+                "Failed utf-8 decoding of input data. Forwarding encoded payload",
+                exc_info=True,
+            )
+            return self.raw
+
+    def __eq__(self, other):
+        if isinstance(other, LazyValue):
+            other = other.value()
+        return self.value() == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self.value())
+
+
+class LazyInputs(dict):
+    """
+    dict whose LazyValue values are decoded, and replaced by their decoded
+    value, when they are read.
+
+    Reads through the C API which bypass the methods of the subclass, such as
+    dict.__getitem__(row, key), return the LazyValue itself.
+    """
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if isinstance(value, LazyValue):
+            value = value.value()
+            dict.__setitem__(self, key, value)
+        return value
+
+    def __iter__(self):
+        # Overridden so that dict(row), {**row} and dict.update(row) read the
+        # values with __getitem__
+        return dict.__iter__(self)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def raw(self, key, default=None):
+        """The value of a key, the bytes of a parameter which is not decoded yet"""
+        if key not in self:
+            return default
+        value = dict.__getitem__(self, key)
+        return value.raw if isinstance(value, LazyValue) else value
+
+    def decode(self):
+        """Decodes all the values"""
+        for key in dict.keys(self):
+            self.__getitem__(key)
+        return self
+
+    def values(self):
+        return dict.values(self.decode())
+
+    def items(self):
+        return dict.items(self.decode())
+
+    def pop(self, key, *default):
+        value = dict.pop(self, key, *default)
+        return value.value() if isinstance(value, LazyValue) else value
+
+    def popitem(self):
+        key, value = dict.popitem(self)
+        return key, value.value() if isinstance(value, LazyValue) else value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            dict.__setitem__(self, key, default)
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        # Keeps the values of other LazyInputs lazy
+        if args and isinstance(args[0], LazyInputs):
+            dict.update(self, dict.items(args[0]), **kwargs)
+        else:
+            dict.update(self, *args, **kwargs)
+
+    def copy(self):
+        return LazyInputs(dict.items(self))
+
+    def __eq__(self, other):
+        if isinstance(other, LazyInputs):
+            other.decode()
+        return dict.__eq__(self.decode(), other)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return dict.__repr__(self.decode())
+
+    def __reduce__(self):
+        return LazyInputs, (dict(self),)
+
+
+def lazy_item(mapping, key):
+    """The value of a key of a dict, without decoding it if it is a LazyInputs"""
+    return dict.__getitem__(mapping, key)
@@ -3,7 +3,6 @@ OTF Codec
 """
 
 import io
-import json
 import logging
 import os
 import struct
@@ -13,6 +12,9 @@ from builtins import bytearray, bytes
 
 import torch
 
+from ts.protocol.lazy_input import LazyInputs, LazyValue
+from ts.utils import serializer
+from ts.utils.tracing import get_tracer
 from ts.utils.util import deprecated
 
 bool_size = 1
@@ -20,7 +22,10 @@ int_size = 4
 END_OF_LIST = -1
 LOAD_MSG = b"L"
 PREDICT_MSG = b"I"
+PROFILE_MSG = b"P"
 RESPONSE = 3
+# JSON and text inputs are decoded unless TS_DECODE_INPUT_REQUEST is false
+DECODE_INPUT_REQUEST = os.environ.get("TS_DECODE_INPUT_REQUEST") in (None, "true")
 
 
 def retrieve_msg(conn):
@@ -34,8 +39,15 @@ def retrieve_msg(conn):
     if cmd == LOAD_MSG:
         msg = _retrieve_load_msg(conn)
     elif cmd == PREDICT_MSG:
+        tracer = get_tracer()
+        if tracer is not None:
+            tracer.begin()
         msg = _retrieve_inference_msg(conn)
+        if tracer is not None:
+            tracer.mark("socket_decode")
         logging.info("Backend received inference at: %d", time.time())
+    elif cmd == PROFILE_MSG:
+        msg = _retrieve_profile_msg(conn)
     else:
         raise ValueError("Invalid command: {}".format(cmd))
 
@@ -142,7 +154,7 @@ def create_predict_response(
                 msg += val_bytes
             else:
                 try:
-                    json_value = json.dumps(val, indent=2).encode("utf-8")
+                    json_value = serializer.dumps(val)
                     msg += struct.pack("!i", len(json_value))
                     msg += json_value
                 except TypeError:
@@ -233,6 +245,29 @@ def _retrieve_load_msg(conn):
     return msg
 
 
+def _retrieve_profile_msg(conn):
+    """
+    MSG Frame Format:
+
+    | cmd value |
+    | int duration in ms, 0 to collect the result |
+    | int sampling interval in us |
+    | int format length | format value |
+    | bool torchProfiler |
+
+    :param conn:
+    :return:
+    """
+    msg = {}
+    msg["durationMs"] = _retrieve_int(conn)
+    msg["intervalUs"] = _retrieve_int(conn)
+    length = _retrieve_int(conn)
+    msg["format"] = _retrieve_buffer(conn, length)
+    msg["torchProfiler"] = _retrieve_bool(conn)
+
+    return msg
+
+
 def _retrieve_inference_msg(conn):
     """
     MSG Frame Format:
@@ -241,11 +276,17 @@ def _retrieve_inference_msg(conn):
     | batch: list of requests |
     """
     msg = []
+    tracer = get_tracer()
+    trace = tracer.current if tracer is not None else None
     while True:
+        if trace is not None:
+            start_ns = time.monotonic_ns()
         request = _retrieve_request(conn)
         if request is None:
             break
 
+        if trace is not None:
+            trace.add_child("decode_request", start_ns, time.monotonic_ns(), len(msg))
         msg.append(request)
 
     return msg
@@ -315,12 +356,11 @@ def _retrieve_input_data(conn):
     | content_type |
     | input data in bytes |
     """
-    decode_req = os.environ.get("TS_DECODE_INPUT_REQUEST")
     length = _retrieve_int(conn)
     if length == -1:
         return None
 
-    model_input = {}
+    model_input = LazyInputs()
     model_input["name"] = _retrieve_buffer(conn, length).decode("utf-8")
 
     length = _retrieve_int(conn)
@@ -329,32 +369,9 @@ def _retrieve_input_data(conn):
 
     length = _retrieve_int(conn)
     value = _retrieve_buffer(conn, length)
-    if content_type == "application/json" and (
-        decode_req is None or decode_req == "true"
-    ):
-        try:
-            model_input["value"] = json.loads(value.decode("utf-8"))
-
-        except Exception as e:
-            model_input["value"] = value
-            logging.warning(
-                "Failed json decoding of input data. Forwarding encoded payload",
-                exc_info=True,
-            )
-
-    elif content_type.startswith("text") and (
-        decode_req is None or decode_req == "true"
-    ):
-        try:
-            model_input["value"] = value.decode("utf-8")
-
-        except Exception as e:
-            model_input["value"] = value
-            logging.warning(
-                "Failed utf-8 decoding of input data. Forwarding encoded payload",
-                exc_info=True,
-            )
-
+    if DECODE_INPUT_REQUEST and LazyValue.decodes(content_type):
+        # Decoded when the handler reads it
+        model_input["value"] = LazyValue(value, content_type)
     else:
         model_input["value"] = value
 
@@ -6,9 +6,14 @@ import os
 import time
 from builtins import str
 
+import torch
+
 import ts
 from ts.context import Context, RequestProcessor
+from ts.handler_utils.memory_accounting import MemoryAccountant, input_size
+from ts.protocol.lazy_input import LazyInputs, lazy_item
 from ts.protocol.otf_message_handler import create_predict_response
+from ts.utils.tracing import get_tracer
 from ts.utils.util import PredictionException, get_yaml_config
 
 PREDICTION_METRIC = "PredictionTime"
@@ -51,6 +56,12 @@ class Service(object):
             metrics_cache,
             model_yaml_config,
         )
+        self._context.memory_accountant = MemoryAccountant.from_config(
+            model_yaml_config,
+            torch.device(f"cuda:{gpu}")
+            if gpu is not None and torch.cuda.is_available()
+            else None,
+        )
         self._entry_point = entry_point
 
     @property
@@ -86,10 +97,11 @@ class Service(object):
             parameters = request_batch["parameters"]
             model_in_headers = {}
 
-            model_in = {}
+            # JSON and text values are decoded when the handler reads them
+            model_in = LazyInputs()
             # Parameter level headers are updated here. multipart/form-data can have multiple headers.
             for parameter in parameters:
-                model_in.update({parameter["name"]: parameter["value"]})
+                model_in[parameter["name"]] = lazy_item(parameter, "value")
                 model_in_headers.update(
                     {parameter["name"]: {"content-type": parameter["contentType"]}}
                 )
@@ -120,7 +132,11 @@ class Service(object):
         :return:
 
         """
+        tracer = get_tracer()
         headers, input_batch, req_id_map = Service.retrieve_data_for_inference(batch)
+        if tracer is not None:
+            tracer.mark("retrieve_data_for_inference")
+            tracer.sample_requests(req_id_map, headers)
 
         self.context.request_ids = req_id_map
         self.context.request_processor = headers
@@ -130,11 +146,26 @@ class Service(object):
 
         start_time = time.time()
 
+        accountant = self.context.memory_accountant
+        if accountant is not None:
+            input_bytes = sum(
+                input_size(model_in.raw(name))
+                for model_in in input_batch
+                for name in model_in
+            )
+
         # noinspection PyBroadException
         try:
-            ret = self._entry_point(input_batch, self.context)
+            if accountant is None:
+                ret = self._entry_point(input_batch, self.context)
+            else:
+                accountant.check(len(input_batch), input_bytes, metrics)
+                with accountant.measure_request(len(input_batch), input_bytes, metrics):
+                    ret = self._entry_point(input_batch, self.context)
         except MemoryError:
             logger.error("System out of memory", exc_info=True)
+            if accountant is not None:
+                accountant.record_oom(len(input_batch), input_bytes, metrics)
             return create_predict_response(None, req_id_map, "Out of resources", 507)
         except PredictionException as e:
             logger.error("Prediction error", exc_info=True)
@@ -144,6 +175,8 @@ class Service(object):
                 # Handles Case A: CUDA error: CUBLAS_STATUS_NOT_INITIALIZED (Close to OOM) &
                 # Case B: CUDA out of memory (OOM)
                 logger.error("CUDA out of memory", exc_info=True)
+                if accountant is not None:
+                    accountant.record_oom(len(input_batch), input_bytes, metrics)
                 return create_predict_response(
                     None, req_id_map, "Out of resources", 507
                 )
@@ -176,10 +209,15 @@ class Service(object):
 
         duration = round((time.time() - start_time) * 1000, 2)
         metrics.add_time(PREDICTION_METRIC, duration)
+        if tracer is not None:
+            tracer.mark("handler")
 
-        return create_predict_response(
+        response = create_predict_response(
             ret, req_id_map, "Prediction success", 200, context=self.context
         )
+        if tracer is not None:
+            tracer.mark("encode")
+        return response
 
 
 def emit_metrics(metrics):
@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from ts.handler_utils.admission_control import AdmissionRejected, TokenBudgetAdmission
+
+
+class MockEngine:
+    """Generates for a fixed time and records the tokens in flight"""
+
+    def __init__(self, admission, duration=0.05):
+        self.admission = admission
+        self.duration = duration
+        self.max_in_flight_tokens = 0
+        self.order = []
+
+    async def generate(self, name, prompt_tokens, decode_tokens, deadline=None):
+        async with self.admission.admit(prompt_tokens, decode_tokens, deadline):
+            self.order.append(name)
+            self.max_in_flight_tokens = max(
+                self.max_in_flight_tokens, self.admission.in_flight_tokens
+            )
+            await asyncio.sleep(self.duration)
+        return name
+
+
+def run_requests(engine, requests):
+    async def main():
+        tasks = []
+        for request in requests:
+            tasks.append(asyncio.ensure_future(engine.generate(*request)))
+            # Let the request reach the controller before submitting the next one
+            await asyncio.sleep(0)
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    return asyncio.run(main())
+
+
+def test_budget_is_respected():
+    admission = TokenBudgetAdmission(max_tokens=100)
+    engine = MockEngine(admission)
+    results = run_requests(engine, [(str(i), 20, 20) for i in range(6)])
+
+    assert results == [str(i) for i in range(6)]
+    assert engine.max_in_flight_tokens == 80
+    assert admission.in_flight_tokens == 0 and admission.in_flight == 0
+
+
+def test_oversized_request_runs_alone():
+    admission = TokenBudgetAdmission(max_tokens=100)
+    engine = MockEngine(admission)
+    assert run_requests(engine, [("big", 500, 100), ("small", 1, 1)]) == [
+        "big",
+        "small",
+    ]
+    assert engine.max_in_flight_tokens == 600
+
+
+def test_cost_policy_prioritizes_short_requests():
+    admission = TokenBudgetAdmission(max_tokens=100, policy="cost")
+    engine = MockEngine(admission)
+    run_requests(
+        engine, [("first", 90, 10), ("long", 80, 10), ("short", 5, 5), ("mid", 30, 5)]
+    )
+    assert engine.order == ["first", "short", "mid", "long"]
+
+
+def test_deadline_policy():
+    admission = TokenBudgetAdmission(max_tokens=10, policy="deadline")
+    engine = MockEngine(admission)
+    run_requests(
+        engine,
+        [
+            ("first", 5, 5),
+            ("late", 5, 5, admission.parse_deadline(5000)),
+            ("none", 5, 5),
+            ("soon", 5, 5, admission.parse_deadline(1000)),
+        ],
+    )
+    assert engine.order == ["first", "soon", "late", "none"]
+
+
+def test_queue_full_is_rejected(mocker):
+    metrics = mocker.Mock()
+    admission = TokenBudgetAdmission(
+        max_tokens=10, max_queue_size=1, retry_after_sec=2, metrics=metrics
+    )
+    engine = MockEngine(admission)
+    results = run_requests(engine, [("a", 5, 5), ("b", 5, 5), ("c", 5, 5)])
+
+    assert results[:2] == ["a", "b"]
+    assert isinstance(results[2], AdmissionRejected)
+    assert results[2].error_code == 503 and results[2].retry_after_sec == 2
+    metrics.add_counter.assert_called_once_with("AdmissionRejected", 1)
+    assert admission.queue_size == 0
+
+
+def test_queue_timeout_is_rejected():
+    admission = TokenBudgetAdmission(max_tokens=10, max_queue_time_sec=0.01)
+    engine = MockEngine(admission)
+    results = run_requests(engine, [("a", 5, 5), ("b", 5, 5), ("c", 1, 1)])
+
+    assert results[0] == "a"
+    assert all(isinstance(r, AdmissionRejected) for r in results[1:])
+    assert admission.queue_size == 0 and admission.in_flight == 0
+
+
+def test_estimate_prompt_tokens():
+    admission = TokenBudgetAdmission(max_tokens=10, chars_per_token=4)
+    assert admission.estimate_prompt_tokens("a" * 9) == 3
+    assert admission.estimate_prompt_tokens([{"content": "a" * 8}, {}]) == 2
+    assert admission.parse_deadline("soon") is None
+
+    with pytest.raises(ValueError):
+        TokenBudgetAdmission(max_tokens=10, policy="random")
@@ -0,0 +1,43 @@
+import asyncio
+import struct
+import threading
+
+import pytest
+
+from ts import async_service
+from ts.async_service import AsyncService
+
+
+@pytest.fixture
+def service(mocker):
+    service = AsyncService(mocker.MagicMock())
+    service.loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=service.loop.run_forever, daemon=True)
+    thread.start()
+
+    async def create_queue():
+        return asyncio.Queue()
+
+    service.out_queue = asyncio.run_coroutine_threadsafe(
+        create_queue(), service.loop
+    ).result()
+    yield service
+    service.loop.call_soon_threadsafe(service.loop.stop)
+    thread.join()
+
+
+def test_profile_command_is_answered(service, mocker):
+    mocker.patch.object(
+        async_service,
+        "retrieve_msg",
+        side_effect=[(b"P", {"durationMs": 100}), StopIteration],
+    )
+
+    with pytest.raises(StopIteration):
+        service.receive_requests()
+
+    response = asyncio.run_coroutine_threadsafe(
+        service.out_queue.get(), service.loop
+    ).result(timeout=5)
+    assert struct.unpack("!i", response[:4])[0] == 501
+    assert b"not supported" in response
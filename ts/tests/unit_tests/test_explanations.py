@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+import torch
+
+from ts.handler_utils.explanations import ExplanationCache, input_key
+
+
+def test_input_key():
+    assert input_key(b"abc", 0) == input_key(bytearray(b"abc"), 0)
+    assert input_key("abc", 0) == input_key(b"abc", 0)
+    assert input_key(b"abc", 0) != input_key(b"abc", 1)
+    assert input_key(b"abc", 0) != input_key(b"abd", 0)
+    assert input_key({"a": [1, 2]}, 0) == input_key({"a": [1, 2]}, 0)
+    assert input_key(torch.ones(2, 3), 0) == input_key(np.ones((2, 3), "float32"), 0)
+    # Same bytes, different shape
+    assert input_key(torch.ones(2, 3), 0) != input_key(torch.ones(3, 2), 0)
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ExplanationCache(2)
+    cache.put("a", [1])
+    cache.put("b", [2])
+    assert cache.get("a") == [1]
+    cache.put("c", [3])
+
+    assert cache.get("b") is None
+    assert cache.get("a") == [1]
+    assert cache.get("c") == [3]
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_cache_size():
+    with pytest.raises(ValueError):
+        ExplanationCache(0)
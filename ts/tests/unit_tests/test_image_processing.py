@@ -0,0 +1,80 @@
+import io
+from pathlib import Path
+
+import pytest
+import torch
+from PIL import Image
+from torchvision import transforms
+
+from ts.handler_utils.image_processing import TensorImageProcessing
+from ts.torch_handler.image_classifier import ImageClassifier
+
+REPO_DIR = Path(__file__).parents[3]
+TORCHVISION_CONFIG = {"handler": {"image_processing": "torchvision"}}
+
+
+@pytest.fixture(scope="module")
+def jpeg_bytes():
+    return (
+        REPO_DIR / "examples/image_classifier/resnet_152_batch/images/kitten.jpg"
+    ).read_bytes()
+
+
+def encode(image, fmt):
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def preprocess(handler_cls, model_yaml_config, data):
+    handler = handler_cls()
+    handler.device = torch.device("cpu")
+    handler.tensor_image_processing = TensorImageProcessing.from_config(
+        model_yaml_config, handler.image_processing
+    )
+    return handler.preprocess(data)
+
+
+@pytest.mark.parametrize("fmt", ["JPEG", "PNG", "BMP"])
+def test_matches_pil_path(jpeg_bytes, fmt):
+    image = Image.open(io.BytesIO(jpeg_bytes))
+    data = [{"data": jpeg_bytes if fmt == "JPEG" else encode(image, fmt)}] * 2
+
+    expected = preprocess(ImageClassifier, {}, data)
+    actual = preprocess(ImageClassifier, TORCHVISION_CONFIG, data)
+
+    assert actual.dtype == torch.float32
+    assert actual.shape == expected.shape == (2, 3, 224, 224)
+    # Resizing in uint8 rounds every pixel to the nearest level, 1 / (255 * std)
+    # after the normalization
+    difference = (actual - expected).abs()
+    assert difference.mean() < 0.005
+    assert difference.max() < 0.05
+
+
+def test_grayscale_chain():
+    class MNISTClassifier(ImageClassifier):
+        image_processing = transforms.Compose(
+            [transforms.ToTensor(), transforms.Normalize((0.1307,), (0.3081,))]
+        )
+
+    image = Image.new("L", (28, 28))
+    image.putpixel((14, 14), 255)
+    data = [{"body": encode(image, "PNG")}]
+
+    expected = preprocess(MNISTClassifier, {}, data)
+    actual = preprocess(MNISTClassifier, TORCHVISION_CONFIG, data)
+
+    assert actual.shape == expected.shape == (1, 1, 28, 28)
+    assert torch.allclose(actual, expected, atol=1e-5)
+
+
+def test_unsupported_chain_keeps_pil_path():
+    chain = transforms.Compose([transforms.Grayscale(), transforms.ToTensor()])
+
+    assert TensorImageProcessing.from_config(TORCHVISION_CONFIG, chain) is None
+    assert TensorImageProcessing.from_config({}, chain) is None
+    with pytest.raises(ValueError):
+        TensorImageProcessing.from_config(
+            {"handler": {"image_processing": "opencv"}}, chain
+        )
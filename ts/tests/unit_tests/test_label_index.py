@@ -0,0 +1,39 @@
+import json
+
+import pytest
+import torch
+
+from ts.utils.util import LabelIndex, map_class_to_label
+
+MAPPING = {str(i): f'label "{i}"' for i in range(50)}
+
+
+def test_map_matches_map_class_to_label():
+    probs, classes = torch.topk(torch.rand(4, 50).softmax(1), 5, dim=1)
+    expected = map_class_to_label(probs.tolist(), MAPPING, classes.tolist())
+
+    index = LabelIndex(MAPPING)
+    assert index.map(probs, classes) == expected
+    assert index.map(probs.tolist(), classes.tolist()) == expected
+    assert map_class_to_label(probs, index, classes) == expected
+    assert [json.loads(row) for row in index.to_json(probs, classes)] == expected
+
+
+def test_map_all_classes():
+    probs = torch.rand(2, 3)
+    expected = map_class_to_label(probs.tolist(), {"0": "a", "1": "b", "2": "c"})
+
+    assert LabelIndex({"0": "a", "1": "b", "2": "c"}).map(probs) == expected
+    assert LabelIndex().map(probs) == map_class_to_label(probs.tolist())
+
+
+def test_missing_class_ids_are_labeled_by_id():
+    index = LabelIndex({"0": "a"})
+    assert index.map([[0.25, 0.75]], [[3, 0]]) == [{"3": 0.25, "a": 0.75}]
+    assert index.labels(4) == ["a", "1", "2", "3", "4"]
+    assert index.to_json([[float("nan")]], [[0]]) == ['{"a": NaN}']
+
+
+def test_mapping_must_be_a_dict():
+    with pytest.raises(Exception, match="Mapping must be a dict"):
+        LabelIndex(["a"])
@@ -0,0 +1,83 @@
+import copy
+import json
+import pickle
+
+import pytest
+
+from ts.protocol.lazy_input import LazyInputs, LazyValue, lazy_item
+from ts.service import Service
+
+
+def lazy_row():
+    return LazyInputs(
+        body=LazyValue(b'{"instances": [1, 2]}', "application/json"),
+        text=LazyValue("café".encode("utf-8"), "text/plain"),
+        image=b"\x89PNG",
+    )
+
+
+def test_decoded_on_first_access():
+    row = lazy_row()
+
+    assert not lazy_item(row, "body").decoded
+    assert row.raw("body") == b'{"instances": [1, 2]}'
+    assert row["body"] == {"instances": [1, 2]}
+    assert row["body"] is row.get("body")
+    assert not lazy_item(row, "text").decoded
+    assert row.get("data") is None
+    assert (row.get("data") or row.get("text")) == "café"
+    assert row.raw("image") == row["image"] == b"\x89PNG"
+
+
+@pytest.mark.parametrize(
+    "content_type,raw", [("application/json", b"{not json"), ("text/plain", b"\xff")]
+)
+def test_invalid_payload_is_forwarded(content_type, raw):
+    assert LazyValue(raw, content_type).value() == raw
+
+
+def test_dict_compatibility():
+    expected = {"body": {"instances": [1, 2]}, "text": "café", "image": b"\x89PNG"}
+
+    assert lazy_row() == expected
+    assert expected == lazy_row()
+    assert dict(lazy_row()) == expected
+    assert {**lazy_row()} == expected
+    assert dict(lazy_row().items()) == expected
+    assert list(lazy_row().values()) == list(expected.values())
+    assert copy.deepcopy(lazy_row()) == expected
+    assert pickle.loads(pickle.dumps(lazy_row())) == expected
+    assert json.loads(json.dumps(lazy_row()["body"])) == expected["body"]
+    assert lazy_row().pop("text") == "café"
+    assert repr(lazy_row()) == repr(expected)
+
+
+def test_copy_and_update_stay_lazy():
+    row = lazy_row()
+    copied = row.copy()
+    updated = LazyInputs()
+    updated.update(row)
+
+    assert not lazy_item(copied, "body").decoded
+    assert not lazy_item(updated, "body").decoded
+    assert copied == updated == row
+
+
+def test_retrieve_data_for_inference():
+    batch = [
+        {
+            "requestId": b"1",
+            "parameters": [
+                LazyInputs(
+                    name="body",
+                    contentType="application/json",
+                    value=LazyValue(b'{"a": 1}', "application/json"),
+                )
+            ],
+        }
+    ]
+
+    _, input_batch, _ = Service.retrieve_data_for_inference(batch)
+
+    assert not lazy_item(input_batch[0], "body").decoded
+    assert input_batch[0]["body"] == {"a": 1}
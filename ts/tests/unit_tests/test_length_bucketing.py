@@ -0,0 +1,66 @@
+import pytest
+import torch
+
+from ts.handler_utils.length_bucketing import (
+    LengthBucketing,
+    bucket_by_length,
+    pad_sequences,
+    padding_waste,
+)
+from ts.metrics.metrics_store import MetricsStore
+
+
+def test_padding_waste():
+    lengths = [512] + [20] * 31
+    assert padding_waste(lengths) == pytest.approx(1 - (512 + 620) / (32 * 512))
+    assert padding_waste(lengths, [[0], list(range(1, 32))]) == 0.0
+    assert padding_waste([]) == 0.0
+
+
+def test_bucket_by_length_greedy():
+    lengths = [512, 20, 21, 20, 500]
+    buckets = bucket_by_length(lengths, max_padding_ratio=0.1)
+    assert buckets == [[1, 3, 2], [4, 0]]
+
+
+def test_bucket_by_length_boundaries():
+    lengths = [5, 40, 100, 300, 7]
+    buckets = bucket_by_length(lengths, boundaries=[128, 32])
+    assert buckets == [[0, 4], [1, 2], [3]]
+
+
+def test_bucket_by_length_max_bucket_size():
+    buckets = bucket_by_length([3] * 5, max_bucket_size=2)
+    assert [len(b) for b in buckets] == [2, 2, 1]
+
+    with pytest.raises(ValueError):
+        bucket_by_length([3], max_bucket_size=0)
+
+
+def test_pad_sequences():
+    input_ids, attention_mask = pad_sequences([[1, 2, 3], [4]], pad_value=9)
+    assert input_ids.tolist() == [[1, 2, 3], [4, 9, 9]]
+    assert attention_mask.tolist() == [[1, 1, 1], [1, 0, 0]]
+
+
+def test_run_restores_order():
+    sequences = [[1] * 10, [2] * 2, [3] * 9, [4] * 3]
+    bucketing = LengthBucketing(max_padding_ratio=0.2, pad_value=0)
+    metrics = MetricsStore({0: "a", 1: "b", 2: "c", 3: "d"}, "model")
+    shapes = []
+
+    def fn(input_ids, attention_mask):
+        shapes.append(tuple(input_ids.shape))
+        return input_ids[:, 0] * 10 + attention_mask.sum(dim=1)
+
+    results = bucketing.run(sequences, fn, metrics=metrics)
+
+    assert [int(r) for r in results] == [20, 22, 39, 43]
+    assert sorted(shapes) == [(2, 3), (2, 10)]
+    assert [m.name for m in metrics.store] == ["PaddingWaste"]
+
+
+def test_run_output_mismatch():
+    bucketing = LengthBucketing()
+    with pytest.raises(ValueError):
+        bucketing.run([[1], [1]], lambda ids, mask: torch.zeros(1))
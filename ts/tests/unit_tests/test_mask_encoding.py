@@ -0,0 +1,75 @@
+import base64
+import io
+import json
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from ts.handler_utils import mask_encoding
+
+
+@pytest.mark.parametrize(
+    "mask, counts, string",
+    [
+        ([[0, 1], [1, 1]], [1, 3], "13"),
+        ([[1, 1], [1, 1]], [0, 4], "04"),
+        (np.ones((4, 4)), [0, 16], "0`0"),
+        (np.zeros((3, 2)), [6], "6"),
+    ],
+)
+def test_rle_matches_coco_format(mask, counts, string):
+    assert mask_encoding.rle_counts(mask) == counts
+    assert mask_encoding.rle_string(counts) == string
+    assert mask_encoding.rle_string_counts(string) == counts
+
+
+def test_rle_round_trip():
+    rng = np.random.default_rng(0)
+    labels = (rng.random((97, 131)) * 4).astype(np.uint8)
+    # Long runs, whose deltas to the run two before are negative
+    labels[10:60, 20:90] = 1
+
+    encoded = mask_encoding.encode_rle(labels, ["a", "b", "c", "d"])
+
+    assert encoded["size"] == [97, 131]
+    assert sorted(encoded["masks"]) == ["a", "b", "c", "d"]
+    for class_id, name in enumerate(["a", "b", "c", "d"]):
+        np.testing.assert_array_equal(
+            mask_encoding.rle_decode(encoded["masks"][name]), labels == class_id
+        )
+
+
+def test_png_and_confidence():
+    labels = np.arange(12, dtype=np.uint8).reshape(3, 4)
+    confidence = (255 - labels * 10).astype(np.uint8)
+
+    image = Image.open(io.BytesIO(mask_encoding.encode_png(labels, confidence)))
+    assert image.mode == "LA"
+    np.testing.assert_array_equal(np.asarray(image)[..., 0], labels)
+    np.testing.assert_array_equal(np.asarray(image)[..., 1], confidence)
+
+    encoded = json.loads(
+        json.dumps(
+            mask_encoding.encode_rle(labels, [str(i) for i in range(12)], confidence)
+        )
+    )
+    png = base64.b64decode(encoded["confidence"]["data"])
+    np.testing.assert_array_equal(np.asarray(Image.open(io.BytesIO(png))), confidence)
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        (None, ("json", False)),
+        ("*/*", ("json", False)),
+        ("image/png", ("png", False)),
+        ("image/png;confidence=uint8", ("png", True)),
+        ("application/json;q=0.5, application/vnd.torchserve.rle+json", ("rle", False)),
+        ("application/json, image/png;q=0.9", ("json", False)),
+        ("text/html, image/*;q=0.1", ("png", False)),
+        ("text/html", ("json", False)),
+    ],
+)
+def test_negotiate(accept, expected):
+    assert mask_encoding.negotiate(accept) == expected
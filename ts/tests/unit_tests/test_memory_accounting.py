@@ -0,0 +1,172 @@
+import struct
+import tracemalloc
+
+import pytest
+import torch
+
+from ts.handler_utils.memory_accounting import (
+    MemoryAccountant,
+    MemoryBudgetExceeded,
+    size_bucket,
+)
+from ts.handler_utils.micro_batching import MicroBatching
+from ts.handler_utils.timer import timed
+from ts.service import Service
+
+
+class MockContext:
+    def __init__(self, mocker, accountant):
+        self.model_yaml_config = {"handler": {"stage_timing": False}}
+        self.metrics = mocker.Mock()
+        self.memory_accountant = accountant
+
+
+class Handler:
+    def __init__(self, context):
+        self.context = context
+
+    @timed
+    def preprocess(self, data):
+        return [bytearray(1 << 20) for _ in data]
+
+    @timed
+    def inference(self, data):
+        return [len(d) for d in data]
+
+    def handle(self, data, context):
+        return self.inference(self.preprocess(data))
+
+
+def size_calls(metrics, name):
+    calls = {}
+    for call in metrics.add_size.call_args_list:
+        if call.args[0] == name:
+            dims = {d.name: d.value for d in call.kwargs["dimensions"]}
+            calls[dims["Stage"]] = (call.args[1], dims)
+    return calls
+
+
+def test_stage_peaks(mocker):
+    accountant = MemoryAccountant(sample_rate=1)
+    context = MockContext(mocker, accountant)
+    handler = Handler(context)
+
+    with accountant.measure_request(2, 3000, context.metrics):
+        assert handler.handle(["a", "b"], context) == [1 << 20, 1 << 20]
+    assert not accountant.active
+
+    heap = size_calls(context.metrics, "MemoryPeakHeap")
+    assert set(heap) == {"preprocess", "inference", "handler"}
+    assert heap["preprocess"][0] >= 2 << 20
+    assert heap["handler"][0] >= heap["preprocess"][0]
+    assert heap["inference"][0] < 1 << 20
+    assert heap["handler"][1] == {
+        "Stage": "handler",
+        "BatchSize": "2",
+        "InputBytes": "4096",
+    }
+    assert set(size_calls(context.metrics, "MemoryRSSDelta")) == set(heap)
+    assert accountant.model.n == 1
+
+
+class MicroBatchingHandler(Handler):
+    @timed
+    def postprocess(self, data):
+        return data
+
+    def handle(self, data, context):
+        return self.micro_batching.handle(data)
+
+
+def test_micro_batching_measures_the_whole_request(mocker):
+    accountant = MemoryAccountant(sample_rate=1)
+    context = MockContext(mocker, accountant)
+    handler = MicroBatchingHandler(context)
+    handler.micro_batching = MicroBatching(
+        handler,
+        micro_batch_size=1,
+        parallelism={"preprocess": 2, "inference": 2, "postprocess": 2},
+    )
+    try:
+        with accountant.measure_request(4, 4, context.metrics):
+            assert handler.handle(list("abcd"), context) == [1 << 20] * 4
+    finally:
+        handler.micro_batching.shutdown()
+
+    # The stages run in the threads of MicroBatching are not attributed peaks
+    heap = size_calls(context.metrics, "MemoryPeakHeap")
+    assert set(heap) == {"handler"}
+    assert heap["handler"][0] >= 1 << 20
+    assert not tracemalloc.is_tracing()
+    assert accountant.model.n == 1
+
+
+def test_unsampled_requests_are_not_measured(mocker):
+    accountant = MemoryAccountant(sample_rate=0.5)
+    context = MockContext(mocker, accountant)
+    handler = Handler(context)
+
+    for _ in range(4):
+        with accountant.measure_request(1, 10, context.metrics):
+            handler.handle(["a"], context)
+    assert accountant.model.n == 2
+
+
+def test_reject_with_learned_model(mocker):
+    accountant = MemoryAccountant(
+        sample_rate=1, reject=True, max_bytes=10000, safety_factor=1.0, min_samples=3
+    )
+    for input_bytes in [100, 200, 300]:
+        accountant.model.add(input_bytes, 10 * input_bytes + 500)
+    assert accountant.model.predict(400) == pytest.approx(4500)
+
+    metrics = mocker.Mock()
+    accountant.check(1, 900, metrics)
+    with pytest.raises(MemoryBudgetExceeded) as e:
+        accountant.check(4, 1000, metrics)
+    assert e.value.error_code == 507
+    metrics.add_counter.assert_called_once()
+    assert size_bucket(1000) == "1024" and size_bucket(1024) == "1024"
+
+
+def test_service_rejects_oversized_batch(mocker):
+    entry_point = mocker.Mock(return_value=["ok"])
+    service = Service("name", "mpath", None, entry_point, None, 1)
+    service.set_cl_socket(mocker.Mock())
+    service.context.metrics = mocker.Mock()
+    accountant = MemoryAccountant(
+        sample_rate=1, reject=True, max_bytes=10000, min_samples=1
+    )
+    accountant.model.add(100, 1000)
+    service.context.memory_accountant = accountant
+
+    def batch(size):
+        return [
+            {
+                "requestId": b"1",
+                "parameters": [
+                    {
+                        "name": "body",
+                        "value": b"x" * size,
+                        "contentType": "application/octet-stream",
+                    }
+                ],
+            }
+        ]
+
+    response = service.predict(batch(100))
+    assert struct.unpack("!i", response[:4])[0] == 200
+    assert accountant.model.n == 2
+
+    response = service.predict(batch(10000))
+    assert struct.unpack("!i", response[:4])[0] == 507
+    entry_point.assert_called_once()
+
+
+def test_cuda_budget_includes_cached_blocks(mocker):
+    mocker.patch("torch.cuda.mem_get_info", return_value=(1 << 30, 16 << 30))
+    mocker.patch("torch.cuda.memory_reserved", return_value=6 << 30)
+    mocker.patch("torch.cuda.memory_allocated", return_value=2 << 30)
+    accountant = MemoryAccountant(device=torch.device("cuda:0"))
+
+    assert accountant.budget() == 5 << 30
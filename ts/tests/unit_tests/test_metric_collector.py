@@ -0,0 +1,83 @@
+import io
+import os
+
+import yaml
+
+from ts.metrics import system_metrics
+from ts.metrics.metric_collector import parse_pids, run_daemon
+
+
+def read_batches(output):
+    batches = []
+    lines = output.split("\n")
+    while len(lines) > 1:
+        end = lines.index("")
+        metrics, lines = lines[:end], lines[end + 1 :]
+        end = lines.index("")
+        processes, lines = lines[:end], lines[end + 1 :]
+        batches.append((metrics, processes))
+    return batches
+
+
+def test_parse_pids():
+    assert parse_pids("12,34,\n") == [12, 34]
+    assert parse_pids("\n") == []
+
+
+def test_daemon_reports_a_batch_per_pid_list():
+    pid = os.getpid()
+    stdout = io.StringIO()
+    run_daemon(0, io.StringIO(f"{pid}\n{pid},999999999\n\n"), stdout)
+
+    batches = read_batches(stdout.getvalue())
+    assert len(batches) == 3
+
+    metrics, processes = batches[1]
+    names = [line.split(".")[0] for line in metrics]
+    for name in ["CPUUtilization", "MemoryUsed", "DiskAvailable"]:
+        assert name in names
+    # No CPU utilization is reported for the pid which does not exist
+    assert names.count("WorkerCPUUtilization") == 1
+    assert processes[0].startswith(f"{pid}:") and int(processes[0].split(":")[1]) > 0
+    assert processes[1] == "999999999:0"
+
+    metrics, processes = batches[2]
+    assert "WorkerCPUUtilization" not in [line.split(".")[0] for line in metrics]
+    assert processes == []
+
+
+def test_reported_metrics_are_declared_for_the_frontend():
+    # The frontend drops the system metrics which are not declared in ts_metrics,
+    # their dimension values followed by the hostname
+    config_file = os.path.join(
+        os.path.dirname(system_metrics.__file__), "..", "configs", "metrics.yaml"
+    )
+    with open(config_file) as f:
+        ts_metrics = yaml.safe_load(f)["ts_metrics"]
+    declared = {
+        metric["name"]: metric["dimensions"]
+        for metrics in ts_metrics.values()
+        for metric in metrics
+    }
+
+    report = system_metrics.SystemMetricsCollector().report([os.getpid()])
+
+    lines = report.split("\n")
+    metrics = lines[: lines.index("")]
+    assert any(line.startswith("WorkerCPUUtilization.") for line in metrics)
+    for line in metrics:
+        name = line.split(".")[0]
+        dimensions = [d.split(":")[0] for d in line.split("|#")[1].split(",")]
+        assert declared[name] == dimensions + ["Hostname"]
+
+
+def test_collector_reuses_process_handles():
+    collector = system_metrics.SystemMetricsCollector()
+    pid = os.getpid()
+    collector.collect_processes([pid])
+    handle = collector._processes[pid]
+    collector.collect_processes([pid])
+    assert collector._processes[pid] is handle
+
+    collector.collect_processes([])
+    assert collector._processes == {}
@@ -2,9 +2,11 @@
 ModelServiceWorker is the worker that is started by the TorchServe front-end.
 """
 
+import json
 import os
 import socket
 import sys
+import time
 from collections import namedtuple
 
 import mock
@@ -198,3 +200,40 @@ class TestHandleConnection:
             RuntimeError, match=r"Received command: .*, but service is not loaded"
         ):
             model_service_worker.handle_connection(cl_socket)
+
+
+# noinspection PyClassHasNoInit
+class TestHandleProfile:
+    @staticmethod
+    def request(duration_ms, fmt=b"collapsed"):
+        return {
+            "durationMs": duration_ms,
+            "intervalUs": 1000,
+            "format": fmt,
+            "torchProfiler": False,
+        }
+
+    @pytest.mark.parametrize("fmt", [b"collapsed", b"speedscope"])
+    def test_profile(self, model_service_worker, fmt):
+        worker = model_service_worker
+        assert worker.handle_profile(self.request(0))[0] == 404
+        assert worker.handle_profile(self.request(100, fmt))[0] == 202
+        assert worker.handle_profile(self.request(100, fmt))[0] == 409
+
+        code, message = worker.handle_profile(self.request(0))
+        while code == 202:
+            time.sleep(0.05)
+            code, message = worker.handle_profile(self.request(0))
+
+        result = json.loads(message)
+        assert code == 200 and result["format"] == fmt.decode()
+        assert result["samples"] > 0 and result["torch_trace"] is None
+        if fmt == b"collapsed":
+            assert "MainThread;" in result["profile"]
+        else:
+            assert result["profile"]["profiles"][0]["type"] == "sampled"
+        assert worker.profile_session is None
+
+    def test_invalid_format(self, model_service_worker):
+        code, _ = model_service_worker.handle_profile(self.request(100, b"pprof"))
+        assert code == 400
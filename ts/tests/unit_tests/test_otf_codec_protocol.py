@@ -12,6 +12,7 @@ from collections import namedtuple
 import pytest
 
 import ts.protocol.otf_message_handler as codec
+from ts.protocol.lazy_input import lazy_item
 
 
 @pytest.fixture()
@@ -185,6 +186,57 @@ class TestOtfCodecHandler:
         assert cmd == b"I"
         assert ret == expected
 
+    JSON_FRAME = [
+        b"I",
+        b"\x00\x00\x00\x0a",
+        b"request_id",
+        b"\xFF\xFF\xFF\xFF",
+        b"\x00\x00\x00\x0a",
+        b"input_name",
+        b"\x00\x00\x00\x0F",
+        b"application/json",
+        b"\x00\x00\x00\x0F",
+        b'{"data":"value"}',
+        b"\xFF\xFF\xFF\xFF",  # end of parameters
+        b"\xFF\xFF\xFF\xFF",  # end of batch
+    ]
+
+    def test_retrieve_msg_predict_lazy(self, socket_patches):
+        socket_patches.socket.recv.side_effect = self.JSON_FRAME
+        _, ret = codec.retrieve_msg(socket_patches.socket)
+
+        parameter = ret[0]["parameters"][0]
+        assert not lazy_item(parameter, "value").decoded
+        assert parameter.raw("value") == b'{"data":"value"}'
+        assert parameter["value"] == {"data": "value"}
+        assert parameter["value"] is parameter["value"]
+
+    def test_retrieve_msg_predict_no_decode(self, socket_patches, monkeypatch):
+        monkeypatch.setattr(codec, "DECODE_INPUT_REQUEST", False)
+        socket_patches.socket.recv.side_effect = self.JSON_FRAME
+        _, ret = codec.retrieve_msg(socket_patches.socket)
+
+        assert lazy_item(ret[0]["parameters"][0], "value") == b'{"data":"value"}'
+
+    def test_retrieve_msg_profile(self, socket_patches):
+        socket_patches.socket.recv.side_effect = [
+            b"P",
+            b"\x00\x00\x13\x88",
+            b"\x00\x00\x27\x10",
+            b"\x00\x00\x00\x0a",
+            b"speedscope",
+            b"\x01",
+        ]
+        cmd, ret = codec.retrieve_msg(socket_patches.socket)
+
+        assert cmd == b"P"
+        assert ret == {
+            "durationMs": 5000,
+            "intervalUs": 10000,
+            "format": b"speedscope",
+            "torchProfiler": True,
+        }
+
     def test_create_load_model_response(self):
         msg = codec.create_load_model_response(200, "model_loaded")
 
@@ -0,0 +1,133 @@
+import json
+import os
+import sys
+
+import pytest
+import torch
+
+from ts.context import Context
+from ts.handler_utils.pipeline import Pipeline, PipelineNode
+from ts.torch_handler.pipeline_handler import PipelineHandler
+from ts.utils.util import PredictionException
+
+# Both nodes have a handler.py importing a model.py of their own
+EMBED_MODEL = """
+def embed(value):
+    return value * 2
+"""
+
+EMBED_HANDLER = """
+import torch
+
+from model import embed
+
+
+def handle(data, context):
+    if data is None:
+        return None
+    return [embed(torch.tensor(float(row.get("data") or row.get("body")))) for row in data]
+"""
+
+SCORE_MODEL = """
+def score(features, text):
+    return {"score": float(features), "text": text}
+"""
+
+SCORE_HANDLER = """
+from model import score
+
+
+class ScoreHandler(object):
+    def initialize(self, context):
+        self.initialized = True
+
+    def handle(self, data, context):
+        return [score(row["embed"], row["input"]) for row in data]
+"""
+
+
+def _write_node(model_dir, name, handler, model):
+    node_dir = os.path.join(model_dir, name)
+    os.makedirs(os.path.join(node_dir, "MAR-INF"))
+    with open(os.path.join(node_dir, "handler.py"), "w") as f:
+        f.write(handler)
+    with open(os.path.join(node_dir, "model.py"), "w") as f:
+        f.write(model)
+    with open(os.path.join(node_dir, "MAR-INF", "MANIFEST.json"), "w") as f:
+        json.dump({"model": {"modelName": name, "handler": "handler.py"}}, f)
+
+
+@pytest.fixture
+def context(tmp_path):
+    model_dir = str(tmp_path)
+    _write_node(model_dir, "embed", EMBED_HANDLER, EMBED_MODEL)
+    _write_node(model_dir, "score", SCORE_HANDLER, SCORE_MODEL)
+    config = {
+        "handler": {
+            "pipeline": {
+                "inputs": ["input"],
+                "nodes": [
+                    {"name": "embed", "model_dir": "embed"},
+                    {
+                        "name": "score",
+                        "model_dir": "score",
+                        "inputs": ["input", "embed"],
+                    },
+                ],
+            }
+        }
+    }
+    context = Context(
+        "pipeline", model_dir, None, 2, None, "1.0", model_yaml_config=config
+    )
+    context.request_ids = {0: "a", 1: "b"}
+    return context
+
+
+def test_pipeline_handler(context):
+    handler = PipelineHandler()
+    handler.initialize(context)
+
+    assert [node.inputs for node in handler.pipeline.nodes] == [
+        ["input"],
+        ["input", "embed"],
+    ]
+    result = handler.handle([{"body": b"1.5"}, {"data": "2"}], context)
+
+    assert result == [{"score": 3.0, "text": b"1.5"}, {"score": 4.0, "text": "2"}]
+    assert "model" not in sys.modules or not sys.modules["model"].__file__.startswith(
+        context.system_properties["model_dir"]
+    )
+    score_node = handler.pipeline.nodes[1]
+    assert score_node.context.request_ids == context.request_ids
+    assert score_node.context.system_properties["model_dir"].endswith("score")
+
+
+def test_node_rows():
+    data = [{"body": b"x"}]
+    outputs = {"a": [torch.ones(1)]}
+
+    assert PipelineNode("a", ["input"]).rows(data, outputs, ["input"]) is data
+    assert PipelineNode("b", ["a"]).rows(data, outputs, ["input"]) == [
+        {"body": outputs["a"][0]}
+    ]
+    assert PipelineNode("b", ["input", "a"]).rows(data, outputs, ["input"]) == [
+        {"input": b"x", "a": outputs["a"][0]}
+    ]
+
+
+def test_pipeline_unknown_inputs():
+    with pytest.raises(ValueError, match="neither inputs of the pipeline"):
+        Pipeline([PipelineNode("a", ["input"]), PipelineNode("b", ["c"])], ["input"])
+
+
+def test_pipeline_output_length(context):
+    class Node(PipelineNode):
+        def __call__(self, rows, pipeline_context):
+            return rows[:1]
+
+    pipeline = Pipeline([Node("a", ["input"])], ["input"])
+    with pytest.raises(
+        PredictionException, match="returned 1 outputs for a batch of 2"
+    ):
+        pipeline([{"body": b"1"}, {"body": b"2"}], context)
@@ -0,0 +1,99 @@
+import json
+
+import numpy as np
+import pytest
+import torch
+
+from ts.protocol.otf_message_handler import create_predict_response
+from ts.utils import serializer
+
+OUTPUT = {
+    "tensor": torch.tensor([[1.0, 2.5], [3.0, 4.0]]),
+    "array": np.arange(3, dtype=np.int64),
+    "scalar": np.float32(0.5),
+    "labels": ["cat", "dog"],
+}
+EXPECTED = {
+    "tensor": [[1.0, 2.5], [3.0, 4.0]],
+    "array": [0, 1, 2],
+    "scalar": 0.5,
+    "labels": ["cat", "dog"],
+}
+
+
+@pytest.fixture(autouse=True)
+def reset_serializer(monkeypatch):
+    monkeypatch.delenv(serializer.SERIALIZER_ENV, raising=False)
+    serializer.set_serializer(None)
+    yield
+    serializer.set_serializer(None)
+
+
+def test_default_is_compact():
+    assert serializer.get_serializer().name == "json"
+    assert serializer.dumps({"a": [1, 2]}) == b'{"a":[1,2]}'
+
+
+def test_json_indent():
+    assert serializer.create_serializer("json_indent").dumps({"a": 1}) == json.dumps(
+        {"a": 1}, indent=2
+    ).encode("utf-8")
+
+
+@pytest.mark.parametrize("name", ["json", "json_indent", "orjson"])
+def test_tensors_and_numpy(name):
+    if name == "orjson":
+        pytest.importorskip("orjson")
+    result = serializer.create_serializer(name).dumps(OUTPUT)
+
+    assert isinstance(result, bytes)
+    assert json.loads(result) == EXPECTED
+
+
+def test_orjson_non_contiguous_and_bfloat16():
+    pytest.importorskip("orjson")
+    output = {
+        "transposed": torch.arange(6.0).reshape(2, 3).t(),
+        "bfloat16": torch.ones(2, dtype=torch.bfloat16),
+    }
+
+    result = serializer.create_serializer("orjson").dumps(output)
+
+    assert json.loads(result) == {
+        "transposed": [[0.0, 3.0], [1.0, 4.0], [2.0, 5.0]],
+        "bfloat16": [1.0, 1.0],
+    }
+
+
+def test_auto():
+    pytest.importorskip("orjson")
+
+    assert serializer.create_serializer("auto").name == "orjson"
+
+
+def test_function(monkeypatch):
+    monkeypatch.setenv(serializer.SERIALIZER_ENV, "json:dumps")
+
+    assert serializer.dumps([1, 2]) == b"[1, 2]"
+
+
+def test_invalid_name_falls_back_to_json(monkeypatch):
+    monkeypatch.setenv(serializer.SERIALIZER_ENV, "yaml")
+
+    with pytest.raises(ValueError, match="should be one of"):
+        serializer.create_serializer()
+    assert serializer.get_serializer().name == "json"
+
+
+def test_predict_response():
+    serializer.set_serializer(serializer.JSONSerializer())
+
+    msg = create_predict_response([OUTPUT], {0: "a"}, "OK", 200)
+
+    assert json.dumps(EXPECTED, separators=(",", ":")).encode("utf-8") in msg
+
+
+def test_predict_response_unsupported_output():
+    msg = create_predict_response([{"a": object()}], {0: "a"}, "OK", 200)
+
+    assert b"Unsupported model output data type." in msg
@@ -0,0 +1,138 @@
+import os
+import time
+
+import pytest
+import torch
+
+from ts.handler_utils.session_store import SessionStateStore, state_nbytes
+
+
+def test_state_nbytes():
+    tensor = torch.zeros(4, 8, dtype=torch.float32)
+    assert state_nbytes(tensor) == 128
+    assert state_nbytes(b"abc") == 3
+    assert state_nbytes({"kv": tensor, "pos": 3}) > 128
+
+
+def test_get_put_delete():
+    store = SessionStateStore()
+    store["seq_0"] = 1
+    store.put("seq_1", {"count": 2})
+
+    assert "seq_0" in store
+    assert store["seq_0"] == 1
+    assert store.get("seq_1") == {"count": 2}
+    assert store.get("missing", 0) == 0
+    assert len(store) == 2
+
+    del store["seq_0"]
+    assert "seq_0" not in store
+    with pytest.raises(KeyError):
+        del store["seq_0"]
+
+
+def test_lru_eviction_by_sessions_and_bytes():
+    store = SessionStateStore(max_sessions=2)
+    store["a"], store["b"] = 1, 2
+    store["a"]
+    store["c"] = 3
+    assert "b" not in store and "a" in store and "c" in store
+    assert store.evictions == 1
+
+    store = SessionStateStore(max_bytes=600)
+    store["a"] = torch.zeros(100)
+    store["b"] = torch.zeros(100)
+    assert "a" not in store
+    assert store.resident_bytes == 400
+
+
+def test_ttl_eviction():
+    store = SessionStateStore(ttl_sec=0.05)
+    store["a"] = 1
+    time.sleep(0.1)
+    store["b"] = 2
+    assert "a" not in store
+    assert "b" in store
+
+
+def test_disk_spill_and_restore(tmp_path):
+    store = SessionStateStore(max_bytes=800, spill="disk", spill_dir=str(tmp_path))
+    kv_cache = torch.arange(100, dtype=torch.float32)
+    store["a"] = {"kv": kv_cache, "step": 3}
+    store["b"] = torch.zeros(100)
+    nbytes = state_nbytes({"kv": kv_cache, "step": 3})
+
+    assert store.spills == 1
+    assert store.spilled_bytes == nbytes
+    assert len(os.listdir(tmp_path)) == 1
+
+    state = store["a"]
+    assert torch.equal(state["kv"], kv_cache) and state["step"] == 3
+    # Restoring "a" spills "b"
+    assert store.spills == 2
+    assert store.resident_bytes == nbytes
+
+    store.clear()
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.fixture
+def fake_cuda(mocker):
+    """CPU tensors stand for device tensors, pinning is a no-op"""
+    mocker.patch("torch.cuda.is_available", return_value=True)
+    mocker.patch("ts.handler_utils.session_store._on_device", lambda t: t.dim() > 0)
+    mocker.patch.object(torch.Tensor, "pin_memory", lambda t: t)
+
+
+def test_pinned_spill_needs_cuda(mocker):
+    mocker.patch("torch.cuda.is_available", return_value=False)
+    with pytest.raises(ValueError, match="needs CUDA"):
+        SessionStateStore(spill="pinned")
+
+
+def test_pinned_spill_of_idle_sessions(fake_cuda):
+    store = SessionStateStore(spill="pinned", spill_idle_sec=0.05)
+    host = torch.tensor(1.0)
+    state = [torch.ones(10), torch.zeros(5), host]
+    resident = state_nbytes(state) + state_nbytes(1)
+    store["a"] = state
+    time.sleep(0.1)
+    store["b"] = 1
+
+    assert store.spills == 1
+    # Only the device tensors are moved out of the resident memory
+    assert store.spilled_bytes == 15 * 4
+    assert store.resident_bytes == resident - 15 * 4
+    assert torch.equal(store["a"][0], torch.ones(10))
+    assert store["a"][2] is host
+    assert store.spilled_bytes == 0
+    assert store.resident_bytes == resident
+
+
+def test_pinned_spill_evicts_host_state(fake_cuda):
+    store = SessionStateStore(max_bytes=500, spill="pinned")
+    store["a"] = {"tokens": list(range(100))}
+    store["b"] = {"tokens": list(range(100))}
+
+    assert "a" not in store
+    assert store.spills == 0 and store.evictions == 1
+
+
+def test_spill_budget_evicts(fake_cuda):
+    store = SessionStateStore(max_bytes=500, spill="pinned", max_spill_bytes=500)
+    for key in "abc":
+        store[key] = torch.zeros(100)
+    assert "a" not in store
+    assert store.spills == 2 and store.evictions == 1
+
+
+def test_publish_metrics(mocker):
+    metrics = mocker.Mock()
+    store = SessionStateStore(max_sessions=1, metrics=metrics, metrics_interval_sec=0)
+    store["a"] = 1
+    store["b"] = 2
+
+    counters = {c.args[0]: c.args[1] for c in metrics.add_counter.call_args_list}
+    assert counters["SessionStoreEvictions"] == 1
+    store.publish_metrics()
+    assert metrics.add_counter.call_args_list[-1].args == ("SessionStoreEvictions", 0)
@@ -0,0 +1,208 @@
+import sys
+import threading
+
+import pytest
+
+from ts.handler_utils.micro_batching import MicroBatching
+from ts.handler_utils.timer import StageHistogram, StageTimer, stage_timer, timed
+
+
+class MockContext:
+    def __init__(self, mocker, model_yaml_config):
+        self.model_yaml_config = model_yaml_config
+        self.metrics = mocker.Mock()
+
+
+class Handler:
+    def __init__(self, context):
+        self.context = context
+
+    @timed
+    def preprocess(self, data):
+        return data + 1
+
+    @timed("tokenize")
+    def tokenize(self, data):
+        with stage_timer(self).measure("split", self.context.metrics):
+            return data * 2
+
+
+def calls_of(metrics, name):
+    return [c for c in metrics.method_calls if c.args and c.args[0] == name]
+
+
+def test_histogram_percentiles():
+    histogram = StageHistogram()
+    for value in range(1, 1001):
+        histogram.record(value / 10)
+
+    assert histogram.count == 1000
+    assert histogram.mean() == pytest.approx(50.05)
+    for q in [50, 90, 99]:
+        assert histogram.percentile(q) == pytest.approx(q, rel=0.02)
+    assert histogram.percentile(100) == pytest.approx(100, rel=0.02)
+
+
+def test_sampled_stages_are_reported_periodically(mocker):
+    context = MockContext(
+        mocker,
+        {
+            "handler": {
+                "stage_timing": {
+                    "sample_rate": 0.5,
+                    "report_interval_sec": 3600,
+                    "percentiles": [50, 99],
+                    "cuda_events": False,
+                }
+            }
+        },
+    )
+    handler = Handler(context)
+    for i in range(10):
+        assert handler.preprocess(i) == i + 1
+        assert handler.tokenize(i) == i * 2
+
+    timer = stage_timer(handler)
+    assert {s: h.count for s, h in timer.histograms.items()} == {
+        "preprocess": 5,
+        "tokenize": 5,
+        "split": 5,
+    }
+    assert context.metrics.method_calls == []
+
+    timer.report(context.metrics)
+    assert timer.histograms == {}
+    counts = calls_of(context.metrics, "StageCount")
+    assert len(counts) == 3 and counts[0].args[1] == 5
+    latencies = calls_of(context.metrics, "StageLatency")
+    assert len(latencies) == 6
+    dims = latencies[1].kwargs["dimensions"]
+    assert [(d.name, d.value) for d in dims] == [
+        ("Stage", "preprocess"),
+        ("Percentile", "p99"),
+    ]
+
+
+def test_profile_emits_every_call(mocker):
+    context = MockContext(mocker, {"handler": {"profile": True}})
+    handler = Handler(context)
+    handler.preprocess(1)
+    handler.preprocess(2)
+
+    calls = calls_of(context.metrics, "ts_handler_preprocess")
+    assert len(calls) == 2 and calls[0].args[1] >= 0
+
+
+def test_disabled_stage_timing(mocker):
+    context = MockContext(mocker, {"handler": {"stage_timing": False}})
+    handler = Handler(context)
+    assert handler.tokenize(3) == 6
+    assert not stage_timer(handler).enabled
+    assert stage_timer(handler).histograms == {}
+
+    # Handlers without a context are not timed
+    assert Handler(None).preprocess(1) == 2
+    assert StageTimer.from_config(None).sample_every == 100
+
+
+class FakeEvent:
+    def __init__(self, enable_timing=False):
+        self.synchronized = False
+
+    def record(self):
+        pass
+
+    def query(self):
+        return False
+
+    def synchronize(self):
+        self.synchronized = True
+
+    def elapsed_time(self, end):
+        assert end.synchronized
+        return 1.5
+
+
+def test_profile_records_cuda_stages_inline(mocker):
+    mocker.patch("torch.cuda.Event", FakeEvent)
+    context = MockContext(mocker, {"handler": {"profile": True}})
+    handler = Handler(context)
+    timer = stage_timer(handler)
+    timer.cuda_events = True
+
+    handler.preprocess(1)
+
+    calls = calls_of(context.metrics, "ts_handler_preprocess")
+    assert [c.args[1] for c in calls] == [1.5]
+    assert not timer.pending
+
+
+class CompletedEvent(FakeEvent):
+    def query(self):
+        self.queried = True
+        return True
+
+    def elapsed_time(self, end):
+        assert end.queried
+        return 1.5
+
+
+class PipelineHandler:
+    def __init__(self, context):
+        self.context = context
+
+    @timed
+    def preprocess(self, data):
+        return data
+
+    @timed
+    def inference(self, data):
+        return data
+
+    @timed
+    def postprocess(self, data):
+        return data
+
+
+@pytest.mark.parametrize("cuda_events", [False, True])
+def test_micro_batching_threads_share_the_timer(mocker, cuda_events):
+    mocker.patch("torch.cuda.Event", CompletedEvent)
+    context = MockContext(
+        mocker,
+        {"handler": {"stage_timing": {"sample_rate": 1, "report_interval_sec": 0}}},
+    )
+    handler = PipelineHandler(context)
+    stage_timer(handler).cuda_events = cuda_events
+    stages = ["preprocess", "inference", "postprocess"]
+    # Switch threads often to interleave the stages
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    micro_batching = MicroBatching(
+        handler, micro_batch_size=1, parallelism={stage: 3 for stage in stages}
+    )
+    outputs = []
+
+    def handle():
+        for _ in range(5):
+            outputs.append(micro_batching.handle(list(range(100))))
+
+    # A stage raising in a thread of MicroBatching would block handle forever
+    thread = threading.Thread(target=handle, daemon=True)
+    try:
+        thread.start()
+        thread.join(timeout=30)
+    finally:
+        micro_batching.shutdown()
+        sys.setswitchinterval(switch_interval)
+    assert outputs == [list(range(100))] * 5
+
+    timer = stage_timer(handler)
+    timer.resolve_pending()
+    timer.report(context.metrics)
+    for stage in stages:
+        counts = [
+            c.args[1]
+            for c in calls_of(context.metrics, "StageCount")
+            if c.kwargs["dimensions"][0].value == stage
+        ]
+        assert sum(counts) == 500
@@ -0,0 +1,81 @@
+import random
+import re
+import string
+
+import pytest
+
+from ts.handler_utils.text_normalizer import BATCH_SEPARATOR, compile_contractions
+from ts.torch_handler.contractions import CONTRACTION_MAP
+from ts.torch_handler.text_classifier import TextClassifier
+
+ALPHABET = list(string.printable) + list("éàçñüßæœﬁ…“”’＇！ℌᴬΣſİ̈") + [" "] * 10
+MARKUP = ["<b>", "</i>", "&amp;", "&#39;", "&#x3c;", "<br />", "&AMP;", "<a\nhref>"]
+
+
+def random_texts(count, seed=0):
+    rng = random.Random(seed)
+    keys = list(CONTRACTION_MAP)
+    texts = []
+    for _ in range(count):
+        parts = []
+        for _ in range(rng.randint(0, 30)):
+            choice = rng.random()
+            if choice < 0.3:
+                key = rng.choice(keys)
+                parts.append(key.upper() if rng.random() < 0.3 else key)
+            elif choice < 0.4:
+                parts.append(rng.choice(MARKUP))
+            else:
+                parts.append("".join(rng.choices(ALPHABET, k=rng.randint(1, 8))))
+        texts.append(rng.choice(["", " "]).join(parts))
+    return texts
+
+
+@pytest.fixture(scope="module")
+def handler():
+    return TextClassifier()
+
+
+def test_contractions_pattern_matches_alternation():
+    text = "can't've can't ab a Ab"
+    for contractions in [
+        {"can't've": "", "can't": "", "ab": "", "a": ""},
+        {"can't": "", "can't've": "", "a": "", "ab": ""},
+    ]:
+        alternation = re.compile("|".join(contractions), flags=re.IGNORECASE)
+        pattern = compile_contractions(contractions)
+        assert pattern.findall(text) == alternation.findall(text)
+
+
+def test_tokenize_matches_cleanup_chain(handler):
+    for text in random_texts(2000):
+        try:
+            expected = handler._tokenize(handler._normalize_text(text))
+        except TypeError:
+            with pytest.raises(TypeError):
+                handler.normalizer.tokenize(text)
+            continue
+        assert handler.normalizer.tokenize(text) == expected, repr(text)
+
+
+def test_tokenize_batch(handler):
+    texts = [t for t in random_texts(200, seed=1) if "ſ" not in t]
+    expected = [handler.normalizer.tokenize(text) for text in texts]
+    assert handler.normalizer.tokenize_batch(texts) == expected
+    assert handler._tokenize_texts(texts) == expected
+
+    texts = ["it's" + BATCH_SEPARATOR + "fine", "I'd"]
+    assert handler.normalizer.tokenize_batch(texts) == [
+        ["it", "is", "fine"],
+        ["i", "would"],
+    ]
+
+
+def test_custom_tokenizer_uses_cleanup_chain(handler):
+    class UpperTextClassifier(TextClassifier):
+        def _remove_punctuation(self, text):
+            return text.upper()
+
+    custom = UpperTextClassifier()
+    custom.tokenizer = str.split
+    assert custom._tokenize_texts(["Don't stop!"]) == [["DO", "NOT", "STOP!"]]
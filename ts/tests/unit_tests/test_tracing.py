@@ -0,0 +1,122 @@
+import json
+
+import pytest
+
+from ts.context import RequestProcessor
+from ts.utils import tracing
+from ts.utils.tracing import FileExporter, Tracer, parse_traceparent
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+@pytest.fixture()
+def tracer(tmp_path):
+    tracer = Tracer(FileExporter(tmp_path / "traces.jsonl"), sample_rate=0)
+    tracer.model_name = "resnet"
+    return tracer
+
+
+def read_spans(path):
+    spans = []
+    with open(path) as f:
+        for line in f:
+            for resource_spans in json.loads(line)["resourceSpans"]:
+                for scope_spans in resource_spans["scopeSpans"]:
+                    spans.extend(scope_spans["spans"])
+    return spans
+
+
+def test_parse_traceparent():
+    assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01") == (
+        TRACE_ID,
+        PARENT_ID,
+        True,
+    )
+    assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-00")[2] is False
+    assert parse_traceparent("00-abc-def-01") is None
+    assert parse_traceparent(f"00-{'0' * 32}-{PARENT_ID}-01") is None
+
+
+def test_sampled_request_spans(tracer, tmp_path):
+    processors = [
+        RequestProcessor({"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"}),
+        RequestProcessor({}),
+    ]
+    trace = tracer.begin()
+    trace.add_child("decode_request", trace.start_ns, trace.start_ns + 10, 0)
+    trace.add_child("decode_request", trace.start_ns + 10, trace.start_ns + 20, 1)
+    tracer.mark("socket_decode")
+    tracer.mark("retrieve_data_for_inference")
+    tracer.sample_requests({0: "req-0", 1: "req-1"}, processors)
+    tracer.mark("handler")
+    tracer.mark("encode")
+    tracer.mark("sendall")
+    tracer.finish()
+    tracer.close()
+
+    # Only the request with a sampled traceparent is traced, sample_rate is 0
+    header = processors[0].get_response_header("traceparent")
+    assert header.startswith(f"00-{TRACE_ID}-") and header.endswith("-01")
+    assert processors[1].get_response_headers() == {}
+
+    spans = read_spans(tmp_path / "traces.jsonl")
+    names = [span["name"] for span in spans]
+    assert names == [
+        "predict",
+        "socket_decode",
+        "retrieve_data_for_inference",
+        "handler",
+        "encode",
+        "sendall",
+        "decode_request",
+    ]
+    root = spans[0]
+    assert root["traceId"] == TRACE_ID and root["parentSpanId"] == PARENT_ID
+    assert root["spanId"] == header.split("-")[2]
+    assert all(span["parentSpanId"] == root["spanId"] for span in spans[1:])
+    assert all(
+        int(span["startTimeUnixNano"]) <= int(span["endTimeUnixNano"]) for span in spans
+    )
+    assert spans[1]["startTimeUnixNano"] == root["startTimeUnixNano"]
+    assert spans[5]["endTimeUnixNano"] == root["endTimeUnixNano"]
+
+
+def test_unsampled_batch_is_not_exported(tracer, tmp_path):
+    tracer.begin()
+    tracer.mark("socket_decode")
+    tracer.sample_requests({0: "req-0"}, [RequestProcessor({})])
+    tracer.finish()
+    tracer.close()
+
+    assert tracer.current is None
+    assert not (tmp_path / "traces.jsonl").exists()
+
+
+def test_tracer_from_env(monkeypatch, tmp_path):
+    monkeypatch.setattr(tracing, "_initialized", False)
+    monkeypatch.delenv(tracing.TRACE_EXPORT_ENV, raising=False)
+    assert tracing.get_tracer() is None
+
+    monkeypatch.setattr(tracing, "_initialized", False)
+    monkeypatch.setenv(tracing.TRACE_EXPORT_ENV, "http://localhost:4318/v1/traces")
+    monkeypatch.setenv(tracing.TRACE_SAMPLE_RATE_ENV, "0.5")
+    tracer = tracing.get_tracer()
+    assert isinstance(tracer.exporter, tracing.HttpExporter)
+    assert tracer.sample_rate == 0.5
+    monkeypatch.setattr(tracing, "_initialized", False)
+    monkeypatch.setattr(tracing, "_tracer", None)
+
+
+def test_async_service_disables_tracing(monkeypatch, mocker, tmp_path):
+    from ts.async_service import AsyncService
+
+    monkeypatch.setattr(tracing, "_initialized", False)
+    monkeypatch.setattr(tracing, "_tracer", None)
+    monkeypatch.setenv(tracing.TRACE_EXPORT_ENV, str(tmp_path / "traces.jsonl"))
+    assert tracing.get_tracer() is not None
+
+    AsyncService(mocker.MagicMock())
+
+    assert tracing.get_tracer() is None
+    monkeypatch.setattr(tracing, "_initialized", False)
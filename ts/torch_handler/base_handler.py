@@ -8,13 +8,16 @@ import importlib.util
 import logging
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import packaging.version
 import torch
 
+from ts.handler_utils.explanations import ExplanationCache, input_key
 from ts.handler_utils.timer import timed
 
 from ..utils.util import (
+    LabelIndex,
     check_valid_pt2_backend,
     list_classes_from_module,
     load_label_mapping,
@@ -122,6 +125,13 @@ class BaseHandler(abc.ABC):
     Also, provides handle method per torch serve custom model specification
     """
 
+    explain_n_steps = None
+    explain_internal_batch_size = None
+    explain_cache_size = 0
+    explain_threads = 1
+    explain_cache = None
+    json_labels = False
+
     def __init__(self):
         self.model = None
         self.mapping = None
@@ -291,9 +301,41 @@ class BaseHandler(abc.ABC):
         # Load class mapping for classifiers
         mapping_file_path = os.path.join(model_dir, "index_to_name.json")
         self.mapping = load_label_mapping(mapping_file_path)
+        handler_config = (getattr(self, "model_yaml_config", None) or {}).get(
+            "handler"
+        ) or {}
+        self.json_labels = bool(handler_config.get("json_labels", self.json_labels))
+
+        self.load_explain_config()
 
         self.initialized = True
 
+    def load_explain_config(self):
+        """
+        Reads the settings of the Captum explanations of the handler section of
+        model-config.yaml, see ts.handler_utils.explanations
+
+        handler:
+          explain:
+            n_steps: 15
+            internal_batch_size: 64
+            cache_size: 1024
+            threads: 1
+        """
+        model_yaml_config = getattr(self, "model_yaml_config", None) or {}
+        config = (model_yaml_config.get("handler") or {}).get("explain") or {}
+        self.explain_n_steps = config.get("n_steps", self.explain_n_steps)
+        self.explain_internal_batch_size = config.get(
+            "internal_batch_size", self.explain_internal_batch_size
+        )
+        self.explain_cache_size = int(config.get("cache_size", self.explain_cache_size))
+        self.explain_threads = int(config.get("threads", self.explain_threads))
+        self.explain_cache = (
+            ExplanationCache(self.explain_cache_size)
+            if self.explain_cache_size > 0
+            else None
+        )
+
     def _load_torch_export_aot_compile(self, model_so_path):
         """Loads the PyTorch model so and returns a Callable object.
 
@@ -356,6 +398,31 @@ class BaseHandler(abc.ABC):
             model.load_state_dict(state_dict)
         return model
 
+    @property
+    def label_index(self):
+        """The LabelIndex of the class mapping, rebuilt when the mapping is replaced"""
+        mapping = getattr(self, "mapping", None)
+        index = getattr(self, "_label_index", None)
+        if index is None or index.mapping is not mapping:
+            index = self._label_index = LabelIndex(mapping)
+        return index
+
+    def map_labels(self, probs, classes=None):
+        """
+        Maps rows of probabilities, and of their class ids if not all the classes,
+        to { friendly class name -> probability } dicts. With handler.json_labels
+        in model-config.yaml, the rows are returned as JSON objects serialized
+        from the pre-serialized labels instead of dicts.
+        """
+        if not self.json_labels:
+            return self.label_index.map(probs, classes)
+        rows = self.label_index.to_json(probs, classes)
+        context = getattr(self, "context", None)
+        if context is not None and hasattr(context, "set_response_content_type"):
+            for idx in range(len(rows)):
+                context.set_response_content_type(idx, "application/json")
+        return rows
+
     def _use_torch_export_aot_compile(self):
         torch_export_aot_compile = False
         if hasattr(self, "model_yaml_config") and "pt2" in self.model_yaml_config:
@@ -518,29 +585,90 @@ class BaseHandler(abc.ABC):
     def explain_handle(self, data_preprocess, raw_data):
         """Captum explanations handler
 
+        Explains every row of the batch, the rows whose explanation is in the
+        explanation cache being skipped.
+
         Args:
             data_preprocess (Torch Tensor): Preprocessed data to be used for captum
             raw_data (list): The unprocessed data to get target from the request
 
         Returns:
-            dict : A dictionary response with the explanations response.
+            list : The explanations of the rows of the batch.
         """
-        output_explain = None
-        inputs = None
-        target = 0
-
         logger.info("Calculating Explanations")
-        row = raw_data[0]
-        if isinstance(row, dict):
-            logger.info("Getting data and target")
-            inputs = row.get("data") or row.get("body")
-            target = row.get("target")
-            if not target:
-                target = 0
-
-        output_explain = self.get_insights(data_preprocess, inputs, target)
+        inputs = []
+        targets = []
+        for row in raw_data:
+            value = None
+            target = 0
+            if isinstance(row, dict):
+                value = row.get("data")
+                if value is None:
+                    value = row.get("body")
+                target = row.get("target") or 0
+            inputs.append(value)
+            targets.append(target)
+
+        cache = getattr(self, "explain_cache", None)
+        if cache is None:
+            return self.get_batch_insights(data_preprocess, inputs, targets)
+
+        keys = [input_key(value, target) for value, target in zip(inputs, targets)]
+        output_explain = [cache.get(key) for key in keys]
+        misses = [idx for idx, output in enumerate(output_explain) if output is None]
+        if not misses:
+            return output_explain
+        if len(misses) < len(raw_data):
+            data_preprocess = self.preprocess([raw_data[idx] for idx in misses])
+        explanations = self.get_batch_insights(
+            data_preprocess,
+            [inputs[idx] for idx in misses],
+            [targets[idx] for idx in misses],
+        )
+        if len(explanations) != len(misses):
+            # get_insights of a custom handler not explaining every row
+            return explanations
+        for idx, explanation in zip(misses, explanations):
+            cache.put(keys[idx], explanation)
+            output_explain[idx] = explanation
         return output_explain
 
+    def get_batch_insights(self, data_preprocess, inputs, targets):
+        """
+        Calculates the explanations of all the rows of the batch. The default
+        handlers override it to explain the whole batch in a single Captum call,
+        custom handlers can override it or get_insights.
+
+        Args:
+            data_preprocess: The preprocessed data of the rows
+            inputs (list): The raw data of every row
+            targets (list): The target of every row
+
+        Returns:
+            list : The explanation of every row
+        """
+        return self.get_insights(data_preprocess, inputs[0], targets[0])
+
+    @property
+    def explain_executor(self):
+        executor = getattr(self, "_explain_executor", None)
+        if executor is None:
+            executor = self._explain_executor = ThreadPoolExecutor(
+                max_workers=getattr(self, "explain_threads", 1),
+                thread_name_prefix="explain",
+            )
+        return executor
+
+    def explain_async(self, data_preprocess, raw_data):
+        """
+        Runs explain_handle on the explain thread pool and returns its
+        concurrent.futures.Future, e.g. for an async handler to await
+        asyncio.wrap_future(future) while it serves predictions.
+        """
+        return self.explain_executor.submit(
+            self.explain_handle, data_preprocess, raw_data
+        )
+
     def _is_explain(self):
         if self.context and self.context.get_request_header(0, "explain"):
             if self.context.get_request_header(0, "explain") == "True":
@@ -4,7 +4,6 @@ Module for image classification default handler
 import torch
 import torch.nn.functional as F
 
-from ..utils.util import map_class_to_label
 from .dali_handler import DALIHandler
 
 
@@ -27,6 +26,4 @@ class DALIImageClassifier(DALIHandler):
     def postprocess(self, data):
         ps = F.softmax(data, dim=1)
         probs, classes = torch.topk(ps, self.topk, dim=1)
-        probs = probs.tolist()
-        classes = classes.tolist()
-        return map_class_to_label(probs, self.mapping, classes)
+        return self.map_labels(probs, classes)
@@ -7,7 +7,6 @@ from torchvision import transforms
 
 from ts.handler_utils.timer import timed
 
-from ..utils.util import map_class_to_label
 from .vision_handler import VisionHandler
 
 
@@ -39,6 +38,4 @@ class ImageClassifier(VisionHandler):
     def postprocess(self, data):
         ps = F.softmax(data, dim=1)
         probs, classes = torch.topk(ps, self.topk, dim=1)
-        probs = probs.tolist()
-        classes = classes.tolist()
-        return map_class_to_label(probs, self.mapping, classes)
+        return self.map_labels(probs, classes)
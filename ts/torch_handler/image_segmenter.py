@@ -1,10 +1,19 @@
 """
 Module for image segmentation default handler
 """
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import torch
 from torchvision import transforms as T
+
+from ts.handler_utils import mask_encoding
+from ts.metrics.dimension import Dimension
+from ts.utils import serializer
+
 from .vision_handler import VisionHandler
 
+
 class ImageSegmenter(VisionHandler):
     """
     ImageSegmenter handler class. This handler takes a batch of images
@@ -12,21 +21,156 @@ class ImageSegmenter(VisionHandler):
     where N - batch size, K - number of classes, H - height and W - width.
     """
 
-    image_processing = T.Compose([
-        T.Resize(256),
-        T.CenterCrop(224),
-        T.ToTensor(),
-        T.Normalize(
-            mean=[0.485, 0.456, 0.406],
-            std=[0.229, 0.224, 0.225]
-        )])
+    image_processing = T.Compose(
+        [
+            T.Resize(256),
+            T.CenterCrop(224),
+            T.ToTensor(),
+            T.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225]),
+        ]
+    )
+    encoding = mask_encoding.JSON
+    confidence = False
+    encode_threads = 4
+
+    def initialize(self, context):
+        super().initialize(context)
+        self.load_segmentation_config()
+
+    def load_segmentation_config(self):
+        """
+        Reads the default encoding of the handler section of model-config.yaml
+
+        handler:
+          segmentation:
+            encoding: json            # json, rle or png, if the request has no Accept header
+            confidence: false         # uint8 confidence map with the rle and png encodings
+            encode_threads: 4         # threads encoding the masks of a batch
+        """
+        model_yaml_config = getattr(self, "model_yaml_config", None) or {}
+        config = (model_yaml_config.get("handler") or {}).get("segmentation") or {}
+        self.encoding = config.get("encoding", self.encoding)
+        if self.encoding not in mask_encoding.ENCODINGS:
+            raise ValueError(
+                f"handler.segmentation.encoding should be one of "
+                f"{mask_encoding.ENCODINGS}, got {self.encoding}"
+            )
+        self.confidence = bool(config.get("confidence", self.confidence))
+        self.encode_threads = int(config.get("encode_threads", self.encode_threads))
+
+    def negotiate_encoding(self, idx):
+        """(encoding, confidence) of the Accept header of the request idx of the batch"""
+        accept = None
+        context = getattr(self, "context", None)
+        if context is not None:
+            for key, value in (context.get_all_request_header(idx) or {}).items():
+                if key.lower() == "accept":
+                    accept = value
+                    break
+        return mask_encoding.negotiate(accept, self.encoding, self.confidence)
+
+    def label_names(self, num_classes):
+        return self.label_index.labels(num_classes - 1)[:num_classes]
+
+    @property
+    def encoder(self):
+        executor = getattr(self, "_encoder", None)
+        if executor is None:
+            executor = self._encoder = ThreadPoolExecutor(
+                max_workers=self.encode_threads,
+                thread_name_prefix="segmentation-encoder",
+            )
+        return executor
 
     def postprocess(self, data):
         # Returning the class for every pixel makes the response size too big
         # (> 24mb). Instead, we'll only return the top class for each image
-        data = data['out']
+        data = data["out"]
+        num_classes = data.shape[1]
         data = torch.nn.functional.softmax(data, dim=1)
         data = torch.max(data, dim=1)
-        data = torch.stack([data.indices.type(data.values.dtype), data.values], dim=3)
 
-        return data.tolist()
+        formats = [self.negotiate_encoding(idx) for idx in range(len(data.values))]
+        if num_classes > 256:
+            # The label maps are encoded as uint8
+            formats = [(mask_encoding.JSON, False)] * len(formats)
+        compact = [
+            idx
+            for idx, (encoding, _) in enumerate(formats)
+            if encoding != mask_encoding.JSON
+        ]
+        if not compact:
+            data = torch.stack(
+                [data.indices.type(data.values.dtype), data.values], dim=3
+            )
+            return data.tolist()
+
+        result = [None] * len(formats)
+        json_rows = [idx for idx in range(len(formats)) if idx not in compact]
+        if json_rows:
+            rows = torch.stack(
+                [
+                    data.indices[json_rows].type(data.values.dtype),
+                    data.values[json_rows],
+                ],
+                dim=3,
+            ).tolist()
+            for idx, row in zip(json_rows, rows):
+                result[idx] = row
+
+        # uint8 label and confidence maps, a single copy to the host
+        maps = (
+            torch.stack(
+                [
+                    data.indices[compact].to(torch.uint8),
+                    data.values[compact].mul(255).round_().to(torch.uint8),
+                ],
+                dim=1,
+            )
+            .cpu()
+            .numpy()
+        )
+        names = self.label_names(num_classes)
+        futures = [
+            self.encoder.submit(
+                self._encode,
+                maps[i, 0],
+                maps[i, 1] if formats[idx][1] else None,
+                formats[idx][0],
+                names,
+            )
+            for i, idx in enumerate(compact)
+        ]
+
+        context = getattr(self, "context", None)
+        metrics = getattr(context, "metrics", None)
+        for idx, future in zip(compact, futures):
+            result[idx], encode_ms = future.result()
+            encoding = formats[idx][0]
+            if context is not None:
+                context.set_response_content_type(
+                    idx, mask_encoding.CONTENT_TYPES[encoding]
+                )
+            if metrics is not None:
+                dimensions = [Dimension("Encoding", encoding)]
+                metrics.add_size(
+                    "SegmentationResponseSize",
+                    len(result[idx]),
+                    unit="B",
+                    dimensions=dimensions,
+                )
+                metrics.add_time(
+                    "SegmentationEncodeTime", encode_ms, dimensions=dimensions
+                )
+        return result
+
+    @staticmethod
+    def _encode(labels, confidence, encoding, names):
+        start = time.perf_counter()
+        if encoding == mask_encoding.PNG:
+            response = mask_encoding.encode_png(labels, confidence)
+        else:
+            response = serializer.dumps(
+                mask_encoding.encode_rle(labels, names, confidence)
+            )
+        return response, round((time.perf_counter() - start) * 1000, 2)
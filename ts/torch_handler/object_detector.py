@@ -4,9 +4,9 @@ Module for object detection default handler
 import torch
 from torchvision import transforms
 from torchvision import __version__ as torchvision_version
+from torchvision.ops import batched_nms
 from packaging import version
 from .vision_handler import VisionHandler
-from ..utils.util import map_class_to_label
 
 
 class ObjectDetector(VisionHandler):
@@ -17,9 +17,12 @@ class ObjectDetector(VisionHandler):
 
     image_processing = transforms.Compose([transforms.ToTensor()])
     threshold = 0.5
+    nms_iou_threshold = None
+    max_detections = None
 
     def initialize(self, context):
         super().initialize(context)
+        self.load_detection_config()
 
         properties = context.system_properties
         # Torchvision breaks with object detector models before 0.6.0
@@ -34,26 +37,83 @@ class ObjectDetector(VisionHandler):
             self.model.eval()
             self.initialized = True
 
+    def load_detection_config(self):
+        """
+        Reads the thresholds of the handler section of model-config.yaml
+
+        handler:
+          detection:
+            threshold: 0.5            # minimum score of the boxes
+            nms_iou_threshold: 0.5    # class-aware NMS of the boxes, disabled by default
+            max_detections: 100       # boxes kept per image, by decreasing score
+        """
+        model_yaml_config = getattr(self, "model_yaml_config", None) or {}
+        config = (model_yaml_config.get("handler") or {}).get("detection") or {}
+        self.threshold = float(config.get("threshold", self.threshold))
+        self.nms_iou_threshold = config.get("nms_iou_threshold", self.nms_iou_threshold)
+        self.max_detections = config.get("max_detections", self.max_detections)
+
+    def label_names(self, max_label):
+        """Names of the class ids up to max_label, indexed by class id"""
+        return self.label_index.labels(max_label)
+
     def postprocess(self, data):
-        result = []
+        if not data:
+            return []
 
-        box_filters = [row["scores"] >= self.threshold for row in data]
-        filtered_boxes, filtered_classes, filtered_scores = [
-            [
-                row[key][box_filter].tolist()
-                for row, box_filter in zip(data, box_filters)
+        scores = torch.cat([row["scores"] for row in data])
+        boxes = torch.cat([row["boxes"] for row in data])
+        labels = torch.cat([row["labels"] for row in data])
+        counts = torch.tensor(
+            [len(row["scores"]) for row in data], device=scores.device
+        )
+        images = torch.repeat_interleave(
+            torch.arange(len(data), device=scores.device), counts
+        )
+
+        keep = torch.nonzero(scores >= self.threshold).squeeze(1)
+        if self.nms_iou_threshold is not None and len(keep):
+            # Boxes of different images or classes never suppress each other
+            groups = labels[keep] * len(data) + images[keep]
+            keep = keep[
+                batched_nms(
+                    boxes[keep], scores[keep], groups, float(self.nms_iou_threshold)
+                )
             ]
-            for key in ["boxes", "labels", "scores"]
-        ]
+        if self.nms_iou_threshold is not None or self.max_detections is not None:
+            # Boxes of every image by decreasing score
+            keep = keep[torch.argsort(scores[keep], descending=True, stable=True)]
+            keep = keep[torch.argsort(images[keep], stable=True)]
+        if self.max_detections is not None and len(keep):
+            kept_images = images[keep]
+            first = torch.searchsorted(kept_images, kept_images)
+            rank = torch.arange(len(keep), device=keep.device) - first
+            keep = keep[rank < int(self.max_detections)]
+
+        # A single copy of the kept boxes to the host, in at least float32 which
+        # represents the image indices and labels exactly, unlike half precision
+        dtype = torch.promote_types(boxes.dtype, torch.float32)
+        survivors = torch.cat(
+            [
+                images[keep].unsqueeze(1).to(dtype),
+                labels[keep].unsqueeze(1).to(dtype),
+                scores[keep].unsqueeze(1).to(dtype),
+                boxes[keep].to(dtype),
+            ],
+            dim=1,
+        ).cpu()
 
-        for classes, boxes, scores in zip(
-            filtered_classes, filtered_boxes, filtered_scores
+        result = [[] for _ in data]
+        if not len(survivors):
+            return result
+        kept_labels = survivors[:, 1].long()
+        names = self.label_names(int(kept_labels.max()))
+        for image, label, score, box in zip(
+            survivors[:, 0].long().tolist(),
+            kept_labels.tolist(),
+            survivors[:, 2].tolist(),
+            survivors[:, 3:].tolist(),
         ):
-            retval = []
-            for _class, _box, _score in zip(classes, boxes, scores):
-                _retval = map_class_to_label([[_box]], self.mapping, [[_class]])[0]
-                _retval["score"] = _score
-                retval.append(_retval)
-            result.append(retval)
+            result[image].append({names[label]: box, "score": score})
 
         return result
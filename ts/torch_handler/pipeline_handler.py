@@ -0,0 +1,34 @@
+"""
+Module for the handler of workflow pipelines, a chain of workflow nodes
+running in a single worker
+"""
+import logging
+
+from ts.handler_utils.pipeline import Pipeline
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineHandler(object):
+    """
+    PipelineHandler runs the handlers of the nodes of a pipeline model archive
+    in order, passing the outputs of every node in memory to the next one.
+    The nodes are described by the handler.pipeline section of model-config.yaml,
+    see ts.handler_utils.pipeline.
+    """
+
+    def __init__(self):
+        self.pipeline = None
+        self.initialized = False
+
+    def initialize(self, context):
+        self.pipeline = Pipeline.from_config(context.model_yaml_config)
+        self.pipeline.load(context)
+        self.initialized = True
+        logger.info(
+            "Pipeline of nodes %s loaded",
+            [node.name for node in self.pipeline.nodes],
+        )
+
+    def handle(self, data, context):
+        return self.pipeline(data, context)
@@ -2,10 +2,11 @@
 Uses JSON formatted inputs/outputs, following the structure outlined in
 https://www.tensorflow.org/tfx/serving/api_rest
 """
-import json
 from base64 import b64decode
 from itertools import chain
 
+from ts.utils import serializer
+
 from .base import BaseEnvelope
 
 
@@ -70,5 +71,4 @@ class JSONEnvelope(BaseEnvelope):
         """
         Converts the output of the model back into compatible JSON
         """
-        out_dict = {"predictions": output}
-        return json.dumps(out_dict)
+        return serializer.dumps({"predictions": output})
@@ -11,6 +11,9 @@ from .base import BaseEnvelope
 
 logger = logging.getLogger(__name__)
 
+# Length of the JSON header of requests of the binary tensor data extension
+BINARY_HEADER = "inference-header-content-length"
+
 _DatatypeToNumpy = {
     "BOOL": "bool",
     "UINT8": "uint8",
@@ -42,6 +45,23 @@ def _to_dtype(datatype: str) -> "np.dtype":
     return np.dtype(dtype)
 
 
+def _from_binary(buffer, datatype, shape):
+    """
+    Reads a tensor of the binary tensor data extension, little endian values or
+    4 byte length prefixed elements for BYTES
+    """
+    if datatype == "BYTES":
+        elements, offset = [], 0
+        while offset < len(buffer):
+            length = int.from_bytes(buffer[offset : offset + 4], "little")
+            elements.append(bytes(buffer[offset + 4 : offset + 4 + length]))
+            offset += 4 + length
+        return elements
+    return np.frombuffer(buffer, dtype=_to_dtype(datatype).newbyteorder("<")).reshape(
+        tuple(shape)
+    )
+
+
 def _to_datatype(dtype: np.dtype) -> str:
     as_str = str(dtype)
     if as_str not in _NumpyToDatatype:
@@ -100,13 +120,18 @@ class KServev2Envelope(BaseEnvelope):
         Extracts the data from the JSON object
         """
         if isinstance(body_list[0], (bytes, bytearray)):
-            body_list = [json.loads(body.decode("utf8")) for body in body_list]
+            body_list = [
+                self._from_bytes(body, index) for index, body in enumerate(body_list)
+            ]
             logger.debug("Bytes array is %s", body_list)
 
         input_names = []
         for index, input in enumerate(body_list[0]["inputs"]):
             if input["datatype"] == "BYTES":
                 body_list[0]["inputs"][index]["data"] = input["data"][0]
+            elif isinstance(input["data"], np.ndarray):
+                # Tensors of the binary extension are passed to the handler as is
+                pass
             else:
                 body_list[0]["inputs"][index]["data"] = (
                     np.array(input["data"]).reshape(tuple(input["shape"])).tolist()
@@ -124,6 +149,39 @@ class KServev2Envelope(BaseEnvelope):
         data_list = [inputs_list.get("inputs") for inputs_list in body_list][0]
         return data_list
 
+    def _from_bytes(self, body, index):
+        """
+        Parses a JSON request, or a request of the binary tensor data extension:
+        a JSON header of Inference-Header-Content-Length bytes followed by the
+        raw values of the inputs with a binary_data_size parameter, in order.
+        """
+        header_length = None
+        for key, value in (self.context.get_all_request_header(index) or {}).items():
+            if key.lower() == BINARY_HEADER:
+                header_length = int(value)
+                break
+        if header_length is None:
+            return json.loads(body.decode("utf8"))
+
+        request = json.loads(bytes(body[:header_length]).decode("utf8"))
+        # A single writable copy of the binary data shared by the inputs
+        buffer = memoryview(bytearray(body[header_length:]))
+        offset = 0
+        for input in request["inputs"]:
+            size = (input.get("parameters") or {}).get("binary_data_size")
+            if size is None:
+                continue
+            input["data"] = _from_binary(
+                buffer[offset : offset + size], input["datatype"], input["shape"]
+            )
+            offset += size
+        if offset != len(buffer):
+            raise ValueError(
+                f"Binary data of {len(buffer)} bytes doesn't match the "
+                f"binary_data_size of the inputs, {offset} bytes"
+            )
+        return request
+
     def format_output(self, data):
         """Translates Torchserve output KServe v2 response format.
 
@@ -181,6 +239,7 @@ class KServev2Envelope(BaseEnvelope):
         data_ndarray = np.array(data).flatten()
         output_data["name"] = input_name
         output_data["datatype"] = _to_datatype(data_ndarray.dtype)
-        output_data["data"] = data_ndarray.tolist()
-        output_data["shape"] = data_ndarray.flatten().shape
+        # Encoded by the response serializer, without a list round-trip
+        output_data["data"] = data_ndarray
+        output_data["shape"] = list(data_ndarray.shape)
         return output_data
@@ -2,17 +2,15 @@
 # TODO remove pylint disable comment after https://github.com/pytorch/pytorch/issues/24807 gets merged.
 """
 Module for text classification default handler
-DOES NOT SUPPORT BATCH!
 """
 import logging
 
 import torch
 import torch.nn.functional as F
-from captum.attr import TokenReferenceBase
+from captum.attr import LayerIntegratedGradients, TokenReferenceBase
 
 from ts.handler_utils.text_utils import ngrams_iterator
 
-from ..utils.util import map_class_to_label
 from .text_handler import TextHandler
 
 logger = logging.getLogger(__name__)
@@ -25,61 +23,86 @@ class TextClassifier(TextHandler):
     """
 
     ngrams = 2
+    reference_token_idx = 0
+    reference_length = 256
+
+    def initialize(self, context):
+        super().initialize(context)
+        self.load_explain_references()
+
+    def load_explain_references(self):
+        """
+        Creates the layer integrated gradients of whole batches and the reference
+        token ids, grown when a longer text is explained.
+        """
+        self.token_reference = TokenReferenceBase(self.reference_token_idx)
+        self.reference_indices = self.token_reference.generate_reference(
+            self.reference_length, device=self.device
+        )
+        self.batch_lig = LayerIntegratedGradients(
+            self._padded_forward, self.model.embedding
+        )
+
+    def _padded_forward(self, text, lengths):
+        """Forward of texts padded to a (batch, length) tensor, as EmbeddingBag bags"""
+        mask = torch.arange(text.shape[1], device=text.device) < lengths.unsqueeze(1)
+        offsets = torch.cumsum(lengths, 0) - lengths
+        return self.model(text[mask], offsets)
 
     def preprocess(self, data):
-        """Normalizes the input text for PyTorch model using following basic cleanup operations :
+        """Normalizes the input texts for PyTorch model using following basic cleanup operations :
             - remove html tags
             - lowercase all text
             - expand contractions [like I'd -> I would, don't -> do not]
             - remove accented characters
             - remove punctuations
-        Converts the normalized text to tensor using the source_vocab.
+        Converts the normalized texts of the batch to a single tensor using the source_vocab.
 
         Args:
-            data (str): The input data is in the form of a string
+            data (list): List of the input requests, each holding a string
 
         Returns:
-            (Tensor): Text Tensor is returned after perfoming the pre-processing operations
-            (str): The raw input is also returned in this function
+            (Tensor): Concatenated token ids of all the texts in the batch
+            (Tensor): Offsets of the texts in the token tensor, as used by nn.EmbeddingBag
+            (list): The tokens of each text
         """
 
-        # Compat layer: normally the envelope should just return the data
-        # directly, but older versions of Torchserve didn't have envelope.
-        # Processing only the first input, not handling batch inference
-
-        line = data[0]
-        text = line.get("data") or line.get("body")
-        # Decode text if not a str but bytes or bytearray
-        if isinstance(text, (bytes, bytearray)):
-            text = text.decode("utf-8")
-
-        text = self._remove_html_tags(text)
-        text = text.lower()
-        text = self._expand_contractions(text)
-        text = self._remove_accented_characters(text)
-        text = self._remove_punctuation(text)
-        text = self._tokenize(text)
-        text_tensor = torch.as_tensor(
-            [self.source_vocab[token] for token in ngrams_iterator(text, self.ngrams)],
-            device=self.device,
-        )
-        return text_tensor, text
+        texts = []
+        for line in data:
+            # Compat layer: normally the envelope should just return the data
+            # directly, but older versions of Torchserve didn't have envelope.
+            text = line.get("data") or line.get("body")
+            # Decode text if not a str but bytes or bytearray
+            if isinstance(text, (bytes, bytearray)):
+                text = text.decode("utf-8")
+            texts.append(text)
+
+        tokens = self._tokenize_texts(texts)
+
+        token_ids = []
+        offsets = []
+        for text in tokens:
+            offsets.append(len(token_ids))
+            token_ids.extend(
+                self.source_vocab[token] for token in ngrams_iterator(text, self.ngrams)
+            )
+
+        text_tensor = torch.as_tensor(token_ids, dtype=torch.long, device=self.device)
+        offsets = torch.as_tensor(offsets, dtype=torch.long, device=self.device)
+        return text_tensor, offsets, tokens
 
     def inference(self, data, *args, **kwargs):
         """The Inference Request is made through this function and the user
         needs to override the inference function to customize it.
 
         Args:
-            data (torch tensor): The data is in the form of Torch Tensor
-                                 whose shape should match that of the
-                                  Model Input shape.
+            data (tuple): The token ids and offsets of the batch as returned by preprocess
 
         Returns:
             (Torch Tensor): The predicted response from the model is returned
-                            in this function.
+                            in this function, one row per text.
         """
-        text_tensor, _ = data
-        offsets = torch.as_tensor([0], device=self.device)
+        text_tensor, offsets, _ = data
         return super().inference(text_tensor, offsets)
 
     def postprocess(self, data):
@@ -95,48 +118,83 @@ class TextClassifier(TextHandler):
             (list): Returns the response containing the predictions and explanations
                     (if the Endpoint is hit).It takes the form of a list of dictionary.
         """
-        data = F.softmax(data)
-        data = data.tolist()
-        return map_class_to_label(data, self.mapping)
+        data = F.softmax(data, dim=1)
+        return self.map_labels(data)
+
+    def get_batch_insights(self, text_preprocess, _, targets):
+        """Calculates the captum insights of all the texts of the batch at once
+
+        Args:
+            text_preprocess (tuple): Token ids, offsets and tokens of the Text Input
+            _ (list): The Raw text data specified in the input requests
+            targets (list): The target of every text for the captum explanation.
+
+        Returns:
+            (list): A dictionary of the word token importances per text
+        """
+        text_tensor, offsets, all_tokens = text_preprocess
+        if getattr(self, "batch_lig", None) is None:
+            self.load_explain_references()
+        ends = torch.cat(
+            [offsets[1:], torch.as_tensor([len(text_tensor)], device=offsets.device)]
+        )
+        lengths = ends - offsets
+        max_length = max(int(lengths.max()), 1)
+        texts = torch.full(
+            (len(offsets), max_length),
+            self.reference_token_idx,
+            dtype=text_tensor.dtype,
+            device=text_tensor.device,
+        )
+        mask = torch.arange(max_length, device=texts.device) < lengths.unsqueeze(1)
+        texts[mask] = text_tensor
+
+        if self.reference_indices.shape[0] < max_length:
+            self.reference_indices = self.token_reference.generate_reference(
+                max_length, device=self.device
+            )
+        references = self.reference_indices[:max_length].expand_as(texts)
+
+        same_target = all(target == targets[0] for target in targets)
+        kwargs = {}
+        if self.explain_n_steps:
+            kwargs["n_steps"] = self.explain_n_steps
+        attributions = self.batch_lig.attribute(
+            texts,
+            references,
+            additional_forward_args=(lengths,),
+            return_convergence_delta=False,
+            target=targets[0] if same_target else list(targets),
+            internal_batch_size=self.explain_internal_batch_size,
+            **kwargs,
+        )
+        logger.info("attributions shape %s", attributions.shape)
+
+        responses = []
+        for idx, tokens in enumerate(all_tokens):
+            attributions_sum = self.summarize_attributions(attributions[idx : idx + 1])
+            responses.append(
+                {
+                    "importances": attributions_sum.tolist(),
+                    "words": self.get_word_token(tokens),
+                }
+            )
+        return responses
 
     def get_insights(self, text_preprocess, _, target=0):
-        """Calculates the captum insights
+        """Calculates the captum insights of the first text of the batch
 
         Args:
-            text_preprocess (tensor): Tensor of the Text Input
+            text_preprocess (tuple): Token ids, offsets and tokens of the Text Input
             _ (str): The Raw text data specified in the input request
             target (int): Defaults to 0, the user needs to specify the target
                           for the captum explanation.
 
         Returns:
-            (dict): Returns a dictionary of the word token importances
+            (list): Returns a dictionary of the word token importances
         """
-        text_tensor, all_tokens = text_preprocess
-        token_reference = TokenReferenceBase()
-        logger.info("input_text shape %s", len(text_tensor.shape))
-        logger.info("get_insights target %s", target)
-        offsets = torch.tensor([0]).to(self.device)
-
-        all_tokens = self.get_word_token(all_tokens)
-        logger.info("text_tensor tokenized shape %s", text_tensor.shape)
-        reference_indices = token_reference.generate_reference(
-            text_tensor.shape[0], device=self.device
-        ).squeeze(0)
-        logger.info("reference indices shape %s", reference_indices.shape)
-
-        # all_tokens = self.get_word_token(text)
-        attributions = self.lig.attribute(
-            text_tensor,
-            reference_indices,
-            additional_forward_args=(offsets),
-            return_convergence_delta=False,
-            target=target,
+        text_tensor, offsets, all_tokens = text_preprocess
+        end = offsets[1] if len(offsets) > 1 else len(text_tensor)
+        return self.get_batch_insights(
+            (text_tensor[:end], offsets[:1], all_tokens[:1]), None, [target]
         )
-
-        logger.info("attributions shape %s", attributions.shape)
-        attributions_sum = self.summarize_attributions(attributions)
-        response = {}
-
-        response["importances"] = attributions_sum.tolist()
-        response["words"] = all_tokens
-        return [response]
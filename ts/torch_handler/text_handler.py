@@ -13,7 +13,8 @@ import torch
 import torch.nn.functional as F
 from captum.attr import LayerIntegratedGradients
 
-from ts.handler_utils.text_utils import get_tokenizer
+from ts.handler_utils.text_normalizer import BATCH_SEPARATOR, TextNormalizer
+from ts.handler_utils.text_utils import _basic_english_normalize, get_tokenizer
 
 from ..utils.util import CLEANUP_REGEX
 from .base_handler import BaseHandler
@@ -27,6 +28,17 @@ CONTRACTIONS_PATTERN = re.compile(
     flags=re.IGNORECASE | re.DOTALL,
 )
 
+# Methods of the cleanup chain which TextNormalizer reproduces
+NORMALIZATION_METHODS = [
+    "_normalize_text",
+    "_normalize_texts",
+    "_remove_html_tags",
+    "_expand_contractions",
+    "_remove_accented_characters",
+    "_remove_punctuation",
+    "_tokenize",
+]
+
 
 class TextHandler(BaseHandler, ABC):
     """
@@ -38,6 +50,7 @@ class TextHandler(BaseHandler, ABC):
         super().__init__()
         self.source_vocab = None
         self.tokenizer = get_tokenizer("basic_english")
+        self.normalizer = TextNormalizer(CONTRACTION_MAP, CLEANUP_REGEX)
         self.input_text = None
         self.lig = None
         self.initialized = None
@@ -125,9 +138,43 @@ class TextHandler(BaseHandler, ABC):
         """
         return text.translate(str.maketrans("", "", string.punctuation))
 
+    def _normalize_text(self, text):
+        """
+        Basic cleanup of a text: removes html tags, lowercases,
+        expands contractions and removes accented characters and punctuation
+        """
+        text = self._remove_html_tags(text)
+        text = text.lower()
+        text = self._expand_contractions(text)
+        text = self._remove_accented_characters(text)
+        text = self._remove_punctuation(text)
+        return text
+
+    def _normalize_texts(self, texts):
+        """
+        Runs the cleanup of _normalize_text once over all texts of a batch
+        """
+        if len(texts) > 1 and not any(BATCH_SEPARATOR in text for text in texts):
+            return self._normalize_text(BATCH_SEPARATOR.join(texts)).split(
+                BATCH_SEPARATOR
+            )
+        return [self._normalize_text(text) for text in texts]
+
     def _tokenize(self, text):
         return self.tokenizer(text)
 
+    def _tokenize_texts(self, texts):
+        """
+        Normalizes and tokenizes the texts of a batch.
+        Uses the fast TextNormalizer unless the tokenizer or a cleanup step is customized.
+        """
+        if self.tokenizer is _basic_english_normalize and all(
+            getattr(type(self), name) is getattr(TextHandler, name)
+            for name in NORMALIZATION_METHODS
+        ):
+            return self.normalizer.tokenize_batch(texts)
+        return [self._tokenize(text) for text in self._normalize_texts(texts)]
+
     def get_word_token(self, input_tokens):
         """
         Constructs word tokens from text
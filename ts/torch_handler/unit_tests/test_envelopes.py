@@ -5,11 +5,17 @@ Basic unit test for BaseHandler class.
 Ensures it can load and execute an example model
 """
 
+import json
+
+import numpy as np
 import pytest
 
 from ts.torch_handler.base_handler import BaseHandler
 from ts.torch_handler.request_envelope.body import BodyEnvelope
 from ts.torch_handler.request_envelope.json import JSONEnvelope
+from ts.torch_handler.request_envelope.kservev2 import KServev2Envelope
+
+from .test_utils.mock_context import MockContext
 
 
 @pytest.fixture()
@@ -22,7 +28,7 @@ def handle_fn(base_model_context):
 
 def test_json(handle_fn, base_model_context):
     test_data = [{"body": {"instances": [[1.0, 2.0]]}}]
-    expected_result = ['{"predictions": [1]}']
+    expected_result = [b'{"predictions":[1]}']
 
     envelope = JSONEnvelope(handle_fn)
     results = envelope.handle(test_data, base_model_context)
@@ -31,7 +37,7 @@ def test_json(handle_fn, base_model_context):
 
 def test_json_batch(handle_fn, base_model_context):
     test_data = [{"body": {"instances": [[1.0, 2.0], [4.0, 3.0]]}}]
-    expected_result = ['{"predictions": [1, 0]}']
+    expected_result = [b'{"predictions":[1,0]}']
 
     envelope = JSONEnvelope(handle_fn)
     results = envelope.handle(test_data, base_model_context)
@@ -47,7 +53,7 @@ def test_json_double_batch(handle_fn, base_model_context):
         {"body": {"instances": [[1.0, 2.0]]}},
         {"body": {"instances": [[4.0, 3.0], [5.0, 6.0]]}},
     ]
-    expected_result = ['{"predictions": [1]}', '{"predictions": [0, 1]}']
+    expected_result = [b'{"predictions":[1]}', b'{"predictions":[0,1]}']
 
     envelope = JSONEnvelope(handle_fn)
     results = envelope.handle(test_data, base_model_context)
@@ -69,4 +75,56 @@ def test_binary(base_model_context):
 
     envelope = JSONEnvelope(lambda x, y: [row.decode("utf-8") for row in x])
     results = envelope.handle(test_data, base_model_context)
-    assert results == ['{"predictions": ["a"]}']
+    assert results == [b'{"predictions":["a"]}']
+
+
+def binary_request(inputs, binary):
+    header = json.dumps({"id": "1", "inputs": inputs}).encode("utf-8")
+    return header + binary, {"Inference-Header-Content-Length": str(len(header))}
+
+
+def test_kservev2_binary_tensors():
+    images = np.random.default_rng(0).random((2, 1, 28, 28), dtype=np.float32)
+    inputs = [
+        {
+            "name": f"input-{i}",
+            "shape": [1, 28, 28],
+            "datatype": "FP32",
+            "parameters": {"binary_data_size": image.nbytes},
+        }
+        for i, image in enumerate(images)
+    ]
+    inputs.append(
+        {"name": "text", "shape": [1], "datatype": "BYTES", "data": ["hello"]}
+    )
+    body, headers = binary_request(inputs, images.tobytes())
+    context = MockContext()
+    context.request_headers = [headers]
+    envelope = KServev2Envelope(None)
+    envelope.context = context
+
+    rows = envelope.parse_input([{"body": body}])
+
+    assert [row["name"] for row in rows] == ["input-0", "input-1", "text"]
+    for row, image in zip(rows, images):
+        assert row["data"].dtype == np.float32
+        np.testing.assert_array_equal(row["data"], image)
+    assert rows[2]["data"] == "hello"
+    assert context.input_request_id == "1"
+
+    body, headers = binary_request(inputs, images.tobytes()[:-4])
+    context.request_headers = [headers]
+    with pytest.raises(ValueError):
+        envelope.parse_input([{"body": body}])
+
+
+def test_kservev2_json_bytes():
+    body = json.dumps(
+        {"inputs": [{"name": "x", "shape": [2], "datatype": "FP32", "data": [1, 2]}]}
+    ).encode("utf-8")
+    envelope = KServev2Envelope(None)
+    envelope.context = MockContext()
+
+    rows = envelope.parse_input([{"body": body}])
+
+    assert rows[0]["data"] == [1, 2]
@@ -5,11 +5,17 @@ Basic unit test for ImageSegmenter class.
 Ensures it can load and execute an example model
 """
 
+import io
+import json
 import sys
 from pathlib import Path
 
+import numpy as np
 import pytest
+import torch
+from PIL import Image
 
+from ts.handler_utils.mask_encoding import rle_decode
 from ts.torch_handler.image_segmenter import ImageSegmenter
 
 from .test_utils.mock_context import MockContext
@@ -55,7 +61,6 @@ def model_dir(tmp_path_factory, model_name):
 
 @pytest.fixture()
 def context(model_dir, model_name):
-
     context = MockContext(
         model_name="mnist",
         model_dir=model_dir.as_posix(),
@@ -78,3 +83,63 @@ def test_handle(handler, context, image_bytes):
 
     assert len(results) == 2
     assert len(results[0]) == 224
+
+
+@pytest.fixture()
+def segmenter():
+    segmenter = ImageSegmenter()
+    segmenter.mapping = {"0": "background", "1": "person", "2": "dog"}
+    segmenter.context = MockContext(model_dir=REPO_DIR.as_posix())
+    return segmenter
+
+
+def segmentation_output(batch_size, num_classes=3, size=32, seed=0):
+    generator = torch.Generator().manual_seed(seed)
+    return {
+        "out": torch.randn(batch_size, num_classes, size, size, generator=generator)
+    }
+
+
+def test_postprocess_negotiates_encoding(segmenter):
+    data = segmentation_output(3)
+    segmenter.context.request_headers = [
+        {},
+        {"Accept": "application/vnd.torchserve.rle+json"},
+        {"accept": "image/png; confidence=uint8"},
+    ]
+
+    results = segmenter.postprocess(data)
+
+    probabilities = torch.nn.functional.softmax(data["out"], dim=1)
+    values, labels = torch.max(probabilities, dim=1)
+    assert results[0] == torch.stack([labels[0].float(), values[0]], dim=2).tolist()
+
+    rle = json.loads(results[1])
+    assert rle["size"] == [32, 32]
+    for class_id, name in enumerate(["background", "person", "dog"]):
+        np.testing.assert_array_equal(
+            rle_decode(rle["masks"][name]), (labels[1] == class_id).numpy()
+        )
+
+    png = np.asarray(Image.open(io.BytesIO(results[2])))
+    np.testing.assert_array_equal(png[..., 0], labels[2].numpy())
+    assert np.abs(png[..., 1] / 255 - values[2].numpy()).max() <= 0.5 / 255 + 1e-6
+
+    assert segmenter.context.response_content_types == {
+        1: "application/vnd.torchserve.rle+json",
+        2: "image/png",
+    }
+
+
+def test_segmentation_config(segmenter):
+    segmenter.model_yaml_config = {
+        "handler": {"segmentation": {"encoding": "png", "encode_threads": 2}}
+    }
+    segmenter.load_segmentation_config()
+
+    results = segmenter.postprocess(segmentation_output(2))
+
+    assert all(isinstance(r, bytes) for r in results)
+    with pytest.raises(ValueError):
+        segmenter.model_yaml_config = {"handler": {"segmentation": {"encoding": "gif"}}}
+        segmenter.load_segmentation_config()
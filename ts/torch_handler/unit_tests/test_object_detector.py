@@ -10,8 +10,11 @@ import sys
 from pathlib import Path
 
 import pytest
+import torch
+import torchvision
 
 from ts.torch_handler.object_detector import ObjectDetector
+from ts.utils.util import map_class_to_label
 
 from .test_utils.mock_context import MockContext
 from .test_utils.model_dir import copy_files, download_model
@@ -81,3 +84,110 @@ def test_handle(handler, context, image_bytes):
     results = handler.handle(test_data, context)
     assert len(results) == 2
     assert any("bench" in d for d in results[0])
+
+
+def reference_postprocess(data, mapping, threshold=0.5):
+    result = []
+    for row in data:
+        box_filter = row["scores"] >= threshold
+        retval = []
+        for _class, _box, _score in zip(
+            row["labels"][box_filter].tolist(),
+            row["boxes"][box_filter].tolist(),
+            row["scores"][box_filter].tolist(),
+        ):
+            _retval = map_class_to_label([[_box]], mapping, [[_class]])[0]
+            _retval["score"] = _score
+            retval.append(_retval)
+        result.append(retval)
+    return result
+
+
+def detections(num_boxes, num_classes=5, seed=0):
+    generator = torch.Generator().manual_seed(seed)
+    xy = torch.rand(num_boxes, 2, generator=generator) * 100
+    wh = torch.rand(num_boxes, 2, generator=generator) * 50 + 1
+    scores, order = torch.sort(
+        torch.rand(num_boxes, generator=generator), descending=True
+    )
+    return {
+        "boxes": torch.cat([xy, xy + wh], dim=1)[order],
+        "labels": torch.randint(1, num_classes, (num_boxes,), generator=generator),
+        "scores": scores,
+    }
+
+
+@pytest.fixture()
+def detector():
+    detector = ObjectDetector()
+    detector.mapping = {"1": "person", "2": "bicycle", "3": "car", "4": "motorcycle"}
+    return detector
+
+
+def test_postprocess_matches_per_box_mapping(detector):
+    data = [detections(300, seed=0), detections(0), detections(50, seed=1)]
+
+    assert detector.postprocess(data) == reference_postprocess(data, detector.mapping)
+
+
+def test_postprocess_nms_and_max_detections(detector):
+    data = [detections(300, seed=0), detections(300, seed=1)]
+    detector.nms_iou_threshold = 0.3
+    detector.max_detections = 10
+
+    results = detector.postprocess(data)
+
+    for row, result in zip(data, results):
+        assert 0 < len(result) <= 10
+        scores = [r["score"] for r in result]
+        assert scores == sorted(scores, reverse=True)
+
+        # Boxes of the same class kept by NMS overlap less than the threshold
+        keep = torchvision.ops.batched_nms(
+            row["boxes"][row["scores"] >= 0.5],
+            row["scores"][row["scores"] >= 0.5],
+            row["labels"][row["scores"] >= 0.5],
+            0.3,
+        )[:10]
+        assert len(result) == len(keep)
+        assert scores == pytest.approx(
+            row["scores"][row["scores"] >= 0.5][keep].tolist()
+        )
+
+
+def test_detection_config(detector):
+    detector.model_yaml_config = {
+        "handler": {"detection": {"threshold": 0.9, "max_detections": 3}}
+    }
+    detector.load_detection_config()
+
+    results = detector.postprocess([detections(100)])
+
+    assert len(results[0]) == 3
+    assert all(r["score"] >= 0.9 for r in results[0])
+
+
+@pytest.mark.parametrize("dtype", [torch.float16, torch.bfloat16])
+def test_postprocess_half_precision(detector, dtype):
+    # float16 represents integers exactly up to 2048, bfloat16 up to 256
+    detector.mapping = {"2049": "toothbrush"}
+    data = [
+        {
+            "boxes": torch.tensor(
+                [[1.0, 2.0, 3.0, 4.0]] * (i % 100 == 99), dtype=dtype
+            ),
+            "labels": torch.tensor([2049] * (i % 100 == 99)),
+            "scores": torch.tensor([0.9] * (i % 100 == 99), dtype=dtype),
+        }
+        for i in range(300)
+    ]
+
+    results = detector.postprocess(data)
+
+    assert [i for i, result in enumerate(results) if result] == [99, 199, 299]
+    assert all(
+        result
+        == [{"toothbrush": [1.0, 2.0, 3.0, 4.0], "score": pytest.approx(0.9, abs=1e-2)}]
+        for result in results
+        if result
+    )
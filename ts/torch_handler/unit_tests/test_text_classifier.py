@@ -0,0 +1,122 @@
+# pylint: disable=W0621
+# Using the same name as global function is part of pytest
+"""
+Basic unit test for TextClassifier class.
+Ensures batches are classified with one EmbeddingBag call
+"""
+
+import json
+
+import pytest
+import torch
+
+from ts.torch_handler.text_classifier import TextClassifier
+
+from .test_utils.mock_context import MockContext
+
+TEXTS = [
+    "I'd <b>LOVE</b> this movie!",
+    "Don't   watch it, it's bad.",
+    "<br/> !!!",
+    "Café &amp; crème\nbrûlée",
+]
+
+
+class Vocab(dict):
+    def __missing__(self, token):
+        self[token] = len(self) % 64
+        return self[token]
+
+
+class BagModel(torch.nn.Module):
+    def __init__(self, vocab_size=64, num_class=3):
+        super().__init__()
+        self.embedding = torch.nn.EmbeddingBag(vocab_size, 8)
+        self.fc = torch.nn.Linear(8, num_class)
+
+    def forward(self, text, offsets):
+        return self.fc(self.embedding(text, offsets))
+
+
+@pytest.fixture()
+def handler():
+    torch.manual_seed(0)
+    handler = TextClassifier()
+    handler.context = MockContext(model_pt_file=None, model_file=None, gpu_id=None)
+    handler.device = torch.device("cpu")
+    handler.model = BagModel().eval()
+    handler.source_vocab = Vocab()
+    return handler
+
+
+def test_normalize_texts_matches_per_text(handler):
+    batched = handler._normalize_texts(TEXTS)
+    assert batched == [handler._normalize_text(text) for text in TEXTS]
+
+
+def test_batch_offsets(handler):
+    text_tensor, offsets, tokens = handler.preprocess([{"data": t} for t in TEXTS])
+
+    assert len(tokens) == len(TEXTS)
+    assert tokens[2] == []
+    lengths = [len(t) + max(len(t) - 1, 0) for t in tokens]
+    assert offsets.tolist() == [sum(lengths[:i]) for i in range(len(TEXTS))]
+    assert len(text_tensor) == sum(lengths)
+
+
+def test_batch_matches_single_requests(handler):
+    batch = [{"data": t.encode("utf-8")} for t in TEXTS]
+    batch_output = handler.postprocess(handler.inference(handler.preprocess(batch)))
+
+    assert len(batch_output) == len(TEXTS)
+    for row, expected in zip(batch, batch_output):
+        single = handler.postprocess(handler.inference(handler.preprocess([row])))
+        assert single[0] == pytest.approx(expected)
+
+
+def test_batch_explanations_match_single_requests(handler):
+    handler.load_explain_config()
+    handler.load_explain_references()
+    handler.explain_internal_batch_size = 7
+    batch = [{"data": t, "target": idx % 3} for idx, t in enumerate(TEXTS)]
+    explanations = handler.explain_handle(handler.preprocess(batch), batch)
+
+    assert len(explanations) == len(TEXTS)
+    for row, explanation in zip(batch, explanations):
+        single = handler.explain_handle(handler.preprocess([row]), [row])[0]
+        assert single["words"] == explanation["words"]
+        assert torch.tensor(single["importances"]) == pytest.approx(
+            torch.tensor(explanation["importances"]), abs=1e-5
+        )
+
+
+def test_cached_explanations(handler, mocker):
+    handler.model_yaml_config = {"handler": {"explain": {"cache_size": 8}}}
+    handler.load_explain_config()
+    handler.load_explain_references()
+    attribute = mocker.spy(handler.batch_lig, "attribute")
+    batch = [{"data": t} for t in TEXTS[:2]]
+
+    first = handler.explain_handle(handler.preprocess(batch), batch)
+    batch.append({"data": TEXTS[2]})
+    second = handler.explain_handle(handler.preprocess(batch), batch)
+
+    assert second[:2] == first
+    assert attribute.call_count == 2
+    # Only the new text is explained
+    assert attribute.call_args.args[0].shape[0] == 1
+
+
+def test_json_labels(handler):
+    handler.mapping = {"0": "World", "1": "Sports", "2": "Business"}
+    batch = [{"data": t} for t in TEXTS[:2]]
+    expected = handler.postprocess(handler.inference(handler.preprocess(batch)))
+
+    handler.json_labels = True
+    rows = handler.postprocess(handler.inference(handler.preprocess(batch)))
+
+    assert [json.loads(row) for row in rows] == expected
+    assert handler.context.response_content_types == {
+        0: "application/json",
+        1: "application/json",
+    }
@@ -40,6 +40,8 @@ class MockContext:
         self.explain = False
         self.metrics = MetricsStore(uuid.uuid4(), model_name)
         self.model_yaml_config = {}
+        self.request_headers = []
+        self.response_content_types = {}
 
         if model_yaml_config_file:
             self.model_yaml_config = get_yaml_config(
@@ -51,3 +53,9 @@ class MockContext:
             if self.explain:
                 return True
         return False
+
+    def get_all_request_header(self, idx):
+        return self.request_headers[idx] if idx < len(self.request_headers) else {}
+
+    def set_response_content_type(self, idx, value):
+        self.response_content_types[idx] = value
@@ -0,0 +1,60 @@
+"""
+Unit tests for the admission control path of the VLLMHandler.
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("vllm")
+
+from ts.handler_utils.admission_control import TokenBudgetAdmission
+from ts.torch_handler.vllm_handler import VLLMHandler
+
+from .test_utils.mock_context import MockContext
+
+
+class ResponseContext(MockContext):
+    """MockContext which records the response status and headers"""
+
+    def __init__(self):
+        super().__init__(model_pt_file=None, model_file=None, model_name="vllm")
+        self.response_status = None
+        self.response_headers = {}
+
+    def get_request_header(self, idx, exp):
+        return None
+
+    def set_response_status(self, code=200, phrase="", idx=0):
+        self.response_status = (code, phrase)
+
+    def set_response_header(self, idx, key, value):
+        self.response_headers[key] = value
+
+
+@pytest.fixture()
+def handler():
+    handler = VLLMHandler()
+    handler.admission = TokenBudgetAdmission(
+        max_tokens=100, max_queue_size=0, retry_after_sec=1.5
+    )
+    handler.initialized = True
+    return handler
+
+
+def test_rejected_request_returns_503_with_retry_after(handler):
+    context = ResponseContext()
+    data = [{"body": {"prompt": "Hello", "max_tokens": 50}}]
+
+    async def main():
+        # Hold the whole budget so the request has to queue and is rejected
+        await handler.admission.acquire(100, 0)
+        return await handler.handle(data, context)
+
+    output = asyncio.run(main())
+
+    assert context.response_status[0] == 503
+    assert context.response_headers["Retry-After"] == "2"
+    assert output[0]["code"] == 503
+    assert output[0]["type"] == "ServiceUnavailableError"
+    assert handler.admission.rejected == 1
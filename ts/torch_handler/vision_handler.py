@@ -11,6 +11,7 @@ import torch
 from captum.attr import IntegratedGradients
 from PIL import Image
 
+from ts.handler_utils.image_processing import TensorImageProcessing
 from ts.handler_utils.timer import timed
 
 from .base_handler import BaseHandler
@@ -28,6 +29,10 @@ class VisionHandler(BaseHandler, ABC):
         properties = context.system_properties
         if not properties.get("limit_max_image_pixels"):
             Image.MAX_IMAGE_PIXELS = None
+        self.tensor_image_processing = TensorImageProcessing.from_config(
+            getattr(self, "model_yaml_config", None),
+            getattr(self, "image_processing", None),
+        )
 
     @timed
     def preprocess(self, data):
@@ -39,12 +44,20 @@ class VisionHandler(BaseHandler, ABC):
         Returns:
             list : The preprocess function returns the input image as a list of float tensors.
         """
+        if getattr(self, "tensor_image_processing", None) is not None:
+            images = self._decode_images(data)
+            if images is not None:
+                batch = torch.stack(images).to(self.device, non_blocking=True)
+                return self.tensor_image_processing.normalize(batch)
+
         images = []
 
         for row in data:
             # Compat layer: normally the envelope should just return the data
             # directly, but older versions of Torchserve didn't have envelope.
-            image = row.get("data") or row.get("body")
+            image = row.get("data")
+            if image is None:
+                image = row.get("body")
             if isinstance(image, str):
                 # if the image is a string of bytesarray.
                 image = base64.b64decode(image)
@@ -54,13 +67,54 @@ class VisionHandler(BaseHandler, ABC):
                 image = Image.open(io.BytesIO(image))
                 image = self.image_processing(image)
             else:
-                # if the image is a list
-                image = torch.FloatTensor(image)
+                # if the image is a list or an array of the binary tensor extension
+                image = torch.as_tensor(image, dtype=torch.float32)
 
             images.append(image)
 
         return torch.stack(images).to(self.device)
 
+    def _decode_images(self, data):
+        """
+        Decodes and resizes the images of the batch in uint8, None if a request
+        does not hold the bytes of an image.
+        """
+        images = []
+        for row in data:
+            image = row.get("data")
+            if image is None:
+                image = row.get("body")
+            if isinstance(image, str):
+                image = base64.b64decode(image)
+            if not isinstance(image, (bytearray, bytes)):
+                return None
+            images.append(self.tensor_image_processing(image))
+        return images
+
+    def explain_baseline(self, tensor_data):
+        """The zero image of the shape of the batch, allocated once"""
+        baseline = getattr(self, "_explain_baseline", None)
+        if (
+            baseline is None
+            or baseline.shape[1:] != tensor_data.shape[1:]
+            or baseline.dtype != tensor_data.dtype
+            or baseline.device != tensor_data.device
+        ):
+            baseline = self._explain_baseline = torch.zeros_like(tensor_data[:1])
+        return baseline
+
+    def get_batch_insights(self, tensor_data, _, targets):
+        """Explains all the images of the batch in a single IntegratedGradients call"""
+        same_target = all(target == targets[0] for target in targets)
+        return self.ig.attribute(
+            tensor_data,
+            baselines=self.explain_baseline(tensor_data),
+            target=targets[0] if same_target else list(targets),
+            n_steps=self.explain_n_steps or 15,
+            internal_batch_size=self.explain_internal_batch_size,
+        ).tolist()
+
     def get_insights(self, tensor_data, _, target=0):
-        print("input shape", tensor_data.shape)
-        return self.ig.attribute(tensor_data, target=target, n_steps=15).tolist()
+        return self.get_batch_insights(
+            tensor_data, None, [target] * tensor_data.shape[0]
+        )
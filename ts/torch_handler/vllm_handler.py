@@ -1,5 +1,6 @@
 import asyncio
 import logging
+import math
 import os
 import pathlib
 import time
@@ -15,6 +16,7 @@ from vllm.entrypoints.openai.serving_chat import OpenAIServingChat
 from vllm.entrypoints.openai.serving_completion import OpenAIServingCompletion
 from vllm.entrypoints.openai.serving_engine import LoRAModulePath
 
+from ts.handler_utils.admission_control import AdmissionRejected, TokenBudgetAdmission
 from ts.handler_utils.utils import send_intermediate_predict_response
 from ts.service import PredictionException
 from ts.torch_handler.base_handler import BaseHandler
@@ -34,6 +36,7 @@ class VLLMHandler(BaseHandler):
         self.chat_completion_service = None
         self.completion_service = None
         self.raw_request = None
+        self.admission = None
         self.initialized = False
 
     def initialize(self, ctx):
@@ -81,6 +84,14 @@ class VLLMHandler(BaseHandler):
             chat_template=chat_template,
         )
 
+        admission_config = ctx.model_yaml_config.get("handler", {}).get(
+            "admission_control"
+        )
+        if admission_config:
+            self.admission = TokenBudgetAdmission.from_config(
+                admission_config, metrics=ctx.metrics
+            )
+
         async def isd():
             return False
 
@@ -96,7 +107,18 @@ class VLLMHandler(BaseHandler):
         metrics = context.metrics
 
         data_preprocess = await self.preprocess(data, context)
-        output = await self.inference(data_preprocess, context)
+        try:
+            if self.admission is None:
+                output = await self.inference(data_preprocess, context)
+            else:
+                prompt_tokens, decode_tokens = self._estimate_tokens(data_preprocess)
+                deadline = self.admission.parse_deadline(
+                    context.get_request_header(0, self.admission.deadline_header)
+                )
+                async with self.admission.admit(prompt_tokens, decode_tokens, deadline):
+                    output = await self.inference(data_preprocess, context)
+        except AdmissionRejected as e:
+            output = [self._rejected_response(e, context)]
         output = await self.postprocess(output)
 
         stop_time = time.time()
@@ -160,6 +182,27 @@ class VLLMHandler(BaseHandler):
     async def postprocess(self, inference_outputs):
         return inference_outputs
 
+    def _estimate_tokens(self, input_batch):
+        request = input_batch[0]
+        if not isinstance(request, dict):
+            return 0, 0
+        prompt = request.get("prompt") or request.get("messages")
+        max_tokens = request.get("max_tokens") or self.admission.default_max_tokens
+        n = request.get("n") or 1
+        return self.admission.estimate_prompt_tokens(prompt), int(max_tokens) * int(n)
+
+    def _rejected_response(self, error, context):
+        context.set_response_status(error.error_code, error.message)
+        # Retry-After is a whole number of seconds
+        context.set_response_header(
+            0, "Retry-After", str(math.ceil(error.retry_after_sec))
+        )
+        return ErrorResponse(
+            message=error.message,
+            type="ServiceUnavailableError",
+            code=error.error_code,
+        ).model_dump()
+
     def _get_vllm_engine_config(self, handler_config: dict):
         vllm_engine_params = handler_config.get("vllm_engine_config", {})
         model = vllm_engine_params.get("model", {})
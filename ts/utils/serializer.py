@@ -0,0 +1,182 @@
+"""
+JSON serializers of the handler outputs in the response path.
+
+The outputs of a handler which are neither bytes, str nor tensors are
+serialized to JSON by create_predict_response, as well as the responses of the
+json and KServe envelopes. Tensors and numpy arrays nested in the outputs are
+serialized as lists, numpy scalars as numbers. The serializer is selected by the
+TS_RESPONSE_SERIALIZER environment variable of the worker
+
+json          compact json of the standard library, the default
+json_indent   json of the standard library indented by 2 spaces, the format
+              of previous TorchServe releases
+orjson        orjson, which serializes numpy arrays without a list conversion
+ujson         ujson
+auto          orjson or ujson if installed, json otherwise
+module:fn     a function of the output returning bytes or str
+
+orjson serializes float32 values with their shortest float32 representation,
+NaN and infinite floats as null, json as NaN and Infinity, which are not valid
+JSON.
+"""
+import importlib
+import json
+import logging
+import os
+
+import numpy as np
+import torch
+
+from ts.protocol.lazy_input import LazyValue
+
+logger = logging.getLogger(__name__)
+
+SERIALIZER_ENV = "TS_RESPONSE_SERIALIZER"
+DEFAULT_SERIALIZER = "json"
+
+
+def _tensor_to_numpy(tensor):
+    tensor = tensor.detach().cpu()
+    if tensor.dtype == torch.bfloat16:
+        # No numpy dtype
+        tensor = tensor.float()
+    return tensor.numpy()
+
+
+def to_builtin(obj):
+    """default hook of the JSON encoders, for tensors and numpy values"""
+    if isinstance(obj, torch.Tensor):
+        obj = _tensor_to_numpy(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, LazyValue):
+        # Value of a request input not read by the handler yet
+        return obj.value()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class JSONSerializer(object):
+    """Serializes outputs to the UTF-8 bytes of their JSON"""
+
+    name = "json"
+
+    def __init__(self, indent=None):
+        self.indent = indent
+        self.separators = None if indent else (",", ":")
+
+    def dumps(self, obj):
+        return json.dumps(
+            obj, indent=self.indent, separators=self.separators, default=to_builtin
+        ).encode("utf-8")
+
+
+class OrjsonSerializer(JSONSerializer):
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self._dumps = orjson.dumps
+        self._option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    @staticmethod
+    def _default(obj):
+        if isinstance(obj, torch.Tensor):
+            # Serialized natively unless non contiguous or of an unsupported
+            # dtype, in which case the array comes back here
+            return np.ascontiguousarray(_tensor_to_numpy(obj))
+        return to_builtin(obj)
+
+    def dumps(self, obj):
+        return self._dumps(obj, default=self._default, option=self._option)
+
+
+class UjsonSerializer(JSONSerializer):
+    name = "ujson"
+
+    def __init__(self):
+        import ujson
+
+        self._dumps = ujson.dumps
+
+    def dumps(self, obj):
+        return self._dumps(obj, default=to_builtin).encode("utf-8")
+
+
+class FunctionSerializer(JSONSerializer):
+    """Serializes outputs with a function of a module, e.g. my_module:dumps"""
+
+    def __init__(self, spec):
+        module_name, function_name = spec.split(":", 1)
+        self.name = spec
+        self._dumps = getattr(importlib.import_module(module_name), function_name)
+
+    def dumps(self, obj):
+        value = self._dumps(obj)
+        return value.encode("utf-8") if isinstance(value, str) else value
+
+
+SERIALIZERS = {
+    "json": JSONSerializer,
+    "json_indent": lambda: JSONSerializer(indent=2),
+    "orjson": OrjsonSerializer,
+    "ujson": UjsonSerializer,
+}
+
+
+def create_serializer(name=None):
+    """
+    The serializer of a name of TS_RESPONSE_SERIALIZER, the one of the
+    environment variable by default.
+    """
+    if name is None:
+        name = os.environ.get(SERIALIZER_ENV) or DEFAULT_SERIALIZER
+    if name == "auto":
+        for candidate in ("orjson", "ujson"):
+            try:
+                return SERIALIZERS[candidate]()
+            except ImportError:
+                continue
+        return JSONSerializer()
+    if ":" in name:
+        return FunctionSerializer(name)
+    if name not in SERIALIZERS:
+        raise ValueError(
+            f"{SERIALIZER_ENV} should be one of {list(SERIALIZERS) + ['auto']} "
+            f"or module:function, got {name}"
+        )
+    return SERIALIZERS[name]()
+
+
+_serializer = None
+
+
+def get_serializer():
+    """The serializer of the worker, created on first use"""
+    global _serializer
+    if _serializer is None:
+        try:
+            _serializer = create_serializer()
+        except (ImportError, ValueError):
+            logger.error(
+                "Invalid %s %s, using json",
+                SERIALIZER_ENV,
+                os.environ.get(SERIALIZER_ENV),
+                exc_info=True,
+            )
+            _serializer = JSONSerializer()
+        logger.info("Serializing responses with %s", _serializer.name)
+    return _serializer
+
+
+def set_serializer(serializer):
+    """Replaces the serializer of the worker, None to read the environment again"""
+    global _serializer
+    _serializer = serializer
+
+
+def dumps(obj):
+    """The UTF-8 bytes of the JSON of an output"""
+    return get_serializer().dumps(obj)
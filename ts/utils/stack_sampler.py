@@ -0,0 +1,177 @@
+"""
+Statistical stack sampler for profiling a live worker.
+
+A daemon thread snapshots the Python stacks of the other threads of the process
+at a fixed interval with sys._current_frames() and counts the unique stacks. The
+result is exported as collapsed stacks, which flamegraph.pl and speedscope read,
+or as a speedscope JSON profile.
+"""
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+FORMATS = ["collapsed", "speedscope"]
+MAX_STACK_DEPTH = 128
+
+
+class StackSampler(threading.Thread):
+    """Samples the stacks of all other threads for a window of time"""
+
+    def __init__(self, duration_sec, interval_sec=0.01):
+        super().__init__(name="StackSampler", daemon=True)
+        self.duration_sec = duration_sec
+        self.interval_sec = interval_sec
+        self.stacks = Counter()
+        self.samples = 0
+        self.start_time = None
+        self.end_time = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        self.start_time = time.time()
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + self.duration_sec
+        while not self._stop_event.is_set() and time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    self.stacks[
+                        self._collapse(names.get(thread_id, thread_id), frame)
+                    ] += 1
+            self.samples += 1
+            self._stop_event.wait(self.interval_sec)
+        self.end_time = time.time()
+
+    def stop(self):
+        self._stop_event.set()
+
+    @staticmethod
+    def _collapse(thread_name, frame):
+        stack = []
+        while frame is not None and len(stack) < MAX_STACK_DEPTH:
+            code = frame.f_code
+            stack.append(
+                (code.co_name, os.path.basename(code.co_filename), code.co_firstlineno)
+            )
+            frame = frame.f_back
+        stack.append((str(thread_name), "", 0))
+        stack.reverse()
+        return tuple(stack)
+
+    def collapsed(self):
+        """Returns the stacks as lines of 'thread;frame;...;frame count'"""
+        lines = []
+        for stack, count in self.stacks.most_common():
+            frames = [stack[0][0]] + [
+                f"{name} ({filename}:{line})" for name, filename, line in stack[1:]
+            ]
+            lines.append(f"{';'.join(frames)} {count}")
+        return "\n".join(lines)
+
+    def speedscope(self, name="torchserve worker"):
+        """Returns the stacks as a speedscope sampled profile per thread"""
+        frames = []
+        frame_index = {}
+        profiles = {}
+        for stack, count in self.stacks.items():
+            indexes = []
+            for frame in stack[1:]:
+                if frame not in frame_index:
+                    frame_index[frame] = len(frames)
+                    frames.append(
+                        {"name": frame[0], "file": frame[1], "line": frame[2]}
+                    )
+                indexes.append(frame_index[frame])
+            profile = profiles.get(stack[0][0])
+            if profile is None:
+                profile = profiles[stack[0][0]] = {
+                    "type": "sampled",
+                    "name": stack[0][0],
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": (self.end_time or time.time()) - self.start_time,
+                    "samples": [],
+                    "weights": [],
+                }
+            profile["samples"].append(indexes)
+            profile["weights"].append(count * self.interval_sec)
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": list(profiles.values()),
+            "name": name,
+            "exporter": "torchserve",
+        }
+
+
+class ProfileSession(object):
+    """
+    On demand profile of a worker, the stack sampler and optionally a
+    torch.profiler trace over the same window.
+
+    The torch profiler has to be started and stopped by the thread running the
+    model, poll() stops it once the window has passed.
+    """
+
+    def __init__(
+        self, duration_sec, interval_sec=0.01, fmt="collapsed", torch_trace=False
+    ):
+        if fmt not in FORMATS:
+            raise ValueError(f"format should be one of {FORMATS}, got {fmt}")
+        self.format = fmt
+        self.sampler = StackSampler(duration_sec, interval_sec)
+        self.torch_profiler = None
+        self.torch_trace_path = None
+        if torch_trace:
+            import torch
+            from torch.profiler import ProfilerActivity, profile
+
+            activities = [ProfilerActivity.CPU]
+            if torch.cuda.is_available():
+                activities.append(ProfilerActivity.CUDA)
+            self.torch_profiler = profile(activities=activities, record_shapes=True)
+
+    def start(self):
+        if self.torch_profiler is not None:
+            self.torch_profiler.start()
+        self.sampler.start()
+        logging.info("Started profiling for %.1f s", self.sampler.duration_sec)
+        return self
+
+    @property
+    def done(self):
+        return not self.sampler.is_alive() and self.torch_profiler is None
+
+    def poll(self):
+        """Stops the torch profiler once the sampling window is over"""
+        if self.torch_profiler is None or self.sampler.is_alive():
+            return
+        self.torch_profiler.stop()
+        fd, self.torch_trace_path = tempfile.mkstemp(
+            prefix="ts_torch_trace_", suffix=".json"
+        )
+        os.close(fd)
+        self.torch_profiler.export_chrome_trace(self.torch_trace_path)
+        self.torch_profiler = None
+
+    def result(self):
+        """Returns the profile as a JSON string"""
+        profile = (
+            self.sampler.collapsed()
+            if self.format == "collapsed"
+            else self.sampler.speedscope()
+        )
+        return json.dumps(
+            {
+                "format": self.format,
+                "samples": self.sampler.samples,
+                "profile": profile,
+                "torch_trace": self.torch_trace_path,
+            }
+        )
@@ -0,0 +1,357 @@
+"""
+Per request tracing of the Python worker.
+
+The worker records monotonic timestamps at the boundaries of the processing of a
+batch: decoding the message from the socket, retrieve_data_for_inference, the
+handler, encoding the response and sending it. Sampled requests are exported as
+OTLP JSON spans, one trace per request with a child span per stage, to a file
+or to the OTLP/HTTP endpoint of a collector.
+
+A request joins the trace of the caller when it has a W3C traceparent header,
+and the traceparent of its worker span is returned as a response header.
+Tracing is configured with environment variables of the worker
+
+TS_TRACE_EXPORT=/tmp/ts_traces.jsonl          # or http://localhost:4318/v1/traces
+TS_TRACE_SAMPLE_RATE=0.01                     # requests without a sampled traceparent
+TS_TRACE_SERVICE_NAME=torchserve-worker
+
+Tracing is disabled in the workers of models with asyncCommunication, whose
+batches are read, handled and sent concurrently by different threads while the
+tracer follows a single batch at a time.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+
+TRACEPARENT = "traceparent"
+TRACE_EXPORT_ENV = "TS_TRACE_EXPORT"
+TRACE_SAMPLE_RATE_ENV = "TS_TRACE_SAMPLE_RATE"
+TRACE_SERVICE_NAME_ENV = "TS_TRACE_SERVICE_NAME"
+DEFAULT_SAMPLE_RATE = 0.01
+# Spans are exported in OTLP requests of up to EXPORT_BATCH_SIZE spans, or
+# after EXPORT_INTERVAL_SEC
+EXPORT_BATCH_SIZE = 64
+EXPORT_INTERVAL_SEC = 5
+MAX_QUEUED_EXPORTS = 1024
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+
+
+def _attribute(key, value):
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def parse_traceparent(value):
+    """
+    Parses a W3C traceparent header.
+
+    :return: (trace id, parent span id, sampled) or None if the header is invalid
+    """
+    parts = value.strip().split("-")
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        flags = int(parts[3][:2], 16)
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+class FileExporter(object):
+    """Appends one OTLP JSON export request per line to a file"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def export(self, payload):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(payload, separators=(",", ":")))
+            f.write("\n")
+
+
+class HttpExporter(object):
+    """Posts OTLP JSON export requests to a collector"""
+
+    def __init__(self, endpoint, timeout_sec=5):
+        self.endpoint = endpoint
+        self.timeout_sec = timeout_sec
+
+    def export(self, payload):
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(payload, separators=(",", ":")).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout_sec) as response:
+            response.read()
+
+
+class BatchTrace(object):
+    """Timestamps of the stages of a batch, in the order they completed"""
+
+    __slots__ = ["start_ns", "marks", "children", "requests"]
+
+    def __init__(self):
+        self.start_ns = time.monotonic_ns()
+        self.marks = []
+        self.children = []
+        # (index, trace id, parent span id, span id, request id) of the sampled requests
+        self.requests = []
+
+    def mark(self, stage):
+        self.marks.append((stage, time.monotonic_ns()))
+
+    def add_child(self, name, start_ns, end_ns, idx=None):
+        """
+        Adds a span nested in the stage running at the time, e.g. a handler method,
+        which belongs to the request at index idx of the batch or to all of them.
+        """
+        self.children.append((name, start_ns, end_ns, idx))
+
+
+class Tracer(object):
+    """
+    Samples requests and exports the spans of the sampled ones. The tracer is
+    used by the worker thread, spans are exported by a background thread.
+    """
+
+    def __init__(
+        self,
+        exporter,
+        sample_rate=DEFAULT_SAMPLE_RATE,
+        service_name="torchserve-worker",
+        model_name=None,
+    ):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.service_name = service_name
+        self.model_name = model_name
+        self.current = None
+        self._random = random.Random()
+        self._clock_offset_ns = time.time_ns() - time.monotonic_ns()
+        self._queue = queue.Queue(MAX_QUEUED_EXPORTS)
+        self._spans = []
+        self._last_flush = time.monotonic()
+        self._thread = threading.Thread(
+            target=self._export_loop, name="TraceExporter", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    @classmethod
+    def from_env(cls):
+        target = os.environ.get(TRACE_EXPORT_ENV)
+        if not target:
+            return None
+        if target.startswith("http://") or target.startswith("https://"):
+            exporter = HttpExporter(target)
+        else:
+            exporter = FileExporter(target)
+        return cls(
+            exporter,
+            sample_rate=float(
+                os.environ.get(TRACE_SAMPLE_RATE_ENV, DEFAULT_SAMPLE_RATE)
+            ),
+            service_name=os.environ.get(TRACE_SERVICE_NAME_ENV, "torchserve-worker"),
+        )
+
+    def begin(self):
+        """Starts the trace of the batch which is being read from the socket"""
+        self.current = BatchTrace()
+        return self.current
+
+    def mark(self, stage):
+        if self.current is not None:
+            self.current.mark(stage)
+
+    def _new_id(self, length):
+        return "%0*x" % (length, self._random.getrandbits(length * 4) or 1)
+
+    def sample_requests(self, request_ids, request_processors):
+        """
+        Decides which requests of the current batch are traced and returns the
+        traceparent of their worker span in the response headers.
+        """
+        trace = self.current
+        if trace is None:
+            return
+        for idx, request_processor in enumerate(request_processors):
+            parent = None
+            header = request_processor.get_request_property(TRACEPARENT)
+            if header:
+                parent = parse_traceparent(header)
+            if parent is not None:
+                trace_id, parent_id, sampled = parent
+            else:
+                trace_id, parent_id = self._new_id(32), None
+                sampled = self._random.random() < self.sample_rate
+            if not sampled:
+                continue
+            span_id = self._new_id(16)
+            trace.requests.append((idx, trace_id, parent_id, span_id, request_ids[idx]))
+            request_processor.add_response_property(
+                TRACEPARENT, f"00-{trace_id}-{span_id}-01"
+            )
+
+    def finish(self):
+        """Ends the trace of the current batch and queues its spans for export"""
+        trace, self.current = self.current, None
+        if trace is None or not trace.requests:
+            return
+        self._spans.extend(self._to_spans(trace))
+        if (
+            len(self._spans) >= EXPORT_BATCH_SIZE
+            or time.monotonic() - self._last_flush >= EXPORT_INTERVAL_SEC
+        ):
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        spans, self._spans = self._spans, []
+        if not spans:
+            return
+        try:
+            self._queue.put_nowait(self._export_request(spans))
+        except queue.Full:
+            logging.warning(
+                "Dropping %d trace spans, the exporter is behind", len(spans)
+            )
+
+    def close(self, timeout_sec=5):
+        """Exports the remaining spans"""
+        self.flush()
+        deadline = time.monotonic() + timeout_sec
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def _unix_ns(self, monotonic_ns):
+        return str(monotonic_ns + self._clock_offset_ns)
+
+    def _span(
+        self, trace_id, span_id, parent_id, name, start_ns, end_ns, kind, attributes
+    ):
+        span = {
+            "traceId": trace_id,
+            "spanId": span_id,
+            "name": name,
+            "kind": kind,
+            "startTimeUnixNano": self._unix_ns(start_ns),
+            "endTimeUnixNano": self._unix_ns(end_ns),
+            "attributes": attributes,
+        }
+        if parent_id:
+            span["parentSpanId"] = parent_id
+        return span
+
+    def _to_spans(self, trace):
+        end_ns = trace.marks[-1][1] if trace.marks else time.monotonic_ns()
+        batch_size = len(trace.requests)
+        spans = []
+        for idx, trace_id, parent_id, span_id, request_id in trace.requests:
+            spans.append(
+                self._span(
+                    trace_id,
+                    span_id,
+                    parent_id,
+                    "predict",
+                    trace.start_ns,
+                    end_ns,
+                    SPAN_KIND_SERVER,
+                    [
+                        _attribute("ts.request_id", request_id),
+                        _attribute("ts.sampled_batch_size", batch_size),
+                    ],
+                )
+            )
+            start_ns = trace.start_ns
+            for stage, stage_end_ns in trace.marks:
+                spans.append(
+                    self._span(
+                        trace_id,
+                        self._new_id(16),
+                        span_id,
+                        stage,
+                        start_ns,
+                        stage_end_ns,
+                        SPAN_KIND_INTERNAL,
+                        [],
+                    )
+                )
+                start_ns = stage_end_ns
+            for name, child_start_ns, child_end_ns, child_idx in trace.children:
+                if child_idx is not None and child_idx != idx:
+                    continue
+                spans.append(
+                    self._span(
+                        trace_id,
+                        self._new_id(16),
+                        span_id,
+                        name,
+                        child_start_ns,
+                        child_end_ns,
+                        SPAN_KIND_INTERNAL,
+                        [],
+                    )
+                )
+        return spans
+
+    def _export_request(self, spans):
+        attributes = [_attribute("service.name", self.service_name)]
+        if self.model_name:
+            attributes.append(_attribute("ts.model_name", self.model_name))
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": attributes},
+                    "scopeSpans": [{"scope": {"name": "ts.worker"}, "spans": spans}],
+                }
+            ]
+        }
+
+    def _export_loop(self):
+        while True:
+            payload = self._queue.get()
+            try:
+                self.exporter.export(payload)
+            except Exception:  # pylint: disable=broad-except
+                logging.warning("Failed to export trace spans", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+
+_tracer = None
+_initialized = False
+
+
+def get_tracer():
+    """Returns the tracer of the worker, None when tracing is not configured"""
+    global _tracer, _initialized
+    if not _initialized:
+        _tracer = Tracer.from_env()
+        _initialized = True
+    return _tracer
+
+
+def disable_tracing(reason):
+    """Disables the tracer of the worker, the spans already finished are exported"""
+    global _tracer, _initialized
+    tracer = get_tracer()
+    if tracer is not None:
+        logging.warning("Tracing is disabled: %s", reason)
+        tracer.close()
+    _tracer = None
+    _initialized = True
@@ -108,11 +108,92 @@ def load_label_mapping(mapping_file_path):
     return mapping
 
 
+class LabelIndex(object):
+    """
+    The labels of a { class ID -> friendly class name } mapping in a list
+    indexed by class id, with the JSON key of every label serialized once.
+    Class ids missing from the mapping are labeled by their id.
+    """
+
+    def __init__(self, mapping=None):
+        if mapping is not None and not isinstance(mapping, dict):
+            raise Exception("Mapping must be a dict")
+        self.mapping = mapping
+        self.names = []
+        self.json_keys = []
+        ids = [int(k) for k in (mapping or {}) if k.isdigit()]
+        self._grow(max(ids) + 1 if ids else 0)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _grow(self, size):
+        mapping = self.mapping or {}
+        for class_id in range(len(self.names), size):
+            name = mapping.get(str(class_id), str(class_id))
+            self.names.append(name)
+            self.json_keys.append(json.dumps(name) + ": ")
+
+    def labels(self, max_class_id):
+        """The labels indexed by class id, up to max_class_id at least"""
+        if max_class_id >= len(self.names):
+            self._grow(max_class_id + 1)
+        return self.names
+
+    def _rows(self, probs, classes):
+        if hasattr(probs, "tolist"):
+            probs = probs.tolist()
+        if classes is None:
+            width = len(probs[0]) if probs else 0
+            return probs, itertools.repeat(range(width), len(probs)), width - 1
+        if hasattr(classes, "max"):
+            max_class_id = int(classes.max()) if classes.numel() else -1
+            classes = classes.tolist()
+        else:
+            max_class_id = max((max(row, default=-1) for row in classes), default=-1)
+        return probs, classes, max_class_id
+
+    def map(self, probs, classes=None):
+        """
+        Maps rows of probabilities, and of their class ids if not all the
+        classes, lists or tensors, to dicts of { friendly class name -> probability }
+        """
+        probs, classes, max_class_id = self._rows(probs, classes)
+        names = self.labels(max_class_id)
+        return [
+            dict(zip(map(names.__getitem__, row_classes), row_probs))
+            for row_classes, row_probs in zip(classes, probs)
+        ]
+
+    def to_json(self, probs, classes=None):
+        """As map, each row serialized as a JSON object from the pre-serialized labels"""
+        probs, classes, max_class_id = self._rows(probs, classes)
+        self.labels(max_class_id)
+        keys = self.json_keys
+        rows = []
+        for row_classes, row_probs in zip(classes, probs):
+            # The floats of the row serialized in one call
+            values = json.dumps(row_probs)[1:-1].split(", ") if row_probs else []
+            rows.append(
+                "{"
+                + ", ".join(
+                    map(str.__add__, map(keys.__getitem__, row_classes), values)
+                )
+                + "}"
+            )
+        return rows
+
+
 def map_class_to_label(probs, mapping=None, lbl_classes=None):
     """
     Given a list of classes & probabilities, return a dictionary of
     { friendly class name -> probability }
+
+    mapping may be a LabelIndex, which also maps tensors
     """
+    if isinstance(mapping, LabelIndex):
+        return mapping.map(probs, lbl_classes)
+
     if not isinstance(probs, list):
         raise Exception("Convert classes to list before doing mapping")
 
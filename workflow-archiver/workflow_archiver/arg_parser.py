@@ -69,4 +69,13 @@ class ArgParser(object):
                                               default=None,
                                               help='Comma separated path to extra dependency files.')
 
+        parser_workflow_archiver.add_argument('--model-store',
+                                              required=False,
+                                              type=str,
+                                              default=None,
+                                              help='Path to the model store holding the .mar files of the nodes of the'
+                                                   ' pipelines of the spec file. The model archive of every pipeline'
+                                                   ' is saved in the model store, and its nodes are replaced by the'
+                                                   ' pipeline in the spec file of the workflow archive.')
+
         return parser_workflow_archiver
@@ -0,0 +1,200 @@
+"""
+Packaging of the pipelines of a workflow spec
+
+A pipeline is a linear chain of nodes of the workflow DAG run in a single
+TorchServe worker, which passes the outputs of every node in memory to the next
+one instead of sending them through the frontend. The pipelines are declared in
+the spec file
+
+pipelines:
+  cat_dog_pipeline: [cat_dog_classification, dog_breed_classification]
+
+For every pipeline, the .mar files of its nodes are combined into the pipeline
+model archive <model-store>/<pipeline>.mar, run by the pipeline_handler of
+TorchServe, and the nodes are replaced by the pipeline in the models and dag
+sections of the spec file of the workflow archive.
+"""
+
+import json
+import os
+import zipfile
+from datetime import datetime
+
+from .workflow_archiver_error import WorkflowArchiverError
+
+PIPELINES = 'pipelines'
+PIPELINE_HANDLER = 'pipeline_handler'
+PIPELINE_CONFIG_FILE = 'model-config.yaml'
+MANIFEST_PATH = 'MAR-INF/MANIFEST.json'
+
+
+def _yaml():
+    try:
+        import yaml
+    except ImportError:
+        raise WorkflowArchiverError('Packaging the pipelines of a workflow requires PyYAML, pip install PyYAML')
+    return yaml
+
+
+def load_spec(spec_file):
+    with open(spec_file) as f:
+        return _yaml().safe_load(f)
+
+
+def predecessors(dag):
+    preds = {}
+    for node, successors in dag.items():
+        preds.setdefault(node, [])
+        for successor in successors or []:
+            preds.setdefault(successor, []).append(node)
+    return preds
+
+
+def validate_pipeline(name, nodes, spec):
+    """
+    Checks that the nodes are a chain of the DAG whose intermediate outputs are
+    only used by the chain, and whose inputs are the inputs of its first node
+    or outputs of earlier nodes.
+    """
+    dag = spec.get('dag') or {}
+    models = spec.get('models') or {}
+    preds = predecessors(dag)
+    if not nodes:
+        raise WorkflowArchiverError('Pipeline {} has no nodes'.format(name))
+    if name in preds or name in models:
+        raise WorkflowArchiverError('Pipeline {} has the name of a node of the workflow'.format(name))
+    for node in nodes:
+        if node not in preds:
+            raise WorkflowArchiverError('Node {} of pipeline {} is not in the dag'.format(node, name))
+    if len(set(nodes)) != len(nodes):
+        raise WorkflowArchiverError('Pipeline {} has duplicate nodes'.format(name))
+
+    for index, node in enumerate(nodes):
+        if index + 1 < len(nodes):
+            successors = dag.get(node) or []
+            if nodes[index + 1] not in successors:
+                raise WorkflowArchiverError('Pipeline {}: {} is not an input of {} in the dag'.format(
+                    name, node, nodes[index + 1]))
+            outside = [s for s in successors if s not in nodes]
+            if outside:
+                raise WorkflowArchiverError('Pipeline {}: the output of {} is used by {} outside of the pipeline'
+                                            .format(name, node, outside))
+        if index > 0:
+            allowed = set(preds[nodes[0]]) | set(nodes[:index])
+            outside = [p for p in preds[node] if p not in allowed]
+            if outside:
+                raise WorkflowArchiverError('Pipeline {}: {} takes the outputs of {}, which are neither inputs of {} '
+                                            'nor nodes of the pipeline'.format(name, node, outside, nodes[0]))
+
+
+def pipeline_config(nodes, spec, handler_name=None):
+    """
+    The handler.pipeline section of the model-config.yaml of the pipeline, the
+    nodes which are not models being functions of the workflow handler
+    """
+    models = spec.get('models') or {}
+    preds = predecessors(spec.get('dag') or {})
+    config_nodes = []
+    for node in nodes:
+        config_node = {'name': node, 'inputs': preds[node]}
+        if node in models:
+            config_node['model_dir'] = node
+        else:
+            config_node['handler'] = '{}:{}'.format(handler_name, node)
+        config_nodes.append(config_node)
+    return {'handler': {'pipeline': {'inputs': preds[nodes[0]], 'nodes': config_nodes}}}
+
+
+def rewrite_spec(spec, pipelines):
+    """The spec with the nodes of every pipeline replaced by the pipeline"""
+    models = dict(spec.get('models') or {})
+    dag = dict(spec.get('dag') or {})
+    replaced = {}
+    for name, nodes in pipelines.items():
+        first = models.get(nodes[0], {})
+        models[name] = dict({k: v for k, v in first.items() if k != 'url'}, url='{}.mar'.format(name))
+        for node in nodes:
+            models.pop(node, None)
+            replaced[node] = name
+
+    new_dag = {}
+    for node, successors in dag.items():
+        node = replaced.get(node, node)
+        targets = new_dag.setdefault(node, [])
+        for successor in successors or []:
+            successor = replaced.get(successor, successor)
+            if successor != node and successor not in targets:
+                targets.append(successor)
+    for name in pipelines:
+        new_dag.setdefault(name, [])
+
+    spec = {k: v for k, v in spec.items() if k != PIPELINES}
+    spec['models'] = models
+    spec['dag'] = new_dag
+    return spec
+
+
+def _resolve_mar(url, model_store):
+    if '://' in url:
+        raise WorkflowArchiverError('Pipeline nodes need local .mar files, got {}'.format(url))
+    path = url if os.path.isabs(url) else os.path.join(model_store, url)
+    if not os.path.isfile(path):
+        raise WorkflowArchiverError('{} not found'.format(path))
+    return path
+
+
+def package_pipeline_mar(name, nodes, spec, model_store, handler_file=None):
+    """Writes <model_store>/<name>.mar with the content of the .mar of every node"""
+    models = spec.get('models') or {}
+    handler_name = os.path.basename(handler_file) if handler_file is not None else None
+    config = pipeline_config(nodes, spec, handler_name)
+    manifest = {
+        'createdOn': datetime.now().strftime('%d/%m/%Y %H:%M:%S'),
+        'runtime': 'python',
+        'model': {
+            'modelName': name,
+            'handler': PIPELINE_HANDLER,
+            'modelVersion': '1.0',
+            'configFile': PIPELINE_CONFIG_FILE,
+        },
+    }
+    mar_path = os.path.join(model_store, '{}.mar'.format(name))
+    with zipfile.ZipFile(mar_path, 'w', zipfile.ZIP_DEFLATED) as mar:
+        mar.writestr(MANIFEST_PATH, json.dumps(manifest, indent=2))
+        mar.writestr(PIPELINE_CONFIG_FILE, _yaml().safe_dump(config, sort_keys=False))
+        for node in nodes:
+            if node not in models:
+                continue
+            with zipfile.ZipFile(_resolve_mar(models[node]['url'], model_store)) as node_mar:
+                for item in node_mar.infolist():
+                    if not item.is_dir():
+                        mar.writestr('{}/{}'.format(node, item.filename), node_mar.read(item))
+        if handler_file is not None and any(node not in models for node in nodes):
+            mar.write(handler_file, os.path.basename(handler_file))
+    return mar_path
+
+
+def package_pipelines(spec_file, model_store, workflow_path, handler_file=None):
+    """
+    Builds the pipeline model archives of the spec file in the model store and
+    writes the spec file with the pipelines in the workflow path.
+
+    :return: the paths of the pipeline model archives
+    """
+    spec = load_spec(spec_file)
+    pipelines = spec.get(PIPELINES) or {}
+    if not pipelines:
+        return []
+    if model_store is None:
+        raise WorkflowArchiverError('--model-store is required to package the pipelines of {}'.format(spec_file))
+    models = spec.get('models') or {}
+    for name, nodes in pipelines.items():
+        validate_pipeline(name, nodes, spec)
+        if handler_file is None and any(node not in models for node in nodes):
+            raise WorkflowArchiverError('Pipeline {} has function nodes and needs the --handler file'.format(name))
+
+    mar_paths = [package_pipeline_mar(name, nodes, spec, model_store, handler_file)
+                 for name, nodes in pipelines.items()]
+    with open(os.path.join(workflow_path, os.path.basename(spec_file)), 'w') as f:
+        _yaml().safe_dump(rewrite_spec(spec, pipelines), f, sort_keys=False)
+    return mar_paths
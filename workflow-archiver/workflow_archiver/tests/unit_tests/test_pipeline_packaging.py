@@ -0,0 +1,109 @@
+import json
+import os
+import zipfile
+
+import pytest
+import yaml
+from workflow_archiver.pipeline_packaging import (
+    package_pipelines,
+    rewrite_spec,
+    validate_pipeline,
+)
+from workflow_archiver.workflow_archiver_error import WorkflowArchiverError
+
+
+# noinspection PyClassHasNoInit
+class TestPipelinePackaging:
+
+    spec = {
+        'models': {
+            'batch-size': 4,
+            'cat_dog_classification': {'url': 'cat_dog_classification.mar', 'max-workers': 2},
+            'dog_breed_classification': {'url': 'dog_breed_classification.mar'},
+        },
+        'dag': {
+            'pre_processing': ['cat_dog_classification', 'dog_breed_classification'],
+            'cat_dog_classification': ['dog_breed_classification'],
+            'dog_breed_classification': ['post_processing'],
+        },
+        'pipelines': {
+            'cat_dog_pipeline': ['cat_dog_classification', 'dog_breed_classification'],
+        },
+    }
+    nodes = ['cat_dog_classification', 'dog_breed_classification']
+
+    def test_validate_pipeline(self):
+        validate_pipeline('cat_dog_pipeline', self.nodes, self.spec)
+
+    def test_validate_pipeline_not_a_chain(self):
+        with pytest.raises(WorkflowArchiverError, match='is not an input of'):
+            validate_pipeline('cat_dog_pipeline', list(reversed(self.nodes)), self.spec)
+
+    def test_validate_pipeline_output_used_outside(self):
+        spec = dict(self.spec, dag=dict(self.spec['dag'], cat_dog_classification=[
+            'dog_breed_classification', 'post_processing']))
+        with pytest.raises(WorkflowArchiverError, match='outside of the pipeline'):
+            validate_pipeline('cat_dog_pipeline', self.nodes, spec)
+
+    def test_validate_pipeline_unknown_node(self):
+        with pytest.raises(WorkflowArchiverError, match='is not in the dag'):
+            validate_pipeline('cat_dog_pipeline', ['cat_dog_classification', 'm3'], self.spec)
+
+    def test_rewrite_spec(self):
+        spec = rewrite_spec(self.spec, self.spec['pipelines'])
+        assert 'pipelines' not in spec
+        assert spec['models'] == {
+            'batch-size': 4,
+            'cat_dog_pipeline': {'max-workers': 2, 'url': 'cat_dog_pipeline.mar'},
+        }
+        assert spec['dag'] == {
+            'pre_processing': ['cat_dog_pipeline'],
+            'cat_dog_pipeline': ['post_processing'],
+        }
+
+    def test_package_pipelines_without_model_store(self, tmpdir):
+        spec_file = os.path.join(str(tmpdir), 'spec.yaml')
+        with open(spec_file, 'w') as f:
+            yaml.safe_dump(self.spec, f, sort_keys=False)
+
+        with pytest.raises(WorkflowArchiverError, match='--model-store is required'):
+            package_pipelines(spec_file, None, str(tmpdir), None)
+
+    def test_package_pipelines(self, tmpdir):
+        model_store = str(tmpdir.mkdir('model_store'))
+        workflow_path = str(tmpdir.mkdir('workflow'))
+        for node in self.nodes:
+            with zipfile.ZipFile(os.path.join(model_store, node + '.mar'), 'w') as mar:
+                mar.writestr('MAR-INF/MANIFEST.json', json.dumps({'model': {'handler': node + '.py'}}))
+                mar.writestr(node + '.py', '')
+        spec_file = os.path.join(str(tmpdir), 'spec.yaml')
+        with open(spec_file, 'w') as f:
+            yaml.safe_dump(self.spec, f, sort_keys=False)
+
+        mar_paths = package_pipelines(spec_file, model_store, workflow_path, None)
+
+        assert mar_paths == [os.path.join(model_store, 'cat_dog_pipeline.mar')]
+        with zipfile.ZipFile(mar_paths[0]) as mar:
+            names = set(mar.namelist())
+            assert names == {
+                'MAR-INF/MANIFEST.json',
+                'model-config.yaml',
+                'cat_dog_classification/MAR-INF/MANIFEST.json',
+                'cat_dog_classification/cat_dog_classification.py',
+                'dog_breed_classification/MAR-INF/MANIFEST.json',
+                'dog_breed_classification/dog_breed_classification.py',
+            }
+            manifest = json.loads(mar.read('MAR-INF/MANIFEST.json'))
+            config = yaml.safe_load(mar.read('model-config.yaml'))
+        assert manifest['model']['handler'] == 'pipeline_handler'
+        assert config['handler']['pipeline'] == {
+            'inputs': ['pre_processing'],
+            'nodes': [
+                {'name': 'cat_dog_classification', 'inputs': ['pre_processing'],
+                 'model_dir': 'cat_dog_classification'},
+                {'name': 'dog_breed_classification', 'inputs': ['pre_processing', 'cat_dog_classification'],
+                 'model_dir': 'dog_breed_classification'},
+            ],
+        }
+        with open(os.path.join(workflow_path, 'spec.yaml')) as f:
+            assert 'cat_dog_pipeline' in yaml.safe_load(f)['models']
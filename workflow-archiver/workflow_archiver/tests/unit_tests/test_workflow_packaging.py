@@ -28,10 +28,11 @@ class TestWorkflowPackaging:
 
     @pytest.fixture()
     def patches(self, mocker):
-        Patches = namedtuple('Patches', ['arg_parse', 'export_utils', 'export_method'])
+        Patches = namedtuple('Patches', ['arg_parse', 'export_utils', 'export_method', 'package_pipelines'])
         patches = Patches(mocker.patch('workflow_archiver.workflow_packaging.ArgParser'),
                           mocker.patch('workflow_archiver.workflow_packaging.WorkflowExportUtils'),
-                          mocker.patch('workflow_archiver.workflow_packaging.package_workflow'))
+                          mocker.patch('workflow_archiver.workflow_packaging.package_workflow'),
+                          mocker.patch('workflow_archiver.workflow_packaging.package_pipelines', return_value=[]))
 
         return patches
 
@@ -46,5 +47,7 @@ class TestWorkflowPackaging:
 
         package_workflow(self.args, WorkflowExportUtils.generate_manifest_json(self.args))
         patches.export_utils.validate_inputs.assert_called()
+        # Without --model-store, raises if the spec has pipelines
+        assert patches.package_pipelines.call_args.args[1] is None
         patches.export_utils.archive.assert_called()
         patches.export_utils.clean_temp_files.assert_called()
@@ -6,6 +6,7 @@ Command line interface to export workflow files to be used for inference by Torc
 import logging
 import sys
 from .arg_parser import ArgParser
+from .pipeline_packaging import package_pipelines
 from .workflow_packaging_utils import WorkflowExportUtils
 from .workflow_archiver_error import WorkflowArchiverError
 
@@ -19,6 +20,7 @@ def package_workflow(args, manifest):
     handler = args.handler
     export_file_path = args.export_path
     extra_files = args.extra_files
+    model_store = getattr(args, 'model_store', None)
 
     temp_files = []
 
@@ -32,7 +34,12 @@ def package_workflow(args, manifest):
 
         workflow_path = WorkflowExportUtils.copy_artifacts(workflow_name, artifact_files)
 
-        # Step 2 : Zip 'em all up
+        # Step 3 : Build the model archives of the pipelines and replace their nodes in the spec file,
+        # a spec with pipelines needs the model store
+        for mar_path in package_pipelines(workflow_spec_file, model_store, workflow_path, handler):
+            logging.info("Exported pipeline model archive %s", mar_path)
+
+        # Step 4 : Zip 'em all up
         WorkflowExportUtils.archive(export_file_path, workflow_name, workflow_path, manifest)
 
         logging.info("Successfully exported workflow %s to file %s", workflow_name, export_file_path)